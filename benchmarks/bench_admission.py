@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Load test: probe timing while API clients overload the server, with and without admission control."""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import multiprocessing
+import urllib.error
+import urllib.request
+from collections import Counter
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+from ping_monitor.web_app import create_app
+from ping_monitor.scheduler import phase_offset
+
+class RecordingProber:
+    """Answers instantly and records when each target was probed."""
+
+    def __init__(self):
+        self.times = {}
+
+    def probe(self, addresses):
+        now = time.monotonic()
+        for target in addresses:
+            self.times.setdefault(target, []).append(now)
+        return {target: (57, 10.0) for target in addresses}
+
+    def close(self):
+        pass
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def hammer(base_url, targets, stop, results, seed, honor_retry_after):
+    """Request expensive endpoints back to back like a burst of dashboards.
+
+    With honor_retry_after False the client retries at once, like a misconfigured scraper.
+    Runs in its own process so the load generator does not compete with the server for the GIL.
+    """
+    rng = random.Random(seed)
+    statuses = Counter()
+    paths = ['/api/data?target={}', '/api/query?metric=p95_ping_time&group_by=target', '/api/summary']
+    while not stop.is_set():
+        request = urllib.request.Request(base_url + rng.choice(paths).format(rng.choice(targets)),
+                                         headers={'Accept-Encoding': 'gzip'})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+            if honor_retry_after and e.headers.get('Retry-After'):
+                stop.wait(float(e.headers['Retry-After']))
+        except Exception:
+            status = 'error'
+        statuses[status] += 1
+    results.put(statuses)
+
+def phase(app, prober, targets, interval, clients, seconds, honor_retry_after):
+    """Run the API load for a while and report probe lateness, scheduler lag and responses."""
+    scheduler = app.extensions['scheduler']
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    stop, results = multiprocessing.Event(), multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=hammer, daemon=True,
+                                       args=(base_url, targets, stop, results, seed, honor_retry_after))
+               for seed in range(clients)]
+    for worker in workers:
+        worker.start()
+    prober.times.clear()
+    lags = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        time.sleep(0.1)
+        lags.append(scheduler.lag)
+    # Probes made while the clients wind down are not part of the measurement
+    probes = {target: list(times) for target, times in prober.times.items()}
+    stop.set()
+    statuses = Counter()
+    for _ in workers:
+        statuses.update(results.get())
+    for worker in workers:
+        worker.join()
+    server.shutdown()
+
+    # Lateness of each probe behind its slot on the target's phase grid
+    late = sorted((moment - phase_offset(target, interval)) % interval
+                    for target, times in probes.items() for moment in times)
+    lags.sort()
+    expected = len(targets) * seconds / interval
+    print(f"  probes: {sum(len(times) for times in probes.values())} of ~{expected:.0f} expected, late ms "
+          + "  ".join(f"p{label} {percentile(late, fraction) * 1e3:.1f}"
+                      for label, fraction in (('50', 0.5), ('99', 0.99), ('100', 1.0))))
+    print(f"  scheduler lag ms: p50 {percentile(lags, 0.5) * 1e3:.1f}  max {lags[-1] * 1e3:.1f}")
+    print(f"  responses: {sum(statuses.values()) / seconds:.0f}/s "
+          + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=0.5, help="probe interval per target in seconds")
+    parser.add_argument('--window', type=int, default=3600, help="samples per target window")
+    parser.add_argument('--clients', type=int, default=32, help="concurrent API clients")
+    parser.add_argument('--seconds', type=float, default=10.0, help="duration of each phase")
+    parser.add_argument('--ignore-retry-after', action='store_true', help="clients retry at once like a misconfigured scraper")
+    args = parser.parse_args()
+
+    targets = [f"10.1.{index >> 8 & 255}.{index & 255}" for index in range(1, args.targets + 1)]
+    app = create_app(target=targets[0], max_points=args.window)
+    scheduler = app.extensions['scheduler']
+    prober = RecordingProber()
+    rng = random.Random(1)
+    for target in targets:
+        engine = scheduler.add_target(target, interval=args.interval)
+        engine.prober = prober
+        for second in range(args.window):
+            engine._process_ping_result(57, round(rng.uniform(5, 50), 3), timestamp=time.time() - args.window + second)
+    scheduler.start()
+    time.sleep(1.0)
+
+    admission = app.extensions['admission']
+    settings = (admission.rate, admission.max_concurrent, admission.max_lag)
+    print(f"{args.targets} targets every {args.interval} s, {args.clients} clients, {args.seconds:.0f} s per phase")
+
+    print("no API load:")
+    phase(app, prober, targets, args.interval, 0, args.seconds, True)
+
+    print("overload, admission control off:")
+    admission.rate, admission.max_concurrent, admission.max_lag = None, None, float('inf')
+    phase(app, prober, targets, args.interval, args.clients, args.seconds, not args.ignore_retry_after)
+
+    print("overload, admission control on:")
+    admission.rate, admission.max_concurrent, admission.max_lag = settings
+    phase(app, prober, targets, args.interval, args.clients, args.seconds, not args.ignore_retry_after)
+    print(f"  {admission.stats()}")
+
+    scheduler.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
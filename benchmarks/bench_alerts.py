@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Benchmark incremental alert rule evaluation across a large fleet of targets."""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.ping_engine import PingEngine
+from ping_monitor.alerts import AlertEngine
+
+RULES = [
+    {'name': 'down', 'kind': 'outage', 'threshold': 5},
+    {'name': 'lossy-1m', 'kind': 'failure_rate', 'threshold': 20, 'horizon': 60},
+    {'name': 'lossy-15m', 'kind': 'failure_rate', 'threshold': 5, 'horizon': 900},
+    {'name': 'slow', 'kind': 'p95_rtt', 'threshold': 150},
+]
+
+class Counter:
+    """Notifier that only counts."""
+
+    def __init__(self):
+        self.count = 0
+
+    def notify(self, alert):
+        self.count += 1
+
+def make_samples(targets: int, rounds: int, seed: int = 3) -> list:
+    """Round-robin samples: mostly healthy, a few lossy or slow targets, occasional outages."""
+    rng = random.Random(seed)
+    samples = []
+    for round_index in range(rounds):
+        for index in range(targets):
+            lossy, slow = index % 50 == 0, index % 70 == 0
+            failed = rng.random() < (0.3 if lossy else 0.01) or (index % 500 == 0 and 20 <= round_index < 30)
+            rtt = rng.uniform(150, 300) if slow else rng.uniform(5, 40)
+            samples.append((index, 1000.0 + round_index, None if failed else 64, None if failed else rtt))
+    return samples
+
+def run(targets: int, rounds: int) -> None:
+    """Feed identical samples into engines with and without alerts and compare."""
+    samples = make_samples(targets, rounds)
+
+    plain = [PingEngine(f"10.{i >> 8 & 255}.{i & 255}.1", max_points=100) for i in range(targets)]
+    start = time.perf_counter()
+    for index, timestamp, ttl, rtt in samples:
+        plain[index]._process_ping_result(ttl, rtt, timestamp=timestamp)
+    baseline = time.perf_counter() - start
+
+    counter = Counter()
+    alerts = AlertEngine.from_config(RULES, notifier=counter)
+    engines = [PingEngine(f"10.{i >> 8 & 255}.{i & 255}.1", max_points=100) for i in range(targets)]
+    for engine in engines:
+        engine.add_sample_listener(alerts)
+    start = time.perf_counter()
+    for index, timestamp, ttl, rtt in samples:
+        engines[index]._process_ping_result(ttl, rtt, timestamp=timestamp)
+    with_alerts = time.perf_counter() - start
+
+    overhead = with_alerts - baseline
+    print(f"{targets} targets x {len(RULES)} rules, {len(samples)} samples")
+    print(f"samples/s: {len(samples) / baseline:9.0f} without alerts, {len(samples) / with_alerts:9.0f} with alerts")
+    print(f"rule evaluations: {alerts.evaluations} at {alerts.evaluations / overhead:9.0f}/s of added time "
+          f"({overhead / alerts.evaluations * 1e6:.2f} us each)")
+    print(f"notifications: {counter.count}, suppressed: {alerts.suppressed}, firing now: {len(alerts.firing())}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=10_000)
+    parser.add_argument('--rounds', type=int, default=30, help="samples per target")
+    args = parser.parse_args()
+
+    run(args.targets, args.rounds)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark the offline analyzer: parse and analysis throughput on generated archives."""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.analyzer import TargetAnalysis, analyze_file, np
+from ping_monitor.sample_format import BinarySampleWriter
+
+def write_ping_log(path: str, count: int) -> None:
+    """Write count samples of raw `ping -O` output with bursty loss."""
+    rng = random.Random(1)
+    failing = False
+    with open(path, 'w', encoding='utf-8') as stream:
+        stream.write("PING 8.8.8.8 (8.8.8.8) 56(84) bytes of data.\n")
+        for seq in range(1, count + 1):
+            failing = rng.random() < (0.6 if failing else 0.01)
+            if failing:
+                stream.write(f"no answer yet for icmp_seq={seq & 0xFFFF}\n")
+            else:
+                stream.write(f"64 bytes from 8.8.8.8: icmp_seq={seq & 0xFFFF} ttl=117 time={rng.uniform(5, 50):.3f} ms\n")
+
+def write_binary_samples(path: str, count: int) -> None:
+    """Write count collector samples in the binary format."""
+    rng = random.Random(1)
+    failing = False
+    with open(path, 'wb') as stream:
+        writer = BinarySampleWriter(stream)
+        for i in range(count):
+            failing = rng.random() < (0.6 if failing else 0.01)
+            if failing:
+                writer.write(1e9 + i, "8.8.8.8", None, None)
+            else:
+                writer.write(1e9 + i, "8.8.8.8", 117, round(rng.uniform(5, 50), 3))
+
+def report(label: str, samples: int, seconds: float) -> None:
+    rate = samples / seconds
+    print(f"{label:<34} {samples:>11} samples  {rate / 1e6:7.2f} M samples/s  "
+          f"(100 M in {1e8 / rate:6.1f} s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ping.log')
+        write_ping_log(path, args.samples)
+        print(f"archive: {os.path.getsize(path) / 1e6:.1f} MB of raw ping output")
+
+        for use_numpy in ([True, False] if np is not None else [False]):
+            start = time.perf_counter()
+            analyze_file(path, file_format='ping', use_numpy=use_numpy)
+            report(f"raw ping text ({'numpy' if use_numpy else 'python'})", args.samples, time.perf_counter() - start)
+
+        path = os.path.join(directory, 'samples.bin')
+        write_binary_samples(path, args.samples)
+        print(f"archive: {os.path.getsize(path) / 1e6:.1f} MB of binary samples")
+
+        for use_numpy in ([True, False] if np is not None else [False]):
+            start = time.perf_counter()
+            analyze_file(path, file_format='samples', use_numpy=use_numpy)
+            report(f"binary samples ({'numpy' if use_numpy else 'python'})", args.samples, time.perf_counter() - start)
+
+    # Analysis alone on pre-decoded arrays isolates the run-length encoding cost
+    if np is not None:
+        rng = np.random.default_rng(1)
+        rtts = rng.uniform(5, 50, args.samples)
+        rtts[rng.random(args.samples) < 0.02] = np.nan
+        ttls = np.where(np.isnan(rtts), -1, 117)
+        analysis = TargetAnalysis("8.8.8.8", use_numpy=True)
+        start = time.perf_counter()
+        for offset in range(0, args.samples, 1 << 22):
+            analysis.add_chunk(ttls[offset:offset + (1 << 22)], rtts[offset:offset + (1 << 22)])
+        analysis.result()
+        report("analyze decoded arrays (numpy)", args.samples, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark sample processing throughput with and without latency anomaly detection."""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.ping_engine import PingEngine
+from ping_monitor.anomaly import LatencyAnomalyDetector
+
+def make_samples(rounds: int, seed: int = 42) -> list:
+    """Pre-generate one round of (ttl, ping_time) per probe cycle, with a latency shift halfway."""
+    rng = random.Random(seed)
+    samples = []
+    for i in range(rounds):
+        if rng.random() < 0.02:
+            samples.append((None, None))
+        else:
+            base = 15.0 if i < rounds // 2 else 30.0
+            samples.append((56, round(rng.gauss(base, 2.0), 3)))
+    return samples
+
+def run_fleet(targets: int, samples: list, detect_anomalies: bool) -> float:
+    """Feed every sample to every engine and return samples per second."""
+    engines = [PingEngine(target=f"10.0.{i // 256}.{i % 256}", max_points=300,
+                          detect_anomalies=detect_anomalies) for i in range(targets)]
+    start = time.perf_counter()
+    timestamp = 0.0
+    for ttl, ping_time in samples:
+        timestamp += 1.0
+        for engine in engines:
+            engine._process_ping_result(ttl, ping_time, timestamp)
+    elapsed = time.perf_counter() - start
+    return targets * len(samples) / elapsed
+
+def detector_cost(updates: int) -> float:
+    """Average cost of one detector update in nanoseconds."""
+    detector = LatencyAnomalyDetector()
+    rng = random.Random(7)
+    rtts = [rng.gauss(15.0, 2.0) for _ in range(updates)]
+    start = time.perf_counter()
+    for i, rtt in enumerate(rtts):
+        detector.update(rtt, float(i))
+    return (time.perf_counter() - start) / updates * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=60)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    samples = make_samples(args.rounds)
+    print(f"{args.targets} targets x {args.rounds} samples, best of {args.repeats}")
+    print(f"detector update: {detector_cost(1_000_000):.0f} ns")
+
+    results = {}
+    for enabled in (False, True):
+        results[enabled] = max(run_fleet(args.targets, samples, enabled) for _ in range(args.repeats))
+        label = "with detection" if enabled else "without detection"
+        print(f"{label:>18}: {results[enabled]:>12,.0f} samples/s")
+
+    overhead = (results[False] / results[True] - 1) * 100
+    print(f"{'overhead':>18}: {overhead:>11.1f} %")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark batched single-socket probing against the `ping -c 1` subprocess per target."""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.batch_prober import BatchProber
+from ping_monitor.ping_engine import PingEngine
+from ping_monitor.config import MAX_PROBE_WORKERS
+
+def loopback_targets(count: int) -> dict:
+    """Build target -> address pairs spread over 127.0.0.0/8."""
+    return {f"target-{i}": f"127.{(i >> 16) & 0xFF}.{(i >> 8) & 0xFF}.{(i & 0xFF) or 1}" for i in range(count)}
+
+def run(label: str, prober: BatchProber, batches, rounds: int) -> None:
+    """Probe each batch for several rounds and print packets/s and CPU per probe."""
+    sent_before, received_before = prober.packets_sent, prober.packets_received
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+    for _ in range(rounds):
+        for batch in batches:
+            prober.probe(batch)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    sent = prober.packets_sent - sent_before
+    received = prober.packets_received - received_before
+    print(f"{label:<12} probes={sent:>7}  replies={received:>7}  "
+          f"{sent / wall:>10.0f} pkt/s  {cpu / max(sent, 1) * 1e6:>7.1f} us CPU/probe")
+
+def run_subprocess(targets: dict, rounds: int) -> None:
+    """Probe every target through PingEngine.ping_target on the scheduler's worker pool, as without a batch prober."""
+    engines = [PingEngine(name, detect_anomalies=False) for name in targets]
+    children_start = os.times()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+    with ThreadPoolExecutor(max_workers=MAX_PROBE_WORKERS) as executor:
+        results = []
+        for _ in range(rounds):
+            results.extend(executor.map(lambda pair: pair[0].ping_target(pair[1]), zip(engines, targets.values())))
+
+    wall = time.perf_counter() - wall_start
+    children = os.times()
+    # The ping processes' own CPU counts too, not just the parent's
+    cpu = (time.process_time() - cpu_start + children.children_user - children_start.children_user
+           + children.children_system - children_start.children_system)
+    sent = len(results)
+    received = sum(1 for _, ping_time in results if ping_time is not None)
+    print(f"{'ping -c 1':<12} probes={sent:>7}  replies={received:>7}  "
+          f"{sent / wall:>10.0f} pkt/s  {cpu / max(sent, 1) * 1e6:>7.1f} us CPU/probe")
+    if not received:
+        print("             (no replies: is the ping command installed? the timings are not comparable)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--subprocess-targets', type=int, default=200,
+                        help="targets probed through ping -c 1, which is much slower")
+    args = parser.parse_args()
+
+    try:
+        prober = BatchProber(timeout=1.0)
+    except PermissionError:
+        print("ICMP sockets not permitted (need root or net.ipv4.ping_group_range)")
+        return 1
+
+    targets = loopback_targets(args.targets)
+    print(f"Probing {args.targets} loopback targets x {args.rounds} rounds")
+
+    # Existing path: one ping -c 1 subprocess per probe
+    run_subprocess(dict(list(targets.items())[:args.subprocess_targets]), args.rounds)
+
+    # One-target rounds through the batch prober's socket: one send and one wait per target
+    run("per-target", prober, [{name: address} for name, address in targets.items()], args.rounds)
+
+    # Batched path: one burst for all targets, replies drained in bulk
+    run("batched", prober, [targets], args.rounds)
+
+    prober.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark the packed failure bitmap against scanning the sample deque."""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import deque
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.bitmap import FailureBitmap
+
+def fill(window: int, loss: float, seed: int = 42):
+    """A full window of RTTs with None for failures, plus the matching bitmap; losses come in bursts."""
+    rng = random.Random(seed)
+    ping_times, bitmap, burst = deque(maxlen=window), FailureBitmap(window), 0
+    for _ in range(window):
+        if burst == 0 and rng.random() < loss / 5:
+            burst = rng.randint(1, 9)
+        failed = burst > 0
+        burst = max(0, burst - 1)
+        ping_times.append(None if failed else 10.0)
+        bitmap.append(failed)
+    return ping_times, bitmap
+
+def scan_runs(ping_times, min_length: int) -> list:
+    """Outage runs by walking the deque, as the engine used to."""
+    runs, start = [], None
+    for position, ping_time in enumerate(ping_times):
+        if ping_time is None:
+            if start is None:
+                start = position
+        elif start is not None:
+            if position - start >= min_length:
+                runs.append((start, position - start))
+            start = None
+    if start is not None and len(ping_times) - start >= min_length:
+        runs.append((start, len(ping_times) - start))
+    return runs
+
+def timed(function, repeat: int) -> float:
+    """Best wall time of repeat calls, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--window', type=int, default=1_000_000, help="samples in the window")
+    parser.add_argument('--loss', type=float, default=0.01, help="fraction of samples lost")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ping_times, bitmap = fill(args.window, args.loss)
+    print(f"window {args.window} samples, {bitmap.count()} failed")
+
+    scan = timed(lambda: sum(1 for ping_time in ping_times if ping_time is None), args.repeat)
+    maintained = timed(bitmap.count, args.repeat)
+    popcount = timed(lambda: bitmap.count_range(0, len(bitmap)), args.repeat)
+    print(f"failure count    deque scan {scan:8.2f} ms   maintained {maintained * 1e3:8.2f} us   "
+          f"popcount {popcount:6.2f} ms")
+
+    for threshold in (1, 2, 5):
+        assert bitmap.runs(threshold) == scan_runs(ping_times, threshold)
+        scan = timed(lambda: scan_runs(ping_times, threshold), args.repeat)
+        words = timed(lambda: bitmap.runs(threshold), args.repeat)
+        print(f"runs >= {threshold}        deque scan {scan:8.2f} ms   word scan  {words:8.2f} ms   "
+              f"{len(bitmap.runs(threshold))} runs")
+
+    start = time.perf_counter()
+    for index in range(args.window):
+        bitmap.append(index % 97 == 0)
+    append = (time.perf_counter() - start) / args.window * 1e9
+    print(f"append           {append:.0f} ns per sample")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
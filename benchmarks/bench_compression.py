@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark /api/data bytes on the wire and CPU per request with response compression."""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from ping_monitor.ping_engine import PingEngine
+from ping_monitor.web_app import build_data_payload
+from ping_monitor.compression import COMPRESSORS, CompressedPayloadCache
+
+def filled_engine(window: int) -> PingEngine:
+    """Create an engine with a full window of realistic samples."""
+    engine = PingEngine(target="8.8.8.8", max_points=window)
+    rng = random.Random(42)
+    for _ in range(window):
+        if rng.random() < 0.02:
+            engine._process_ping_result(None, None)
+        else:
+            engine._process_ping_result(rng.choice((56, 57, 118)), round(rng.gauss(15.0, 3.0), 3))
+    return engine
+
+def cpu_per_request(requests: int, handler) -> float:
+    """Average process CPU time per call in microseconds."""
+    start = time.process_time()
+    for _ in range(requests):
+        handler()
+    return (time.process_time() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--windows', type=int, nargs='+', default=[300, 3600, 86400])
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    encodings = [None] + sorted(COMPRESSORS)
+    print(f"Encodings available: {', '.join(sorted(COMPRESSORS))}")
+    print(f"{'window':>7} {'encoding':>9} {'bytes':>10} {'ratio':>6} {'uncached us/req':>16} {'cached us/req':>14}")
+
+    for window in args.windows:
+        engine = filled_engine(window)
+        build = lambda: app.json.dumps(build_data_payload(engine)).encode('utf-8')
+        raw_size = len(build())
+
+        for encoding in encodings:
+            # Uncached: every request serializes and compresses again (one client per version)
+            version = iter(range(10 ** 9))
+            cold_cache = CompressedPayloadCache()
+            uncached = cpu_per_request(max(1, args.requests // 10),
+                                       lambda: cold_cache.get('data', next(version), build, encoding))
+
+            # Cached: N clients polling between two samples share one serialization/compression
+            warm_cache = CompressedPayloadCache()
+            body, _ = warm_cache.get('data', 0, build, encoding)
+            cached = cpu_per_request(args.requests, lambda: warm_cache.get('data', 0, build, encoding))
+
+            print(f"{window:>7} {encoding or 'identity':>9} {len(body):>10} {raw_size / len(body):>6.1f} "
+                  f"{uncached:>16.0f} {cached:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Benchmark streamed exports: rows per second and peak memory as the export grows."""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.history import SampleHistory
+from ping_monitor.export import merge_histories, stream_export
+
+def make_histories(targets: int, seconds: int, seed: int = 5) -> dict:
+    """1 Hz jittered samples with 1% failures per target."""
+    rng = random.Random(seed)
+    histories = {}
+    for index in range(targets):
+        history = histories[f"10.0.{index >> 8 & 255}.{index & 255}"] = SampleHistory()
+        for second in range(seconds):
+            failed = rng.random() < 0.01
+            history.add(1.7e9 + second + rng.random() * 0.01, None if failed else 57,
+                        None if failed else round(rng.uniform(5, 40), 3))
+    return histories
+
+def run(histories: dict, export_format: str) -> None:
+    """Drain one export, counting bytes and peak traced memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    for chunk in stream_export(merge_histories(histories), export_format):
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rows = sum(history.sealed_samples + len(history._open) for history in histories.values())
+    print(f"{export_format:>6}: {rows} rows, {size / 1e6:7.1f} MB in {elapsed:.2f} s "
+          f"({rows / elapsed:9.0f} rows/s), peak {peak / 1e6:.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=10)
+    parser.add_argument('--hours', type=float, nargs='+', default=[1, 6], help="history lengths to export")
+    parser.add_argument('--format', default='ndjson', choices=['ndjson', 'csv', 'arrow'])
+    args = parser.parse_args()
+
+    for hours in args.hours:
+        histories = make_histories(args.targets, int(hours * 3600))
+        for history in histories.values():
+            history.seal()
+        print(f"{args.targets} targets x {hours:g} h")
+        run(histories, args.format)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark compressed history blocks: bytes per sample and decode throughput."""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import defaultdict
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.history import encode_block, decode_block, query_blocks
+from ping_monitor.sample_format import SAMPLE_RECORD, iter_samples
+
+def realistic(count: int, seed: int = 42) -> list:
+    """1 Hz probes with scheduler jitter, microsecond RTTs around a drifting baseline, and loss bursts."""
+    rng = random.Random(seed)
+    samples, timestamp, baseline, outage = [], 1.7e9, 15.0, 0
+    for _ in range(count):
+        timestamp += 1.0 + rng.choice((0.0, 0.0, 0.0, 0.001, -0.001))
+        baseline = max(1.0, baseline + rng.gauss(0, 0.01))
+        if outage == 0 and rng.random() < 0.001:
+            outage = rng.randint(2, 30)
+        if outage or rng.random() < 0.005:
+            outage = max(0, outage - 1)
+            samples.append((round(timestamp, 3), None, None))
+        else:
+            samples.append((round(timestamp, 3), 117, round(baseline + abs(rng.gauss(0, 0.8)), 3)))
+    return samples
+
+def steady(count: int) -> list:
+    """Perfectly paced probes with a quantized RTT, the best case for both encodings."""
+    rng = random.Random(7)
+    return [(1.7e9 + i, 64, rng.choice((10.0, 10.5, 11.0))) for i in range(count)]
+
+def noisy(count: int) -> list:
+    """Irregular timestamps, full-precision random RTTs and changing TTLs, the worst case."""
+    rng = random.Random(13)
+    timestamp, samples = 1.7e9, []
+    for _ in range(count):
+        timestamp += rng.uniform(0.1, 5.0)
+        if rng.random() < 0.3:
+            samples.append((round(timestamp, 3), None, None))
+        else:
+            samples.append((round(timestamp, 3), rng.randint(1, 255), rng.uniform(0.1, 500.0)))
+    return samples
+
+def from_file(path: str) -> list:
+    """Samples of the busiest target in a collector output file."""
+    by_target = defaultdict(list)
+    for timestamp, target, ttl, ping_time in iter_samples(path):
+        by_target[target].append((timestamp, ttl, ping_time))
+    return max(by_target.values(), key=len) if by_target else []
+
+def run(label: str, samples: list, block_size: int) -> None:
+    """Encode in blocks, then report size, decode throughput and a range query over the middle."""
+    if not samples:
+        print(f"{label:<10} no samples")
+        return
+
+    start = time.perf_counter()
+    blocks = [encode_block(samples[i:i + block_size]) for i in range(0, len(samples), block_size)]
+    encode_time = time.perf_counter() - start
+    size = sum(len(block) for block in blocks)
+
+    start = time.perf_counter()
+    decoded = sum(1 for block in blocks for _ in decode_block(block))
+    decode_time = time.perf_counter() - start
+
+    # One block's worth from the middle: only overlapping blocks are decoded
+    middle = len(samples) // 2
+    first, last = samples[middle][0], samples[min(middle + block_size, len(samples) - 1)][0]
+    start = time.perf_counter()
+    in_range = sum(1 for _ in query_blocks(blocks, first, last))
+    query_time = time.perf_counter() - start
+
+    print(f"{label:<10} {len(samples):>9} samples  {size / len(samples):5.2f} B/sample "
+          f"(binary records {SAMPLE_RECORD.size} B)  encode {len(samples) / encode_time / 1e3:6.0f} k/s  "
+          f"decode {decoded / decode_time / 1e3:6.0f} k/s  range of {in_range} in {query_time * 1e3:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=86400, help="samples per simulated series (one day at 1 Hz)")
+    parser.add_argument('--block-size', type=int, default=3600)
+    parser.add_argument('--file', default=None, help="also encode the busiest target of a collector output file")
+    args = parser.parse_args()
+
+    run('realistic', realistic(args.samples), args.block_size)
+    run('steady', steady(args.samples), args.block_size)
+    run('noisy', noisy(args.samples), args.block_size)
+    if args.file:
+        run('file', from_file(args.file), args.block_size)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
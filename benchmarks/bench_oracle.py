@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Differential run of PingEngine against the from-scratch reference engine, timing both."""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.ping_engine import PingEngine
+from ping_monitor.oracle import ReferenceEngine, generate_samples
+from ping_monitor.statistics import StatisticsCalculator
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--window', type=int, default=300)
+    parser.add_argument('--threshold', type=int, default=2)
+    parser.add_argument('--check-every', type=int, default=1000, help="samples between compared reads")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    samples = list(generate_samples(random.Random(args.seed), args.samples))
+    engine = PingEngine('10.0.0.1', max_points=args.window, detect_anomalies=False, outage_threshold=args.threshold)
+    oracle = ReferenceEngine(max_points=args.window, outage_threshold=args.threshold)
+
+    ingest = {'engine': 0.0, 'oracle': 0.0}
+    reads = {'engine': 0.0, 'oracle': 0.0}
+    checks = 0
+    for start in range(0, len(samples), args.check_every):
+        chunk = samples[start:start + args.check_every]
+        for name, target in (('engine', engine), ('oracle', oracle)):
+            begin = time.perf_counter()
+            for ttl, ping_time, timestamp in chunk:
+                target._process_ping_result(ttl, ping_time, timestamp=timestamp)
+            ingest[name] += time.perf_counter() - begin
+
+        now = chunk[-1][2]
+        begin = time.perf_counter()
+        stats = engine.get_statistics(now=now)
+        derived = StatisticsCalculator.calculate_statistics(stats)
+        reads['engine'] += time.perf_counter() - begin
+        begin = time.perf_counter()
+        expected = oracle.get_statistics(now)
+        expected_derived = oracle.calculate_statistics(now)
+        reads['oracle'] += time.perf_counter() - begin
+
+        checks += 1
+        if stats != expected or derived != expected_derived:
+            print(f"MISMATCH after {start + len(chunk)} samples (seed {args.seed})")
+            for key in expected:
+                if stats[key] != expected[key]:
+                    print(f"  {key}: engine {stats[key]!r} != oracle {expected[key]!r}")
+            return 1
+
+    print(f"{len(samples)} samples, window {args.window}, threshold {args.threshold}: {checks} identical reads")
+    for name in ('engine', 'oracle'):
+        print(f"{name:>6}: {len(samples) / ingest[name]:9.0f} samples/s ingest, "
+              f"{reads[name] / checks * 1e6:8.1f} us per read")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
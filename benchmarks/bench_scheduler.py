@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark the scheduler's timing wheel: O(1) timer operations and firing lag at fleet scale."""
+
+import os
+import sys
+import math
+import time
+import random
+import argparse
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.timer_wheel import TimerWheel
+from ping_monitor.scheduler import phase_offset
+
+# (interval in seconds, share of targets)
+INTERVAL_MIX = ((0.2, 0.01), (1.0, 0.29), (5.0, 0.2), (60.0, 0.5))
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def operations(count: int, tick: float) -> None:
+    """Time schedule, cancel and a full drain of count timers spread over an hour."""
+    rng = random.Random(1)
+    deadlines = [rng.uniform(0, 3600) for _ in range(count)]
+    wheel = TimerWheel(tick)
+
+    start = time.perf_counter()
+    timers = [wheel.schedule(index, deadline) for index, deadline in enumerate(deadlines)]
+    schedule = (time.perf_counter() - start) / count
+
+    start = time.perf_counter()
+    for timer in timers[::2]:
+        wheel.cancel(timer)
+    cancel = (time.perf_counter() - start) / len(timers[::2])
+
+    start = time.perf_counter()
+    fired = len(wheel.advance(3600))
+    drain = time.perf_counter() - start
+    print(f"{count} timers: schedule {schedule * 1e9:.0f} ns, cancel {cancel * 1e9:.0f} ns, "
+          f"{int(3600 / tick)} ticks firing {fired} in {drain:.2f} s")
+
+def fleet(count: int, tick: float, duration: float) -> None:
+    """Run the scheduler loop in real time with count recurring timers and report firing lag."""
+    rng = random.Random(2)
+    intervals = {}
+    for index in range(count):
+        pick, share = rng.random(), 0.0
+        for interval, weight in INTERVAL_MIX:
+            share += weight
+            if pick < share:
+                break
+        intervals[f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"] = interval
+
+    # Timers start one second out so filling the wheel does not count as lag
+    now = time.monotonic()
+    wheel = TimerWheel(tick, start=now)
+    first = now + 1.0
+    for target, interval in intervals.items():
+        wheel.schedule(target, first + (phase_offset(target, interval) - first) % interval)
+
+    # The same loop as ProbeScheduler._scheduler_loop, with dispatch replaced by lag accounting
+    lags, busiest, end = [], 0, first + duration
+    next_tick = time.monotonic()
+    while time.monotonic() < end:
+        now = time.monotonic()
+        fired = wheel.advance(now)
+        for timer in fired:
+            lags.append(now - timer.deadline)
+            interval = intervals[timer.key]
+            deadline = timer.deadline + interval
+            if deadline <= now:
+                deadline += math.ceil((now - deadline) / interval) * interval
+            wheel.schedule(timer.key, deadline)
+        busiest = max(busiest, len(fired))
+
+        next_tick += tick
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.monotonic()
+
+    lags.sort()
+    expected = sum(1 / interval for interval in intervals.values())
+    print(f"{count} targets over {duration:.0f} s: {len(lags) / duration:.0f} probes/s "
+          f"(expected {expected:.0f}), busiest tick {busiest}")
+    print("lag ms: " + "  ".join(f"p{label} {percentile(lags, fraction) * 1e3:.2f}"
+                                 for label, fraction in (('50', 0.5), ('90', 0.9), ('99', 0.99), ('99.9', 0.999)))
+          + f"  max {lags[-1] * 1e3:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=100_000)
+    parser.add_argument('--tick', type=float, default=0.01, help="wheel resolution in seconds")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds to run the real-time loop")
+    args = parser.parse_args()
+
+    operations(args.targets, args.tick)
+    fleet(args.targets, args.tick, args.duration)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
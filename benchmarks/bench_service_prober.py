@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Benchmark concurrent TCP, UDP and HTTP probes against localhost servers with bounded sockets."""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import selectors
+import threading
+import multiprocessing
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.service_prober import ServiceProber
+
+HTTP_RESPONSE = b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok'
+
+def accept_loop(listener: socket.socket) -> None:
+    """Complete TCP handshakes and drop the connections."""
+    while True:
+        conn, _ = listener.accept()
+        conn.close()
+
+def udp_echo_loop(sock: socket.socket) -> None:
+    """Echo every datagram back to its sender."""
+    while True:
+        data, source = sock.recvfrom(2048)
+        sock.sendto(data, source)
+
+def http_loop(listener: socket.socket) -> None:
+    """Answer pipelined GETs on any number of keep-alive connections from one selector."""
+    selector = selectors.DefaultSelector()
+    listener.setblocking(False)
+    selector.register(listener, selectors.EVENT_READ, None)
+    while True:
+        for key, _ in selector.select():
+            if key.data is None:
+                try:
+                    conn, _ = listener.accept()
+                except BlockingIOError:
+                    continue
+                conn.setblocking(False)
+                selector.register(conn, selectors.EVENT_READ, b'')
+                continue
+
+            conn = key.fileobj
+            try:
+                data = conn.recv(65536)
+            except OSError:
+                data = b''
+            if not data:
+                selector.unregister(conn)
+                conn.close()
+                continue
+            pending = key.data + data
+            requests = pending.count(b'\r\n\r\n')
+            if requests:
+                conn.sendall(HTTP_RESPONSE * requests)
+                pending = pending[pending.rfind(b'\r\n\r\n') + 4:]
+            selector.modify(conn, selectors.EVENT_READ, pending)
+
+def run_servers(ports) -> None:
+    """Serve TCP, UDP echo and HTTP on loopback from a separate process."""
+    tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    tcp.bind(('127.0.0.1', 0))
+    tcp.listen(4096)
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind(('127.0.0.1', 0))
+    udp.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    http = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    http.bind(('127.0.0.1', 0))
+    http.listen(4096)
+
+    for loop, sock in ((accept_loop, tcp), (udp_echo_loop, udp), (http_loop, http)):
+        threading.Thread(target=loop, args=(sock,), daemon=True).start()
+    ports.put((tcp.getsockname()[1], udp.getsockname()[1], http.getsockname()[1]))
+    threading.Event().wait()
+
+def open_fds() -> int:
+    """File descriptors open in this process."""
+    return len(os.listdir('/proc/self/fd'))
+
+def run(label: str, prober: ServiceProber, targets: dict, rounds: int) -> None:
+    """Probe all targets for several rounds and print probes/s and peak descriptor use."""
+    peak = [open_fds()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.005):
+            peak[0] = max(peak[0], open_fds())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    baseline = open_fds()
+    answered = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = prober.probe(targets)
+        answered += sum(1 for _, ping_time in results.values() if ping_time is not None)
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    probes = len(targets) * rounds
+    print(f"{label:<6} probes={probes:>6}  answered={answered:>6}  {probes / elapsed:>8.0f} probes/s  "
+          f"peak sockets={prober.peak_sockets:>4}  peak fds over baseline={peak[0] - baseline:>4}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=2000, help="targets per probe type")
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--max-sockets', type=int, nargs='+', default=[64, 256, 1024])
+    args = parser.parse_args()
+
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_servers, args=(ports,), daemon=True)
+    server.start()
+    tcp_port, udp_port, http_port = ports.get()
+
+    # Distinct target names for the same loopback endpoints
+    kinds = {
+        'tcp': {f"tcp://t{i}:{tcp_port}": '127.0.0.1' for i in range(args.targets)},
+        'udp': {f"udp://u{i}:{udp_port}": '127.0.0.1' for i in range(args.targets)},
+        'http': {f"http://h{i}:{http_port}/": '127.0.0.1' for i in range(args.targets)},
+    }
+    kinds['mixed'] = {**kinds['tcp'], **kinds['udp'], **kinds['http']}
+    print(f"{args.targets} targets per type x {args.rounds} rounds, fd limit {os.sysconf('SC_OPEN_MAX')}")
+
+    try:
+        for max_sockets in args.max_sockets:
+            print(f"\nmax_sockets={max_sockets}")
+            for label, targets in kinds.items():
+                prober = ServiceProber(timeout=2.0, max_sockets=max_sockets)
+                run(label, prober, targets, args.rounds)
+                prober.close()
+    finally:
+        server.terminate()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark /api/data payload throughput from a shared-memory store across reader processes."""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import multiprocessing
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.ping_engine import PingEngine
+from ping_monitor.shared_store import SharedSampleStore, SharedStoreReader
+
+def fill_store(store: SharedSampleStore, targets: int, window: int) -> list:
+    """Publish a full window of samples for every target."""
+    rng = random.Random(42)
+    engines = []
+    now = time.time() - window
+    for i in range(targets):
+        engine = PingEngine(target=f"10.0.{i // 256}.{i % 256}", max_points=window)
+        store.attach(engine)
+        for step in range(window):
+            if rng.random() < 0.02:
+                engine._process_ping_result(None, None, now + step)
+            else:
+                engine._process_ping_result(56, round(rng.gauss(15.0, 3.0), 3), now + step)
+        engines.append(engine)
+    return engines
+
+def reader_worker(name: str, targets: list, duration: float, results) -> None:
+    """Serve /api/data payloads for random targets until the duration elapses."""
+    from ping_monitor.web_app import build_data_payload
+
+    reader = SharedStoreReader(name)
+    rng = random.Random(os.getpid())
+    served = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        snapshot = reader.snapshot(rng.choice(targets))
+        json.dumps(build_data_payload(snapshot))
+        served += 1
+    reader.close()
+    results.put(served)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=100)
+    parser.add_argument('--window', type=int, default=300)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    store = SharedSampleStore(capacity=args.targets, max_points=args.window)
+    try:
+        engines = fill_store(store, args.targets, args.window)
+        targets = [engine.target for engine in engines]
+        print(f"{args.targets} targets x {args.window} samples, {os.cpu_count()} CPUs")
+
+        baseline = None
+        for processes in args.processes:
+            results = multiprocessing.Queue()
+            workers = [
+                multiprocessing.Process(target=reader_worker, args=(store.name, targets, args.duration, results))
+                for _ in range(processes)
+            ]
+            for worker in workers:
+                worker.start()
+            served = sum(results.get() for _ in workers)
+            for worker in workers:
+                worker.join()
+
+            rate = served / args.duration
+            baseline = baseline or rate / processes
+            print(f"{processes:>3} readers: {rate:>10,.0f} payloads/s  ({rate / baseline:.2f}x one reader)")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
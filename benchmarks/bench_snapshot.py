@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark engine snapshot save and warm-restart restore for large fleets."""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ping_monitor.scheduler import ProbeScheduler
+
+def populate(scheduler: ProbeScheduler, targets: int, window: int) -> None:
+    """Fill every engine with a full window without running the probe path."""
+    rng = random.Random(42)
+    ping_times = [round(rng.gauss(15.0, 3.0), 3) for _ in range(window)]
+    ttls = [56] * window
+    for position in rng.sample(range(window), window // 50):
+        ping_times[position] = ttls[position] = None
+
+    for i in range(targets):
+        engine = scheduler.add_target(f"10.{i // 65536}.{i // 256 % 256}.{i % 256}")
+        state = engine.capture_state()
+        state.update(ttls=ttls, ping_times=ping_times, total_pings=window,
+                     failed_pings=ping_times.count(None))
+        engine.restore_state(state)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--targets', type=int, default=10000)
+    parser.add_argument('--window', type=int, default=3600)
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, 'engines.snap')
+    try:
+        scheduler = ProbeScheduler(max_points=args.window, snapshot_path=path)
+        populate(scheduler, args.targets, args.window)
+        print(f"{args.targets} targets x {args.window} samples")
+
+        start = time.perf_counter()
+        scheduler.save_snapshot()
+        print(f"save:        {time.perf_counter() - start:6.2f} s  ({os.path.getsize(path) / 1e6:,.0f} MB)")
+        del scheduler
+
+        start = time.perf_counter()
+        restored = ProbeScheduler(max_points=args.window, snapshot_path=path)
+        print(f"restore:     {time.perf_counter() - start:6.2f} s  ({len(restored.engines)} engines)")
+
+        # Each engine expands its window on first use, spread over the first probe round
+        start = time.perf_counter()
+        for engine in restored.engines.values():
+            engine.get_gaps()
+        print(f"first touch: {time.perf_counter() - start:6.2f} s  "
+              f"({(time.perf_counter() - start) / args.targets * 1e6:.0f} us per engine)")
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark collector cold start: import time and time to first probe sample."""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_time(module: str, runs: int) -> float:
+    """Best-of-N wall time in ms for a fresh interpreter to import module."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=ROOT, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def first_sample_time(extra_args, runs: int) -> float:
+    """Best-of-N wall time in ms from spawning the collector to reading its first sample."""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'ping_monitor.collector', '-c', '1', *extra_args],
+            cwd=ROOT, stdout=subprocess.PIPE, text=True
+        )
+        line = process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        process.wait()
+        if not line:
+            raise RuntimeError("collector produced no sample")
+        best = min(best, elapsed)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--target', default='127.0.0.1')
+    args = parser.parse_args()
+
+    baseline = import_time('sys', args.runs)
+    print(f"interpreter startup:            {baseline:7.1f} ms")
+    print(f"import ping_monitor:            {import_time('ping_monitor', args.runs):7.1f} ms")
+    print(f"import ping_monitor.web_app:    {import_time('ping_monitor.web_app', args.runs):7.1f} ms")
+    print(f"collector first sample (ping):  {first_sample_time([args.target], args.runs):7.1f} ms")
+    try:
+        batched = first_sample_time(['--batch', args.target], args.runs)
+        print(f"collector first sample (batch): {batched:7.1f} ms")
+    except RuntimeError:
+        print("collector first sample (batch): ICMP sockets not permitted")
+
+if __name__ == "__main__":
+    main()
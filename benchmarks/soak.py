@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Soak test: days of simulated probing at an accelerated rate under concurrent API load.
+
+Samples traced memory, RSS, GC activity and request latency at every simulated interval,
+fails when memory or latency trends upward beyond the thresholds, and writes a JSON report
+that can be compared with the report of a previous release (--baseline).
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import tracemalloc
+import urllib.error
+import urllib.request
+from typing import Optional, Dict, List, Tuple
+
+# Add the project root to the path so we can import ping_monitor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+from ping_monitor.web_app import create_app
+
+ENDPOINTS = [
+    '/api/data?target={target}',
+    '/api/summary',
+    '/api/targets',
+    '/api/query?metric=failure_rate&group_by=target&window=3600',
+    '/api/query?metric=p95_ping_time&group_by=target&order=desc&limit=5',
+    '/api/outages?start=0&limit=100',
+    '/api/anomalies?start=0&limit=100',
+    '/api/incidents',
+]
+
+class SimulatedProber:
+    """Prober stand-in: a base RTT per target with jitter, random loss and occasional outages."""
+
+    def __init__(self, targets: List[str], seed: int = 1, loss: float = 0.005, outage_rate: float = 1 / 21600):
+        self.rng = random.Random(seed)
+        self.base = {target: self.rng.uniform(2, 80) for target in targets}
+        self.loss = loss
+        self.outage_rate = outage_rate
+        self.down: Dict[str, int] = {}  # Probes left in each target's current outage
+
+    def probe(self, addresses: Dict[str, str]) -> Dict[str, Tuple[Optional[int], Optional[float]]]:
+        """One result per target, as the real probers return them."""
+        results = {}
+        for target in addresses:
+            left = self.down.get(target, 0)
+            if left == 0 and self.rng.random() < self.outage_rate:
+                left = self.rng.randint(2, 120)
+            if left:
+                self.down[target] = left - 1
+                results[target] = (None, None)
+            elif self.rng.random() < self.loss:
+                results[target] = (None, None)
+            else:
+                results[target] = (57, round(self.base[target] * self.rng.lognormvariate(0, 0.15), 3))
+        return results
+
+    def close(self) -> None:
+        pass
+
+class ApiLoad:
+    """Client threads requesting a mix of endpoints from a live server and recording latencies."""
+
+    def __init__(self, base_url: str, targets: List[str], clients: int, seed: int = 2):
+        self.base_url = base_url
+        self.targets = targets
+        self.clients = clients
+        self.rng = random.Random(seed)
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _client(self) -> None:
+        """Request random endpoints until stopped."""
+        while not self._stop.is_set():
+            path = self.rng.choice(ENDPOINTS).format(target=self.rng.choice(self.targets))
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(self.base_url + path, timeout=30) as response:
+                    response.read()
+                outcome = 'ok'
+            except urllib.error.HTTPError as e:
+                # 429 and 503 are admission control shedding load, not the API failing
+                outcome = 'shed' if e.code in (429, 503) else 'error'
+            except Exception:
+                outcome = 'error'
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if outcome == 'ok':
+                    self.latencies.append(elapsed)
+                elif outcome == 'shed':
+                    self.shed += 1
+                else:
+                    self.errors += 1
+
+    def start(self) -> None:
+        for _ in range(self.clients):
+            thread = threading.Thread(target=self._client, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def take(self) -> Tuple[List[float], int, int]:
+        """Latencies, errors and shed requests since the previous call."""
+        with self._lock:
+            latencies, errors, shed = self.latencies, self.errors, self.shed
+            self.latencies, self.errors, self.shed = [], 0, 0
+        return latencies, errors, shed
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size from /proc, or None where it is not available."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile, None without values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def trend(points: List[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """Least-squares growth over the span of the points, absolute and relative to the mean level."""
+    points = [(x, y) for x, y in points if y is not None]
+    if len(points) < 3:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0 or mean_y == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+    growth = slope * (points[-1][0] - points[0][0])
+    return growth, growth / mean_y
+
+def run(args) -> dict:
+    """Drive the engines and the API, returning the report."""
+    targets = [f"10.0.{index >> 8 & 255}.{index & 255}" for index in range(1, args.targets + 1)]
+    app = create_app(target=targets[0], max_points=args.max_points)
+    scheduler = app.extensions['scheduler']
+    # Every soak client shares 127.0.0.1, so per-client admission limits would shed the load under test
+    admission = app.extensions['admission']
+    admission.rate, admission.max_concurrent = None, None
+    for target in targets[1:]:
+        scheduler.add_target(target)
+    # The scheduler runs for the API but probes nothing; samples come from the simulated prober
+    for target in targets:
+        scheduler.pause_target(target)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    load = ApiLoad(f"http://127.0.0.1:{server.server_port}", targets, args.clients)
+    prober = SimulatedProber(targets, seed=args.seed)
+    addresses = {target: target for target in targets}
+    engines = [(target, scheduler.get_engine(target)) for target in targets]
+
+    tracemalloc.start()
+    load.start()
+    samples = []
+    baseline_snapshot = None
+    warmup_hours = args.hours * args.warmup
+    clock = time.time()
+    ingested = 0
+    interval_start = time.perf_counter()
+    try:
+        for second in range(1, int(args.hours * 3600) + 1):
+            clock += 1
+            results = prober.probe(addresses)
+            for target, engine in engines:
+                ttl, ping_time = results[target]
+                engine._process_ping_result(ttl, ping_time, timestamp=clock)
+            ingested += len(engines)
+
+            if second % int(args.sample_hours * 3600):
+                continue
+            hours = second / 3600
+            wall = time.perf_counter() - interval_start
+            latencies, errors, shed = load.take()
+            gc.collect()
+            traced, _ = tracemalloc.get_traced_memory()
+            samples.append({
+                'hours': hours,
+                'samples_per_second': ingested / wall,
+                'traced_bytes': traced,
+                'rss_bytes': rss_bytes(),
+                'gc_objects': len(gc.get_objects()),
+                'gc_collections': [generation['collections'] for generation in gc.get_stats()],
+                'requests': len(latencies),
+                'errors': errors,
+                'shed': shed,
+                'p50_ms': percentile(latencies, 0.5) * 1000 if latencies else None,
+                'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+                'p99_ms': percentile(latencies, 0.99) * 1000 if latencies else None,
+                'outage_history': sum(len(engine.outage_history) for _, engine in engines),
+                'outage_log': len(scheduler.outage_log)
+            })
+            if baseline_snapshot is None and hours >= warmup_hours:
+                baseline_snapshot = tracemalloc.take_snapshot()
+            last = samples[-1]
+            print(f"{hours:7.1f} h  {last['samples_per_second']:8.0f} samples/s  "
+                  f"traced {traced / 1e6:7.2f} MB  rss {(last['rss_bytes'] or 0) / 1e6:7.1f} MB  "
+                  f"p95 {last['p95_ms'] or 0:7.1f} ms  {last['requests']:5d} requests  {errors} errors  {shed} shed")
+            ingested = 0
+            interval_start = time.perf_counter()
+    finally:
+        load.stop()
+        server.shutdown()
+        scheduler.stop()
+
+    top_growth = []
+    if baseline_snapshot is not None:
+        stats = tracemalloc.take_snapshot().compare_to(baseline_snapshot, 'lineno')
+        top_growth = [str(stat) for stat in stats[:10]]
+    tracemalloc.stop()
+
+    # Trends are fitted after the warmup, once windows, horizons and caches are full
+    steady = [sample for sample in samples if sample['hours'] > warmup_hours]
+    fitted = {
+        'traced_memory': trend([(s['hours'], s['traced_bytes']) for s in steady]),
+        'rss': trend([(s['hours'], s['rss_bytes']) for s in steady]),
+        'p95_latency': trend([(s['hours'], s['p95_ms']) for s in steady])
+    }
+    trends = {name: None if value is None else {'growth': value[0], 'relative': value[1]}
+              for name, value in fitted.items()}
+
+    # A trend fails when it is large both relative to its level and in absolute terms, so
+    # jitter of a few kilobytes or milliseconds on a small baseline never fails a run
+    limits = {'traced_memory': (args.max_memory_growth, args.min_memory_growth),
+              'rss': (args.max_rss_growth, args.min_memory_growth),
+              'p95_latency': (args.max_latency_growth, args.min_latency_growth)}
+    failures = [f"{name} grew {value['relative'] * 100:.1f}% ({value['growth']:.6g}) over the steady state "
+                f"(limit {limits[name][0] * 100:.0f}%)"
+                for name, value in trends.items()
+                if value is not None and value['relative'] > limits[name][0] and value['growth'] > limits[name][1]]
+    if sum(sample['errors'] for sample in samples):
+        failures.append(f"{sum(sample['errors'] for sample in samples)} API requests failed")
+
+    return {
+        'config': {'targets': args.targets, 'hours': args.hours, 'clients': args.clients,
+                   'max_points': args.max_points, 'seed': args.seed},
+        'samples': samples,
+        'trends': trends,
+        'top_growth': top_growth,
+        'summary': summarize(steady or samples),
+        'failures': failures,
+        'passed': not failures
+    }
+
+def summarize(samples: List[dict]) -> dict:
+    """Headline numbers for comparing releases."""
+    def median(key):
+        values = [sample[key] for sample in samples if sample[key] is not None]
+        return percentile(values, 0.5)
+
+    return {
+        'samples_per_second': median('samples_per_second'),
+        'p50_ms': median('p50_ms'),
+        'p95_ms': median('p95_ms'),
+        'p99_ms': median('p99_ms'),
+        'final_traced_bytes': samples[-1]['traced_bytes'] if samples else None,
+        'final_rss_bytes': samples[-1]['rss_bytes'] if samples else None
+    }
+
+def compare(report: dict, baseline: dict) -> None:
+    """Print this run's headline numbers next to a previous report's."""
+    print(f"\n{'metric':>20} {'baseline':>12} {'this run':>12} {'change':>8}")
+    for key, value in report['summary'].items():
+        before = baseline.get('summary', {}).get(key)
+        change = f"{(value - before) / before * 100:+7.1f}%" if value is not None and before else ''
+        print(f"{key:>20} {'-' if before is None else f'{before:.6g}':>12} "
+              f"{'-' if value is None else f'{value:.6g}':>12} {change:>8}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', type=int, default=5)
+    parser.add_argument('--hours', type=float, default=72, help="simulated hours of 1 Hz probing")
+    parser.add_argument('--sample-hours', type=float, default=3, help="simulated hours between measurements")
+    parser.add_argument('--warmup', type=float, default=0.25, help="fraction of the run excluded from trends")
+    parser.add_argument('--clients', type=int, default=4, help="concurrent API clients")
+    parser.add_argument('--max-points', type=int, default=300)
+    parser.add_argument('--max-memory-growth', type=float, default=0.05, help="allowed traced memory trend")
+    parser.add_argument('--max-rss-growth', type=float, default=0.10, help="allowed RSS trend")
+    parser.add_argument('--max-latency-growth', type=float, default=0.50, help="allowed p95 latency trend")
+    parser.add_argument('--min-memory-growth', type=float, default=1e6, help="bytes of growth always allowed")
+    parser.add_argument('--min-latency-growth', type=float, default=5.0, help="ms of p95 growth always allowed")
+    parser.add_argument('--report', help="write the JSON report here")
+    parser.add_argument('--baseline', help="JSON report of a previous run to compare against")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.report:
+        with open(args.report, 'w') as output:
+            json.dump(report, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as previous:
+            compare(report, json.load(previous))
+
+    trends = ', '.join(f"{name} " + ('-' if value is None else f"{value['relative'] * 100:+.1f}%")
+                       for name, value in report['trends'].items())
+    print(f"\nsteady-state trends: {trends}")
+    if report['top_growth']:
+        print("largest allocation growth since warmup:")
+        for line in report['top_growth'][:5]:
+            print(f"  {line}")
+    for failure in report['failures']:
+        print(f"FAIL: {failure}")
+    print("PASS" if report['passed'] else "FAIL")
+    return 0 if report['passed'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,15 @@ A real-time network monitoring tool with interactive web interface.
 """
 
 from .ping_engine import PingEngine
-from .web_app import create_app
 from .statistics import StatisticsCalculator
 from .config import *
 
+def __getattr__(name):
+    """Import the web stack only when create_app is first used."""
+    if name == "create_app":
+        from .web_app import create_app
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __version__ = "1.0.0"
 __all__ = ["PingEngine", "create_app", "StatisticsCalculator"] 
\ No newline at end of file
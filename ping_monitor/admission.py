@@ -0,0 +1,152 @@
+"""Admission control for the HTTP API: per-client rate limits, a cap on expensive requests and yielding to probes."""
+
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Callable, Tuple
+
+try:
+    from .config import (API_RATE_LIMIT, API_RATE_BURST, API_MAX_CONCURRENT, API_MAX_PROBE_LAG, API_YIELD_TIME,
+                         API_MAX_CLIENTS)
+except ImportError:
+    from config import (API_RATE_LIMIT, API_RATE_BURST, API_MAX_CONCURRENT, API_MAX_PROBE_LAG, API_YIELD_TIME,
+                        API_MAX_CLIENTS)
+
+# Seconds slept at a time while waiting for lagging probes; each sleep hands the GIL to the scheduler
+YIELD_STEP = 0.01
+
+# Why a request was refused: (HTTP status, Retry-After seconds, message)
+Rejection = Tuple[int, int, str]
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst; every request takes one."""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token, returning 0.0, or the seconds until one is available without taking it."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class AdmissionController:
+    """Decides per request whether the API serves it now, so bursts cannot starve the probes.
+
+    Every client has a token bucket; an empty bucket means 429. When the probe scheduler's
+    lag exceeds max_lag, requests sleep in short steps until it recovers, handing the GIL to
+    the scheduler; expensive requests still waiting after yield_time are shed with 503.
+    At most max_concurrent expensive requests run at once, and the rest get 503 at once
+    rather than queueing behind them.
+    """
+
+    def __init__(self, rate: Optional[float] = API_RATE_LIMIT, burst: float = API_RATE_BURST,
+                 max_concurrent: Optional[int] = API_MAX_CONCURRENT, max_lag: float = API_MAX_PROBE_LAG,
+                 yield_time: float = API_YIELD_TIME, max_clients: int = API_MAX_CLIENTS,
+                 lag_source: Optional[Callable[[], float]] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        # Configuration
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_lag = max_lag
+        self.yield_time = yield_time
+        self.max_clients = max_clients
+        self.lag_source = lag_source
+        self.clock = clock
+        self.sleep = sleep
+
+        # Client address -> bucket, least recently seen first
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self.active = 0  # Expensive requests holding a slot
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed_busy = 0
+        self.shed_lag = 0
+        self.yielded = 0
+
+    def admit(self, client: str, expensive: bool) -> Optional[Rejection]:
+        """None if the request may proceed, else why not.
+
+        An admitted expensive request holds a slot that must be given back with release().
+        """
+        # Step 1: the client's own rate limit
+        if self.rate is not None:
+            with self._lock:
+                bucket = self._buckets.get(client)
+                if bucket is None:
+                    bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, self.clock())
+                    if len(self._buckets) > self.max_clients:
+                        self._buckets.popitem(last=False)
+                else:
+                    self._buckets.move_to_end(client)
+                wait = bucket.take(self.clock())
+                if wait > 0:
+                    self.rate_limited += 1
+                    return 429, math.ceil(wait), 'Rate limit exceeded'
+
+        # Step 2: let lagging probes catch up first
+        if not self._yield_to_probes() and expensive:
+            with self._lock:
+                self.shed_lag += 1
+            return 503, math.ceil(self.yield_time), 'Probes are lagging; try again shortly'
+
+        # Step 3: the cap on expensive requests in progress
+        with self._lock:
+            if expensive:
+                if self.max_concurrent is not None and self.active >= self.max_concurrent:
+                    self.shed_busy += 1
+                    return 503, 1, 'Too many requests in progress'
+                self.active += 1
+            self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        """Give back the slot of a finished expensive request."""
+        with self._lock:
+            self.active -= 1
+
+    def lag(self) -> float:
+        """Current probe scheduling lag in seconds."""
+        return self.lag_source() if self.lag_source is not None else 0.0
+
+    def _yield_to_probes(self) -> bool:
+        """Sleep while the probes lag, for at most yield_time; True once they are on time."""
+        if self.lag() <= self.max_lag:
+            return True
+        with self._lock:
+            self.yielded += 1
+        deadline = self.clock() + self.yield_time
+        while self.clock() < deadline:
+            self.sleep(YIELD_STEP)
+            if self.lag() <= self.max_lag:
+                return True
+        return False
+
+    def stats(self) -> dict:
+        """Settings, counters and the current lag for monitoring."""
+        with self._lock:
+            return {
+                'rate_limit': self.rate,
+                'burst': self.burst,
+                'max_concurrent': self.max_concurrent,
+                'max_probe_lag': self.max_lag,
+                'probe_lag': self.lag(),
+                'active': self.active,
+                'clients': len(self._buckets),
+                'admitted': self.admitted,
+                'rate_limited': self.rate_limited,
+                'shed_busy': self.shed_busy,
+                'shed_lag': self.shed_lag,
+                'yielded': self.yielded
+            }
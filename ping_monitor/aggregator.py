@@ -0,0 +1,134 @@
+"""Central aggregator that merges sample frames pushed by collectors at several sites."""
+
+import time
+import threading
+from typing import Optional, Dict, List, Tuple
+
+try:
+    from .config import DEFAULT_MAX_POINTS
+    from .ping_engine import PingEngine
+    from .statistics import StatisticsCalculator
+    from .push import decode_frame
+except ImportError:
+    from config import DEFAULT_MAX_POINTS
+    from ping_engine import PingEngine
+    from statistics import StatisticsCalculator
+    from push import decode_frame
+
+class SiteState:
+    """Delivery accounting and per-target engines for one pushing site."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.session: Optional[int] = None
+        self.last_sequence = 0
+        self.frames = 0
+        self.duplicate_frames = 0
+        self.lost_frames = 0
+        self.samples = 0
+        self.restarts = 0
+        self.last_push_time: Optional[float] = None
+        self.engines: Dict[str, PingEngine] = {}
+
+    def to_dict(self) -> dict:
+        """Delivery status for the /api/sites endpoint."""
+        return {
+            'site': self.name,
+            'last_sequence': self.last_sequence,
+            'frames': self.frames,
+            'duplicate_frames': self.duplicate_frames,
+            'lost_frames': self.lost_frames,
+            'samples': self.samples,
+            'restarts': self.restarts,
+            'last_push_time': self.last_push_time,
+            'targets': sorted(self.engines)
+        }
+
+class Aggregator:
+    """Replays pushed samples into one PingEngine per (site, target).
+
+    Each collector process numbers its frames within a random session id. A frame at
+    or below the last sequence seen is a retry and is acknowledged without replaying
+    it; a jump past the next sequence records the skipped frames as lost. A new
+    session means the collector restarted, so numbering starts over.
+    """
+
+    def __init__(self, max_points: int = DEFAULT_MAX_POINTS):
+        self.max_points = max_points
+        self.sites: Dict[str, SiteState] = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, data: bytes, now: Optional[float] = None) -> dict:
+        """Apply one frame and return the acknowledgement sent back to the collector."""
+        site_name, session, sequence, samples = decode_frame(data)
+
+        # Frames from one site are applied in order, so sequence checks and replay happen together
+        with self._lock:
+            site = self.sites.get(site_name)
+            if site is None:
+                site = self.sites[site_name] = SiteState(site_name)
+
+            if session != site.session:
+                if site.session is not None:
+                    site.restarts += 1
+                site.session = session
+                site.last_sequence = 0
+
+            if sequence <= site.last_sequence:
+                site.duplicate_frames += 1
+                return {'site': site_name, 'sequence': sequence, 'status': 'duplicate'}
+
+            site.lost_frames += sequence - site.last_sequence - 1
+            site.last_sequence = sequence
+            site.frames += 1
+            site.samples += len(samples)
+            site.last_push_time = time.time() if now is None else now
+
+            for timestamp, target, ttl, ping_time in samples:
+                engine = site.engines.get(target)
+                if engine is None:
+                    engine = site.engines[target] = PingEngine(target=target, max_points=self.max_points)
+                engine._process_ping_result(ttl, ping_time, timestamp=timestamp)
+
+        return {'site': site_name, 'sequence': sequence, 'status': 'accepted'}
+
+    def get_engine(self, site: str, target: str) -> Optional[PingEngine]:
+        """Get the engine replaying one site's samples for a target, if any."""
+        with self._lock:
+            state = self.sites.get(site)
+            return state.engines.get(target) if state is not None else None
+
+    def site_status(self) -> List[dict]:
+        """Delivery status of every site that has pushed."""
+        with self._lock:
+            return [self.sites[name].to_dict() for name in sorted(self.sites)]
+
+    def version(self) -> Tuple:
+        """Changes whenever any site applies a frame, for response caching."""
+        with self._lock:
+            return tuple((name, site.session, site.last_sequence) for name, site in sorted(self.sites.items()))
+
+    def cross_site(self) -> Dict[str, dict]:
+        """Per-target statistics from every site that probes it, with the sites currently in outage."""
+        with self._lock:
+            engines = [(site.name, target, engine) for site in self.sites.values()
+                       for target, engine in site.engines.items()]
+
+        view: Dict[str, dict] = {}
+        for site_name, target, engine in sorted(engines, key=lambda item: (item[1], item[0])):
+            stats_data = engine.get_statistics()
+            failure_rate, avg_ping_time, min_ping_time, max_ping_time, avg_outage_duration = \
+                StatisticsCalculator.calculate_statistics(stats_data)
+            entry = view.setdefault(target, {'sites': {}, 'sites_in_outage': []})
+            entry['sites'][site_name] = {
+                'failure_rate': failure_rate,
+                'avg_ping_time': avg_ping_time,
+                'min_ping_time': min_ping_time,
+                'max_ping_time': max_ping_time,
+                'avg_outage_duration': avg_outage_duration,
+                'total_pings': stats_data['total_pings'],
+                'consecutive_failures': stats_data['consecutive_failures']
+            }
+            if engine.outage_start_index is not None:
+                entry['sites_in_outage'].append(site_name)
+        return view
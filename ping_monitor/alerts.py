@@ -0,0 +1,333 @@
+"""Declarative alert rules evaluated incrementally on every sample, with batched webhook delivery."""
+
+import json
+import time
+import bisect
+import logging
+import threading
+import urllib.request
+from collections import deque
+from typing import Optional, Dict, List, Iterable, Tuple
+
+try:
+    from .config import (ALERT_COOLDOWN, ALERT_RTT_WINDOW, ALERT_MIN_SAMPLES, ALERT_BATCH_SIZE,
+                         ALERT_FLUSH_INTERVAL, ALERT_MAX_QUEUE, ALERT_TIMEOUT, ALERT_MAX_BACKOFF)
+    from .query import percentile
+except ImportError:
+    from config import (ALERT_COOLDOWN, ALERT_RTT_WINDOW, ALERT_MIN_SAMPLES, ALERT_BATCH_SIZE,
+                        ALERT_FLUSH_INTERVAL, ALERT_MAX_QUEUE, ALERT_TIMEOUT, ALERT_MAX_BACKOFF)
+    from query import percentile
+
+RULE_KINDS = ('outage', 'failure_rate', 'p95_rtt')
+
+class AlertError(ValueError):
+    """Raised for an invalid alert rule."""
+
+class AlertRule:
+    """One alert condition, checked per target on every sample.
+
+    - outage: at least threshold consecutive failed probes
+    - failure_rate: failure percentage above threshold over a horizon (seconds) the target's engine tracks
+    - p95_rtt: 95th percentile RTT (ms) above threshold over the last window successful samples
+
+    The rate and percentile rules stay quiet until min_samples samples are available.
+    """
+
+    def __init__(self, name: str, kind: str, threshold: float, horizon: Optional[int] = None,
+                 window: int = ALERT_RTT_WINDOW, min_samples: int = ALERT_MIN_SAMPLES,
+                 targets: Optional[Iterable[str]] = None):
+        if kind not in RULE_KINDS:
+            raise AlertError(f"Unknown rule kind {kind!r}; expected one of {', '.join(RULE_KINDS)}")
+        if kind == 'failure_rate' and (not isinstance(horizon, (int, float)) or horizon <= 0):
+            raise AlertError(f"Rule {name!r} needs a positive horizon in seconds")
+        if window < 1 or min_samples < 1:
+            raise AlertError(f"Rule {name!r} needs a positive window and min_samples")
+        self.name = name
+        self.kind = kind
+        self.threshold = threshold
+        self.horizon = horizon
+        self.window = window
+        self.min_samples = min_samples
+        self.targets = frozenset(targets) if targets is not None else None
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> 'AlertRule':
+        """Build a rule from its config form, e.g. {'name': 'down', 'kind': 'outage', 'threshold': 5}."""
+        try:
+            return cls(str(spec['name']), spec['kind'], float(spec['threshold']), horizon=spec.get('horizon'),
+                       window=int(spec.get('window', ALERT_RTT_WINDOW)),
+                       min_samples=int(spec.get('min_samples', ALERT_MIN_SAMPLES)), targets=spec.get('targets'))
+        except AlertError:
+            raise
+        except (KeyError, TypeError, ValueError) as e:
+            raise AlertError(f"Invalid alert rule {spec!r}: {e}")
+
+    def applies_to(self, target: str) -> bool:
+        """Whether the rule watches a target."""
+        return self.targets is None or target in self.targets
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form of the rule."""
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'threshold': self.threshold,
+            'horizon': self.horizon,
+            'window': self.window,
+            'min_samples': self.min_samples,
+            'targets': sorted(self.targets) if self.targets is not None else None
+        }
+
+class _RuleState:
+    """Evaluation state of one rule for one target."""
+
+    __slots__ = ('firing', 'notified', 'since', 'value', 'last_fired', 'recent', 'ordered')
+
+    def __init__(self):
+        self.firing = False
+        self.notified = False  # Whether the current firing was sent, so its resolution is too
+        self.since: Optional[float] = None
+        self.value: Optional[float] = None
+        self.last_fired: Optional[float] = None
+        self.recent: deque = deque()  # RTTs in arrival order (p95 rules only)
+        self.ordered: List[float] = []  # The same RTTs sorted
+
+class AlertEngine:
+    """Sample listener that evaluates every rule watching the sample's target.
+
+    Each sample costs O(1) per rule (O(log window) for percentile rules), so there is no
+    periodic sweep over targets. Only state changes are notified: a firing alert is
+    sent once, and its resolution once. A rule that fires again for the same target
+    within cooldown seconds of its last notification is held back, so flapping targets
+    cannot flood the webhook: it is sent on the first sample after the cooldown if it
+    is still firing, and neither it nor its resolution is sent if it resolves before then.
+    Failure rate rules over a horizon a target's engine does not track are skipped for that target.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule], notifier=None, cooldown: float = ALERT_COOLDOWN):
+        self.rules = list(rules)
+        self.notifier = notifier
+        self.cooldown = cooldown
+
+        # Rules watching each target and their states, built on the target's first sample
+        self._states: Dict[str, List[Tuple[AlertRule, _RuleState]]] = {}
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.evaluations = 0
+        self.notifications = 0
+        self.suppressed = 0
+
+    @classmethod
+    def from_config(cls, specs: Iterable[dict], notifier=None, cooldown: float = ALERT_COOLDOWN) -> 'AlertEngine':
+        """Build an engine from rule dictionaries such as ALERT_RULES."""
+        return cls([AlertRule.from_dict(spec) for spec in specs], notifier=notifier, cooldown=cooldown)
+
+    def __call__(self, engine, timestamp: float, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Sample listener entry point."""
+        states = self._states.get(engine.target)
+        if states is None:
+            with self._lock:
+                states = self._states.get(engine.target)
+                if states is None:
+                    states = self._states[engine.target] = [
+                        (rule, _RuleState()) for rule in self.rules if self._watches(rule, engine)]
+
+        success = ttl is not None and ping_time is not None
+        for rule, state in states:
+            breached, value = self._evaluate(rule, state, engine, timestamp, ping_time if success else None)
+            state.value = value
+            if breached != state.firing:
+                self._transition(engine.target, rule, state, breached, timestamp)
+            elif state.firing and not state.notified and self._cooled_down(state, timestamp):
+                # A firing held back by the cooldown goes out once the cooldown has passed
+                self._notify(engine.target, rule, state, timestamp)
+        self.evaluations += len(states)
+
+    @staticmethod
+    def _watches(rule: AlertRule, engine) -> bool:
+        """Whether a rule applies to an engine's target and can be evaluated on it."""
+        if not rule.applies_to(engine.target):
+            return False
+        if rule.kind == 'failure_rate' and all(horizon.seconds != rule.horizon for horizon in engine.horizons.horizons):
+            logging.error(f"Alert rule {rule.name} skipped for {engine.target}: horizon {rule.horizon:g}s is not tracked")
+            return False
+        return True
+
+    def _cooled_down(self, state: _RuleState, timestamp: float) -> bool:
+        """Whether the cooldown since a rule's last firing notification has passed."""
+        return state.last_fired is None or timestamp - state.last_fired >= self.cooldown
+
+    def _evaluate(self, rule: AlertRule, state: _RuleState, engine, timestamp: float,
+                  ping_time: Optional[float]) -> Tuple[bool, Optional[float]]:
+        """Update a rule's state with one sample; returns (breached, current value)."""
+        if rule.kind == 'outage':
+            failures = engine.consecutive_failures
+            return failures >= rule.threshold, failures
+
+        if rule.kind == 'failure_rate':
+            totals = engine.get_horizon_totals(rule.horizon, timestamp)
+            if totals is None:
+                return False, None
+            count, failed, _, _ = totals
+            if count == 0:
+                return False, None
+            rate = failed / count * 100
+            return count >= rule.min_samples and rate > rule.threshold, rate
+
+        # p95_rtt: a sliding window kept both in arrival order and sorted
+        if ping_time is not None:
+            state.recent.append(ping_time)
+            bisect.insort(state.ordered, ping_time)
+            if len(state.recent) > rule.window:
+                del state.ordered[bisect.bisect_left(state.ordered, state.recent.popleft())]
+        p95 = percentile(state.ordered, 0.95)
+        return p95 is not None and len(state.ordered) >= rule.min_samples and p95 > rule.threshold, p95
+
+    def _transition(self, target: str, rule: AlertRule, state: _RuleState, firing: bool, timestamp: float) -> None:
+        """Record a rule starting or stopping to fire and notify it, holding back firings inside the cooldown."""
+        state.firing = firing
+        if firing:
+            state.since = timestamp
+            state.notified = False
+            if not self._cooled_down(state, timestamp):
+                self.suppressed += 1
+                return
+        elif not state.notified:
+            return
+        self._notify(target, rule, state, timestamp)
+
+    def _notify(self, target: str, rule: AlertRule, state: _RuleState, timestamp: float) -> None:
+        """Send a rule's current state for a target."""
+        if state.firing:
+            state.notified = True
+            state.last_fired = timestamp
+        self.notifications += 1
+        if self.notifier is not None:
+            self.notifier.notify({
+                'rule': rule.name,
+                'kind': rule.kind,
+                'target': target,
+                'state': 'firing' if state.firing else 'resolved',
+                'value': state.value,
+                'threshold': rule.threshold,
+                'since': state.since,
+                'timestamp': timestamp
+            })
+
+    def forget(self, target: str) -> None:
+        """Drop a removed target's rule states."""
+        with self._lock:
+            self._states.pop(target, None)
+
+    def firing(self) -> List[dict]:
+        """Alerts currently firing, oldest first."""
+        with self._lock:
+            items = [(target, list(states)) for target, states in self._states.items()]
+
+        alerts = [
+            {'rule': rule.name, 'kind': rule.kind, 'target': target, 'value': state.value,
+             'threshold': rule.threshold, 'since': state.since, 'notified': state.notified}
+            for target, states in items for rule, state in states if state.firing
+        ]
+        alerts.sort(key=lambda alert: alert['since'])
+        return alerts
+
+class WebhookNotifier:
+    """Delivers alert notifications to a webhook in batched JSON posts from a background thread.
+
+    Notifications wait in a bounded queue; when it is full the oldest are dropped and
+    counted. A batch is retried with exponential backoff until the webhook accepts it,
+    so notifications are delivered in order and at least once.
+    """
+
+    def __init__(self, url: str, batch_size: int = ALERT_BATCH_SIZE, flush_interval: float = ALERT_FLUSH_INTERVAL,
+                 max_queue: int = ALERT_MAX_QUEUE, timeout: float = ALERT_TIMEOUT,
+                 max_backoff: float = ALERT_MAX_BACKOFF):
+        # Configuration
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+
+        # Notifications not yet batched, and the batch awaiting acceptance
+        self.queue: deque = deque(maxlen=max_queue)
+        self._pending: Optional[List[dict]] = None
+
+        # Counters
+        self.batches_sent = 0
+        self.alerts_sent = 0
+        self.alerts_dropped = 0
+        self.send_failures = 0
+
+        # Threading controls
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._send_loop, daemon=True)
+        self._thread.start()
+
+    def notify(self, alert: dict) -> None:
+        """Queue one notification for delivery."""
+        with self._lock:
+            if len(self.queue) == self.queue.maxlen:
+                self.alerts_dropped += 1
+            self.queue.append(alert)
+            if len(self.queue) >= self.batch_size:
+                self._wakeup.set()
+
+    def _next_batch(self) -> Optional[List[dict]]:
+        """The unaccepted batch, or a new one cut from the queue."""
+        with self._lock:
+            if self._pending is None and self.queue:
+                count = min(len(self.queue), self.batch_size)
+                self._pending = [self.queue.popleft() for _ in range(count)]
+            return self._pending
+
+    def _send(self, alerts: List[dict]) -> None:
+        """POST one batch; raises on any transport or HTTP error."""
+        body = json.dumps({'alerts': alerts}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def flush(self) -> bool:
+        """Send batches until the queue is empty; returns False if the webhook is failing."""
+        while True:
+            alerts = self._next_batch()
+            if alerts is None:
+                return True
+            try:
+                self._send(alerts)
+            except Exception as e:
+                self.send_failures += 1
+                logging.error(f"Alert webhook {self.url} failed: {e}")
+                return False
+            with self._lock:
+                self._pending = None
+                self.batches_sent += 1
+                self.alerts_sent += len(alerts)
+
+    def _send_loop(self) -> None:
+        """Flush on a timer or when a batch fills, backing off while the webhook fails."""
+        backoff = self.flush_interval
+        while not self._closed:
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            if self.flush():
+                backoff = self.flush_interval
+            else:
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the background thread and try to deliver what is queued."""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not self.flush():
+            time.sleep(min(self.flush_interval, max(0.0, deadline - time.monotonic())))
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Offline bulk analyzer for archived ping output and collector sample files."""
+
+import re
+import sys
+import json
+import argparse
+from collections import deque
+from typing import Optional, Dict, Iterator, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .config import OUTAGE_THRESHOLD
+    from .statistics import StatisticsCalculator
+    from .sample_format import iter_samples, parse_sample_line, BINARY_MAGIC, TARGET_RECORD, SAMPLE_RECORD, MISSING_RTT
+except ImportError:
+    from config import OUTAGE_THRESHOLD
+    from statistics import StatisticsCalculator
+    from sample_format import iter_samples, parse_sample_line, BINARY_MAGIC, TARGET_RECORD, SAMPLE_RECORD, MISSING_RTT
+
+# Bytes read per chunk from large archives
+CHUNK_SIZE = 64 * 1024 * 1024
+
+# Samples grouped per target before being handed to the accumulator
+SAMPLE_BATCH_SIZE = 1024 * 1024
+
+# Matches replies ("icmp_seq=1 ttl=117 time=15.2") and sequence-only failure lines
+# ("no answer yet for icmp_seq=2", "icmp_seq=3 Destination Host Unreachable", "Request timeout for icmp_seq 4")
+_PING_LINE = re.compile(rb'icmp_seq[= ](\d+)(?: ttl=(\d+) time=(\d+(?:\.\d+)?))?')
+_PING_HEADER = re.compile(rb'^PING (\S+)', re.MULTILINE)
+
+class TargetAnalysis:
+    """Accumulates the live engine's statistics and outage runs for one target, chunk by chunk.
+
+    With a window, results match a PingEngine(max_points=window) fed the same samples;
+    without one, the whole archive is treated as a single window.
+    """
+
+    def __init__(self, target: str, window: Optional[int] = None, threshold: int = OUTAGE_THRESHOLD,
+                 use_numpy: Optional[bool] = None):
+        # Configuration
+        self.target = target
+        self.window = window
+        self.threshold = threshold
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+
+        # Overall counters
+        self.total = 0
+        self.failed = 0
+
+        # Open run of failures at the end of the data seen so far
+        self.run_length = 0
+
+        # Completed outages as (start position, length); only runs ended by a success count
+        self.outage_runs: List[Tuple[int, int]] = []
+
+        # Whole-archive RTT aggregates, accumulated in sample order
+        self.rtt_count = 0
+        self.rtt_sum = 0.0
+        self.rtt_min: Optional[float] = None
+        self.rtt_max: Optional[float] = None
+
+        # Most recent samples when a window is requested (None marks a failure)
+        self._tail = None
+        if window is not None:
+            self._tail = np.empty(0) if self.use_numpy else deque(maxlen=window)
+
+    def add_chunk(self, ttls: List[Optional[int]], rtts: List[Optional[float]]) -> None:
+        """Consume the next samples in order; a sample fails if its TTL or RTT is missing."""
+        if self.use_numpy:
+            self._add_chunk_numpy(ttls, rtts)
+        else:
+            self._add_chunk_python(ttls, rtts)
+
+    def _record_run(self, start: int, length: int) -> None:
+        """Record a failure run that was ended by a success, if it is long enough."""
+        if length >= self.threshold:
+            self.outage_runs.append((start, length))
+
+    def _add_chunk_python(self, ttls: List[Optional[int]], rtts: List[Optional[float]]) -> None:
+        """Pure-Python fallback: one pass over the samples."""
+        for ttl, rtt in zip(ttls, rtts):
+            position = self.total
+            self.total += 1
+            if ttl is not None and rtt is not None:
+                if self.run_length:
+                    self._record_run(position - self.run_length, self.run_length)
+                    self.run_length = 0
+                self.rtt_count += 1
+                self.rtt_sum += rtt
+                if self.rtt_min is None or rtt < self.rtt_min:
+                    self.rtt_min = rtt
+                if self.rtt_max is None or rtt > self.rtt_max:
+                    self.rtt_max = rtt
+            else:
+                rtt = None
+                self.failed += 1
+                self.run_length += 1
+            if self._tail is not None:
+                self._tail.append(rtt)
+
+    def _add_chunk_numpy(self, ttls, rtts) -> None:
+        """Vectorized path: failure runs by run-length encoding the failure mask."""
+        rtt = np.array([value if value is not None else np.nan for value in rtts], dtype=np.float64) \
+            if isinstance(rtts, list) else np.asarray(rtts, dtype=np.float64).copy()
+        if isinstance(ttls, list):
+            rtt[np.fromiter((ttl is None for ttl in ttls), dtype=bool, count=len(ttls))] = np.nan
+        else:
+            rtt[np.asarray(ttls) < 0] = np.nan
+
+        count = len(rtt)
+        if count == 0:
+            return
+        base = self.total
+        failures = np.isnan(rtt)
+
+        # Run boundaries: +1 where a failure run starts, -1 one past where it ends
+        edges = np.diff(np.concatenate(([0], failures.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        lengths = ends - starts
+        positions = starts + base
+
+        # Stitch the run left open by the previous chunk onto this one
+        if self.run_length:
+            if len(starts) and starts[0] == 0:
+                lengths[0] += self.run_length
+                positions[0] -= self.run_length
+            else:
+                self._record_run(base - self.run_length, self.run_length)
+
+        # A run reaching the end of the chunk stays open
+        self.run_length = 0
+        if len(ends) and ends[-1] == count:
+            self.run_length = int(lengths[-1])
+            lengths, positions = lengths[:-1], positions[:-1]
+
+        closed = lengths >= self.threshold
+        self.outage_runs.extend(zip(positions[closed].tolist(), lengths[closed].tolist()))
+
+        # RTT aggregates, summed sequentially like StatisticsCalculator does
+        successes = rtt[~failures]
+        if len(successes):
+            self.rtt_sum = float(np.cumsum(np.concatenate(([self.rtt_sum], successes)))[-1])
+            self.rtt_count += len(successes)
+            low, high = float(successes.min()), float(successes.max())
+            self.rtt_min = low if self.rtt_min is None else min(self.rtt_min, low)
+            self.rtt_max = high if self.rtt_max is None else max(self.rtt_max, high)
+
+        self.total += count
+        self.failed += int(failures.sum())
+        if self._tail is not None:
+            self._tail = np.concatenate((self._tail, rtt))[-self.window:]
+
+    def _window_ping_times(self) -> List[Optional[float]]:
+        """The last window samples as the engine's ping_times list."""
+        if self.use_numpy:
+            return [None if value != value else value for value in self._tail.tolist()]
+        return list(self._tail)
+
+    def result(self) -> dict:
+        """Statistics in the live engine's terms."""
+        if self.window is None:
+            # Whole archive as one window: every completed outage is still in view
+            outage_history = [length for _, length in self.outage_runs]
+            failure_rate = (self.failed / self.total * 100) if self.total > 0 else 0.0
+            avg_outage_duration = sum(outage_history) / len(outage_history) if outage_history else None
+            avg_ping_time = self.rtt_sum / self.rtt_count if self.rtt_count else None
+            min_ping_time, max_ping_time = self.rtt_min, self.rtt_max
+        else:
+            # An outage stays in the engine's history while the success that ended it is in the window
+            ping_times = self._window_ping_times()
+            window_start = self.total - self.window
+            outage_history = [length for start, length in self.outage_runs if start + length >= window_start]
+            window_failed = sum(1 for ping_time in ping_times if ping_time is None)
+            failure_rate = (window_failed / len(ping_times) * 100) if ping_times else 0.0
+            failure_rate, avg_ping_time, min_ping_time, max_ping_time, avg_outage_duration = \
+                StatisticsCalculator.calculate_statistics({
+                    'failure_rate': failure_rate, 'ping_times': ping_times, 'outage_history': outage_history
+                })
+
+        return {
+            'target': self.target,
+            'total_pings': self.total,
+            'failed_pings': self.failed,
+            'failure_rate': failure_rate,
+            'avg_ping_time': avg_ping_time,
+            'min_ping_time': min_ping_time,
+            'max_ping_time': max_ping_time,
+            'avg_outage_duration': avg_outage_duration,
+            'outage_history': outage_history,
+            'outage_runs': [list(run) for run in self.outage_runs],
+            'consecutive_failures': self.run_length
+        }
+
+def iter_ping_output_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[List[Optional[int]], List[Optional[float]]]]:
+    """Parse raw ping output in large chunks into (ttls, rtts) lists in sequence order.
+
+    Sequence gaps (ping without -O) count as lost probes; duplicates and late replies are ignored.
+    """
+    expected: Optional[int] = None
+    with open(path, 'rb') as stream:
+        leftover = b''
+        while True:
+            block = stream.read(chunk_size)
+            data = leftover + block
+            if block:
+                # Only parse complete lines; carry the partial last line into the next chunk
+                cut = data.rfind(b'\n') + 1
+                leftover, data = data[cut:], data[:cut]
+            elif not data:
+                return
+            else:
+                leftover = b''
+
+            ttls: List[Optional[int]] = []
+            rtts: List[Optional[float]] = []
+            for seq_text, ttl_text, time_text in _PING_LINE.findall(data):
+                sequence = int(seq_text)
+                if expected is not None:
+                    gap = (sequence - expected) & 0xFFFF
+                    if gap >= 0x8000:
+                        # Duplicate or reply to a probe already counted as lost
+                        continue
+                    ttls.extend([None] * gap)
+                    rtts.extend([None] * gap)
+                expected = (sequence + 1) & 0xFFFF
+                if ttl_text:
+                    ttls.append(int(ttl_text))
+                    rtts.append(float(time_text))
+                else:
+                    ttls.append(None)
+                    rtts.append(None)
+            yield ttls, rtts
+            if not block:
+                return
+
+def iter_binary_sample_arrays(path: str, chunk_size: int = CHUNK_SIZE):
+    """Decode a binary sample file in bulk, yielding (names, target_ids, ttls, rtts) arrays per chunk.
+
+    Runs of fixed-size sample records are decoded with one frombuffer call; only the rare
+    target-definition records are handled in Python. Failures have ttl -1 and rtt NaN.
+    """
+    target_size = TARGET_RECORD.size
+    sample_size = SAMPLE_RECORD.size
+    record_dtype = np.dtype([('tag', 'S1'), ('target', '<u2'), ('timestamp', '<f8'),
+                             ('ttl', '<i2'), ('rtt_us', '<u4')])
+    names: Dict[int, str] = {}
+
+    with open(path, 'rb') as stream:
+        if stream.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary sample file")
+
+        leftover = b''
+        while True:
+            block = stream.read(chunk_size)
+            data = leftover + block
+            if not data:
+                return
+            buffer = np.frombuffer(data, dtype=np.uint8)
+            position, parts = 0, []
+
+            while position < len(data):
+                if buffer[position] == ord('T'):
+                    if position + target_size > len(data):
+                        break
+                    _, target_id, length = TARGET_RECORD.unpack_from(data, position)
+                    if position + target_size + length > len(data):
+                        break
+                    names[target_id] = data[position + target_size:position + target_size + length].decode('utf-8')
+                    position += target_size + length
+                    continue
+
+                # Count the sample records that follow before the next target record
+                complete = (len(data) - position) // sample_size
+                tags = buffer[position:position + complete * sample_size:sample_size]
+                others = np.flatnonzero(tags != ord('S'))
+                run = int(others[0]) if len(others) else complete
+                if run == 0:
+                    if complete == 0:
+                        break
+                    raise ValueError(f"Unknown record tag at offset {position}")
+                parts.append(np.frombuffer(data, dtype=record_dtype, count=run, offset=position))
+                position += run * sample_size
+
+            leftover = data[position:]
+            if parts:
+                records = np.concatenate(parts)
+                missing = (records['ttl'] < 0) | (records['rtt_us'] == MISSING_RTT)
+                rtts = records['rtt_us'] / 1000
+                rtts[missing] = np.nan
+                yield names, records['target'], records['ttl'].astype(np.int64), rtts
+            if not block:
+                return
+
+def ping_output_target(path: str) -> Optional[str]:
+    """Read the target name from a ping header line, if present."""
+    with open(path, 'rb') as stream:
+        match = _PING_HEADER.search(stream.read(4096))
+    return match.group(1).decode('utf-8', 'replace') if match else None
+
+def _is_binary(path: str) -> bool:
+    """Check for the binary sample magic."""
+    with open(path, 'rb') as stream:
+        return stream.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def detect_format(path: str) -> str:
+    """Guess whether a file holds collector samples or raw ping output."""
+    with open(path, 'rb') as stream:
+        head = stream.read(4096)
+    if head.startswith(BINARY_MAGIC):
+        return 'samples'
+    first_line = head.split(b'\n', 1)[0].decode('utf-8', 'replace')
+    return 'samples' if parse_sample_line(first_line) is not None else 'ping'
+
+def analyze_file(path: str, file_format: str = 'auto', window: Optional[int] = None,
+                 threshold: int = OUTAGE_THRESHOLD, target: Optional[str] = None,
+                 use_numpy: Optional[bool] = None) -> Dict[str, dict]:
+    """Analyze an archive and return per-target results."""
+    if file_format == 'auto':
+        file_format = detect_format(path)
+
+    analyses: Dict[str, TargetAnalysis] = {}
+
+    def analysis_for(name: str) -> TargetAnalysis:
+        if name not in analyses:
+            analyses[name] = TargetAnalysis(name, window=window, threshold=threshold, use_numpy=use_numpy)
+        return analyses[name]
+
+    if file_format == 'ping':
+        analysis = analysis_for(target or ping_output_target(path) or path)
+        for ttls, rtts in iter_ping_output_chunks(path):
+            analysis.add_chunk(ttls, rtts)
+    elif np is not None and use_numpy is not False and _is_binary(path):
+        # Vectorized decode, then split each chunk by target
+        for names, target_ids, ttls, rtts in iter_binary_sample_arrays(path):
+            for target_id in np.unique(target_ids).tolist():
+                name = names.get(target_id, str(target_id))
+                if target is not None and name != target:
+                    continue
+                mask = target_ids == target_id
+                analysis_for(name).add_chunk(ttls[mask], rtts[mask])
+    else:
+        # Group interleaved multi-target samples into per-target batches
+        pending: Dict[str, Tuple[list, list]] = {}
+        buffered = 0
+        for _, name, ttl, ping_time in iter_samples(path):
+            if target is not None and name != target:
+                continue
+            ttls, rtts = pending.setdefault(name, ([], []))
+            ttls.append(ttl)
+            rtts.append(ping_time)
+            buffered += 1
+            if buffered >= SAMPLE_BATCH_SIZE:
+                for batch_name, (batch_ttls, batch_rtts) in pending.items():
+                    analysis_for(batch_name).add_chunk(batch_ttls, batch_rtts)
+                pending.clear()
+                buffered = 0
+        for batch_name, (batch_ttls, batch_rtts) in pending.items():
+            analysis_for(batch_name).add_chunk(batch_ttls, batch_rtts)
+
+    return {name: analysis.result() for name, analysis in analyses.items()}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the offline analyzer."""
+    parser = argparse.ArgumentParser(description="Analyze archived ping output or collector sample files")
+    parser.add_argument('path', help="file with raw ping output or collector samples")
+    parser.add_argument('--format', choices=['auto', 'ping', 'samples'], default='auto')
+    parser.add_argument('--window', type=int, default=None, help="reproduce a live engine with this max_points")
+    parser.add_argument('--threshold', type=int, default=OUTAGE_THRESHOLD, help="consecutive failures that make an outage")
+    parser.add_argument('--target', default=None, help="target name (ping output) or filter (samples)")
+    parser.add_argument('--no-numpy', action='store_true', help="force the pure-Python path")
+    parser.add_argument('--json', action='store_true', help="print full results as JSON")
+    args = parser.parse_args(argv)
+
+    results = analyze_file(args.path, file_format=args.format, window=args.window, threshold=args.threshold,
+                           target=args.target, use_numpy=False if args.no_numpy else None)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    for name, result in results.items():
+        print(f"{name}: {result['total_pings']} pings, {result['failed_pings']} failed, "
+              f"failure rate {result['failure_rate']:.2f}%")
+        if result['avg_ping_time'] is not None:
+            print(f"  ping time avg/min/max: {result['avg_ping_time']:.3f} / "
+                  f"{result['min_ping_time']:.3f} / {result['max_ping_time']:.3f} ms")
+        print(f"  outages: {len(result['outage_history'])}"
+              + (f", avg duration {result['avg_outage_duration']:.2f} pings" if result['avg_outage_duration'] else ""))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
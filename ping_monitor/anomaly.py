@@ -0,0 +1,181 @@
+"""Online latency anomaly detection with EWMA bands and CUSUM change points."""
+
+import math
+from typing import Optional, NamedTuple, Tuple
+
+try:
+    from .config import (ANOMALY_ALPHA, ANOMALY_WARMUP, ANOMALY_BAND, ANOMALY_CUSUM_DRIFT,
+                         ANOMALY_CUSUM_THRESHOLD, ANOMALY_MIN_STD)
+except ImportError:
+    from config import (ANOMALY_ALPHA, ANOMALY_WARMUP, ANOMALY_BAND, ANOMALY_CUSUM_DRIFT,
+                        ANOMALY_CUSUM_THRESHOLD, ANOMALY_MIN_STD)
+
+class AnomalyEvent(NamedTuple):
+    """A sustained latency level shift detected on one target."""
+    target: str
+    start_time: float
+    detected_time: float
+    direction: str
+    baseline_rtt: float
+    observed_rtt: float
+    samples: int
+
+    def to_dict(self) -> dict:
+        """Serialize the event for JSON output."""
+        return {
+            'target': self.target,
+            'start_time': self.start_time,
+            'detected_time': self.detected_time,
+            'direction': self.direction,
+            'baseline_rtt': self.baseline_rtt,
+            'observed_rtt': self.observed_rtt,
+            'samples': self.samples
+        }
+
+# Returned by LatencyAnomalyDetector.update: (direction, start_time, baseline_rtt, observed_rtt, samples)
+Shift = Tuple[str, float, float, float, int]
+
+class LatencyAnomalyDetector:
+    """Tracks an EWMA baseline of RTT and flags level shifts with a two-sided CUSUM.
+
+    Each sample is standardized against the baseline band and clipped to it, so a
+    lone spike only nudges the CUSUM while a sustained shift crosses the threshold
+    within a few samples. After a shift the baseline is re-anchored at the new level.
+    Every update is O(1) with a handful of float operations.
+    """
+
+    __slots__ = ('alpha', 'warmup', 'band', 'drift', 'threshold', 'min_std',
+                 'samples', 'mean', 'var', 'outliers',
+                 'high', 'high_sum', 'high_count', 'high_start',
+                 'low', 'low_sum', 'low_count', 'low_start')
+
+    def __init__(self, alpha: float = ANOMALY_ALPHA, warmup: int = ANOMALY_WARMUP,
+                 band: float = ANOMALY_BAND, drift: float = ANOMALY_CUSUM_DRIFT,
+                 threshold: float = ANOMALY_CUSUM_THRESHOLD, min_std: float = ANOMALY_MIN_STD):
+        # Configuration
+        self.alpha = alpha
+        self.warmup = warmup
+        self.band = band
+        self.drift = drift
+        self.threshold = threshold
+        self.min_std = min_std
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the baseline and any accumulated evidence."""
+        # EWMA baseline
+        self.samples = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.outliers = 0
+
+        # Upper and lower CUSUM statistics with the RTTs accumulated since each left zero
+        self._clear_cusum()
+
+    def _clear_cusum(self) -> None:
+        """Reset both CUSUM statistics."""
+        self.high = 0.0
+        self.high_sum = 0.0
+        self.high_count = 0
+        self.high_start = 0.0
+        self.low = 0.0
+        self.low_sum = 0.0
+        self.low_count = 0
+        self.low_start = 0.0
+
+    def export_state(self) -> Tuple[int, float, float, int]:
+        """Baseline state for snapshots; pending CUSUM evidence is not kept."""
+        return self.samples, self.mean, self.var, self.outliers
+
+    def restore_state(self, state: Tuple[int, float, float, int]) -> None:
+        """Load a baseline exported by export_state."""
+        self.reset()
+        self.samples, self.mean, self.var, self.outliers = state
+
+    @property
+    def std(self) -> float:
+        """Baseline standard deviation, floored so very stable links don't alarm on jitter."""
+        return max(math.sqrt(self.var), self.min_std)
+
+    def band_limits(self) -> Optional[Tuple[float, float]]:
+        """Current (lower, upper) RTT band, or None while warming up."""
+        if self.samples <= self.warmup:
+            return None
+        spread = self.band * self.std
+        return self.mean - spread, self.mean + spread
+
+    def _learn(self, rtt: float, alpha: float) -> None:
+        """Fold one RTT into the EWMA mean and variance."""
+        diff = rtt - self.mean
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff * diff)
+
+    def update(self, rtt: float, timestamp: float) -> Optional[Shift]:
+        """Process one successful RTT; returns a shift tuple when a level change is detected."""
+        self.samples += 1
+
+        # Warm up with a cumulative average so the baseline converges quickly
+        if self.samples == 1:
+            self.mean = rtt
+            return None
+        if self.samples <= self.warmup:
+            self._learn(rtt, max(self.alpha, 1 / self.samples))
+            return None
+
+        # Locals and plain comparisons keep this path under a microsecond
+        band = self.band
+        drift = self.drift
+        std = math.sqrt(self.var)
+        if std < self.min_std:
+            std = self.min_std
+        z = (rtt - self.mean) / std
+        clipped = band if z > band else (-band if z < -band else z)
+
+        # Upper CUSUM: evidence that latency rose
+        high = self.high
+        if high == 0.0:
+            self.high_start = timestamp
+        high += clipped - drift
+        if high > 0.0:
+            self.high_sum += rtt
+            self.high_count += 1
+        else:
+            high = 0.0
+            self.high_sum, self.high_count = 0.0, 0
+        self.high = high
+
+        # Lower CUSUM: evidence that latency fell
+        low = self.low
+        if low == 0.0:
+            self.low_start = timestamp
+        low -= clipped + drift
+        if low > 0.0:
+            self.low_sum += rtt
+            self.low_count += 1
+        else:
+            low = 0.0
+            self.low_sum, self.low_count = 0.0, 0
+        self.low = low
+
+        threshold = self.threshold
+        if high > threshold:
+            return self._shift('up', self.high_start, self.high_sum, self.high_count)
+        if low > threshold:
+            return self._shift('down', self.low_start, self.low_sum, self.low_count)
+
+        # Outliers only move the baseline as far as the band edge
+        if clipped != z:
+            self.outliers += 1
+        diff = clipped * std
+        alpha = self.alpha
+        self.mean += alpha * diff
+        self.var = (1 - alpha) * (self.var + alpha * diff * diff)
+        return None
+
+    def _shift(self, direction: str, start_time: float, rtt_sum: float, count: int) -> Shift:
+        """Report a level shift and re-anchor the baseline at the new level."""
+        baseline = self.mean
+        observed = rtt_sum / count
+        self.mean = observed
+        self._clear_cusum()
+        return direction, start_time, baseline, observed, count
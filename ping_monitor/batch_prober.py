@@ -0,0 +1,212 @@
+"""Batched ICMP echo probing of many targets through a single socket."""
+
+import os
+import time
+import errno
+import select
+import socket
+import struct
+import logging
+from typing import Optional, Dict, List, Tuple
+
+try:
+    from .config import PING_TIMEOUT
+except ImportError:
+    from config import PING_TIMEOUT
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# Linux value; the socket module does not export it
+IP_RECVTTL = getattr(socket, 'IP_RECVTTL', 12)
+
+# Largest batch that keeps sequence numbers unique within one burst
+MAX_BATCH_SIZE = 0xFFFF
+
+# Replies arrive while the burst is still going out; size the buffer for a large fleet
+RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024
+
+_HEADER = struct.Struct('!BBHHH')
+_PAYLOAD = b'ping_monitor'.ljust(32, b'\x00')
+
+def icmp_checksum(data: bytes) -> int:
+    """Compute the RFC 1071 Internet checksum."""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+def build_echo_request(identifier: int, sequence: int, payload: bytes = _PAYLOAD) -> bytes:
+    """Build an ICMP echo request packet."""
+    header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = icmp_checksum(header + payload)
+    return _HEADER.pack(ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+def parse_echo_reply(packet: bytes, has_ip_header: bool) -> Optional[Tuple[int, int, Optional[int]]]:
+    """Extract (identifier, sequence, ttl) from an echo reply, or None for other packets."""
+    ttl = None
+    if has_ip_header:
+        if len(packet) < 20:
+            return None
+        header_length = (packet[0] & 0x0F) * 4
+        ttl = packet[8]
+        packet = packet[header_length:]
+
+    if len(packet) < _HEADER.size:
+        return None
+    icmp_type, _, _, identifier, sequence = _HEADER.unpack_from(packet)
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    return identifier, sequence, ttl
+
+def ancillary_ttl(ancillary: list) -> Optional[int]:
+    """TTL from recvmsg ancillary data on a socket with IP_RECVTTL set, if present.
+
+    The kernel reports it under the IP_TTL message type, not IP_RECVTTL.
+    """
+    for level, kind, value in ancillary:
+        if level == socket.IPPROTO_IP and kind in (socket.IP_TTL, IP_RECVTTL) and len(value) >= 4:
+            return struct.unpack('=i', value[:4])[0]
+    return None
+
+def open_icmp_socket() -> Tuple[socket.socket, bool]:
+    """Open an unprivileged ICMP datagram socket, falling back to a raw socket.
+
+    Returns the socket and whether received packets carry an IP header.
+    """
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        sock.setsockopt(socket.IPPROTO_IP, IP_RECVTTL, 1)
+        return sock, False
+    except OSError:
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+
+class BatchProber:
+    """Sends one echo request to every target in a single burst and drains replies in bulk."""
+
+    def __init__(self, timeout: float = PING_TIMEOUT, sock: Optional[socket.socket] = None,
+                 has_ip_header: Optional[bool] = None):
+        # Configuration
+        self.timeout = timeout
+
+        # One socket shared by every target
+        if sock is None:
+            sock, has_ip_header = open_icmp_socket()
+        self.sock = sock
+        self.has_ip_header = bool(has_ip_header)
+        self.sock.setblocking(False)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+        except (OSError, AttributeError):
+            pass
+
+        # Raw sockets see every ICMP packet on the host, so replies are matched by identifier.
+        # Datagram sockets get only their own replies with the identifier rewritten by the kernel.
+        self.identifier = os.getpid() & 0xFFFF
+        self._next_sequence = 0
+
+        # Counters for benchmarking
+        self.packets_sent = 0
+        self.packets_received = 0
+
+    def _allocate_sequences(self, count: int) -> int:
+        """Reserve a contiguous block of sequence numbers and return the first one."""
+        first = self._next_sequence
+        self._next_sequence = (first + count) & 0xFFFF
+        return first
+
+    def _send_burst(self, addresses: List[Tuple[str, str]], first_sequence: int,
+                    pending: Dict[int, Tuple[str, str, float]]) -> None:
+        """Send echo requests for all targets back to back."""
+        sendto = self.sock.sendto
+        for offset, (target, address) in enumerate(addresses):
+            sequence = (first_sequence + offset) & 0xFFFF
+            packet = build_echo_request(self.identifier, sequence)
+            try:
+                sendto(packet, (address, 0))
+            except BlockingIOError:
+                # Socket buffer full: wait for room rather than drop the probe
+                select.select([], [self.sock], [], self.timeout)
+                try:
+                    sendto(packet, (address, 0))
+                except OSError:
+                    continue
+            except OSError as e:
+                logging.error(f"Failed to send echo request to {target}: {e}")
+                continue
+            pending[sequence] = (target, address, time.perf_counter())
+            self.packets_sent += 1
+
+    def _receive(self) -> Optional[Tuple[bytes, str, Optional[int]]]:
+        """Read one packet, returning (data, source, ttl) or None when drained."""
+        try:
+            if self.has_ip_header:
+                data, source = self.sock.recvfrom(65535)
+                return data, source[0], None
+
+            data, ancillary, _, source = self.sock.recvmsg(65535, socket.CMSG_SPACE(4))
+        except (BlockingIOError, InterruptedError):
+            return None
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return None
+            raise
+
+        return data, source[0], ancillary_ttl(ancillary)
+
+    def _drain_replies(self, pending: Dict[int, Tuple[str, str, float]],
+                       results: Dict[str, Tuple[Optional[int], Optional[float]]], deadline: float) -> None:
+        """Collect replies until every probe is answered or the deadline passes."""
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([self.sock], [], [], remaining)
+            if not readable:
+                break
+
+            # Drain everything queued on the socket before waiting again
+            while pending:
+                received = self._receive()
+                if received is None:
+                    break
+                data, source, ttl = received
+                received_at = time.perf_counter()
+
+                reply = parse_echo_reply(data, self.has_ip_header)
+                if reply is None:
+                    continue
+                identifier, sequence, header_ttl = reply
+                if self.has_ip_header and identifier != self.identifier:
+                    continue
+
+                # Demultiplex by sequence and check the reply came from the probed address
+                entry = pending.get(sequence)
+                if entry is None or entry[1] != source:
+                    continue
+                target, _, sent_at = pending.pop(sequence)
+                ttl = header_ttl if header_ttl is not None else ttl
+                results[target] = (ttl, round((received_at - sent_at) * 1000.0, 3))
+                self.packets_received += 1
+
+    def probe(self, addresses: Dict[str, str]) -> Dict[str, Tuple[Optional[int], Optional[float]]]:
+        """Probe every target once and return (ttl, ping_time) per target.
+
+        addresses maps target names to resolved IPv4 addresses; unanswered targets get (None, None).
+        """
+        results: Dict[str, Tuple[Optional[int], Optional[float]]] = {target: (None, None) for target in addresses}
+        items = list(addresses.items())
+
+        for start in range(0, len(items), MAX_BATCH_SIZE):
+            batch = items[start:start + MAX_BATCH_SIZE]
+            pending: Dict[int, Tuple[str, str, float]] = {}
+            self._send_burst(batch, self._allocate_sequences(len(batch)), pending)
+            self._drain_replies(pending, results, time.perf_counter() + self.timeout)
+
+        return results
+
+    def close(self) -> None:
+        """Close the shared socket."""
+        self.sock.close()
@@ -0,0 +1,140 @@
+"""Packed success/failure bits for a sliding sample window."""
+
+from array import array
+from typing import List, Tuple, Iterable
+
+WORD_BITS = 64
+FULL_WORD = (1 << WORD_BITS) - 1
+
+class FailureBitmap:
+    """Sliding window of failure bits packed into 64-bit words.
+
+    The window occupies bits [start, end) of a buffer twice its capacity; when the end
+    reaches the buffer's end the window is shifted back to bit 0 in one big-integer
+    operation, so appends are amortized O(1). The failure count is kept up to date on
+    every append, and outage runs are found by scanning words: all-zero and all-one
+    words are skipped whole and only mixed words are examined bit by bit.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._words_count = (2 * capacity + WORD_BITS - 1) // WORD_BITS
+        self._words = array('Q', bytes(8 * self._words_count))
+        self._start = 0
+        self._end = 0
+        self._failures = 0
+
+    @classmethod
+    def from_positions(cls, capacity: int, length: int, positions: Iterable[int]) -> 'FailureBitmap':
+        """A window of length samples whose failures are at the given positions."""
+        bitmap = cls(capacity)
+        bitmap._end = length
+        words = bitmap._words
+        for position in positions:
+            words[position >> 6] |= 1 << (position & 63)
+            bitmap._failures += 1
+        return bitmap
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def count(self) -> int:
+        """Failures in the window."""
+        return self._failures
+
+    def clear(self) -> None:
+        """Drop every sample."""
+        self.__init__(self.capacity)
+
+    def _compact(self) -> None:
+        """Move the window back to bit 0 of the buffer."""
+        size = 8 * self._words_count
+        packed = int.from_bytes(self._words.tobytes(), 'little') >> self._start
+        self._words = array('Q', packed.to_bytes(size, 'little'))
+        self._end -= self._start
+        self._start = 0
+
+    def append(self, failed: bool) -> None:
+        """Add the newest sample, evicting the oldest once the window is full."""
+        if self._end - self._start == self.capacity:
+            word, bit = self._start >> 6, self._start & 63
+            if self._words[word] >> bit & 1:
+                self._failures -= 1
+            self._start += 1
+        if self._end == self._words_count * WORD_BITS:
+            self._compact()
+
+        word, bit = self._end >> 6, self._end & 63
+        if failed:
+            self._words[word] |= 1 << bit
+            self._failures += 1
+        else:
+            self._words[word] &= FULL_WORD ^ (1 << bit)
+        self._end += 1
+
+    def count_range(self, start: int, end: int) -> int:
+        """Failures among window positions [start, end), by popcount over whole words."""
+        start, end = max(start, 0) + self._start, min(end, len(self)) + self._start
+        if start >= end:
+            return 0
+        first, last = start >> 6, (end - 1) >> 6
+        low_mask = FULL_WORD ^ ((1 << (start & 63)) - 1)
+        high_mask = (1 << ((end - 1) & 63) + 1) - 1
+        if first == last:
+            return (self._words[first] & low_mask & high_mask).bit_count()
+        total = (self._words[first] & low_mask).bit_count() + (self._words[last] & high_mask).bit_count()
+        if last - first > 1:
+            total += int.from_bytes(self._words[first + 1:last].tobytes(), 'little').bit_count()
+        return total
+
+    def runs(self, min_length: int = 1) -> List[Tuple[int, int]]:
+        """Failure runs of at least min_length as (window position, length), oldest first.
+
+        A run touching the newest sample is still open and is included; one touching the
+        oldest sample may have started before the window.
+        """
+        result = []
+        if self._end == self._start:
+            return result
+
+        first, last = self._start >> 6, (self._end - 1) >> 6
+        run_start = None
+        base = first * WORD_BITS - self._start  # Window position of bit 0 of the current word
+        words = self._words
+        for index in range(first, last + 1):
+            word = words[index]
+            if index == first:
+                word &= FULL_WORD ^ ((1 << (self._start & 63)) - 1)
+            if index == last:
+                word &= (1 << ((self._end - 1) & 63) + 1) - 1
+
+            if word == 0:
+                if run_start is not None:
+                    if base - run_start >= min_length:
+                        result.append((run_start, base - run_start))
+                    run_start = None
+            elif word == FULL_WORD:
+                if run_start is None:
+                    run_start = base
+            else:
+                # Mixed word: alternate between the ends of one-runs and zero-runs
+                bit = 0
+                while bit < WORD_BITS:
+                    rest = word >> bit
+                    if run_start is not None:
+                        bit += (~rest & (rest + 1)).bit_length() - 1
+                        if bit >= WORD_BITS:
+                            break
+                        if base + bit - run_start >= min_length:
+                            result.append((run_start, base + bit - run_start))
+                        run_start = None
+                        rest = word >> bit
+                    if rest == 0:
+                        break
+                    bit += (rest & -rest).bit_length() - 1
+                    run_start = base + bit
+            base += WORD_BITS
+
+        if run_start is not None and len(self) - run_start >= min_length:
+            result.append((run_start, len(self) - run_start))
+        return result
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Headless collector: runs only the probing engine and streams samples, without the web stack."""
+
+import sys
+import signal
+import socket
+import argparse
+import threading
+from typing import Optional, List
+
+try:
+    from .config import DEFAULT_TARGET, DEFAULT_MAX_POINTS, PING_INTERVAL, SHARED_STORE_CAPACITY, ALERT_RULES
+    from .ping_engine import PingEngine
+    from .scheduler import ProbeScheduler
+    from .sample_format import LineSampleWriter, BinarySampleWriter
+except ImportError:
+    from config import DEFAULT_TARGET, DEFAULT_MAX_POINTS, PING_INTERVAL, SHARED_STORE_CAPACITY, ALERT_RULES
+    from ping_engine import PingEngine
+    from scheduler import ProbeScheduler
+    from sample_format import LineSampleWriter, BinarySampleWriter
+
+class Collector:
+    """Probes targets through the shared scheduler and streams every sample to a writer."""
+
+    def __init__(self, targets: List[str], writer, interval: float = PING_INTERVAL,
+                 max_points: int = DEFAULT_MAX_POINTS, batch: bool = False, count: Optional[int] = None,
+                 shared_store: Optional[str] = None, snapshot: Optional[str] = None, stream: bool = False,
+                 alert_webhook: Optional[str] = None):
+        # Configuration
+        self.writer = writer
+        self.count = count
+
+        # Sample accounting so the collector can stop after a fixed number of samples
+        self.samples_written = 0
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+        batch_prober = None
+        if batch:
+            try:
+                from .batch_prober import BatchProber
+            except ImportError:
+                from batch_prober import BatchProber
+            batch_prober = BatchProber()
+
+        # Persistent ping processes for hosts where raw sockets are not permitted
+        ping_streamer = None
+        if stream:
+            try:
+                from .ping_stream import StreamingPinger
+            except ImportError:
+                from ping_stream import StreamingPinger
+            ping_streamer = StreamingPinger(interval=interval)
+
+        # Optionally publish every engine into shared memory for read-only API workers
+        self.shared_store = None
+        if shared_store:
+            try:
+                from .shared_store import SharedSampleStore
+            except ImportError:
+                from shared_store import SharedSampleStore
+            self.shared_store = SharedSampleStore(name=shared_store, capacity=max(SHARED_STORE_CAPACITY, len(targets)),
+                                                  max_points=max_points)
+
+        # Optionally evaluate ALERT_RULES on every sample and post notifications to a webhook
+        self.notifier = None
+        alerts = None
+        if alert_webhook:
+            try:
+                from .alerts import AlertEngine, WebhookNotifier
+            except ImportError:
+                from alerts import AlertEngine, WebhookNotifier
+            self.notifier = WebhookNotifier(alert_webhook)
+            alerts = AlertEngine.from_config(ALERT_RULES, notifier=self.notifier)
+
+        self.scheduler = ProbeScheduler(max_points=max_points, interval=interval, batch_prober=batch_prober,
+                                        snapshot_path=snapshot, ping_streamer=ping_streamer, alerts=alerts)
+        for target in targets:
+            engine = self.scheduler.add_target(target)
+            if self.shared_store is not None:
+                self.shared_store.attach(engine)
+            engine.add_sample_listener(self._on_sample)
+
+    def _on_sample(self, engine: PingEngine, timestamp: float, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Stream one sample and stop once the requested count is reached."""
+        with self._lock:
+            if self.done.is_set():
+                return
+            if self.writer is not None:
+                self.writer.write(timestamp, engine.target, ttl, ping_time)
+            self.samples_written += 1
+            if self.count is not None and self.samples_written >= self.count:
+                self.done.set()
+
+    def run(self) -> None:
+        """Collect until the sample count is reached or the process is interrupted."""
+        self.scheduler.start()
+        try:
+            while not self.done.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.scheduler.stop()
+            if self.shared_store is not None:
+                self.shared_store.close()
+            if self.notifier is not None:
+                self.notifier.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the headless collector."""
+    parser = argparse.ArgumentParser(description="Headless ping collector")
+    parser.add_argument('targets', nargs='*', default=[DEFAULT_TARGET], help="targets to probe")
+    parser.add_argument('-o', '--output', default='-', help="output file, or - for stdout")
+    parser.add_argument('-f', '--format', choices=['line', 'binary'], default='line', help="sample format")
+    parser.add_argument('-i', '--interval', type=float, default=PING_INTERVAL, help="seconds between probes")
+    parser.add_argument('-c', '--count', type=int, default=None, help="stop after this many samples")
+    parser.add_argument('--batch', action='store_true', help="probe all targets through one ICMP socket")
+    parser.add_argument('--stream', action='store_true',
+                        help="keep one persistent ping process per target instead of one per sample")
+    parser.add_argument('--shared-store', default=None, metavar='NAME',
+                        help="publish samples to this shared memory region for read-only API workers")
+    parser.add_argument('--snapshot', default=None, metavar='PATH',
+                        help="save engine state here periodically and restore it on startup")
+    parser.add_argument('--push', default=None, metavar='URL',
+                        help="push samples to the aggregator at this URL instead of writing them out")
+    parser.add_argument('--site', default=None, help="site name reported to the aggregator (default: hostname)")
+    parser.add_argument('--alert-webhook', default=None, metavar='URL',
+                        help="evaluate ALERT_RULES from config.py and post notifications to this URL")
+    args = parser.parse_args(argv)
+
+    # Open the sample sink
+    binary = args.format == 'binary'
+    stream = None
+    if args.push:
+        try:
+            from .push import PushClient
+        except ImportError:
+            from push import PushClient
+        writer = PushClient(args.push, args.site or socket.gethostname())
+    elif args.output == '-':
+        stream = sys.stdout.buffer if binary else sys.stdout
+    else:
+        # Binary streams carry their own header and target table, so they always start fresh
+        stream = open(args.output, 'wb') if binary else open(args.output, 'a', encoding='utf-8')
+    if stream is not None:
+        writer = BinarySampleWriter(stream) if binary else LineSampleWriter(stream)
+
+    collector = Collector(args.targets, writer, interval=args.interval, batch=args.batch, count=args.count,
+                          shared_store=args.shared_store, snapshot=args.snapshot, stream=args.stream,
+                          alert_webhook=args.alert_webhook)
+
+    # Treat SIGTERM like Ctrl+C so service managers stop the collector cleanly
+    signal.signal(signal.SIGTERM, lambda signum, frame: collector.done.set())
+    collector.run()
+
+    if stream is None:
+        writer.close()
+    elif stream not in (sys.stdout, sys.stdout.buffer):
+        stream.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
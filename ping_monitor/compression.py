@@ -0,0 +1,119 @@
+"""Response compression with content negotiation and per-version caching."""
+
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Optional, Callable, Dict, Hashable, List, Tuple
+
+try:
+    from .config import COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY, ZSTD_LEVEL
+except ImportError:
+    from config import COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY, ZSTD_LEVEL
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    """Build the compressors available in this environment."""
+    compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+    if zstandard is not None:
+        compressors['zstd'] = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress
+    return compressors
+
+COMPRESSORS = _compressors()
+
+# Server preference when the client weights several encodings equally
+PREFERENCE = ['br', 'zstd', 'gzip']
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Optional[List[str]] = None) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    available = [name for name in PREFERENCE if name in (available or COMPRESSORS)]
+
+    # Parse "name;q=weight" entries
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        fields = part.strip().split(';')
+        name = fields[0].strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for field in fields[1:]:
+            key, _, value = field.strip().partition('=')
+            if key.strip() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name] = weight
+
+    best, best_weight = None, 0.0
+    for name in available:
+        weight = weights.get(name, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+class CompressedPayloadCache:
+    """Caches each payload once per version, plus one compressed copy per encoding.
+
+    N clients polling the same unchanged payload cost one serialization and one
+    compression per encoding; a new version (e.g. a new sample) replaces the entry.
+    With max_entries set, the least recently used keys are evicted beyond that many.
+    """
+
+    def __init__(self, min_size: int = COMPRESSION_MIN_SIZE, max_entries: Optional[int] = None):
+        self.min_size = min_size
+        self.max_entries = max_entries
+        # key -> (version, {encoding or None: bytes}), least recently used first
+        self._entries: 'OrderedDict[Hashable, Tuple[Hashable, Dict[Optional[str], bytes]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters for benchmarking
+        self.builds = 0
+        self.compressions = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], bytes],
+            encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """Return (body, applied_encoding) for key at version, building and compressing on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                entry = (version, {})
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            variants = entry[1]
+
+            body = variants.get(None)
+            if body is None:
+                body = variants[None] = build()
+                self.builds += 1
+
+            # Small bodies aren't worth the header and CPU overhead
+            if encoding is None or encoding not in COMPRESSORS or len(body) < self.min_size:
+                return body, None
+
+            compressed = variants.get(encoding)
+            if compressed is None:
+                compressed = variants[encoding] = COMPRESSORS[encoding](body)
+                self.compressions += 1
+            return compressed, encoding
+
+    def discard(self, key: Hashable) -> None:
+        """Drop a cached payload, e.g. when its target is removed."""
+        with self._lock:
+            self._entries.pop(key, None)
@@ -6,9 +6,113 @@ PING_INTERVAL = 1
 DEFAULT_TARGET = "8.8.8.8"
 DEFAULT_MAX_POINTS = 300
 
+# Streaming ping settings: one persistent `ping -O -i <interval>` process per target
+# instead of one `ping -c 1` per sample, for hosts without raw socket access
+STREAM_PINGS = False  # Set to stream ICMP targets through persistent ping processes in the web app
+PING_COMMAND = ("ping",)
+STREAM_RESTART_DELAY = 1.0  # Seconds before restarting a ping process that exited; doubles while it keeps failing
+STREAM_MAX_RESTART_DELAY = 30.0
+
+# DNS cache settings (seconds; refresh-ahead is a fraction of the record TTL)
+DNS_DEFAULT_TTL = 60
+DNS_NEGATIVE_TTL = 5
+DNS_REFRESH_AHEAD = 0.2
+DNS_MAX_STALE = 300
+
+# Scheduler settings
+MAX_PROBE_WORKERS = 32
+SCHEDULER_TICK = 0.01  # Timer wheel resolution in seconds; probes fire at most one tick late
+
+# Shared-memory store settings (see shared_store.py)
+SHARED_STORE_NAME = None  # Set to publish from the collector and serve API workers from shared memory
+SHARED_STORE_CAPACITY = 1024  # Target slots in the region
+
+# TCP, UDP and HTTP probe settings (targets written as tcp://host:port, udp://host[:port], http://host[:port][/path])
+SERVICE_MAX_SOCKETS = 256  # Sockets open at once across in-flight probes and idle keep-alive connections
+UDP_ECHO_PORT = 7  # Default port for udp:// targets
+HTTP_USER_AGENT = "ping_monitor"
+
+# Multi-site push settings
+PUSH_BATCH_SIZE = 500  # Samples per pushed frame
+PUSH_FLUSH_INTERVAL = 1.0  # Seconds between pushes when batches are not full
+PUSH_MAX_BUFFER = 100000  # Samples buffered while the aggregator is unreachable; oldest are dropped beyond this
+PUSH_TIMEOUT = 5.0  # Seconds to wait for the aggregator to acknowledge a frame
+PUSH_MAX_BACKOFF = 30.0  # Longest wait between retries while the aggregator is unreachable
+
+# Alert settings (see alerts.py)
+# Rules such as {'name': 'down', 'kind': 'outage', 'threshold': 5},
+# {'name': 'lossy', 'kind': 'failure_rate', 'threshold': 20, 'horizon': 900} or
+# {'name': 'slow', 'kind': 'p95_rtt', 'threshold': 150}; add 'targets': [...] to limit a rule
+ALERT_RULES = []
+ALERT_WEBHOOK_URL = None  # Set to POST batches of alert notifications as JSON
+ALERT_COOLDOWN = 300  # Seconds before the same rule may notify again for a target
+ALERT_RTT_WINDOW = 100  # Successful samples behind p95_rtt rules
+ALERT_MIN_SAMPLES = 10  # Samples required before rate and percentile rules can fire
+ALERT_BATCH_SIZE = 100  # Notifications per webhook post
+ALERT_FLUSH_INTERVAL = 1.0  # Seconds between posts when batches are not full
+ALERT_MAX_QUEUE = 10000  # Notifications queued while the webhook fails; oldest are dropped beyond this
+ALERT_TIMEOUT = 5.0  # Seconds to wait for the webhook to accept a batch
+ALERT_MAX_BACKOFF = 60.0  # Longest wait between retries while the webhook fails
+
+# Snapshot settings for warm restarts
+SNAPSHOT_PATH = None  # Set to a file path to save engine state periodically and restore it on startup
+SNAPSHOT_INTERVAL = 60  # Seconds between snapshots while running
+
+# Long-term history settings (see history.py)
+KEEP_HISTORY = False  # Set to keep every sample in compressed blocks beyond the max_points window
+HISTORY_BLOCK_SIZE = 3600  # Samples per sealed block; one hour at 1 Hz
+HISTORY_RETENTION = 30 * 86400  # Seconds of sealed blocks kept per target; None keeps everything
+EXPORT_CHUNK_SIZE = 64 * 1024  # Bytes of NDJSON/CSV buffered per chunk of a streamed export
+EXPORT_BATCH_ROWS = 8192  # Rows per Arrow IPC record batch of a streamed export
+
 # Statistics settings
+OUTAGE_THRESHOLD = 2  # Consecutive failed pings that make an outage
+DEFAULT_HORIZONS = (60, 900, 3600, 86400)  # Seconds: 1 min, 15 min, 1 h, 24 h
+HORIZON_BUCKETS = 60  # Buckets per horizon; sets both memory and expiry granularity
+OUTAGE_LOG_PATH = None  # Set to a file path to persist outage events across restarts
+OUTAGE_RETENTION = 365 * 86400  # Seconds of outage events kept in memory; None keeps everything
+OUTAGE_MAX_EVENTS = 100000  # Outage events kept in memory across all targets; the earliest ending are dropped first
+
+# Latency anomaly detection settings
+ANOMALY_ALPHA = 0.02  # EWMA weight of each new RTT in the baseline
+ANOMALY_WARMUP = 30  # Successful samples used to learn the baseline before detecting
+ANOMALY_BAND = 3.0  # Standard deviations from the baseline before an RTT is an outlier
+ANOMALY_CUSUM_DRIFT = 0.5  # Standardized slack subtracted per sample
+ANOMALY_CUSUM_THRESHOLD = 8.0  # Accumulated deviation that signals a level shift
+ANOMALY_MIN_STD = 0.5  # Floor on the baseline standard deviation (ms)
+ANOMALY_HISTORY_SIZE = 100  # Latency anomaly events kept per target
+
+# Cross-target incident correlation settings (see correlation.py)
+CORRELATION_BUCKET = 5  # Seconds per loss bitmap bucket
+CORRELATION_MIN_TARGETS = 3  # Targets that must go down together to open an incident
+CORRELATION_JOIN = 30  # Seconds within which outages starting after the first still join its incident
+CORRELATION_HISTORY = 1000  # Ended incidents kept
+
+# Per-hop path probing settings
+PATH_MAX_HOPS = 30  # Highest TTL probed when tracing a path
+PATH_CHANGE_CONFIRM = 2  # Consecutive rounds a new responder must answer at a hop before the path is considered changed
+PATH_CHANGE_HISTORY = 100  # Path change events kept per target
 
 # Web settings
 DEFAULT_PORT = 5000
 DEFAULT_HOST = "0.0.0.0"
-AUTO_REFRESH_INTERVAL = 1 
\ No newline at end of file
+AUTO_REFRESH_INTERVAL = 1
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+QUERY_CACHE_SIZE = 256  # Distinct /api/query results kept; least recently used are evicted
+
+# API admission control settings (see admission.py)
+API_RATE_LIMIT = 20.0  # Requests per second each client may sustain; None disables per-client limits
+API_RATE_BURST = 40  # Requests a client may send at once before being limited
+API_MAX_CONCURRENT = 4  # Expensive requests served at once; None removes the cap
+# Capped and shed under probe lag; the dashboard's polled /api/data and /api/summary are left out
+API_EXPENSIVE_PATHS = ('/api/history', '/api/export', '/api/query')
+API_MAX_PROBE_LAG = 0.005  # Seconds of smoothed probe scheduling lag above which API work yields
+API_YIELD_TIME = 0.5  # Longest a request waits for the probes to catch up before expensive ones are shed
+API_MAX_CLIENTS = 10000  # Client rate buckets kept; the least recently seen are forgotten first
+
+# Response compression settings
+COMPRESSION_MIN_SIZE = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3 
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""Groups concurrent outages across targets into incidents using per-bucket loss bitmaps."""
+
+import threading
+from collections import deque
+from typing import Optional, Dict, List, Callable, Iterable
+
+try:
+    from .config import CORRELATION_BUCKET, CORRELATION_MIN_TARGETS, CORRELATION_JOIN, CORRELATION_HISTORY
+except ImportError:
+    from config import CORRELATION_BUCKET, CORRELATION_MIN_TARGETS, CORRELATION_JOIN, CORRELATION_HISTORY
+
+class Incident:
+    """Outages of several targets that started together, most likely from one cause."""
+
+    def __init__(self, number: int, start_time: float, members: int):
+        self.id = number
+        self.start_time = start_time
+        self.end_time: Optional[float] = None
+        self.members = members  # Bitmap of target indices while open
+        self.active = members  # Members still in the outage they joined with
+        self.targets: List[str] = []  # Member names, kept current while open and frozen on close
+        self.peak = 0  # Most members down in one bucket
+        self.cause: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        """Serialize the incident for JSON output."""
+        return {
+            'id': self.id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'ongoing': self.end_time is None,
+            'targets': self.targets,
+            'target_count': len(self.targets),
+            'peak': self.peak,
+            'common_cause': self.cause
+        }
+
+def _bits(bitmap: int) -> Iterable[int]:
+    """Indices of the set bits of a bitmap."""
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+class IncidentCorrelator:
+    """Sample listener that turns simultaneous outages on many targets into one incident.
+
+    Each target gets a bit index. Per time bucket of `bucket` seconds one integer bitmap
+    holds every target in outage during the bucket, so comparing targets is a handful of
+    big-integer ANDs per bucket rather than pairwise checks. When a bucket closes, targets
+    whose outage began within the last `join` seconds and that are still down become
+    candidates, and an open incident no older than `join` absorbs them. Without one, at
+    least `min_targets` candidates whose outages began in the same or adjacent buckets
+    open a new incident. A member that recovers leaves the incident's active set, so a
+    later outage of the same target is free to start or join another incident, and the
+    incident ends once no member is still down.
+
+    The likely common cause is the path prefix shared by the members whose paths are
+    traced, with the hop where they break when they all break at the same hop.
+    """
+
+    def __init__(self, bucket: float = CORRELATION_BUCKET, min_targets: int = CORRELATION_MIN_TARGETS,
+                 join: float = CORRELATION_JOIN, history: int = CORRELATION_HISTORY,
+                 path_lookup: Optional[Callable[[str], object]] = None):
+        # Configuration
+        self.bucket = bucket
+        self.min_targets = min_targets
+        self.join_buckets = max(1, int(join // bucket))
+        self.path_lookup = path_lookup
+
+        # Bit index per target; freed indices are reused
+        self._index: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._free: List[int] = []
+
+        # Targets in outage now, in outage at any point of the open bucket, and in the last closed bucket
+        self._down_now = 0
+        self._bucket_down = 0
+        self._previous_down = 0
+        self._current: Optional[int] = None
+
+        # Outage onsets of recent closed buckets as (bucket, bitmap), within the join window
+        self._onsets: deque = deque()
+
+        self._open: List[Incident] = []
+        self._closed: deque = deque(maxlen=history)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __call__(self, engine, timestamp: float, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Sample listener entry point."""
+        down = engine.consecutive_failures >= engine.outage_threshold
+        with self._lock:
+            self._advance(int(timestamp // self.bucket))
+            index = self._index.get(engine.target)
+            if index is None:
+                if not down:
+                    return
+                index = self._free.pop() if self._free else len(self._index)
+                self._index[engine.target] = index
+                self._names[index] = engine.target
+
+            bit = 1 << index
+            if down:
+                self._down_now |= bit
+                self._bucket_down |= bit
+            else:
+                self._down_now &= ~bit
+
+    def advance(self, now: float) -> None:
+        """Close every bucket that ended before now."""
+        with self._lock:
+            self._advance(int(now // self.bucket))
+
+    def _advance(self, bucket: int) -> None:
+        """Close buckets up to the one before bucket (lock held)."""
+        if self._current is None:
+            self._current = bucket
+            return
+        # With nothing down and no incident open, idle buckets change nothing
+        if bucket - self._current > self.join_buckets + 1 and not (self._down_now or self._bucket_down
+                                                                   or self._previous_down or self._open):
+            self._onsets.clear()
+            self._current = bucket
+            return
+        while self._current < bucket:
+            self._close_bucket(self._current)
+            self._current += 1
+            # Targets still in outage are down in the new bucket even before their next sample
+            self._bucket_down = self._down_now
+
+    def _close_bucket(self, bucket: int) -> None:
+        """Fold one finished bucket into the incidents (lock held)."""
+        down = self._bucket_down
+        self._onsets.append((bucket, down & ~self._previous_down))
+        while self._onsets and self._onsets[0][0] <= bucket - self.join_buckets:
+            self._onsets.popleft()
+        self._previous_down = down
+
+        # Members that recovered no longer tie their later outages to the incident
+        claimed = 0
+        for incident in self._open:
+            incident.active &= down
+            claimed |= incident.active
+
+        # Recent onsets still down and not already part of an open incident
+        candidates = 0
+        for _, onsets in self._onsets:
+            candidates |= onsets
+        candidates &= down & ~claimed
+
+        if candidates:
+            young = [incident for incident in self._open
+                     if bucket - int(incident.start_time // self.bucket) < self.join_buckets]
+            # A new incident needs its outages to begin together, not merely within the join window
+            simultaneous = 0
+            for onset_bucket, onsets in self._onsets:
+                if onset_bucket >= bucket - 1:
+                    simultaneous |= onsets
+            simultaneous &= candidates
+            if young:
+                self._grow(young[0], candidates)
+            elif simultaneous.bit_count() >= self.min_targets:
+                start = next(onset_bucket for onset_bucket, onsets in self._onsets if onsets & simultaneous)
+                incident = Incident(self._next_id, start * self.bucket, 0)
+                self._next_id += 1
+                self._open.append(incident)
+                self._grow(incident, simultaneous)
+
+        for incident in list(self._open):
+            active = incident.active.bit_count()
+            incident.peak = max(incident.peak, active)
+            if active == 0:
+                incident.end_time = bucket * self.bucket
+                self._open.remove(incident)
+                self._closed.append(incident)
+
+    def _grow(self, incident: Incident, members: int) -> None:
+        """Add targets to an incident and refresh its names and likely cause (lock held)."""
+        incident.members |= members
+        incident.active |= members
+        incident.targets = [self._names[index] for index in sorted(_bits(incident.members))]
+        incident.cause = self._common_cause(incident.targets)
+
+    def _common_cause(self, targets: List[str]) -> Optional[dict]:
+        """The path prefix shared by every traced member, if at least two are traced."""
+        if self.path_lookup is None:
+            return None
+        paths = [path for path in (self.path_lookup(target) for target in targets)
+                 if path is not None and any(path.path)]
+        if len(paths) < 2:
+            return None
+
+        shared = []
+        for hops in zip(*(list(path.path) for path in paths)):
+            if hops[0] is None or any(hop != hops[0] for hop in hops):
+                break
+            shared.append(hops[0])
+        if not shared:
+            return None
+
+        # The break is attributed to a shared hop only when every traced member breaks there
+        failing = {path.first_failing_hop() for path in paths}
+        failing_hop = None
+        if len(failing) == 1:
+            number = failing.pop()
+            if number is not None and number <= len(shared):
+                failing_hop = {'hop': number, 'address': shared[number - 1]}
+        return {'kind': 'shared_path', 'traced_targets': len(paths), 'shared_hops': shared,
+                'failing_hop': failing_hop}
+
+    def forget(self, target: str) -> None:
+        """Drop a removed target from the bitmaps and open incidents; closed incidents keep its name."""
+        with self._lock:
+            index = self._index.pop(target, None)
+            if index is None:
+                return
+            del self._names[index]
+            self._free.append(index)
+            mask = ~(1 << index)
+            self._down_now &= mask
+            self._bucket_down &= mask
+            self._previous_down &= mask
+            self._onsets = deque((bucket, onsets & mask) for bucket, onsets in self._onsets)
+            for incident in self._open:
+                incident.members &= mask
+                incident.active &= mask
+                incident.targets = [name for name in incident.targets if name != target]
+
+    def incidents(self, start: Optional[float] = None, end: Optional[float] = None,
+                  now: Optional[float] = None) -> List[Incident]:
+        """Closed and ongoing incidents overlapping [start, end], ordered by start time."""
+        with self._lock:
+            if now is not None:
+                self._advance(int(now // self.bucket))
+            incidents = list(self._closed) + list(self._open)
+
+        selected = [
+            incident for incident in incidents
+            if (start is None or incident.end_time is None or incident.end_time >= start)
+            and (end is None or incident.start_time <= end)
+        ]
+        selected.sort(key=lambda incident: (incident.start_time, incident.id))
+        return selected
@@ -0,0 +1,163 @@
+"""TTL-respecting DNS cache shared by all ping engines."""
+
+import time
+import socket
+import logging
+import ipaddress
+import threading
+from typing import Optional, Callable, Dict, List, Tuple
+
+try:
+    from .config import DNS_DEFAULT_TTL, DNS_NEGATIVE_TTL, DNS_REFRESH_AHEAD, DNS_MAX_STALE
+except ImportError:
+    from config import DNS_DEFAULT_TTL, DNS_NEGATIVE_TTL, DNS_REFRESH_AHEAD, DNS_MAX_STALE
+
+try:
+    import dns.resolver as dns_resolver
+except ImportError:
+    dns_resolver = None
+
+# A resolver returns the addresses for a name and the record TTL in seconds (None if unknown)
+Resolver = Callable[[str], Tuple[List[str], Optional[float]]]
+
+class DnsResolutionError(Exception):
+    """Raised when a target name cannot be resolved."""
+
+def system_resolver(name: str) -> Tuple[List[str], Optional[float]]:
+    """Resolve a name with dnspython when installed, otherwise the system resolver.
+
+    The system resolver does not expose record TTLs, so the cache default applies.
+    """
+    if dns_resolver is not None:
+        answer = dns_resolver.resolve(name, 'A')
+        return [record.to_text() for record in answer], float(answer.rrset.ttl)
+
+    addresses = []
+    for _, _, _, _, sockaddr in socket.getaddrinfo(name, None, socket.AF_INET, socket.SOCK_DGRAM):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses, None
+
+class _CacheEntry:
+    """Cached resolution state for one name."""
+
+    def __init__(self):
+        self.addresses: List[str] = []
+        self.expires_at = 0.0
+        self.ttl = 0.0
+        self.failures = 0
+        # Set once the lookup in flight finishes; None while no lookup runs
+        self.lookup: Optional[threading.Event] = None
+
+class DnsCache:
+    """Resolves target names once per TTL and refreshes them in the background."""
+
+    def __init__(self, resolver: Optional[Resolver] = None, default_ttl: float = DNS_DEFAULT_TTL,
+                 negative_ttl: float = DNS_NEGATIVE_TTL, refresh_ahead: float = DNS_REFRESH_AHEAD,
+                 max_stale: float = DNS_MAX_STALE, clock: Callable[[], float] = time.monotonic):
+        # Configuration
+        self.resolver = resolver or system_resolver
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_stale = max_stale
+        self.clock = clock
+
+        # Cache state
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, name: str) -> str:
+        """Return an address for name, raising DnsResolutionError if none is available."""
+        # IP literals never need resolving
+        try:
+            ipaddress.ip_address(name)
+            return name
+        except ValueError:
+            pass
+
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _CacheEntry()
+
+            if entry.addresses and now < entry.expires_at:
+                # Fresh entry: kick off an early refresh near the end of its TTL
+                if now >= entry.expires_at - entry.ttl * self.refresh_ahead:
+                    self._schedule_refresh(name, entry)
+                return entry.addresses[0]
+
+            if entry.addresses and now < entry.expires_at + self.max_stale:
+                # Serve stale while the background refresh runs
+                self._schedule_refresh(name, entry)
+                return entry.addresses[0]
+
+            if not entry.addresses and now < entry.expires_at:
+                # Negative cache: a recent lookup failed
+                raise DnsResolutionError(f"Cannot resolve {name}")
+
+            # Nothing usable cached: the first caller resolves synchronously and the rest wait for it
+            lookup = entry.lookup
+            leader = lookup is None
+            if leader:
+                lookup = entry.lookup = threading.Event()
+
+        if leader:
+            self._refresh(name, entry)
+        else:
+            lookup.wait()
+        with self._lock:
+            if entry.addresses:
+                return entry.addresses[0]
+        raise DnsResolutionError(f"Cannot resolve {name}")
+
+    def _schedule_refresh(self, name: str, entry: _CacheEntry) -> None:
+        """Start a background refresh unless a lookup is already running (lock held)."""
+        if entry.lookup is None:
+            entry.lookup = threading.Event()
+            threading.Thread(target=self._refresh, args=(name, entry), daemon=True).start()
+
+    def _finish_lookup(self, entry: _CacheEntry) -> None:
+        """Wake the callers waiting on the entry's lookup (lock held)."""
+        entry.lookup.set()
+        entry.lookup = None
+
+    def _refresh(self, name: str, entry: _CacheEntry) -> bool:
+        """Query the resolver and update the entry, keeping old addresses on failure."""
+        try:
+            addresses, ttl = self.resolver(name)
+            if not addresses:
+                raise DnsResolutionError(f"No addresses for {name}")
+        except Exception as e:
+            logging.error(f"DNS resolution failed for {name}: {e}")
+            with self._lock:
+                entry.failures += 1
+                now = self.clock()
+                if not entry.addresses or now >= entry.expires_at + self.max_stale:
+                    # Too stale to serve: cache the failure so probes don't each retry a blocking lookup
+                    entry.addresses = []
+                    entry.expires_at = now + self.negative_ttl
+                self._finish_lookup(entry)
+            return False
+
+        with self._lock:
+            entry.addresses = list(addresses)
+            entry.ttl = self.default_ttl if ttl is None else ttl
+            entry.expires_at = self.clock() + entry.ttl
+            self._finish_lookup(entry)
+        return True
+
+    def failures(self, name: str) -> int:
+        """Number of failed resolutions for name."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry.failures if entry else 0
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+# Shared by every engine that isn't given its own cache
+default_dns_cache = DnsCache()
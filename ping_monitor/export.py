@@ -0,0 +1,142 @@
+"""Streams the long-term samples of several targets as chunked NDJSON, CSV or Arrow IPC."""
+
+import io
+import csv
+import json
+import heapq
+from typing import Optional, Dict, Iterator, Iterable, Tuple
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    from .config import EXPORT_CHUNK_SIZE, EXPORT_BATCH_ROWS
+    from .history import SampleHistory, HistorySample
+except ImportError:
+    from config import EXPORT_CHUNK_SIZE, EXPORT_BATCH_ROWS
+    from history import SampleHistory, HistorySample
+
+# One exported row: (target, timestamp, ttl, ping_time); failures have ttl and ping_time None
+ExportRow = Tuple[str, float, Optional[int], Optional[float]]
+
+EXPORT_COLUMNS = ('target', 'timestamp', 'ttl', 'ping_time')
+
+# Media type and file extension per export format
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows')
+}
+
+ARROW_AVAILABLE = pa is not None
+
+class ExportError(ValueError):
+    """Raised when an export format is unknown or its library is not installed."""
+
+def _tag(target: str, samples: Iterable[HistorySample]) -> Iterator[ExportRow]:
+    """Prefix each sample with its target."""
+    for timestamp, ttl, ping_time in samples:
+        yield target, timestamp, ttl, ping_time
+
+def merge_histories(histories: Dict[str, SampleHistory], start: Optional[float] = None,
+                    end: Optional[float] = None) -> Iterator[ExportRow]:
+    """Rows of every target in timestamp order.
+
+    Each history is queried lazily, so at most one decoded block per target is alive at a
+    time, and no engine lock is involved: histories are fed by the engines' sample listeners.
+    """
+    streams = [_tag(target, history.query(start, end)) for target, history in histories.items()]
+    return heapq.merge(*streams, key=lambda row: row[1])
+
+def export_ndjson(rows: Iterable[ExportRow], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """One JSON object per line, yielded in chunks of about chunk_size bytes."""
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(lines).encode('utf-8')
+            lines = []
+            size = 0
+    if lines:
+        yield ''.join(lines).encode('utf-8')
+
+def export_csv(rows: Iterable[ExportRow], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """A header line and one line per row, failures with empty ttl and ping_time, in chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+class _DrainedSink:
+    """File-like target for the Arrow IPC writer, emptied after every record batch."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+def _record_batch(columns: tuple, schema) -> "pa.RecordBatch":
+    """Build one record batch from the column lists."""
+    return pa.RecordBatch.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                                      schema=schema)
+
+def export_arrow(rows: Iterable[ExportRow], batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[bytes]:
+    """An Arrow IPC stream: the schema, then one record batch per batch_rows rows, then the end marker."""
+    if pa is None:
+        raise ExportError("Arrow export needs pyarrow")
+    schema = pa.schema([('target', pa.string()), ('timestamp', pa.float64()),
+                        ('ttl', pa.int32()), ('ping_time', pa.float64())])
+    sink = _DrainedSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.drain()
+
+    columns = ([], [], [], [])
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+        if len(columns[0]) >= batch_rows:
+            writer.write_batch(_record_batch(columns, schema))
+            yield sink.drain()
+            columns = ([], [], [], [])
+    if columns[0]:
+        writer.write_batch(_record_batch(columns, schema))
+    writer.close()
+    yield sink.drain()
+
+def stream_export(rows: Iterable[ExportRow], export_format: str) -> Iterator[bytes]:
+    """Check the format up front and return the generator of its chunks."""
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format '{export_format}'; expected one of {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'arrow':
+        if pa is None:
+            raise ExportError("Arrow export needs pyarrow")
+        return export_arrow(rows)
+    if export_format == 'csv':
+        return export_csv(rows)
+    return export_ndjson(rows)
@@ -0,0 +1,317 @@
+"""Compressed blocks of sealed sample history: delta-of-delta timestamps, XOR floats and run-length TTLs."""
+
+import struct
+import threading
+from array import array
+from collections import deque
+from typing import Optional, List, Iterator, Iterable, Tuple
+
+try:
+    from .config import HISTORY_BLOCK_SIZE, HISTORY_RETENTION
+    from .varint import write_varint, read_varint
+except ImportError:
+    from config import HISTORY_BLOCK_SIZE, HISTORY_RETENTION
+    from varint import write_varint, read_varint
+
+# One target's sample: (timestamp, ttl, ping_time); failures have ttl and ping_time None
+HistorySample = Tuple[float, Optional[int], Optional[float]]
+
+# Block layout:
+#   header:  magic, sample count, first and last timestamp (ms), byte lengths of the three sections
+#   section 1 (bits): per-sample delta-of-delta of ms timestamps; '0' for a steady interval, then
+#            '10', '110', '1110', '1111' prefixes with 7, 9, 12 and 64 zigzag bits
+#   section 2 (bits): RTTs of successful samples as float64; the first in full, then the XOR with
+#            the previous value: '0' if equal, '10' + bits inside the previous leading/trailing zero
+#            window, '11' + 5 bits leading zeros + 6 bits length - 1 + the meaningful bits
+#   section 3 (bytes): runs of (varint TTL + 1, 0 for failures; varint run length)
+BLOCK_MAGIC = b'PMH1'
+BLOCK_HEADER = struct.Struct('<4sIqqIII')
+
+# (prefix, prefix width, value width) for delta-of-delta buckets, smallest first
+DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12), (0b1111, 4, 64))
+
+class HistoryError(Exception):
+    """Raised when a history block cannot be decoded."""
+
+class _BitWriter:
+    """Appends values of arbitrary bit width, most significant bit first."""
+
+    def __init__(self):
+        self.out = bytearray()
+        self.acc = 0
+        self.bits = 0
+
+    def write(self, value: int, width: int) -> None:
+        """Append the low width bits of value."""
+        self.acc = (self.acc << width) | value
+        self.bits += width
+        while self.bits >= 8:
+            self.bits -= 8
+            self.out.append((self.acc >> self.bits) & 0xFF)
+        self.acc &= (1 << self.bits) - 1
+
+    def getvalue(self) -> bytes:
+        """The written bits, zero-padded to a whole byte."""
+        if self.bits:
+            return bytes(self.out) + bytes([(self.acc << (8 - self.bits)) & 0xFF])
+        return bytes(self.out)
+
+class _BitReader:
+    """Reads values written by _BitWriter."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+        self.acc = 0
+        self.bits = 0
+
+    def read(self, width: int) -> int:
+        """Read the next width bits as an unsigned integer."""
+        while self.bits < width:
+            if self.pos >= len(self.data):
+                raise HistoryError("Truncated bit section")
+            self.acc = (self.acc << 8) | self.data[self.pos]
+            self.pos += 1
+            self.bits += 8
+        self.bits -= width
+        value = self.acc >> self.bits
+        self.acc &= (1 << self.bits) - 1
+        return value
+
+    def read_prefix(self, limit: int) -> int:
+        """Count leading one bits up to limit, consuming the terminating zero if reached first."""
+        ones = 0
+        while ones < limit and self.read(1):
+            ones += 1
+        return ones
+
+def _encode_timestamps(timestamps_ms: List[int]) -> bytes:
+    """Delta-of-delta encode ms timestamps after the first."""
+    writer = _BitWriter()
+    previous, previous_delta = timestamps_ms[0], 0
+    for timestamp in timestamps_ms[1:]:
+        delta = timestamp - previous
+        dod = delta - previous_delta
+        previous, previous_delta = timestamp, delta
+        if dod == 0:
+            writer.write(0, 1)
+            continue
+        zigzag = (dod << 1) ^ (dod >> 63)
+        for prefix, prefix_width, width in DOD_BUCKETS:
+            if zigzag < (1 << width):
+                writer.write(prefix, prefix_width)
+                writer.write(zigzag, width)
+                break
+    return writer.getvalue()
+
+def _decode_timestamps(data: bytes, first_ms: int, count: int) -> List[int]:
+    """Inverse of _encode_timestamps."""
+    reader = _BitReader(data)
+    timestamps = [first_ms]
+    previous, delta = first_ms, 0
+    for _ in range(count - 1):
+        ones = reader.read_prefix(4)
+        if ones:
+            zigzag = reader.read(DOD_BUCKETS[ones - 1][2])
+            delta += (zigzag >> 1) ^ -(zigzag & 1)
+        previous += delta
+        timestamps.append(previous)
+    return timestamps
+
+def _encode_floats(values: List[float]) -> bytes:
+    """XOR encode float64 values against their predecessor."""
+    writer = _BitWriter()
+    if not values:
+        return b''
+    words = struct.unpack(f'<{len(values)}Q', array('d', values).tobytes())
+    previous = words[0]
+    writer.write(previous, 64)
+    window_leading, window_trailing = -1, 0
+    for word in words[1:]:
+        xor = word ^ previous
+        previous = word
+        if xor == 0:
+            writer.write(0, 1)
+            continue
+        leading = min(64 - xor.bit_length(), 31)
+        trailing = (xor & -xor).bit_length() - 1
+        if window_leading >= 0 and leading >= window_leading and trailing >= window_trailing:
+            # Reuse the previous window: no need to resend its position
+            writer.write(0b10, 2)
+            writer.write(xor >> window_trailing, 64 - window_leading - window_trailing)
+        else:
+            length = 64 - leading - trailing
+            writer.write(0b11, 2)
+            writer.write(leading, 5)
+            writer.write(length - 1, 6)
+            writer.write(xor >> trailing, length)
+            window_leading, window_trailing = leading, trailing
+    return writer.getvalue()
+
+def _decode_floats(data: bytes, count: int) -> List[float]:
+    """Inverse of _encode_floats."""
+    if count == 0:
+        return []
+    reader = _BitReader(data)
+    previous = reader.read(64)
+    words = [previous]
+    window_leading, window_trailing = 0, 0
+    for _ in range(count - 1):
+        if reader.read(1):
+            if reader.read(1):
+                window_leading = reader.read(5)
+                length = reader.read(6) + 1
+                window_trailing = 64 - window_leading - length
+            previous ^= reader.read(64 - window_leading - window_trailing) << window_trailing
+        words.append(previous)
+    return array('d', struct.pack(f'<{count}Q', *words)).tolist()
+
+def encode_block(samples: List[HistorySample]) -> bytes:
+    """Encode one target's samples, oldest first, into a block; timestamps keep millisecond precision."""
+    if not samples:
+        raise ValueError("Cannot encode an empty block")
+
+    timestamps_ms = [round(timestamp * 1000) for timestamp, _, _ in samples]
+    rtts = [ping_time for _, ttl, ping_time in samples if ttl is not None and ping_time is not None]
+
+    # Run-length TTLs, with 0 marking failures so the RTT section only holds successes
+    runs = bytearray()
+    previous, length = None, 0
+    for _, ttl, ping_time in samples:
+        value = 0 if ttl is None or ping_time is None else ttl + 1
+        if value == previous:
+            length += 1
+            continue
+        if length:
+            write_varint(runs, previous)
+            write_varint(runs, length)
+        previous, length = value, 1
+    write_varint(runs, previous)
+    write_varint(runs, length)
+
+    timestamp_bits = _encode_timestamps(timestamps_ms)
+    rtt_bits = _encode_floats(rtts)
+    header = BLOCK_HEADER.pack(BLOCK_MAGIC, len(samples), timestamps_ms[0], timestamps_ms[-1],
+                               len(timestamp_bits), len(rtt_bits), len(runs))
+    return header + timestamp_bits + rtt_bits + bytes(runs)
+
+def block_range(block: bytes) -> Tuple[int, float, float]:
+    """(sample count, first timestamp, last timestamp) from a block header without decoding it."""
+    if len(block) < BLOCK_HEADER.size:
+        raise HistoryError("Truncated block header")
+    magic, count, first_ms, last_ms, _, _, _ = BLOCK_HEADER.unpack_from(block)
+    if magic != BLOCK_MAGIC:
+        raise HistoryError(f"Bad block magic {magic!r}")
+    return count, first_ms / 1000, last_ms / 1000
+
+def decode_block(block: bytes) -> Iterator[HistorySample]:
+    """Yield a block's samples, oldest first."""
+    count, _, _ = block_range(block)
+    _, _, first_ms, _, timestamp_size, rtt_size, runs_size = BLOCK_HEADER.unpack_from(block)
+    offset = BLOCK_HEADER.size
+    if len(block) != offset + timestamp_size + rtt_size + runs_size:
+        raise HistoryError("Block length does not match its header")
+
+    # Step 1: Expand the TTL runs, counting the successes that carry an RTT
+    ttls: List[int] = []
+    runs = block[offset + timestamp_size + rtt_size:]
+    position = 0
+    try:
+        while position < len(runs):
+            value, position = read_varint(runs, position)
+            length, position = read_varint(runs, position)
+            ttls.extend([value] * length)
+    except IndexError:
+        raise HistoryError("Truncated TTL runs")
+    if len(ttls) != count:
+        raise HistoryError(f"TTL runs cover {len(ttls)} samples, expected {count}")
+
+    # Step 2: Decode the bit sections
+    timestamps = _decode_timestamps(block[offset:offset + timestamp_size], first_ms, count)
+    rtts = _decode_floats(block[offset + timestamp_size:offset + timestamp_size + rtt_size],
+                          count - ttls.count(0))
+
+    # Step 3: Zip them back into samples
+    rtt_index = 0
+    for timestamp_ms, value in zip(timestamps, ttls):
+        if value == 0:
+            yield timestamp_ms / 1000, None, None
+        else:
+            yield timestamp_ms / 1000, value - 1, rtts[rtt_index]
+            rtt_index += 1
+
+def query_blocks(blocks: Iterable[bytes], start: Optional[float] = None,
+                 end: Optional[float] = None) -> Iterator[HistorySample]:
+    """Stream samples with start <= timestamp <= end, decoding only the blocks that overlap the range."""
+    for block in blocks:
+        _, first, last = block_range(block)
+        if (start is not None and last < start) or (end is not None and first > end):
+            continue
+        for sample in decode_block(block):
+            if (start is None or sample[0] >= start) and (end is None or sample[0] <= end):
+                yield sample
+
+class SampleHistory:
+    """One target's long-term history: an open block of recent samples and sealed compressed blocks.
+
+    Attach it to an engine as a sample listener. Every block_size samples the open block is
+    sealed into a few bytes per sample; sealed blocks older than retention seconds are dropped.
+    """
+
+    def __init__(self, block_size: int = HISTORY_BLOCK_SIZE, retention: Optional[float] = HISTORY_RETENTION):
+        self.block_size = block_size
+        self.retention = retention
+        self._open: List[HistorySample] = []
+        self._sealed: deque = deque()
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.sealed_samples = 0
+        self.sealed_bytes = 0
+
+    def __call__(self, engine, timestamp: float, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Sample listener entry point."""
+        self.add(timestamp, ttl, ping_time)
+
+    def add(self, timestamp: float, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Append one sample, sealing the open block when it is full."""
+        with self._lock:
+            self._open.append((timestamp, ttl, ping_time))
+            if len(self._open) >= self.block_size:
+                self._seal()
+
+    def seal(self) -> None:
+        """Compress the open block now, e.g. before saving the history."""
+        with self._lock:
+            if self._open:
+                self._seal()
+
+    def _seal(self) -> None:
+        """Compress the open block and expire old sealed blocks (lock held)."""
+        block = encode_block(self._open)
+        self._sealed.append(block)
+        self.sealed_samples += len(self._open)
+        self.sealed_bytes += len(block)
+        self._open = []
+
+        if self.retention is not None:
+            cutoff = block_range(block)[2] - self.retention
+            while self._sealed and block_range(self._sealed[0])[2] < cutoff:
+                expired = self._sealed.popleft()
+                self.sealed_samples -= block_range(expired)[0]
+                self.sealed_bytes -= len(expired)
+
+    def blocks(self) -> List[bytes]:
+        """Sealed blocks, oldest first."""
+        with self._lock:
+            return list(self._sealed)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[HistorySample]:
+        """Stream samples in a time range from the sealed blocks and then the open block."""
+        with self._lock:
+            sealed = list(self._sealed)
+            recent = list(self._open)
+        yield from query_blocks(sealed, start, end)
+        for sample in recent:
+            if (start is None or sample[0] >= start) and (end is None or sample[0] <= end):
+                yield sample
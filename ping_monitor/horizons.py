@@ -0,0 +1,183 @@
+"""Incremental multi-horizon aggregates over time-bucketed ping samples."""
+
+from typing import Optional, List, Sequence, Tuple
+
+# Raw aggregates: (pings, failed pings, successful pings, RTT sum in microseconds)
+Totals = Tuple[int, int, int, int]
+
+try:
+    from .config import DEFAULT_HORIZONS, HORIZON_BUCKETS
+except ImportError:
+    from config import DEFAULT_HORIZONS, HORIZON_BUCKETS
+
+# Marks a bucket slot that holds no samples
+EMPTY = -1
+
+class _Horizon:
+    """Ring of fixed-width time buckets with running totals over the whole ring."""
+
+    def __init__(self, seconds: float, buckets: int):
+        self.seconds = seconds
+        self.buckets = buckets
+        self.width = seconds / buckets
+
+        # Per-bucket aggregates; epochs[i] is the bucket number currently held in slot i
+        self.epochs: List[int] = [EMPTY] * buckets
+        self.counts = [0] * buckets
+        self.failures = [0] * buckets
+        self.rtt_counts = [0] * buckets
+        self.rtt_sums_us = [0] * buckets
+
+        # Running totals; RTTs are summed in integer microseconds so expiry subtracts exactly
+        self.count = 0
+        self.failed = 0
+        self.rtt_count = 0
+        self.rtt_sum_us = 0
+
+        self.current_epoch: Optional[int] = None
+
+    def _clear_slot(self, slot: int) -> None:
+        """Remove a bucket's contribution from the running totals."""
+        self.count -= self.counts[slot]
+        self.failed -= self.failures[slot]
+        self.rtt_count -= self.rtt_counts[slot]
+        self.rtt_sum_us -= self.rtt_sums_us[slot]
+        self.epochs[slot] = EMPTY
+        self.counts[slot] = self.failures[slot] = self.rtt_counts[slot] = self.rtt_sums_us[slot] = 0
+
+    def advance(self, epoch: int) -> None:
+        """Expire buckets that fall out of the horizon when time moves to epoch."""
+        if self.current_epoch is None:
+            self.current_epoch = epoch
+            return
+        if epoch <= self.current_epoch:
+            return
+
+        # Each slot is cleared at most once per lap, so this is amortized O(1) per sample
+        if epoch - self.current_epoch >= self.buckets:
+            for slot in range(self.buckets):
+                if self.epochs[slot] != EMPTY:
+                    self._clear_slot(slot)
+        else:
+            for stale in range(self.current_epoch + 1, epoch + 1):
+                slot = stale % self.buckets
+                if self.epochs[slot] != EMPTY:
+                    self._clear_slot(slot)
+        self.current_epoch = epoch
+
+    def add(self, timestamp: float, rtt_us: Optional[int]) -> None:
+        """Add one sample; rtt_us is None for a failed ping."""
+        epoch = int(timestamp // self.width)
+        self.advance(epoch)
+        if epoch <= self.current_epoch - self.buckets:
+            # Older than the horizon
+            return
+
+        slot = epoch % self.buckets
+        if self.epochs[slot] != epoch:
+            if self.epochs[slot] != EMPTY:
+                self._clear_slot(slot)
+            self.epochs[slot] = epoch
+
+        self.counts[slot] += 1
+        self.count += 1
+        if rtt_us is None:
+            self.failures[slot] += 1
+            self.failed += 1
+        else:
+            self.rtt_counts[slot] += 1
+            self.rtt_sums_us[slot] += rtt_us
+            self.rtt_count += 1
+            self.rtt_sum_us += rtt_us
+
+    def snapshot(self) -> dict:
+        """Aggregates over the horizon from the running totals."""
+        return {
+            'horizon': self.seconds,
+            'pings': self.count,
+            'failed_pings': self.failed,
+            'failure_rate': (self.failed / self.count * 100) if self.count > 0 else 0.0,
+            'avg_ping_time': (self.rtt_sum_us / self.rtt_count / 1000) if self.rtt_count > 0 else None
+        }
+
+    def totals(self) -> Totals:
+        """Running totals over the horizon."""
+        return self.count, self.failed, self.rtt_count, self.rtt_sum_us
+
+    def series(self) -> List[Tuple[float, Totals]]:
+        """(bucket start time, totals) for every bucket holding samples, oldest first."""
+        return [
+            (epoch * self.width, (self.counts[slot], self.failures[slot], self.rtt_counts[slot], self.rtt_sums_us[slot]))
+            for epoch, slot in sorted((epoch, slot) for slot, epoch in enumerate(self.epochs) if epoch != EMPTY)
+        ]
+
+    def clear(self) -> None:
+        """Drop all buckets."""
+        self.__init__(self.seconds, self.buckets)
+
+    def export_state(self) -> tuple:
+        """Copy of the bucket ring and running totals for snapshots."""
+        return (self.seconds, self.buckets, self.current_epoch,
+                (self.count, self.failed, self.rtt_count, self.rtt_sum_us),
+                list(self.epochs), list(self.counts), list(self.failures),
+                list(self.rtt_counts), list(self.rtt_sums_us))
+
+    def restore_state(self, state: tuple) -> None:
+        """Load a ring exported by export_state, taking ownership of its lists."""
+        (_, _, self.current_epoch, totals,
+         self.epochs, self.counts, self.failures, self.rtt_counts, self.rtt_sums_us) = state
+        self.count, self.failed, self.rtt_count, self.rtt_sum_us = totals
+
+class HorizonAggregator:
+    """Maintains failure rate and RTT over several time horizons from one sample stream.
+
+    Each horizon keeps a fixed number of buckets, so a 24 h horizon costs the same
+    memory as a 1 min one and reads come from running totals in O(horizons).
+    """
+
+    def __init__(self, horizons: Sequence[float] = DEFAULT_HORIZONS, buckets: int = HORIZON_BUCKETS):
+        self.horizons = [_Horizon(seconds, buckets) for seconds in sorted(horizons)]
+
+    def add(self, timestamp: float, ping_time: Optional[float]) -> None:
+        """Add one sample to every horizon; ping_time is None for a failed ping."""
+        rtt_us = None if ping_time is None else round(ping_time * 1000)
+        for horizon in self.horizons:
+            horizon.add(timestamp, rtt_us)
+
+    def epoch(self, now: float) -> int:
+        """Number of the finest bucket containing now; snapshots only age when it changes."""
+        return int(now // self.horizons[0].width) if self.horizons else 0
+
+    def snapshot(self, now: float) -> List[dict]:
+        """Aggregates for every horizon as of now."""
+        results = []
+        for horizon in self.horizons:
+            horizon.advance(int(now // horizon.width))
+            results.append(horizon.snapshot())
+        return results
+
+    def find(self, seconds: float, now: float) -> Optional[_Horizon]:
+        """The horizon of the given length advanced to now, or None if it is not tracked."""
+        for horizon in self.horizons:
+            if horizon.seconds == seconds:
+                horizon.advance(int(now // horizon.width))
+                return horizon
+        return None
+
+    def clear(self) -> None:
+        """Drop all samples."""
+        for horizon in self.horizons:
+            horizon.clear()
+
+    def export_state(self) -> List[tuple]:
+        """Bucket rings of every horizon for snapshots."""
+        return [horizon.export_state() for horizon in self.horizons]
+
+    def restore_state(self, states: List[tuple]) -> bool:
+        """Load exported rings; returns False (and keeps nothing) if the horizons differ."""
+        layout = [(horizon.seconds, horizon.buckets) for horizon in self.horizons]
+        if [(state[0], state[1]) for state in states] != layout:
+            return False
+        for horizon, state in zip(self.horizons, states):
+            horizon.restore_state(state)
+        return True
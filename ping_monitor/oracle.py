@@ -0,0 +1,146 @@
+"""Reference engine that recomputes every statistic from the raw samples, for differential testing."""
+
+import random
+from collections import deque
+from typing import Optional, List, Sequence, Tuple, Iterator
+
+try:
+    from .config import DEFAULT_MAX_POINTS, DEFAULT_HORIZONS, HORIZON_BUCKETS, OUTAGE_THRESHOLD
+except ImportError:
+    from config import DEFAULT_MAX_POINTS, DEFAULT_HORIZONS, HORIZON_BUCKETS, OUTAGE_THRESHOLD
+
+# One generated sample: (ttl, ping_time, timestamp); failures have ttl or ping_time None
+Sample = Tuple[Optional[int], Optional[float], float]
+
+class ReferenceEngine:
+    """Deliberately naive model of PingEngine's outputs.
+
+    Only raw samples are stored: the window, the failures immediately before it (an outage
+    ending inside the window counts its whole run) and the samples of the longest horizon.
+    Every read rescans them, so the result is the definition of what the incremental engine
+    must report, at O(window) cost per read.
+    """
+
+    def __init__(self, max_points: int = DEFAULT_MAX_POINTS, outage_threshold: int = OUTAGE_THRESHOLD,
+                 horizons: Sequence[float] = DEFAULT_HORIZONS, buckets: int = HORIZON_BUCKETS):
+        self.max_points = max_points
+        self.outage_threshold = outage_threshold
+        self.horizons = sorted(horizons)
+        self.buckets = buckets
+
+        # (ttl, ping_time) of the window, None for failures
+        self.window: deque = deque()
+        self.lead_failures = 0  # Failures directly before the oldest window sample
+        self.total_pings = 0
+        self.failed_pings = 0
+
+        # (timestamp, RTT in microseconds or None) newer than the longest horizon; horizons
+        # never move back in time, so the clock is the latest timestamp or read time seen
+        self.timed: deque = deque()
+        self.clock: Optional[float] = None
+
+    def _process_ping_result(self, ttl: Optional[int], ping_time: Optional[float],
+                             timestamp: float) -> None:
+        """Append one sample, with the engine's entry point signature."""
+        failed = ttl is None or ping_time is None
+        self.total_pings += 1
+        self.failed_pings += failed
+        self.window.append((None, None) if failed else (ttl, ping_time))
+        if len(self.window) > self.max_points:
+            evicted = self.window.popleft()
+            self.lead_failures = self.lead_failures + 1 if evicted[1] is None else 0
+
+        self.timed.append((timestamp, None if failed else round(ping_time * 1000)))
+        self.clock = timestamp if self.clock is None else max(self.clock, timestamp)
+        if self.horizons:
+            while self.timed[0][0] < self.clock - 2 * self.horizons[-1]:
+                self.timed.popleft()
+
+    def _failure_runs(self) -> List[Tuple[int, int, int]]:
+        """(window position, length in the window, whole length) of every failure run, oldest first."""
+        runs = []
+        start = None
+        for position, (_, ping_time) in enumerate(self.window):
+            if ping_time is None and start is None:
+                start = position
+            elif ping_time is not None and start is not None:
+                runs.append((start, position - start, position - start + (self.lead_failures if start == 0 else 0)))
+                start = None
+        if start is not None:
+            length = len(self.window) - start
+            runs.append((start, length, length + (self.lead_failures if start == 0 else 0)))
+        return runs
+
+    def _horizon_snapshot(self, seconds: float) -> dict:
+        """A horizon's aggregates, by selecting the samples in its buckets as of the clock."""
+        width = seconds / self.buckets
+        newest = int(self.clock // width)
+        selected = [rtt_us for timestamp, rtt_us in self.timed if int(timestamp // width) > newest - self.buckets]
+        rtts = [rtt_us for rtt_us in selected if rtt_us is not None]
+        failed = len(selected) - len(rtts)
+        return {
+            'horizon': seconds,
+            'pings': len(selected),
+            'failed_pings': failed,
+            'failure_rate': (failed / len(selected) * 100) if selected else 0.0,
+            'avg_ping_time': (sum(rtts) / len(rtts) / 1000) if rtts else None
+        }
+
+    def get_outage_runs(self, threshold: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Failure runs cut at the window edges, as PingEngine.get_outage_runs."""
+        threshold = self.outage_threshold if threshold is None else threshold
+        return [(start, length) for start, length, _ in self._failure_runs() if length >= threshold]
+
+    def get_statistics(self, now: float) -> dict:
+        """The same dictionary as PingEngine.get_statistics."""
+        self.clock = now if self.clock is None else max(self.clock, now)
+        runs = self._failure_runs()
+        window_failed = sum(length for _, length, _ in runs)
+
+        # A run ended by a success inside the window is an outage if it was long enough overall,
+        # including a run entirely before the window that the oldest sample ended
+        ended = [self.lead_failures] if self.window and self.window[0][1] is not None and self.lead_failures else []
+        ended += [whole for start, length, whole in runs if start + length < len(self.window)]
+        open_run = runs[-1][2] if runs and runs[-1][0] + runs[-1][1] == len(self.window) else 0
+        return {
+            'ttls': [ttl for ttl, _ in self.window],
+            'ping_times': [ping_time for _, ping_time in self.window],
+            'failed_pings': self.failed_pings,
+            'total_pings': self.total_pings,
+            'failure_rate': (window_failed / len(self.window) * 100) if self.window else 0.0,
+            'outage_history': [whole for whole in ended if whole >= self.outage_threshold],
+            'consecutive_failures': open_run,
+            'outage_start_index': self.max_points - 1 if open_run >= self.outage_threshold else None,
+            'horizons': [self._horizon_snapshot(seconds) for seconds in self.horizons]
+        }
+
+    def calculate_statistics(self, now: float) -> Tuple[float, Optional[float], Optional[float],
+                                                         Optional[float], Optional[float]]:
+        """The same tuple as StatisticsCalculator.calculate_statistics of get_statistics."""
+        stats = self.get_statistics(now)
+        rtts = [ping_time for ping_time in stats['ping_times'] if ping_time is not None]
+        if not stats['ping_times']:
+            return stats['failure_rate'], None, None, None, None
+        outages = stats['outage_history']
+        return (stats['failure_rate'],
+                sum(rtts) / len(rtts) if rtts else None,
+                min(rtts) if rtts else None,
+                max(rtts) if rtts else None,
+                sum(outages) / len(outages) if outages else None)
+
+def generate_samples(rng: random.Random, count: int, timestamp: float = 1000.0) -> Iterator[Sample]:
+    """(ttl, ping_time, timestamp) in random regimes: healthy, lossy, flapping and long outages."""
+    produced = 0
+    while produced < count:
+        regime = rng.choice(('healthy', 'lossy', 'flapping', 'outage', 'partial'))
+        length = rng.randint(1, 40) if regime != 'outage' else rng.randint(1, 400)
+        loss = {'healthy': 0.0, 'lossy': 0.3, 'flapping': 0.7, 'outage': 1.0, 'partial': 0.5}[regime]
+        for _ in range(min(length, count - produced)):
+            # Mostly steady intervals, sometimes jitter or a pause longer than a horizon
+            timestamp += rng.choice((1.0, 1.0, 1.0, 0.25, rng.uniform(0, 3), rng.choice((0.0, 90.0))))
+            if rng.random() < loss:
+                # Probers report failures as (None, None); a lone TTL or RTT is still a failure
+                yield rng.choice(((None, None), (None, None), (64, None), (None, 5.0))) + (timestamp,)
+            else:
+                yield rng.choice((64, 117, 255)), rng.choice((10.0, 10.5, round(rng.uniform(0.1, 500), 3))), timestamp
+            produced += 1
@@ -0,0 +1,214 @@
+"""Persistent outage event log with per-target interval index."""
+
+import json
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Optional, Dict, List, Iterable, Iterator, Tuple, NamedTuple
+
+try:
+    from .config import OUTAGE_RETENTION, OUTAGE_MAX_EVENTS
+except ImportError:
+    from config import OUTAGE_RETENTION, OUTAGE_MAX_EVENTS
+
+class OutageEvent(NamedTuple):
+    """A completed outage with absolute wall-clock bounds."""
+    target: str
+    start_time: float
+    end_time: float
+    lost_probes: int
+    rtt_before: Optional[float]
+    rtt_after: Optional[float]
+
+    @property
+    def duration(self) -> float:
+        """Outage length in seconds."""
+        return self.end_time - self.start_time
+
+    def to_dict(self) -> dict:
+        """Serialize the event for JSON output."""
+        return {
+            'target': self.target,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration': self.duration,
+            'lost_probes': self.lost_probes,
+            'rtt_before': self.rtt_before,
+            'rtt_after': self.rtt_after
+        }
+
+class _TargetIndex:
+    """Interval index for one target's outages.
+
+    A target cannot be in two outages at once, so its events never overlap and
+    sorting by start also sorts by end. Overlap queries are then two bisections.
+    """
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.events: List[OutageEvent] = []
+        # Events before head are dropped; the lists are compacted once they are half dropped
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.events) - self.head
+
+    def add(self, event: OutageEvent) -> None:
+        """Insert an event, appending in O(1) for the usual in-order case."""
+        if len(self.starts) == self.head or event.start_time >= self.starts[-1]:
+            self.starts.append(event.start_time)
+            self.ends.append(event.end_time)
+            self.events.append(event)
+        else:
+            position = bisect_right(self.starts, event.start_time, self.head)
+            self.starts.insert(position, event.start_time)
+            self.ends.insert(position, event.end_time)
+            self.events.insert(position, event)
+
+    def drop_oldest(self, count: int) -> None:
+        """Remove the count earliest events in amortized O(count)."""
+        self.head += count
+        if self.head * 2 >= len(self.events):
+            del self.starts[:self.head]
+            del self.ends[:self.head]
+            del self.events[:self.head]
+            self.head = 0
+
+    def overlapping(self, start: float, end: float) -> Tuple[int, int]:
+        """Return the slice bounds of events overlapping [start, end]."""
+        lo = bisect_left(self.ends, start, self.head)
+        hi = bisect_right(self.starts, end, self.head)
+        return lo, max(lo, hi)
+
+class OutageLog:
+    """Keeps outages across all targets, independent of the sliding window.
+
+    Events that ended more than retention seconds before the newest one are dropped, and
+    beyond max_events the earliest ending go first, so the index stays bounded over months of uptime.
+    The journal keeps everything; replaying it applies the same limits.
+    """
+
+    def __init__(self, path: Optional[str] = None, retention: Optional[float] = OUTAGE_RETENTION,
+                 max_events: Optional[int] = OUTAGE_MAX_EVENTS):
+        # Per-target interval indexes
+        self._indexes: Dict[str, _TargetIndex] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+
+        # Min-heap of (end_time, target) with one entry per indexed event, for eviction
+        self._expiry: List[Tuple[float, str]] = []
+
+        # Limits on the in-memory index
+        self.retention = retention
+        self.max_events = max_events
+        self._latest_end: Optional[float] = None
+
+        # Optional append-only journal so events survive restarts
+        self.path = path
+        self._journal = None
+        if path:
+            self._load(path)
+            self._journal = open(path, 'a', encoding='utf-8')
+
+    def _load(self, path: str) -> None:
+        """Replay events from the journal file, if it exists."""
+        try:
+            with open(path, 'r', encoding='utf-8') as journal:
+                for line in journal:
+                    if line.strip():
+                        data = json.loads(line)
+                        self._insert(OutageEvent(
+                            data['target'], data['start_time'], data['end_time'],
+                            data['lost_probes'], data.get('rtt_before'), data.get('rtt_after')
+                        ))
+        except FileNotFoundError:
+            pass
+
+    def _insert(self, event: OutageEvent) -> None:
+        """Add an event to its target's index."""
+        index = self._indexes.get(event.target)
+        if index is None:
+            index = self._indexes[event.target] = _TargetIndex()
+        index.add(event)
+        self._count += 1
+        heapq.heappush(self._expiry, (event.end_time, event.target))
+
+        if self._latest_end is None or event.end_time > self._latest_end:
+            self._latest_end = event.end_time
+        self._trim()
+
+    def _trim(self) -> None:
+        """Drop events past the retention horizon, then the earliest ending ones beyond max_events.
+
+        A target's events never overlap, so the globally earliest end is always the first
+        event of its target's index. Each eviction is O(log n) and touches one index.
+        """
+        cutoff = None if self.retention is None else self._latest_end - self.retention
+        while self._expiry:
+            end, target = self._expiry[0]
+            expired = cutoff is not None and end < cutoff
+            if not expired and (self.max_events is None or self._count <= self.max_events):
+                break
+            heapq.heappop(self._expiry)
+            index = self._indexes[target]
+            index.drop_oldest(1)
+            self._count -= 1
+            if not len(index):
+                del self._indexes[target]
+
+    def record(self, event: OutageEvent) -> None:
+        """Record a completed outage."""
+        with self._lock:
+            self._insert(event)
+            if self._journal:
+                self._journal.write(json.dumps(event.to_dict()) + '\n')
+                self._journal.flush()
+
+    def query(self, start: float, end: float, targets: Optional[Iterable[str]] = None,
+              offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[OutageEvent]]:
+        """Find outages overlapping [start, end], ordered by start time.
+
+        Returns the total number of matches and the requested page of events.
+        """
+        with self._lock:
+            names = self._indexes.keys() if targets is None else targets
+            slices = []
+            for name in names:
+                index = self._indexes.get(name)
+                if index is None:
+                    continue
+                lo, hi = index.overlapping(start, end)
+                if hi > lo:
+                    slices.append((index.events, lo, hi))
+
+            total = sum(hi - lo for _, lo, hi in slices)
+
+            # Lazily merge the per-target slices so a page costs O((offset + limit) log k)
+            merged = heapq.merge(
+                *(_iter_slice(events, lo, hi) for events, lo, hi in slices),
+                key=lambda event: event.start_time
+            )
+            stop = None if limit is None else offset + limit
+            return total, list(islice(merged, offset, stop))
+
+    def targets(self) -> List[str]:
+        """List targets that have recorded outages."""
+        with self._lock:
+            return list(self._indexes.keys())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+def _iter_slice(events: List[OutageEvent], lo: int, hi: int) -> Iterator[OutageEvent]:
+    """Iterate over events[lo:hi] without copying the list."""
+    for position in range(lo, hi):
+        yield events[position]
@@ -0,0 +1,173 @@
+"""Per-hop statistics, outage detection and path change tracking for one traced target."""
+
+import time
+import threading
+from collections import deque
+from typing import Optional, Dict, List, NamedTuple, Tuple
+
+try:
+    from .config import DEFAULT_MAX_POINTS, PATH_CHANGE_CONFIRM, PATH_CHANGE_HISTORY
+    from .ping_engine import PingEngine
+    from .statistics import StatisticsCalculator
+    from .path_prober import Hop
+except ImportError:
+    from config import DEFAULT_MAX_POINTS, PATH_CHANGE_CONFIRM, PATH_CHANGE_HISTORY
+    from ping_engine import PingEngine
+    from statistics import StatisticsCalculator
+    from path_prober import Hop
+
+class PathChange(NamedTuple):
+    """A hop that started answering from a different router."""
+    target: str
+    timestamp: float
+    hop: int
+    previous: str
+    current: str
+
+    def to_dict(self) -> dict:
+        """Convert to a JSON-serializable dictionary."""
+        return self._asdict()
+
+class PathEngine:
+    """Feeds each hop of a traced path into its own PingEngine and tracks which router answers it.
+
+    Hops reuse the sample windows, horizon aggregates and outage detection of a
+    regular target, so an outage on the destination can be lined up with the first
+    hop that went dark. Path changes are detected per hop as rounds arrive: a new
+    responder must answer PATH_CHANGE_CONFIRM rounds in a row, which keeps
+    per-packet load balancing from reading as a stream of changes.
+    """
+
+    def __init__(self, target: str, max_points: int = DEFAULT_MAX_POINTS, confirm: int = PATH_CHANGE_CONFIRM):
+        # Configuration
+        self.target = target
+        self.max_points = max_points
+        self.confirm = confirm
+
+        # One engine per hop, index 0 being TTL 1
+        self.hops: List[PingEngine] = []
+
+        # Confirmed responder per hop, and responders waiting for confirmation as (address, rounds seen)
+        self.path: List[Optional[str]] = []
+        self._candidates: Dict[int, Tuple[str, int]] = {}
+
+        # Hop count to the destination as of the last round that reached it
+        self.depth: Optional[int] = None
+
+        self.changes = deque(maxlen=PATH_CHANGE_HISTORY)
+        self.rounds = 0
+
+        # Bumped on every round so readers can cache derived views
+        self.sequence = 0
+
+        self._lock = threading.Lock()
+
+    def _hop_engine(self, index: int) -> PingEngine:
+        """The engine for a hop, creating engines up to it (caller holds the lock)."""
+        while len(self.hops) <= index:
+            # Routers rate-limit the ICMP errors they generate, so hop latency is not baselined
+            self.hops.append(PingEngine(target=f"{self.target} hop {len(self.hops) + 1}",
+                                        max_points=self.max_points, detect_anomalies=False))
+            self.path.append(None)
+        return self.hops[index]
+
+    def _observe_responder(self, index: int, address: str, timestamp: float) -> None:
+        """Update one hop's responder, recording a change once it is confirmed (caller holds the lock)."""
+        current = self.path[index]
+        if current is None:
+            self.path[index] = address
+            return
+        if address == current:
+            self._candidates.pop(index, None)
+            return
+
+        candidate, seen = self._candidates.get(index, (address, 0))
+        seen = seen + 1 if candidate == address else 1
+        if seen < self.confirm:
+            self._candidates[index] = (address, seen)
+            return
+
+        del self._candidates[index]
+        self.path[index] = address
+        self.changes.append(PathChange(self.target, timestamp, index + 1, current, address))
+
+    def process_round(self, reached: bool, hops: List[Hop], timestamp: Optional[float] = None) -> None:
+        """Apply one round of hop answers from PathProber."""
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self._lock:
+            # Unreached rounds run to the maximum TTL; only the hops of the known path are tracked
+            if not reached and self.depth is not None:
+                hops = hops[:self.depth]
+
+            for index, (address, ttl, ping_time) in enumerate(hops):
+                engine = self._hop_engine(index)
+                engine._process_ping_result(ttl, ping_time, timestamp=timestamp)
+                if address is not None:
+                    self._observe_responder(index, address, timestamp)
+
+            # A shorter path is kept once the destination is confirmed at its new hop
+            if reached:
+                self.depth = len(hops)
+                if len(self.hops) > self.depth and self.path[self.depth - 1] == hops[-1][0]:
+                    del self.hops[self.depth:]
+                    del self.path[self.depth:]
+                    for index in [index for index in self._candidates if index >= self.depth]:
+                        del self._candidates[index]
+
+            self.rounds += 1
+            self.sequence += 1
+
+    def first_failing_hop(self) -> Optional[int]:
+        """The hop where the path breaks: the nearest hop in outage with every hop beyond it in outage too."""
+        with self._lock:
+            hops = list(self.hops)
+
+        failing = None
+        for number in range(len(hops), 0, -1):
+            if hops[number - 1].outage_start_index is None:
+                break
+            failing = number
+        return failing
+
+    def get_hops(self) -> List[dict]:
+        """Per-hop responder and statistics, from TTL 1 outwards."""
+        with self._lock:
+            hops = list(zip(self.hops, self.path))
+
+        result = []
+        for number, (engine, address) in enumerate(hops, start=1):
+            stats_data = engine.get_statistics()
+            failure_rate, avg_ping_time, min_ping_time, max_ping_time, avg_outage_duration = \
+                StatisticsCalculator.calculate_statistics(stats_data)
+            result.append({
+                'hop': number,
+                'address': address,
+                'failure_rate': failure_rate,
+                'avg_ping_time': avg_ping_time,
+                'min_ping_time': min_ping_time,
+                'max_ping_time': max_ping_time,
+                'avg_outage_duration': avg_outage_duration,
+                'total_pings': stats_data['total_pings'],
+                'consecutive_failures': stats_data['consecutive_failures'],
+                'in_outage': engine.outage_start_index is not None,
+                'outage_history': stats_data['outage_history']
+            })
+        return result
+
+    def get_changes(self) -> List[PathChange]:
+        """Confirmed path changes, oldest first."""
+        with self._lock:
+            return list(self.changes)
+
+    def reset(self) -> None:
+        """Forget the traced path and all hop statistics."""
+        with self._lock:
+            self.hops = []
+            self.path = []
+            self._candidates = {}
+            self.depth = None
+            self.changes.clear()
+            self.rounds = 0
+            self.sequence += 1
@@ -0,0 +1,165 @@
+"""MTR-style path probing: TTL-limited echo requests to every hop of many targets in one burst."""
+
+import os
+import time
+import select
+import socket
+import struct
+import logging
+from typing import Optional, Dict, List, Tuple
+
+try:
+    from .config import PING_TIMEOUT, PATH_MAX_HOPS
+    from .batch_prober import build_echo_request, RECEIVE_BUFFER_SIZE, ICMP_ECHO_REPLY
+except ImportError:
+    from config import PING_TIMEOUT, PATH_MAX_HOPS
+    from batch_prober import build_echo_request, RECEIVE_BUFFER_SIZE, ICMP_ECHO_REPLY
+
+ICMP_DEST_UNREACHABLE = 3
+ICMP_TIME_EXCEEDED = 11
+
+# One hop's answer in a round: (responder address, reply TTL, RTT in ms), all None when unanswered
+Hop = Tuple[Optional[str], Optional[int], Optional[float]]
+
+# One round for one target: whether the destination answered, and its hops from TTL 1 outwards
+PathResult = Tuple[bool, List[Hop]]
+
+_ECHO_HEADER = struct.Struct('!BBHHH')
+
+def parse_path_reply(packet: bytes) -> Optional[Tuple[int, int, int, int]]:
+    """Extract (ICMP type, identifier, sequence, reply TTL) from a raw-socket packet.
+
+    Echo replies carry the probe's identifier and sequence directly; time exceeded and
+    unreachable errors quote the probe's IP and ICMP headers after their own header.
+    Other packets return None.
+    """
+    if len(packet) < 20:
+        return None
+    ttl = packet[8]
+    offset = (packet[0] & 0x0F) * 4
+    if len(packet) < offset + _ECHO_HEADER.size:
+        return None
+    icmp_type = packet[offset]
+
+    if icmp_type == ICMP_ECHO_REPLY:
+        _, _, _, identifier, sequence = _ECHO_HEADER.unpack_from(packet, offset)
+        return icmp_type, identifier, sequence, ttl
+    if icmp_type not in (ICMP_TIME_EXCEEDED, ICMP_DEST_UNREACHABLE):
+        return None
+
+    # Quoted datagram: original IP header, then at least the first 8 bytes of the echo request
+    inner = offset + 8
+    if len(packet) < inner + 20:
+        return None
+    inner += (packet[inner] & 0x0F) * 4
+    if len(packet) < inner + _ECHO_HEADER.size:
+        return None
+    _, _, _, identifier, sequence = _ECHO_HEADER.unpack_from(packet, inner)
+    return icmp_type, identifier, sequence, ttl
+
+class PathProber:
+    """Sends probes with TTL 1..max_hops to every target in one burst and maps the answers to hops.
+
+    All hops are probed concurrently rather than one TTL at a time, so a round takes
+    one timeout regardless of path length. Intermediate routers answer with ICMP time
+    exceeded, which only a raw socket receives, so this needs CAP_NET_RAW.
+    """
+
+    def __init__(self, timeout: float = PING_TIMEOUT, max_hops: int = PATH_MAX_HOPS,
+                 sock: Optional[socket.socket] = None):
+        # Configuration
+        self.timeout = timeout
+        self.max_hops = max_hops
+
+        # One raw socket for every hop of every target
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        self.sock = sock
+        self.sock.setblocking(False)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+        except (OSError, AttributeError):
+            pass
+
+        # Raw sockets see all ICMP on the host; our probes are told apart by identifier
+        self.identifier = (os.getpid() + 1) & 0xFFFF
+        self._next_sequence = 0
+
+        # Counters for benchmarking
+        self.packets_sent = 0
+        self.packets_received = 0
+
+    def _send_burst(self, addresses: List[Tuple[str, str]],
+                    pending: Dict[int, Tuple[str, str, int, float]]) -> None:
+        """Send one probe per (target, TTL), changing the socket TTL once per hop level."""
+        for ttl in range(1, self.max_hops + 1):
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, ttl)
+            for target, address in addresses:
+                sequence = self._next_sequence
+                self._next_sequence = (sequence + 1) & 0xFFFF
+                try:
+                    self.sock.sendto(build_echo_request(self.identifier, sequence), (address, 0))
+                except OSError as e:
+                    logging.error(f"Failed to send path probe to {target} (TTL {ttl}): {e}")
+                    continue
+                pending[sequence] = (target, address, ttl, time.perf_counter())
+                self.packets_sent += 1
+
+    def _drain_replies(self, pending: Dict[int, Tuple[str, str, int, float]],
+                       answers: Dict[str, Dict[int, Tuple[int, str, int, float]]], deadline: float) -> None:
+        """Collect answers until every probe is answered or the deadline passes."""
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([self.sock], [], [], remaining)
+            if not readable:
+                break
+
+            while pending:
+                try:
+                    data, source = self.sock.recvfrom(65535)
+                except (BlockingIOError, InterruptedError):
+                    break
+                received_at = time.perf_counter()
+
+                reply = parse_path_reply(data)
+                if reply is None:
+                    continue
+                icmp_type, identifier, sequence, reply_ttl = reply
+                if identifier != self.identifier or sequence not in pending:
+                    continue
+
+                # Echo replies must come from the probed address; errors come from the hop
+                target, address, ttl, sent_at = pending[sequence]
+                if icmp_type == ICMP_ECHO_REPLY and source[0] != address:
+                    continue
+                del pending[sequence]
+                answers[target][ttl] = (icmp_type, source[0], reply_ttl, round((received_at - sent_at) * 1000.0, 3))
+                self.packets_received += 1
+
+    def _build_path(self, hops: Dict[int, Tuple[int, str, int, float]]) -> PathResult:
+        """Order one target's answers by TTL, cutting the path at the first hop the destination answered."""
+        reached = [ttl for ttl, (icmp_type, _, _, _) in hops.items() if icmp_type == ICMP_ECHO_REPLY]
+        depth = min(reached) if reached else self.max_hops
+
+        path: List[Hop] = []
+        for ttl in range(1, depth + 1):
+            answer = hops.get(ttl)
+            path.append((answer[1], answer[2], answer[3]) if answer is not None else (None, None, None))
+        return bool(reached), path
+
+    def probe(self, addresses: Dict[str, str]) -> Dict[str, PathResult]:
+        """Trace every target once; addresses maps target names to resolved IPv4 addresses."""
+        if len(addresses) * self.max_hops > 0xFFFF:
+            raise ValueError("Too many targets for one path probing burst")
+
+        pending: Dict[int, Tuple[str, str, int, float]] = {}
+        answers: Dict[str, Dict[int, Tuple[int, str, int, float]]] = {target: {} for target in addresses}
+        self._send_burst(list(addresses.items()), pending)
+        self._drain_replies(pending, answers, time.perf_counter() + self.timeout)
+        return {target: self._build_path(hops) for target, hops in answers.items()}
+
+    def close(self) -> None:
+        """Close the raw socket."""
+        self.sock.close()
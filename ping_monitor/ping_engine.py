@@ -6,49 +6,109 @@ import time
 import threading
 import logging
 from collections import deque
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Callable, Sequence
 
 try:
-    from .config import PING_TIMEOUT, PING_INTERVAL, DEFAULT_TARGET, DEFAULT_MAX_POINTS
+    from .config import (PING_TIMEOUT, PING_INTERVAL, DEFAULT_TARGET, DEFAULT_MAX_POINTS, DEFAULT_HORIZONS,
+                         ANOMALY_HISTORY_SIZE, OUTAGE_THRESHOLD)
+    from .bitmap import FailureBitmap
+    from .outage_log import OutageLog, OutageEvent
+    from .dns_cache import DnsCache, DnsResolutionError, default_dns_cache
+    from .horizons import HorizonAggregator, Totals
+    from .anomaly import LatencyAnomalyDetector, AnomalyEvent
+    from .service_prober import Prober, parse_probe_target, default_service_prober
 except ImportError:
-    from config import PING_TIMEOUT, PING_INTERVAL, DEFAULT_TARGET, DEFAULT_MAX_POINTS
+    from config import (PING_TIMEOUT, PING_INTERVAL, DEFAULT_TARGET, DEFAULT_MAX_POINTS, DEFAULT_HORIZONS,
+                        ANOMALY_HISTORY_SIZE, OUTAGE_THRESHOLD)
+    from bitmap import FailureBitmap
+    from outage_log import OutageLog, OutageEvent
+    from dns_cache import DnsCache, DnsResolutionError, default_dns_cache
+    from horizons import HorizonAggregator, Totals
+    from anomaly import LatencyAnomalyDetector, AnomalyEvent
+    from service_prober import Prober, parse_probe_target, default_service_prober
 
 logging.getLogger().setLevel(logging.ERROR)
 
+# Called with (engine, timestamp, ttl, ping_time) after each sample is processed
+SampleListener = Callable[['PingEngine', float, Optional[int], Optional[float]], None]
+
 class PingEngine:
     """Handles ping operations and data collection with sliding window outage detection."""
 
-    def __init__(self, target: str = DEFAULT_TARGET, max_points: int = DEFAULT_MAX_POINTS):
+    def __init__(self, target: str = DEFAULT_TARGET, max_points: int = DEFAULT_MAX_POINTS,
+                 outage_log: Optional[OutageLog] = None, dns_cache: Optional[DnsCache] = None,
+                 horizons: Sequence[float] = DEFAULT_HORIZONS, detect_anomalies: bool = True,
+                 prober: Optional[Prober] = None, outage_threshold: int = OUTAGE_THRESHOLD):
         # Configuration
         self.target = target
         self.max_points = max_points
+        self.outage_threshold = outage_threshold
+        self.outage_log = outage_log
+        self.dns_cache = dns_cache if dns_cache is not None else default_dns_cache
+        
+        # Probe type from the target name (tcp://, udp://, http://, or plain host for ICMP);
+        # service targets fall back to the shared service prober when none is given
+        self.probe_target = parse_probe_target(target)
+        if prober is None and self.probe_target.kind != 'icmp':
+            prober = default_service_prober
+        self.prober = prober
         
         # Data storage (auto-limited by deque maxlen)
         self.ttls = deque(maxlen=max_points)
         self.ping_times = deque(maxlen=max_points)
         
+        # Failure bit per window sample, so window failure counts and runs never scan the deques
+        self.failure_bits = FailureBitmap(max_points)
+        
         # Overall statistics
         self.failed_pings = 0
         self.total_pings = 0
         
+        # Name resolution failures are tracked apart from ping loss
+        self.resolution_failures = 0
+        
+        # Bumped on every state change so readers can cache derived views
+        self.sequence = 0
+        
         # Outage detection state
         self.consecutive_failures = 0
         self.outage_start_index: Optional[int] = None
         
-        # Historical outage tracking - stores (start_index, duration) tuples
-        self.outage_history: List[Tuple[int, int]] = []
+        # Outages ended inside the window as (position of the ending success, duration), oldest first;
+        # positions count from the first ping so entries never need shifting as the window slides
+        self._outages: deque = deque()
+        
+        # Time-based aggregates (1 min .. 24 h) independent of the sample window
+        self.horizons = HorizonAggregator(horizons)
+        
+        # Restarts leave holes in the window: (total_pings when restored, down since, up again)
+        self.gaps: List[Tuple[int, float, float]] = []
+        
+        # Window restored from a snapshot, expanded into the deques on first use
+        self._pending_window: Optional[Tuple[memoryview, memoryview, Sequence[int]]] = None
+        
+        # Latency level shifts, reported alongside outages
+        self.anomaly_detector = LatencyAnomalyDetector() if detect_anomalies else None
+        self.anomalies = deque(maxlen=ANOMALY_HISTORY_SIZE)
+        
+        # Wall-clock context for the outage event log
+        self.failure_run_start_time: Optional[float] = None
+        self.last_ping_time: Optional[float] = None
+        
+        # Consumers notified of every processed sample
+        self.sample_listeners: List[SampleListener] = []
         
         # Threading controls
         self.running = False
         self.ping_thread: Optional[threading.Thread] = None
         self._lock = threading.Lock()
 
-    def ping_target(self) -> Tuple[Optional[int], Optional[float]]:
+    def ping_target(self, address: Optional[str] = None) -> Tuple[Optional[int], Optional[float]]:
         """Execute ping command and extract TTL and time."""
         try:
             # Execute single ping command with timeout
             result = subprocess.run(
-                ['ping', '-c', '1', self.target],
+                ['ping', '-c', '1', address or self.target],
                 capture_output=True,
                 text=True,
                 timeout=PING_TIMEOUT
@@ -69,75 +129,276 @@ class PingEngine:
             
         return None, None
 
-    def _update_outage_history(self) -> None:
-        """Decrement start indices of all outages and remove outdated ones."""
-        updated_outages = []
-        for start_idx, duration in self.outage_history:
-            # Decrement start index as window slides
-            new_start_idx = start_idx - 1
-            
-            # Keep outages that are still within the window (start index >= 0)
-            if new_start_idx >= 0:
-                updated_outages.append((new_start_idx, duration))
-                
-        self.outage_history = updated_outages
+    @property
+    def outage_history(self) -> List[Tuple[int, int]]:
+        """Outages still in view as (start index, duration), the index counting down to 0 as the window slides."""
+        newest = self.total_pings - 1
+        return [(self.max_points - 1 - (newest - end), duration) for end, duration in self._outages]
 
-    def _record_outage(self, start_index: int, duration: int) -> None:
-        """Record a valid outage (2+ consecutive failures) in the history."""
-        if duration >= 2:
-            self.outage_history.append((start_index, duration))
+    def _expire_outages(self) -> None:
+        """Drop outages whose ending success has left the window."""
+        oldest = self.total_pings - self.max_points
+        while self._outages and self._outages[0][0] < oldest:
+            self._outages.popleft()
 
-    def _handle_successful_ping(self, ttl: int, ping_time: float) -> None:
+    def _record_outage(self, duration: int) -> None:
+        """Record an outage ended by the current sample if it reached the outage threshold."""
+        if duration >= self.outage_threshold:
+            self._outages.append((self.total_pings - 1, duration))
+
+    def _log_outage_event(self, end_time: float, rtt_after: float) -> None:
+        """Append the outage that just ended to the persistent event log."""
+        if self.outage_log is not None and self.failure_run_start_time is not None:
+            self.outage_log.record(OutageEvent(
+                target=self.target,
+                start_time=self.failure_run_start_time,
+                end_time=end_time,
+                lost_probes=self.consecutive_failures,
+                rtt_before=self.last_ping_time,
+                rtt_after=rtt_after
+            ))
+
+    def _handle_successful_ping(self, ttl: int, ping_time: float, timestamp: float) -> None:
         """Process a successful ping result and handle outage ending."""
         # Store successful ping data
         self.ttls.append(ttl)
         self.ping_times.append(ping_time)
+        self.failure_bits.append(False)
         
-        # Check if we're ending an outage (2+ consecutive failures)
-        if self.consecutive_failures >= 2:
-            # Use the recorded start index from when the outage began
-            self._record_outage(self.outage_start_index, self.consecutive_failures)
+        # Feed the latency baseline; failures carry no RTT and are handled as outages
+        if self.anomaly_detector is not None:
+            shift = self.anomaly_detector.update(ping_time, timestamp)
+            if shift is not None:
+                direction, start_time, baseline_rtt, observed_rtt, samples = shift
+                self.anomalies.append(AnomalyEvent(
+                    target=self.target,
+                    start_time=start_time,
+                    detected_time=timestamp,
+                    direction=direction,
+                    baseline_rtt=baseline_rtt,
+                    observed_rtt=observed_rtt,
+                    samples=samples
+                ))
+        
+        # Check if we're ending an outage (a run of at least outage_threshold failures)
+        if self.consecutive_failures >= self.outage_threshold:
+            self._record_outage(self.consecutive_failures)
+            self._log_outage_event(timestamp, ping_time)
         
         # Reset outage tracking since ping succeeded
         self.consecutive_failures = 0
         self.outage_start_index = None
+        self.failure_run_start_time = None
+        self.last_ping_time = ping_time
 
-    def _handle_failed_ping(self) -> None:
+    def _handle_failed_ping(self, timestamp: float) -> None:
         """Process a failed ping result and track consecutive failures."""
         # Store failed ping data
         self.ttls.append(None)
         self.ping_times.append(None)
+        self.failure_bits.append(True)
         
         # Update failure counters
         self.failed_pings += 1
         self.consecutive_failures += 1
         
-        # Mark outage start when we hit 2 consecutive failures
-        if self.consecutive_failures == 2:
+        # Remember when this run of failures started
+        if self.consecutive_failures == 1:
+            self.failure_run_start_time = timestamp
+        
+        # Mark outage start when the run reaches the outage threshold
+        if self.consecutive_failures == self.outage_threshold:
             # Outage enters the window from the right boundary
             self.outage_start_index = self.max_points - 1
 
-    def _process_ping_result(self, ttl: Optional[int], ping_time: Optional[float]) -> None:
+    def _process_ping_result(self, ttl: Optional[int], ping_time: Optional[float],
+                             timestamp: Optional[float] = None) -> None:
         """Process ping result and update all statistics and outage tracking."""
+        if timestamp is None:
+            timestamp = time.time()
+        
         with self._lock:
+            self._materialize_window()
+            
             # Update basic counters
             self.total_pings += 1
+            self.sequence += 1
             
-            # Update outage history indices on every ping
-            self._update_outage_history()
+            # Forget outages that slid out of the window
+            self._expire_outages()
             
             # Process ping result
             if ttl is not None and ping_time is not None: # successful ping
-                self._handle_successful_ping(ttl, ping_time)
+                self._handle_successful_ping(ttl, ping_time, timestamp)
+                self.horizons.add(timestamp, ping_time)
             else: # failed ping
-                self._handle_failed_ping()
+                self._handle_failed_ping(timestamp)
+                self.horizons.add(timestamp, None)
+        
+        # Notify listeners outside the lock so they can read statistics
+        for listener in self.sample_listeners:
+            try:
+                listener(self, timestamp, ttl, ping_time)
+            except Exception as e:
+                logging.error(f"Sample listener failed for {self.target}: {e}")
+
+    def _materialize_window(self) -> None:
+        """Expand a restored window into the sample deques (caller holds the lock).
+        
+        Building thousands of Python floats per target dominates restore time, so a
+        restored window stays packed (TTLs as 'h', RTTs as 'd', failed positions listed
+        separately) until the engine is first used.
+        """
+        if self._pending_window is None:
+            return
+        ttls, ping_times, failures = self._pending_window
+        self._pending_window = None
+        
+        ttl_values = ttls.tolist()
+        ping_values = ping_times.tolist()
+        for position in failures:
+            ttl_values[position] = None
+            ping_values[position] = None
+        self.ttls = deque(ttl_values, maxlen=self.max_points)
+        self.ping_times = deque(ping_values, maxlen=self.max_points)
+
+    def capture_state(self) -> dict:
+        """Copy of the full engine state for snapshots, taken under the lock."""
+        with self._lock:
+            self._materialize_window()
+            return {
+                'max_points': self.max_points,
+                'ttls': list(self.ttls),
+                'ping_times': list(self.ping_times),
+                'failed_pings': self.failed_pings,
+                'total_pings': self.total_pings,
+                'resolution_failures': self.resolution_failures,
+                'sequence': self.sequence,
+                'consecutive_failures': self.consecutive_failures,
+                'outage_start_index': self.outage_start_index,
+                'outage_history': list(self.outage_history),
+                'failure_run_start_time': self.failure_run_start_time,
+                'last_ping_time': self.last_ping_time,
+                'gaps': list(self.gaps),
+                'horizons': self.horizons.export_state(),
+                'anomaly_detector': self.anomaly_detector.export_state() if self.anomaly_detector else None
+            }
+
+    def capture_counters(self, now: float, window: bool = False) -> dict:
+        """Counters, outages and horizon aggregates as of one sample, taken under the lock.
+
+        With window set the TTL and RTT windows are included, so everything comes from the same sample.
+        """
+        with self._lock:
+            counters = {
+                'sequence': self.sequence,
+                'total_pings': self.total_pings,
+                'failed_pings': self.failed_pings,
+                'resolution_failures': self.resolution_failures,
+                'consecutive_failures': self.consecutive_failures,
+                'outage_start_index': self.outage_start_index,
+                'outage_history': self.outage_history,
+                'horizons': self.horizons.snapshot(now)
+            }
+            if window:
+                self._materialize_window()
+                counters['ttls'] = list(self.ttls)
+                counters['ping_times'] = list(self.ping_times)
+            return counters
+
+    def restore_state(self, state: dict) -> None:
+        """Load state produced by capture_state; 'window' may replace 'ttls'/'ping_times' for lazy loading."""
+        with self._lock:
+            if 'window' in state:
+                self._pending_window = state['window']
+                ttls, _, failures = state['window']
+                self.failure_bits = FailureBitmap.from_positions(self.max_points, len(ttls), failures)
+            else:
+                self._pending_window = None
+                self.ttls = deque(state['ttls'], maxlen=self.max_points)
+                self.ping_times = deque(state['ping_times'], maxlen=self.max_points)
+                self.failure_bits = FailureBitmap.from_positions(
+                    self.max_points, len(self.ping_times),
+                    [position for position, ping_time in enumerate(self.ping_times) if ping_time is None])
+            
+            self.failed_pings = state['failed_pings']
+            self.total_pings = state['total_pings']
+            self.resolution_failures = state['resolution_failures']
+            self.consecutive_failures = state['consecutive_failures']
+            self.outage_start_index = state['outage_start_index']
+            newest = self.total_pings - 1
+            self._outages = deque((newest - (self.max_points - 1 - start), duration)
+                                  for start, duration in state['outage_history'])
+            self.failure_run_start_time = state['failure_run_start_time']
+            self.last_ping_time = state['last_ping_time']
+            self.gaps = list(state['gaps'])
+            
+            # Horizons and the latency baseline are only kept if configured the same way
+            if not self.horizons.restore_state(state['horizons']):
+                self.horizons.clear()
+            if self.anomaly_detector is not None and state['anomaly_detector'] is not None:
+                self.anomaly_detector.restore_state(state['anomaly_detector'])
+            
+            # Readers caching by sequence must never see an old number again
+            self.sequence = max(self.sequence, state['sequence']) + 1
+
+    def add_gap(self, start_time: float, end_time: float) -> None:
+        """Mark that no samples were taken between start_time and end_time (e.g. a restart)."""
+        with self._lock:
+            self.gaps.append((self.total_pings, start_time, end_time))
+            self.sequence += 1
+
+    def get_gaps(self) -> List[dict]:
+        """Gaps still inside the window, with the index of the first sample after each."""
+        with self._lock:
+            self._materialize_window()
+            window = len(self.ping_times)
+            
+            # Drop gaps that have slid out of the window
+            self.gaps = [gap for gap in self.gaps if window - (self.total_pings - gap[0]) >= 0]
+            return [
+                {'index': window - (self.total_pings - total), 'start_time': start_time, 'end_time': end_time}
+                for total, start_time, end_time in self.gaps
+            ]
+
+    def add_sample_listener(self, listener: SampleListener) -> None:
+        """Register a callback invoked after every processed sample."""
+        self.sample_listeners.append(listener)
+
+    def remove_sample_listener(self, listener: SampleListener) -> None:
+        """Unregister a sample callback."""
+        if listener in self.sample_listeners:
+            self.sample_listeners.remove(listener)
+
+    def resolve_address(self) -> Optional[str]:
+        """Resolve the target through the shared DNS cache, counting failures."""
+        try:
+            return self.dns_cache.resolve(self.probe_target.host)
+        except DnsResolutionError:
+            # Not a ping failure: no probe can be sent
+            with self._lock:
+                self.resolution_failures += 1
+                self.sequence += 1
+            return None
+
+    def probe_once(self) -> None:
+        """Execute a single ping and process its result."""
+        # Resolve through the shared cache so ping never does its own DNS lookup
+        address = self.resolve_address()
+        if address is None:
+            return
+        
+        if self.prober is not None:
+            ttl, ping_time = self.prober.probe({self.target: address})[self.target]
+        else:
+            ttl, ping_time = self.ping_target(address)
+        self._process_ping_result(ttl, ping_time)
 
     def _ping_loop(self) -> None:
         """Main ping execution loop that runs in background thread."""
         while self.running:
             # Execute single ping and process result
-            ttl, ping_time = self.ping_target()
-            self._process_ping_result(ttl, ping_time)
+            self.probe_once()
             
             # Wait before next ping
             time.sleep(PING_INTERVAL)
@@ -165,22 +426,72 @@ class PingEngine:
             # Clear data storage
             self.ttls.clear()
             self.ping_times.clear()
+            self.failure_bits.clear()
             
             # Reset overall counters
             self.failed_pings = 0
             self.total_pings = 0
+            self.resolution_failures = 0
+            self.sequence += 1
             
             # Reset outage detection
-            self.outage_history.clear()
+            self._outages.clear()
+            self._pending_window = None
+            self.gaps.clear()
+            self.horizons.clear()
+            self.anomalies.clear()
+            if self.anomaly_detector is not None:
+                self.anomaly_detector.reset()
             self.consecutive_failures = 0
             self.outage_start_index = None
+            self.failure_run_start_time = None
+            self.last_ping_time = None
+
+    def get_anomalies(self, start: Optional[float] = None, end: Optional[float] = None) -> List[AnomalyEvent]:
+        """Get recent latency anomaly events, optionally limited to a detection time range."""
+        with self._lock:
+            return [
+                event for event in self.anomalies
+                if (start is None or event.detected_time >= start) and (end is None or event.detected_time <= end)
+            ]
+
+    def get_outage_runs(self, threshold: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Failure runs in the window as (window index, length), re-evaluated at any outage threshold.
+
+        Unlike outage_history, runs are cut at the window edges and the last one may still be open.
+        """
+        with self._lock:
+            return self.failure_bits.runs(self.outage_threshold if threshold is None else threshold)
 
-    def get_statistics(self) -> dict:
+    def get_ping_times(self) -> List[Optional[float]]:
+        """Copy of the RTT window, None for failed pings."""
+        with self._lock:
+            self._materialize_window()
+            return list(self.ping_times)
+
+    def get_horizon_totals(self, seconds: float, now: Optional[float] = None) -> Optional[Totals]:
+        """Raw aggregates over one tracked horizon, or None if it is not tracked."""
+        with self._lock:
+            horizon = self.horizons.find(seconds, time.time() if now is None else now)
+            return horizon.totals() if horizon is not None else None
+
+    def get_horizon_series(self, seconds: float, now: Optional[float] = None) -> Optional[List[Tuple[float, Totals]]]:
+        """Per-bucket aggregates over one tracked horizon, or None if it is not tracked."""
+        with self._lock:
+            horizon = self.horizons.find(seconds, time.time() if now is None else now)
+            return horizon.series() if horizon is not None else None
+
+    def get_statistics(self, now: Optional[float] = None) -> dict:
         """Get current statistics snapshot with thread-safe access."""
+        if now is None:
+            now = time.time()
+        
         with self._lock:
+            self._materialize_window()
+            
             # Calculate sliding window statistics
             window_pings = len(self.ping_times)
-            window_failed_pings = sum(1 for ping_time in self.ping_times if ping_time is None)
+            window_failed_pings = self.failure_bits.count()
             
             # Calculate failure rate within the sliding window
             failure_rate = (window_failed_pings / window_pings * 100) if window_pings > 0 else 0.0
@@ -193,5 +504,6 @@ class PingEngine:
                 'failure_rate': failure_rate,
                 'outage_history': [duration for _, duration in self.outage_history],
                 'consecutive_failures': self.consecutive_failures,
-                'outage_start_index': self.outage_start_index
+                'outage_start_index': self.outage_start_index,
+                'horizons': self.horizons.snapshot(now)
             } 
\ No newline at end of file
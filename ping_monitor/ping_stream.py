@@ -0,0 +1,228 @@
+"""Persistent streaming `ping` processes, one per target, parsed incrementally from their output."""
+
+import os
+import re
+import time
+import logging
+import selectors
+import threading
+import subprocess
+from typing import Optional, Dict, List, Tuple, Sequence
+
+try:
+    from .config import PING_INTERVAL, PING_COMMAND, STREAM_RESTART_DELAY, STREAM_MAX_RESTART_DELAY
+    from .ping_engine import PingEngine
+except ImportError:
+    from config import PING_INTERVAL, PING_COMMAND, STREAM_RESTART_DELAY, STREAM_MAX_RESTART_DELAY
+    from ping_engine import PingEngine
+
+# "64 bytes from 8.8.8.8: icmp_seq=1 ttl=117 time=12.3 ms"
+REPLY_PATTERN = re.compile(rb'icmp_seq=(\d+) ttl=(\d+) time=(\d+(?:\.\d+)?)')
+# "no answer yet for icmp_seq=2" (-O) and "From 10.0.0.1 icmp_seq=3 Destination Host Unreachable"
+LOSS_PATTERN = re.compile(rb'(?:^no answer yet for |^From \S+ )icmp_seq=(\d+)')
+
+# Sequence numbers are 16 bit; anything less than half a lap ahead is new
+SEQUENCE_MODULO = 1 << 16
+
+def parse_ping_line(line: bytes) -> Optional[Tuple[int, Optional[int], Optional[float]]]:
+    """Parse one output line into (icmp_seq, ttl, time_ms); ttl and time are None for a lost probe."""
+    if b'icmp_seq=' not in line:
+        return None
+    match = REPLY_PATTERN.search(line)
+    if match is not None:
+        return int(match.group(1)), int(match.group(2)), float(match.group(3))
+    match = LOSS_PATTERN.search(line)
+    if match is not None:
+        return int(match.group(1)), None, None
+    return None
+
+class _Stream:
+    """One running ping process and its partial output."""
+
+    def __init__(self, engine: PingEngine, address: str, process: subprocess.Popen, interval: float = PING_INTERVAL):
+        self.engine = engine
+        self.address = address
+        self.process = process
+        self.interval = interval
+        self.buffer = b''
+        self.last_seq: Optional[int] = None
+
+    def feed(self, data: bytes) -> List[Tuple[Optional[int], Optional[float]]]:
+        """Parse complete lines from new output, dropping late replies to already reported probes."""
+        lines = (self.buffer + data).split(b'\n')
+        self.buffer = lines.pop()
+
+        results = []
+        for line in lines:
+            parsed = parse_ping_line(line)
+            if parsed is None:
+                continue
+            seq, ttl, ping_time = parsed
+            if self.last_seq is not None and not 0 < (seq - self.last_seq) % SEQUENCE_MODULO < SEQUENCE_MODULO // 2:
+                continue
+            self.last_seq = seq
+            results.append((ttl, ping_time))
+        return results
+
+class StreamingPinger:
+    """Keeps one `ping -O -i <interval>` process per target and feeds its samples to the target's engine.
+
+    Processes are spawned once per target lifetime instead of once per sample. A single
+    supervisor thread multiplexes every process's stdout, restarts processes that exit
+    (with exponential backoff) and follows target, address and interval changes passed to sync().
+    Each process pings at its target's own interval, the pinger's interval by default.
+    """
+
+    def __init__(self, interval: float = PING_INTERVAL, command: Sequence[str] = PING_COMMAND,
+                 restart_delay: float = STREAM_RESTART_DELAY, max_restart_delay: float = STREAM_MAX_RESTART_DELAY):
+        self.interval = interval
+        self.command = list(command)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        # Desired state from sync(): target -> (engine, address, interval); owned by callers
+        self._desired: Dict[str, Tuple[PingEngine, Optional[str], float]] = {}
+        self._lock = threading.Lock()
+
+        # Running state; owned by the supervisor thread
+        self._streams: Dict[str, _Stream] = {}
+        self._selector = selectors.DefaultSelector()
+        self._retry_at: Dict[str, float] = {}
+        self._backoff: Dict[str, float] = {}
+
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        # Counters for monitoring and benchmarking
+        self.spawns = 0
+        self.restarts = 0
+        self.samples = 0
+
+    def sync(self, targets: List[Tuple[str, PingEngine]], intervals: Optional[Dict[str, float]] = None) -> None:
+        """Set the targets that should be streaming, resolving each through its engine's DNS cache.
+
+        intervals maps targets to their own ping interval; a changed interval restarts the process.
+        """
+        intervals = intervals or {}
+        desired = {}
+        for target, engine in targets:
+            # On a resolution failure keep streaming to the last known address
+            desired[target] = (engine, engine.resolve_address(), intervals.get(target, self.interval))
+        with self._lock:
+            self._desired = desired
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._supervise, daemon=True)
+                self._thread.start()
+
+    def running_targets(self) -> Dict[str, int]:
+        """Target -> pid of every live process."""
+        return {target: stream.process.pid for target, stream in list(self._streams.items())}
+
+    def close(self) -> None:
+        """Stop every process and the supervisor thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._desired = {}
+        self._stopped.set()
+        if thread is not None:
+            thread.join()
+
+    def _spawn(self, target: str, engine: PingEngine, address: str, interval: float) -> None:
+        """Start a process for a target, scheduling a retry if it cannot be started."""
+        try:
+            process = subprocess.Popen(self.command + ['-n', '-O', '-i', f"{interval:g}", address],
+                                       stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                       stderr=subprocess.DEVNULL, bufsize=0)
+        except OSError as e:
+            logging.error(f"Cannot start ping for {target}: {e}")
+            self._schedule_retry(target)
+            return
+
+        self._streams[target] = _Stream(engine, address, process, interval)
+        os.set_blocking(process.stdout.fileno(), False)
+        self._selector.register(process.stdout, selectors.EVENT_READ, target)
+        self.spawns += 1
+
+    def _terminate(self, target: str) -> None:
+        """Stop a target's process and forget its stream."""
+        stream = self._streams.pop(target)
+        self._selector.unregister(stream.process.stdout)
+        if stream.process.poll() is None:
+            stream.process.terminate()
+            try:
+                stream.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                stream.process.kill()
+                stream.process.wait()
+        stream.process.stdout.close()
+
+    def _schedule_retry(self, target: str) -> None:
+        """Back off before restarting a target whose process failed."""
+        delay = self._backoff.get(target, self.restart_delay)
+        self._retry_at[target] = time.monotonic() + delay
+        self._backoff[target] = min(delay * 2, self.max_restart_delay)
+
+    def _reconcile(self) -> None:
+        """Start, stop and restart processes to match the desired targets."""
+        with self._lock:
+            desired = self._desired
+
+        for target in list(self._streams):
+            engine, address, interval = desired.get(target, (None, None, None))
+            stream = self._streams[target]
+            if (engine is not stream.engine or (address is not None and address != stream.address)
+                    or interval != stream.interval):
+                self._terminate(target)
+        for target in list(self._retry_at):
+            if target not in desired:
+                del self._retry_at[target]
+                self._backoff.pop(target, None)
+
+        now = time.monotonic()
+        for target, (engine, address, interval) in desired.items():
+            if target in self._streams or address is None or self._retry_at.get(target, 0) > now:
+                continue
+            self._retry_at.pop(target, None)
+            self._spawn(target, engine, address, interval)
+
+    def _read(self, target: str) -> None:
+        """Read available output from one process, handling its exit."""
+        stream = self._streams[target]
+        try:
+            data = os.read(stream.process.stdout.fileno(), 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+
+        if not data:
+            # Step 1: The process exited; restart it after a backoff
+            self._terminate(target)
+            logging.error(f"ping for {target} exited with status {stream.process.returncode}; restarting")
+            self.restarts += 1
+            self._schedule_retry(target)
+            return
+
+        # Step 2: Feed each parsed sample to the engine
+        results = stream.feed(data)
+        if results:
+            self._backoff.pop(target, None)
+        for ttl, ping_time in results:
+            stream.engine._process_ping_result(ttl, ping_time)
+        self.samples += len(results)
+
+    def _supervise(self) -> None:
+        """Multiplex process output and keep the processes matching the desired targets."""
+        while not self._stopped.is_set():
+            try:
+                self._reconcile()
+                for key, _ in self._selector.select(timeout=0.1):
+                    if key.data in self._streams:
+                        self._read(key.data)
+            except Exception as e:
+                logging.error(f"Ping stream supervisor failed: {e}")
+                self._stopped.wait(self.restart_delay)
+
+        for target in list(self._streams):
+            self._terminate(target)
@@ -0,0 +1,224 @@
+"""Push protocol: collectors send batched, delta-encoded sample frames to a central aggregator."""
+
+import os
+import time
+import struct
+import logging
+import threading
+import urllib.request
+from collections import deque
+from typing import Optional, Dict, List, Tuple
+
+try:
+    from .config import PUSH_BATCH_SIZE, PUSH_FLUSH_INTERVAL, PUSH_MAX_BUFFER, PUSH_TIMEOUT, PUSH_MAX_BACKOFF
+    from .sample_format import Sample
+    from .varint import write_varint, read_varint, zigzag, unzigzag
+    from .service_prober import parse_probe_target
+except ImportError:
+    from config import PUSH_BATCH_SIZE, PUSH_FLUSH_INTERVAL, PUSH_MAX_BUFFER, PUSH_TIMEOUT, PUSH_MAX_BACKOFF
+    from sample_format import Sample
+    from varint import write_varint, read_varint, zigzag, unzigzag
+    from service_prober import parse_probe_target
+
+# Frame layout:
+#   header:  magic, site name length, session id, frame sequence, base timestamp (ms), sample count
+#   then:    site name, target table (varint count, then varint length + UTF-8 name each)
+#   samples: varint of the target index shifted left once with the low bit set for failed probes,
+#            zigzag varint change in the ms spacing between samples (0 while the probe interval is steady),
+#            and for successes a TTL byte (0 = unknown, as for service probes) and a zigzag varint
+#            of the RTT change (us) since the target's previous RTT
+FRAME_MAGIC = b'PMP2'
+FRAME_HEADER = struct.Struct('<4sHQQqI')
+
+class FrameError(Exception):
+    """Raised when a pushed frame cannot be decoded."""
+
+def encode_frame(site: str, session: int, sequence: int, samples: List[Sample]) -> bytes:
+    """Encode samples into one frame; timestamps keep millisecond and RTTs microsecond precision."""
+    targets: Dict[str, int] = {}
+    for _, target, _, _ in samples:
+        if target not in targets:
+            targets[target] = len(targets)
+
+    base_ms = round(samples[0][0] * 1000) if samples else 0
+    site_name = site.encode('utf-8')
+    out = bytearray(FRAME_HEADER.pack(FRAME_MAGIC, len(site_name), session, sequence, base_ms, len(samples)))
+    out += site_name
+
+    write_varint(out, len(targets))
+    for target in targets:
+        name = target.encode('utf-8')
+        write_varint(out, len(name))
+        out += name
+
+    previous_ms = base_ms
+    previous_step = 0
+    previous_rtt: Dict[int, int] = {}
+    for timestamp, target, ttl, ping_time in samples:
+        index = targets[target]
+        timestamp_ms = round(timestamp * 1000)
+        step = timestamp_ms - previous_ms
+        failed = ttl is None or ping_time is None
+        write_varint(out, index << 1 | failed)
+        write_varint(out, zigzag(step - previous_step))
+        previous_ms, previous_step = timestamp_ms, step
+
+        if failed:
+            continue
+        rtt_us = round(ping_time * 1000)
+        out.append(min(max(ttl, 0), 255))
+        write_varint(out, zigzag(rtt_us - previous_rtt.get(index, 0)))
+        previous_rtt[index] = rtt_us
+    return bytes(out)
+
+def decode_frame(data: bytes) -> Tuple[str, int, int, List[Sample]]:
+    """Decode a frame into (site, session, sequence, samples)."""
+    try:
+        magic, site_length, session, sequence, base_ms, count = FRAME_HEADER.unpack_from(data, 0)
+        if magic != FRAME_MAGIC:
+            raise FrameError("Not a sample frame")
+        offset = FRAME_HEADER.size
+        site = data[offset:offset + site_length].decode('utf-8')
+        offset += site_length
+
+        target_count, offset = read_varint(data, offset)
+        targets = []
+        for _ in range(target_count):
+            length, offset = read_varint(data, offset)
+            target = data[offset:offset + length].decode('utf-8')
+            offset += length
+            # An unparseable name would otherwise fail later, when its engine is created
+            try:
+                parse_probe_target(target)
+            except ValueError as e:
+                raise FrameError(f"Invalid target in frame: {e}") from e
+            targets.append(target)
+
+        samples: List[Sample] = []
+        previous_ms = base_ms
+        previous_step = 0
+        previous_rtt: Dict[int, int] = {}
+        for _ in range(count):
+            flagged, offset = read_varint(data, offset)
+            index = flagged >> 1
+            delta, offset = read_varint(data, offset)
+            previous_step += unzigzag(delta)
+            previous_ms += previous_step
+            if flagged & 1:
+                samples.append((previous_ms / 1000, targets[index], None, None))
+                continue
+            ttl = data[offset]
+            offset += 1
+            delta, offset = read_varint(data, offset)
+            rtt_us = previous_rtt.get(index, 0) + unzigzag(delta)
+            previous_rtt[index] = rtt_us
+            samples.append((previous_ms / 1000, targets[index], ttl, rtt_us / 1000))
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise FrameError(f"Malformed frame: {e}") from e
+    return site, session, sequence, samples
+
+class PushClient:
+    """Sample writer that batches samples into frames and pushes them to an aggregator.
+
+    Samples wait in a bounded buffer while the aggregator is unreachable; when it is
+    full the oldest samples are dropped and counted. A frame keeps its sequence number
+    until acknowledged, so retries are recognized as duplicates rather than replayed.
+    """
+
+    def __init__(self, url: str, site: str, batch_size: int = PUSH_BATCH_SIZE,
+                 flush_interval: float = PUSH_FLUSH_INTERVAL, max_buffer: int = PUSH_MAX_BUFFER,
+                 timeout: float = PUSH_TIMEOUT, max_backoff: float = PUSH_MAX_BACKOFF):
+        # Configuration
+        self.url = url.rstrip('/') + '/api/push'
+        self.site = site
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+
+        # A new session per process lets the aggregator tell restarts from lost frames
+        self.session = int.from_bytes(os.urandom(8), 'little')
+        self.sequence = 0
+
+        # Samples not yet framed, and the framed batch awaiting acknowledgement
+        self.buffer: deque = deque(maxlen=max_buffer)
+        self._pending: Optional[Tuple[int, bytes, int]] = None
+
+        # Counters
+        self.frames_sent = 0
+        self.samples_sent = 0
+        self.samples_dropped = 0
+        self.send_failures = 0
+
+        # Threading controls
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._push_loop, daemon=True)
+        self._thread.start()
+
+    def write(self, timestamp: float, target: str, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Queue one sample for pushing."""
+        with self._lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.samples_dropped += 1
+            self.buffer.append((timestamp, target, ttl, ping_time))
+            if len(self.buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def _next_frame(self) -> Optional[Tuple[int, bytes, int]]:
+        """The unacknowledged frame, or a new one cut from the buffer."""
+        with self._lock:
+            if self._pending is None and self.buffer:
+                count = min(len(self.buffer), self.batch_size)
+                samples = [self.buffer.popleft() for _ in range(count)]
+                self.sequence += 1
+                self._pending = (self.sequence, encode_frame(self.site, self.session, self.sequence, samples), count)
+            return self._pending
+
+    def _send(self, body: bytes) -> None:
+        """POST one frame; raises on any transport or HTTP error."""
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/octet-stream'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def flush(self) -> bool:
+        """Push frames until the buffer is empty; returns False if the aggregator is unreachable."""
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return True
+            sequence, body, count = frame
+            try:
+                self._send(body)
+            except Exception as e:
+                self.send_failures += 1
+                logging.error(f"Push to {self.url} failed: {e}")
+                return False
+            with self._lock:
+                self._pending = None
+                self.frames_sent += 1
+                self.samples_sent += count
+
+    def _push_loop(self) -> None:
+        """Flush on a timer or when a batch fills, backing off while the aggregator is down."""
+        backoff = self.flush_interval
+        while not self._closed:
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            if self._closed:
+                return
+            if self.flush():
+                backoff = self.flush_interval
+            else:
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the background thread and try to deliver what is buffered."""
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not self.flush():
+            time.sleep(min(self.flush_interval, max(0.0, deadline - time.monotonic())))
@@ -0,0 +1,238 @@
+"""Aggregate queries over targets and time buckets, evaluated from per-target aggregates."""
+
+import re
+import time
+import math
+import fnmatch
+from typing import Optional, List, Dict, Tuple, NamedTuple
+
+try:
+    from .ping_engine import PingEngine
+    from .horizons import Totals
+except ImportError:
+    from ping_engine import PingEngine
+    from horizons import Totals
+
+# Metrics computable from horizon running totals; the rest need the per-sample window
+TOTALS_METRICS = ('pings', 'failed_pings', 'failure_rate', 'avg_ping_time')
+SAMPLE_METRICS = ('min_ping_time', 'max_ping_time', 'p50_ping_time', 'p95_ping_time', 'p99_ping_time')
+METRICS = TOTALS_METRICS + SAMPLE_METRICS
+
+GROUP_BY = ('target', 'time')
+
+OPERATORS = {
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+}
+
+FILTER_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|==|!=|>|<)\s*(-?\d+(?:\.\d+)?)\s*$')
+
+class QueryError(ValueError):
+    """Raised for queries that are malformed or cannot be evaluated."""
+
+class Query(NamedTuple):
+    """A parsed aggregate query; hashable so it can key the result cache."""
+    metric: str = 'failure_rate'
+    window: Optional[float] = None  # Horizon seconds, or None for the per-sample window
+    group_by: Tuple[str, ...] = ()
+    targets: Tuple[str, ...] = ()
+    match: Optional[str] = None  # Glob over target names
+    kind: Optional[str] = None  # Probe type: icmp, tcp, udp or http
+    filters: Tuple[Tuple[str, str, float], ...] = ()  # Per-target (metric, operator, value)
+    order: Optional[str] = None  # 'asc' or 'desc' ranks groups by value; None keeps natural order
+    limit: Optional[int] = None
+
+def _check_metric(metric: str, window: Optional[float]) -> None:
+    """Reject unknown metrics and sample metrics over a horizon window."""
+    if metric not in METRICS:
+        raise QueryError(f"Unknown metric '{metric}'; expected one of {', '.join(METRICS)}")
+    if window is not None and metric not in TOTALS_METRICS:
+        raise QueryError(f"Metric '{metric}' needs the sample window; horizons support {', '.join(TOTALS_METRICS)}")
+
+def parse_query(args) -> Query:
+    """Build a Query from request arguments (anything with get() and getlist())."""
+    metric = args.get('metric', 'failure_rate')
+
+    window = args.get('window')
+    if window is not None:
+        try:
+            window = float(window)
+        except ValueError:
+            raise QueryError(f"Invalid window '{window}'")
+    _check_metric(metric, window)
+
+    group_by = tuple(part.strip() for value in args.getlist('group_by') for part in value.split(',') if part.strip())
+    for dimension in group_by:
+        if dimension not in GROUP_BY:
+            raise QueryError(f"Cannot group by '{dimension}'; expected target and/or time")
+    group_by = tuple(dimension for dimension in GROUP_BY if dimension in group_by)
+    if 'time' in group_by and window is None:
+        raise QueryError("Grouping by time needs a horizon window")
+
+    filters = []
+    for expression in args.getlist('filter'):
+        parsed = FILTER_PATTERN.match(expression)
+        if parsed is None:
+            raise QueryError(f"Invalid filter '{expression}'; expected e.g. failure_rate>5")
+        _check_metric(parsed.group(1), window)
+        filters.append((parsed.group(1), parsed.group(2), float(parsed.group(3))))
+
+    order = args.get('order')
+    if order not in (None, 'asc', 'desc'):
+        raise QueryError("Order must be asc or desc")
+
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise QueryError(f"Invalid limit '{limit}'")
+        if limit < 1:
+            raise QueryError("Limit must be at least 1")
+
+    return Query(metric=metric, window=window, group_by=group_by, targets=tuple(sorted(set(args.getlist('target')))),
+                 match=args.get('match'), kind=args.get('kind'), filters=tuple(filters), order=order, limit=limit)
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Linearly interpolated percentile of sorted values."""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+class _Accumulator:
+    """Mergeable aggregates for one group; RTTs are kept only for sample-window queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.rtt_count = 0
+        self.rtt_sum_us = 0
+        self.rtts: List[float] = []
+        self._sorted = True
+
+    def add_totals(self, totals: Totals) -> None:
+        """Add horizon running totals."""
+        count, failed, rtt_count, rtt_sum_us = totals
+        self.count += count
+        self.failed += failed
+        self.rtt_count += rtt_count
+        self.rtt_sum_us += rtt_sum_us
+
+    def add_samples(self, ping_times: List[Optional[float]]) -> None:
+        """Add a window of samples, None for failed pings."""
+        rtts = [ping_time for ping_time in ping_times if ping_time is not None]
+        self.count += len(ping_times)
+        self.failed += len(ping_times) - len(rtts)
+        self.rtt_count += len(rtts)
+        self.rtt_sum_us += round(sum(rtts) * 1000)
+        self.rtts.extend(rtts)
+        self._sorted = False
+
+    def merge(self, other: '_Accumulator') -> None:
+        """Add another group's aggregates."""
+        self.add_totals((other.count, other.failed, other.rtt_count, other.rtt_sum_us))
+        if other.rtts:
+            self.rtts.extend(other.rtts)
+            self._sorted = False
+
+    def value(self, metric: str) -> Optional[float]:
+        """Compute one metric from the aggregates."""
+        if metric == 'pings':
+            return self.count
+        if metric == 'failed_pings':
+            return self.failed
+        if metric == 'failure_rate':
+            return (self.failed / self.count * 100) if self.count > 0 else 0.0
+        if metric == 'avg_ping_time':
+            return (self.rtt_sum_us / self.rtt_count / 1000) if self.rtt_count > 0 else None
+
+        if not self._sorted:
+            self.rtts.sort()
+            self._sorted = True
+        if not self.rtts:
+            return None
+        if metric == 'min_ping_time':
+            return self.rtts[0]
+        if metric == 'max_ping_time':
+            return self.rtts[-1]
+        return percentile(self.rtts, int(metric[1:3]) / 100)
+
+def _selected(query: Query, name: str, engine: PingEngine) -> bool:
+    """Whether a target passes the name, glob and probe type selectors."""
+    if query.targets and name not in query.targets:
+        return False
+    if query.match is not None and not fnmatch.fnmatchcase(name, query.match):
+        return False
+    return query.kind is None or engine.probe_target.kind == query.kind
+
+def _target_accumulator(query: Query, engine: PingEngine, now: float) -> _Accumulator:
+    """Aggregates of one target over the query window."""
+    accumulator = _Accumulator()
+    if query.window is None:
+        accumulator.add_samples(engine.get_ping_times())
+        return accumulator
+
+    totals = engine.get_horizon_totals(query.window, now)
+    if totals is None:
+        windows = ', '.join(f"{horizon.seconds:g}" for horizon in engine.horizons.horizons)
+        raise QueryError(f"Window must be one of the tracked horizons: {windows}")
+    accumulator.add_totals(totals)
+    return accumulator
+
+def _passes(accumulator: _Accumulator, filters: Tuple[Tuple[str, str, float], ...]) -> bool:
+    """Whether aggregates satisfy every filter; a metric without a value fails its filter."""
+    for metric, op, threshold in filters:
+        value = accumulator.value(metric)
+        if value is None or not OPERATORS[op](value, threshold):
+            return False
+    return True
+
+def evaluate(query: Query, engines: Dict[str, PingEngine], now: Optional[float] = None) -> dict:
+    """Evaluate a query over the given engines."""
+    now = time.time() if now is None else now
+
+    # Step 1: Select targets and apply per-target filters over the whole window
+    groups: Dict[tuple, _Accumulator] = {}
+    matched = 0
+    for name, engine in sorted(engines.items()):
+        if not _selected(query, name, engine):
+            continue
+        target_accumulator = _target_accumulator(query, engine, now)
+        if not _passes(target_accumulator, query.filters):
+            continue
+        matched += 1
+
+        # Step 2: Fold the target into its groups
+        target_key = (name,) if 'target' in query.group_by else ()
+        if 'time' in query.group_by:
+            for start, totals in engine.get_horizon_series(query.window, now) or []:
+                groups.setdefault(target_key + (start,), _Accumulator()).add_totals(totals)
+        else:
+            groups.setdefault(target_key, _Accumulator()).merge(target_accumulator)
+
+    result = {'metric': query.metric, 'window': query.window, 'targets': matched}
+    if not query.group_by:
+        result['value'] = groups.get((), _Accumulator()).value(query.metric)
+        return result
+
+    # Step 3: Rank and cut groups; missing values sort last in either order
+    rows = []
+    for key in sorted(groups):
+        row = dict(zip(query.group_by, key))
+        row['value'] = groups[key].value(query.metric)
+        rows.append(row)
+    if query.order is not None:
+        present = [row for row in rows if row['value'] is not None]
+        present.sort(key=lambda row: row['value'], reverse=query.order == 'desc')
+        rows = present + [row for row in rows if row['value'] is None]
+
+    result['total'] = len(rows)
+    result['groups'] = rows[:query.limit] if query.limit is not None else rows
+    return result
@@ -0,0 +1,113 @@
+"""Compact line and binary formats for streaming ping samples."""
+
+import struct
+import threading
+from typing import Optional, BinaryIO, Dict, Iterator, Tuple
+
+# A sample as streamed: (timestamp, target, ttl, ping_time); failures have ttl and ping_time None
+Sample = Tuple[float, str, Optional[int], Optional[float]]
+
+# Binary stream layout: magic, then records tagged 'T' (target definition) or 'S' (sample)
+BINARY_MAGIC = b'PMS1'
+TARGET_RECORD = struct.Struct('<cHB')
+SAMPLE_RECORD = struct.Struct('<cHdhI')
+
+# Ping reports RTT with microsecond resolution, so integer microseconds are lossless
+MISSING_RTT = 0xFFFFFFFF
+
+def format_sample_line(timestamp: float, target: str, ttl: Optional[int], ping_time: Optional[float]) -> str:
+    """Format one sample as "<timestamp> <target> <ttl> <ping_time>" with "-" for missing values."""
+    if ttl is None or ping_time is None:
+        return f"{timestamp:.3f} {target} - -\n"
+    return f"{timestamp:.3f} {target} {ttl} {ping_time}\n"
+
+def parse_sample_line(line: str) -> Optional[Sample]:
+    """Parse a line written by format_sample_line, or None if it is malformed."""
+    fields = line.split()
+    if len(fields) != 4:
+        return None
+    try:
+        timestamp = float(fields[0])
+        if fields[2] == '-' or fields[3] == '-':
+            return timestamp, fields[1], None, None
+        return timestamp, fields[1], int(fields[2]), float(fields[3])
+    except ValueError:
+        return None
+
+class LineSampleWriter:
+    """Writes samples as text lines; safe to call from several probe threads."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, timestamp: float, target: str, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Append one sample to the stream."""
+        line = format_sample_line(timestamp, target, ttl, ping_time)
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+class BinarySampleWriter:
+    """Writes samples as fixed-size binary records with target names interned once."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self._target_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stream.write(BINARY_MAGIC)
+
+    def write(self, timestamp: float, target: str, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Append one sample, defining its target first if it is new."""
+        with self._lock:
+            target_id = self._target_ids.get(target)
+            if target_id is None:
+                target_id = self._target_ids[target] = len(self._target_ids)
+                name = target.encode('utf-8')
+                self.stream.write(TARGET_RECORD.pack(b'T', target_id, len(name)) + name)
+
+            if ttl is None or ping_time is None:
+                record = SAMPLE_RECORD.pack(b'S', target_id, timestamp, -1, MISSING_RTT)
+            else:
+                rtt_us = min(round(ping_time * 1000), MISSING_RTT - 1)
+                record = SAMPLE_RECORD.pack(b'S', target_id, timestamp, ttl, rtt_us)
+            self.stream.write(record)
+            self.stream.flush()
+
+def iter_binary_samples(stream: BinaryIO) -> Iterator[Sample]:
+    """Read samples from a binary stream (after its magic has been consumed)."""
+    names: Dict[int, str] = {}
+    while True:
+        tag = stream.read(1)
+        if not tag:
+            return
+        if tag == b'T':
+            header = stream.read(TARGET_RECORD.size - 1)
+            if len(header) < TARGET_RECORD.size - 1:
+                return
+            _, target_id, length = TARGET_RECORD.unpack(tag + header)
+            names[target_id] = stream.read(length).decode('utf-8')
+        elif tag == b'S':
+            body = stream.read(SAMPLE_RECORD.size - 1)
+            if len(body) < SAMPLE_RECORD.size - 1:
+                return
+            _, target_id, timestamp, ttl, rtt_us = SAMPLE_RECORD.unpack(tag + body)
+            if ttl < 0 or rtt_us == MISSING_RTT:
+                yield timestamp, names.get(target_id, str(target_id)), None, None
+            else:
+                yield timestamp, names.get(target_id, str(target_id)), ttl, rtt_us / 1000
+        else:
+            raise ValueError(f"Unknown record tag {tag!r}")
+
+def iter_samples(path: str) -> Iterator[Sample]:
+    """Read samples from a file in either format, detected from its first bytes."""
+    with open(path, 'rb') as stream:
+        if stream.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            yield from iter_binary_samples(stream)
+            return
+
+    with open(path, 'r', encoding='utf-8') as stream:
+        for line in stream:
+            sample = parse_sample_line(line)
+            if sample is not None:
+                yield sample
@@ -0,0 +1,588 @@
+"""Shared probe scheduler for monitoring multiple targets."""
+
+import gc
+import os
+import math
+import time
+import zlib
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Set, Tuple, Iterable
+
+try:
+    from .config import PING_INTERVAL, DEFAULT_MAX_POINTS, MAX_PROBE_WORKERS, SNAPSHOT_INTERVAL, SCHEDULER_TICK
+    from .ping_engine import PingEngine
+    from .statistics import StatisticsCalculator
+    from .outage_log import OutageLog
+    from .batch_prober import BatchProber
+    from .service_prober import Prober, ServiceProber
+    from .anomaly import AnomalyEvent
+    from .timer_wheel import Timer, TimerWheel
+except ImportError:
+    from config import PING_INTERVAL, DEFAULT_MAX_POINTS, MAX_PROBE_WORKERS, SNAPSHOT_INTERVAL, SCHEDULER_TICK
+    from ping_engine import PingEngine
+    from statistics import StatisticsCalculator
+    from outage_log import OutageLog
+    from batch_prober import BatchProber
+    from service_prober import Prober, ServiceProber
+    from anomaly import AnomalyEvent
+    from timer_wheel import Timer, TimerWheel
+
+# History, alerts, path tracing, ping streams and snapshots are imported where they are enabled,
+# so the headless collector starts probing without loading what it does not use
+
+# Wheel key of the shared round that traces paths and reconciles ping streams
+ROUNDS = object()
+
+# Weight of each tick's lateness in the smoothed scheduling lag
+LAG_ALPHA = 0.2
+
+def phase_offset(target: str, interval: float) -> float:
+    """A stable offset in [0, interval) for a target, so targets sharing an interval spread evenly."""
+    return zlib.crc32(target.encode()) / 2 ** 32 * interval
+
+class ProbeScheduler:
+    """Drives probes for many targets from one scheduler thread and a shared state store."""
+
+    def __init__(self, max_points: int = DEFAULT_MAX_POINTS, interval: float = PING_INTERVAL,
+                 max_workers: int = MAX_PROBE_WORKERS, outage_log: Optional[OutageLog] = None,
+                 batch_prober: Optional[BatchProber] = None, snapshot_path: Optional[str] = None,
+                 snapshot_interval: float = SNAPSHOT_INTERVAL, path_prober: Optional['PathProber'] = None,
+                 service_prober: Optional[ServiceProber] = None, ping_streamer: Optional['StreamingPinger'] = None,
+                 keep_history: bool = False, tick: Optional[float] = None, alerts: Optional['AlertEngine'] = None,
+                 correlator: Optional['IncidentCorrelator'] = None):
+        # Configuration
+        self.max_points = max_points
+        self.interval = interval
+        self.max_workers = max_workers
+
+        # Every target recurs on its own interval and phase; one timing wheel holds all their timers
+        self.tick = tick if tick is not None else min(SCHEDULER_TICK, interval)
+        self.intervals: Dict[str, float] = {}
+        self._timers: Dict[object, Timer] = {}
+        self._wheel = TimerWheel(self.tick, start=time.monotonic())
+
+        # Smoothed lateness of the scheduler's ticks in seconds; API admission yields while it is high
+        self.lag = 0.0
+
+        # Outage events from every target go to one shared log
+        self.outage_log = outage_log if outage_log is not None else OutageLog()
+
+        # When set, each tick probes all due targets in one burst through a single socket
+        self.batch_prober = batch_prober
+
+        # TCP, UDP and HTTP targets are always probed together on non-blocking sockets
+        self.service_prober = service_prober if service_prober is not None else ServiceProber()
+
+        # When set, ICMP targets are pinged by persistent processes that pace themselves
+        self.ping_streamer = ping_streamer
+
+        # Shared state store: one engine per target, keyed by target name
+        self.engines: Dict[str, PingEngine] = {}
+        self.paused: Set[str] = set()
+
+        # Optional compressed long-term history per target, fed by each engine's samples
+        self.keep_history = keep_history
+        self.histories: Dict[str, 'SampleHistory'] = {}
+
+        # Optional alert rules, evaluated as each engine's samples arrive
+        self.alerts = alerts
+
+        # Optional grouping of simultaneous outages into incidents, explained by traced paths
+        self.correlator = correlator
+        if correlator is not None and correlator.path_lookup is None:
+            correlator.path_lookup = self.get_path
+
+        # Targets with a probe currently executing on the worker pool
+        self._in_flight: Set[str] = set()
+
+        # Probers with a round in flight, each with the targets that came due meanwhile to join its next round
+        self._rounds_waiting: Dict[Prober, List[Tuple[str, PingEngine]]] = {}
+
+        # Targets whose path is traced hop by hop; all of them share one burst per tick
+        self.path_prober = path_prober
+        self.paths: Dict[str, 'PathEngine'] = {}
+        self._paths_in_flight = False
+
+        # Periodic state snapshots for warm restarts
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+
+        # Threading controls
+        self.running = False
+        self.scheduler_thread: Optional[threading.Thread] = None
+        self.snapshot_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+        # Pick up where the previous process left off
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.restore_snapshot()
+
+    def add_target(self, target: str, interval: Optional[float] = None) -> PingEngine:
+        """Add a target to the schedule, returning its engine (existing targets are kept).
+
+        The target is probed every interval seconds, the scheduler's interval by default;
+        passing an interval for an existing target changes it.
+        """
+        if interval is not None and interval <= 0:
+            raise ValueError(f"Invalid probe interval {interval}")
+        with self._lock:
+            engine = self.engines.get(target)
+            if engine is None:
+                engine = PingEngine(target=target, max_points=self.max_points, outage_log=self.outage_log)
+                self.engines[target] = engine
+                if self.keep_history:
+                    try:
+                        from .history import SampleHistory
+                    except ImportError:
+                        from history import SampleHistory
+                    history = self.histories[target] = SampleHistory()
+                    engine.add_sample_listener(history)
+                if self.alerts is not None:
+                    engine.add_sample_listener(self.alerts)
+                if self.correlator is not None:
+                    engine.add_sample_listener(self.correlator)
+                self.intervals[target] = interval if interval is not None else self.interval
+                # Probe a new target on the next tick; its phase applies from the second probe on
+                self._start_timer(target, time.monotonic(), immediate=True)
+            elif interval is not None and interval != self.intervals[target]:
+                self.intervals[target] = interval
+                self._start_timer(target, time.monotonic())
+            return engine
+
+    def set_interval(self, target: str, interval: float) -> bool:
+        """Change how often a scheduled target is probed."""
+        if interval <= 0:
+            raise ValueError(f"Invalid probe interval {interval}")
+        with self._lock:
+            if target not in self.engines:
+                return False
+            self.intervals[target] = interval
+            self._start_timer(target, time.monotonic())
+            return True
+
+    def remove_target(self, target: str) -> bool:
+        """Remove a target and its collected data from the schedule."""
+        with self._lock:
+            self.paused.discard(target)
+            self.paths.pop(target, None)
+            self.histories.pop(target, None)
+            self.intervals.pop(target, None)
+            timer = self._timers.pop(target, None)
+            if timer is not None:
+                self._wheel.cancel(timer)
+            if self.alerts is not None:
+                self.alerts.forget(target)
+            if self.correlator is not None:
+                self.correlator.forget(target)
+            return self.engines.pop(target, None) is not None
+
+    def pause_target(self, target: str) -> bool:
+        """Stop probing a target while keeping its collected data."""
+        with self._lock:
+            if target not in self.engines:
+                return False
+            self.paused.add(target)
+            return True
+
+    def resume_target(self, target: str) -> bool:
+        """Resume probing a previously paused target."""
+        with self._lock:
+            if target not in self.engines:
+                return False
+            self.paused.discard(target)
+            return True
+
+    def enable_path(self, target: str) -> Optional['PathEngine']:
+        """Start tracing a scheduled target's path, opening the path prober on first use.
+
+        Returns None for unknown targets; raises OSError when raw ICMP sockets are not permitted.
+        """
+        with self._lock:
+            if target not in self.engines:
+                return None
+            try:
+                from .path_prober import PathProber
+                from .path_engine import PathEngine
+            except ImportError:
+                from path_prober import PathProber
+                from path_engine import PathEngine
+            if self.path_prober is None:
+                self.path_prober = PathProber()
+            path = self.paths.get(target)
+            if path is None:
+                path = self.paths[target] = PathEngine(target=target, max_points=self.max_points)
+            return path
+
+    def disable_path(self, target: str) -> bool:
+        """Stop tracing a target's path and drop its hop statistics."""
+        with self._lock:
+            return self.paths.pop(target, None) is not None
+
+    def get_path(self, target: str) -> Optional['PathEngine']:
+        """Get the path engine of a traced target, if any."""
+        return self.paths.get(target)
+
+    def get_history(self, target: str) -> Optional['SampleHistory']:
+        """Get a target's long-term history, if history is kept."""
+        return self.histories.get(target)
+
+    def get_engine(self, target: str) -> Optional[PingEngine]:
+        """Get the engine backing a target, if it is scheduled."""
+        return self.engines.get(target)
+
+    def list_targets(self) -> List[dict]:
+        """List scheduled targets with their probing state."""
+        with self._lock:
+            items = list(self.engines.items())
+            paused = set(self.paused)
+
+        return [
+            {
+                'target': target,
+                'paused': target in paused,
+                'interval': self.intervals.get(target, self.interval),
+                'total_pings': engine.total_pings
+            }
+            for target, engine in items
+        ]
+
+    def get_summary(self) -> Dict[str, dict]:
+        """Get aggregate statistics for every scheduled target."""
+        with self._lock:
+            items = list(self.engines.items())
+            paused = set(self.paused)
+
+        summary = {}
+        for target, engine in items:
+            stats_data = engine.get_statistics()
+            failure_rate, avg_ping_time, min_ping_time, max_ping_time, avg_outage_duration = \
+                StatisticsCalculator.calculate_statistics(stats_data)
+            summary[target] = {
+                'paused': target in paused,
+                'failure_rate': failure_rate,
+                'avg_ping_time': avg_ping_time,
+                'min_ping_time': min_ping_time,
+                'max_ping_time': max_ping_time,
+                'avg_outage_duration': avg_outage_duration,
+                'total_pings': stats_data['total_pings'],
+                'consecutive_failures': stats_data['consecutive_failures'],
+                'resolution_failures': engine.resolution_failures
+            }
+        return summary
+
+    def query_anomalies(self, start: float, end: float, targets: Optional[Iterable[str]] = None,
+                        offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[AnomalyEvent]]:
+        """Latency anomaly events detected in [start, end], as (total, page) ordered by start time."""
+        with self._lock:
+            if targets is None:
+                engines = list(self.engines.values())
+            else:
+                engines = [self.engines[target] for target in targets if target in self.engines]
+
+        events: List[AnomalyEvent] = []
+        for engine in engines:
+            events.extend(engine.get_anomalies(start, end))
+        events.sort(key=lambda event: event.start_time)
+
+        page_end = None if limit is None else offset + limit
+        return len(events), events[offset:page_end]
+
+    def save_snapshot(self) -> int:
+        """Write every engine's state to the snapshot path; returns the number saved."""
+        with self._lock:
+            items = [(engine, target in self.paused) for target, engine in self.engines.items()]
+            intervals = dict(self.intervals)
+        try:
+            from .snapshot import save_snapshot
+        except ImportError:
+            from snapshot import save_snapshot
+        return save_snapshot(self.snapshot_path, items, intervals=intervals)
+
+    def restore_snapshot(self, now: Optional[float] = None) -> int:
+        """Restore engines from the snapshot path, marking the downtime as a gap; returns the number restored."""
+        if now is None:
+            now = time.time()
+        try:
+            from .snapshot import SnapshotError, load_snapshot
+        except ImportError:
+            from snapshot import SnapshotError, load_snapshot
+
+        # Bulk decoding only allocates; skip the collector passes it would trigger
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            saved_at, records = load_snapshot(self.snapshot_path)
+
+            restored = 0
+            for target, (state, paused) in records.items():
+                if state['max_points'] != self.max_points:
+                    logging.error(f"Ignoring snapshot of {target}: window {state['max_points']} != {self.max_points}")
+                    continue
+                engine = self.add_target(target, interval=state['interval'])
+                engine.restore_state(state)
+                engine.add_gap(saved_at, now)
+                if paused:
+                    self.pause_target(target)
+                restored += 1
+            return restored
+        except SnapshotError as e:
+            logging.error(f"Ignoring snapshot: {e}")
+            return 0
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _snapshot_loop(self) -> None:
+        """Save a snapshot every snapshot_interval seconds until stopped."""
+        while not self._stopped.wait(self.snapshot_interval):
+            try:
+                self.save_snapshot()
+            except Exception as e:
+                logging.error(f"Snapshot failed: {e}")
+
+    def _run_probe(self, target: str, engine: PingEngine) -> None:
+        """Execute one probe on a worker thread and release the target slot."""
+        try:
+            engine.probe_once()
+        except Exception as e:
+            logging.error(f"Probe for {target} failed: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(target)
+
+    def _submit_round(self, due: List[Tuple[str, PingEngine]], prober: Prober) -> None:
+        """Start a prober round for the due targets, or queue them for its next round if one is running.
+
+        Service rounds hold their prober for a full timeout and batch rounds share one socket,
+        so at most one round per prober is in flight.
+        """
+        with self._lock:
+            waiting = self._rounds_waiting.get(prober)
+            if waiting is not None:
+                waiting.extend(due)
+                return
+            self._rounds_waiting[prober] = []
+        self._executor.submit(self._run_batch, due, prober)
+
+    def _run_batch(self, due: List[Tuple[str, PingEngine]], prober: Prober) -> None:
+        """Probe all due targets in one round through a prober and feed each engine its result.
+
+        Targets that came due during the round are probed in a follow-up round right away.
+        """
+        try:
+            addresses = {}
+            for target, engine in due:
+                address = engine.resolve_address()
+                if address is not None:
+                    addresses[target] = address
+
+            results = prober.probe(addresses)
+            for target, engine in due:
+                if target in results:
+                    ttl, ping_time = results[target]
+                    engine._process_ping_result(ttl, ping_time)
+        except Exception as e:
+            logging.error(f"Batch probe failed: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.difference_update(target for target, _ in due)
+                waiting = self._rounds_waiting.pop(prober, [])
+                if waiting and self.running:
+                    self._rounds_waiting[prober] = []
+                else:
+                    self._in_flight.difference_update(target for target, _ in waiting)
+                    waiting = []
+
+        if waiting:
+            try:
+                self._executor.submit(self._run_batch, waiting, prober)
+            except (AttributeError, RuntimeError):
+                # Stopped meanwhile: the executor is gone or shutting down
+                with self._lock:
+                    self._rounds_waiting.pop(prober, None)
+                    self._in_flight.difference_update(target for target, _ in waiting)
+
+    def _run_paths(self, due: List[Tuple[str, 'PathEngine']]) -> None:
+        """Trace all due paths in one burst and feed each path engine its hops."""
+        try:
+            addresses = {}
+            for target, _ in due:
+                address = self.engines[target].resolve_address() if target in self.engines else None
+                if address is not None:
+                    addresses[target] = address
+
+            timestamp = time.time()
+            results = self.path_prober.probe(addresses)
+            for target, path in due:
+                if target in results:
+                    reached, hops = results[target]
+                    path.process_round(reached, hops, timestamp)
+        except Exception as e:
+            logging.error(f"Path probe failed: {e}")
+        finally:
+            with self._lock:
+                self._paths_in_flight = False
+
+    def _sync_streams(self, streamed: List[Tuple[str, PingEngine]], intervals: Dict[str, float]) -> None:
+        """Start or stop persistent ping processes to match the active ICMP targets and their intervals."""
+        try:
+            self.ping_streamer.sync(streamed, intervals)
+        except Exception as e:
+            logging.error(f"Ping stream sync failed: {e}")
+
+    def _interval(self, key: object) -> float:
+        """Probe interval of a target, or the shared round's interval."""
+        return self.interval if key is ROUNDS else self.intervals[key]
+
+    def _next_slot(self, key: object, after: float) -> float:
+        """The first point at or after a time on a timer's phase grid."""
+        offset = 0.0 if key is ROUNDS else phase_offset(key, self._interval(key))
+        return after + (offset - after) % self._interval(key)
+
+    def _start_timer(self, key: object, now: float, immediate: bool = False) -> None:
+        """(Re)schedule a target's or the shared round's next probe on its own phase grid (lock held).
+
+        With immediate set the timer fires on the next tick instead of waiting for its slot.
+        """
+        timer = self._timers.get(key)
+        if timer is not None:
+            self._wheel.cancel(timer)
+        self._timers[key] = self._wheel.schedule(key, now if immediate else self._next_slot(key, now))
+
+    def _reschedule(self, timer: Timer, now: float) -> None:
+        """Schedule a fired timer's next expiry on its phase grid, skipping any missed slots (lock held).
+
+        On the grid this is one interval on; after an immediate first probe it is the first
+        slot at least half an interval later.
+        """
+        interval = self._interval(timer.key)
+        deadline = self._next_slot(timer.key, timer.deadline + interval / 2)
+        if deadline <= now:
+            deadline += math.ceil((now - deadline) / interval) * interval
+        self._timers[timer.key] = self._wheel.schedule(timer.key, deadline)
+
+    def _dispatch_probes(self, targets: Iterable[str]) -> None:
+        """Submit one probe for every given target that is active and not already being probed."""
+        with self._lock:
+            active = [(target, self.engines[target]) for target in targets
+                      if target in self.engines and target not in self.paused]
+            if self.ping_streamer is not None:
+                # Streamed targets are paced by their own processes
+                active = [(target, engine) for target, engine in active if engine.probe_target.kind != 'icmp']
+            due = [(target, engine) for target, engine in active if target not in self._in_flight]
+            self._in_flight.update(target for target, _ in due)
+
+        # TCP, UDP and HTTP targets due together share one selector-driven round
+        service_due = [(target, engine) for target, engine in due if engine.probe_target.kind != 'icmp']
+        if service_due:
+            due = [(target, engine) for target, engine in due if engine.probe_target.kind == 'icmp']
+            self._submit_round(service_due, self.service_prober)
+
+        if self.batch_prober is not None:
+            if due:
+                self._submit_round(due, self.batch_prober)
+            return
+
+        for target, engine in due:
+            self._executor.submit(self._run_probe, target, engine)
+
+    def _dispatch_rounds(self) -> None:
+        """Start a path round if none is in flight and reconcile the ping streams."""
+        with self._lock:
+            # Path rounds last a full timeout when hops stay silent, so at most one is in flight
+            due_paths = []
+            if not self._paths_in_flight:
+                due_paths = [(target, path) for target, path in self.paths.items() if target not in self.paused]
+                self._paths_in_flight = bool(due_paths)
+
+            streamed = []
+            if self.ping_streamer is not None:
+                streamed = [(target, engine) for target, engine in self.engines.items()
+                            if target not in self.paused and engine.probe_target.kind == 'icmp']
+                intervals = {target: self.intervals[target] for target, _ in streamed}
+
+        if due_paths:
+            self._executor.submit(self._run_paths, due_paths)
+
+        # Streamed targets are never in flight; each round only reconciles which processes run
+        if self.ping_streamer is not None:
+            self._executor.submit(self._sync_streams, streamed, intervals)
+
+    def _scheduler_loop(self) -> None:
+        """Main scheduling loop: every wheel tick, fire the due timers and probe their targets."""
+        next_tick = time.monotonic()
+        while self.running:
+            now = time.monotonic()
+            # A tick wakes late when other threads hold the GIL; one hiccup barely moves the average
+            self.lag += LAG_ALPHA * (max(0.0, now - next_tick) - self.lag)
+            with self._lock:
+                fired = self._wheel.advance(now)
+                for timer in fired:
+                    self._reschedule(timer, now)
+
+            self._dispatch_probes(timer.key for timer in fired if timer.key is not ROUNDS)
+            if any(timer.key is ROUNDS for timer in fired):
+                self._dispatch_rounds()
+
+            # Sleep until the next tick on a fixed grid so slow ticks don't drift
+            next_tick += self.tick
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def start(self) -> None:
+        """Start the scheduler thread and its probe worker pool."""
+        if not self.running:
+            # Start the wheel afresh so time spent stopped is not replayed tick by tick
+            with self._lock:
+                now = time.monotonic()
+                self._wheel = TimerWheel(self.tick, start=now)
+                self._timers.clear()
+                self._start_timer(ROUNDS, now)
+                # Every target's first probe goes out on the first tick
+                for target in self.engines:
+                    self._start_timer(target, now, immediate=True)
+
+            self.running = True
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='probe')
+            self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
+            self.scheduler_thread.start()
+            if self.snapshot_path:
+                self._stopped.clear()
+                self.snapshot_thread = threading.Thread(target=self._snapshot_loop, daemon=True)
+                self.snapshot_thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler and wait for in-flight probes to finish."""
+        self.running = False
+        if self.scheduler_thread and self.scheduler_thread.is_alive():
+            self.scheduler_thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._in_flight.clear()
+        self._rounds_waiting.clear()
+        self._paths_in_flight = False
+        self.service_prober.close()
+        if self.ping_streamer is not None:
+            self.ping_streamer.close()
+
+        # Final snapshot so a clean restart loses nothing
+        self._stopped.set()
+        if self.snapshot_thread and self.snapshot_thread.is_alive():
+            self.snapshot_thread.join()
+            self.snapshot_thread = None
+            try:
+                self.save_snapshot()
+            except Exception as e:
+                logging.error(f"Snapshot failed: {e}")
+
+    def is_running(self) -> bool:
+        """Check if the scheduler is currently running."""
+        return self.running
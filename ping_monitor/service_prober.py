@@ -0,0 +1,409 @@
+"""TCP-connect, UDP echo and HTTP time-to-first-byte probes multiplexed on non-blocking sockets."""
+
+import os
+import time
+import errno
+import socket
+import selectors
+import threading
+from collections import deque
+from typing import Optional, Dict, NamedTuple, Protocol, Tuple
+from urllib.parse import urlsplit
+
+try:
+    from .config import PING_TIMEOUT, SERVICE_MAX_SOCKETS, UDP_ECHO_PORT, HTTP_USER_AGENT
+    from .batch_prober import IP_RECVTTL, ancillary_ttl
+except ImportError:
+    from config import PING_TIMEOUT, SERVICE_MAX_SOCKETS, UDP_ECHO_PORT, HTTP_USER_AGENT
+    from batch_prober import IP_RECVTTL, ancillary_ttl
+
+# (ttl, ping_time) as fed to PingEngine._process_ping_result; (None, None) for a failed probe
+ProbeResult = Tuple[Optional[int], Optional[float]]
+
+# TCP sockets cannot observe the TTL of incoming segments, so TCP and HTTP probes report this
+UNKNOWN_TTL = 0
+
+class Prober(Protocol):
+    """Common interface of every probe implementation driven by the scheduler."""
+
+    def probe(self, addresses: Dict[str, str]) -> Dict[str, ProbeResult]:
+        """Probe each target once; addresses maps target names to resolved IPv4 addresses."""
+
+    def close(self) -> None:
+        """Release sockets held between rounds."""
+
+class ProbeTarget(NamedTuple):
+    """A target name split into probe type and endpoint."""
+    kind: str
+    host: str
+    port: Optional[int]
+    path: str
+
+SERVICE_KINDS = ('tcp', 'udp', 'http')
+
+def parse_probe_target(target: str) -> ProbeTarget:
+    """Split tcp://host:port, udp://host[:port] and http://host[:port][/path]; anything else is ICMP."""
+    if '://' not in target:
+        return ProbeTarget('icmp', target, None, '')
+
+    parts = urlsplit(target)
+    kind = parts.scheme.lower()
+    if kind not in SERVICE_KINDS or not parts.hostname:
+        raise ValueError(f"Unsupported probe target {target!r}; use tcp://, udp:// or http://")
+    try:
+        port = parts.port
+    except ValueError as e:
+        raise ValueError(f"Invalid port in probe target {target!r}") from e
+
+    if port is None:
+        if kind == 'tcp':
+            raise ValueError(f"TCP probe target {target!r} needs a port")
+        port = UDP_ECHO_PORT if kind == 'udp' else 80
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    return ProbeTarget(kind, parts.hostname, port, path if kind == 'http' else '')
+
+class _Probe:
+    """One probe in flight on a non-blocking socket."""
+
+    events = selectors.EVENT_WRITE
+
+    def __init__(self, target: str, spec: ProbeTarget, address: str):
+        self.target = target
+        self.spec = spec
+        self.address = address
+        self.sock: Optional[socket.socket] = None
+        self.deadline = 0.0
+        self.result: ProbeResult = (None, None)
+
+    def _connect(self, kind: int) -> bool:
+        """Open the socket and start connecting; False if the connect failed outright."""
+        self.sock = socket.socket(socket.AF_INET, kind)
+        self.sock.setblocking(False)
+        self.started = time.perf_counter()
+        return self.sock.connect_ex((self.address, self.spec.port)) in (0, errno.EINPROGRESS)
+
+    def open(self) -> bool:
+        """Start the probe; returns False if it already failed."""
+        raise NotImplementedError
+
+    def ready(self, mask: int) -> bool:
+        """Advance on a socket event; returns True once the result is known."""
+        raise NotImplementedError
+
+class _TcpProbe(_Probe):
+    """Time the three-way handshake."""
+
+    def open(self) -> bool:
+        return self._connect(socket.SOCK_STREAM)
+
+    def ready(self, mask: int) -> bool:
+        if self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+            self.result = (UNKNOWN_TTL, round((time.perf_counter() - self.started) * 1000.0, 3))
+        return True
+
+class _UdpProbe(_Probe):
+    """Time a datagram bounced off an echo service."""
+
+    events = selectors.EVENT_READ
+
+    def open(self) -> bool:
+        if not self._connect(socket.SOCK_DGRAM):
+            return False
+        self.sock.setsockopt(socket.IPPROTO_IP, IP_RECVTTL, 1)
+        self.payload = b'ping_monitor ' + os.urandom(8)
+        try:
+            self.sock.send(self.payload)
+        except OSError:
+            return False
+        return True
+
+    def ready(self, mask: int) -> bool:
+        try:
+            data, ancillary, _, _ = self.sock.recvmsg(len(self.payload) + 1, socket.CMSG_SPACE(4))
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            # ICMP port unreachable surfaces as ECONNREFUSED on a connected socket
+            return True
+        if data != self.payload:
+            return False
+
+        ttl = ancillary_ttl(ancillary)
+        self.result = (UNKNOWN_TTL if ttl is None else ttl, round((time.perf_counter() - self.started) * 1000.0, 3))
+        return True
+
+class _HttpProbe(_Probe):
+    """Time from sending a GET to the first response byte, on a pooled keep-alive connection."""
+
+    def __init__(self, target: str, spec: ProbeTarget, address: str):
+        super().__init__(target, spec, address)
+        self.key = (address, spec.port)
+        self.request = (
+            f"GET {spec.path} HTTP/1.1\r\nHost: {spec.host}\r\nUser-Agent: {HTTP_USER_AGENT}\r\n"
+            f"Connection: keep-alive\r\n\r\n"
+        ).encode('ascii')
+        self.reused = False
+        self.retry = False
+        self.keep_alive = False
+
+    def open(self, pooled: Optional[socket.socket] = None) -> bool:
+        self.sent = 0
+        self.buffer = b''
+        self.first_byte: Optional[float] = None
+        self.head: Optional[Tuple[int, Optional[int], bool]] = None
+        self.events = selectors.EVENT_WRITE
+        if pooled is not None:
+            self.sock, self.reused, self.connecting = pooled, True, False
+            return True
+        self.reused, self.connecting = False, True
+        return self._connect(socket.SOCK_STREAM)
+
+    def _parse_head(self, head: bytes) -> Tuple[int, Optional[int], bool]:
+        """(status, body length or None to read until close, reusable) from a response head."""
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        reusable = headers.get('connection') != 'close' and not lines[0].startswith('HTTP/1.0')
+        if status in (204, 304):
+            return status, 0, reusable
+        if 'content-length' in headers:
+            return status, int(headers['content-length']), reusable
+        if headers.get('transfer-encoding') == 'chunked':
+            return status, -1, reusable
+        return status, None, False
+
+    def _complete(self) -> bool:
+        """Whether the whole response has been read, so the connection can be reused."""
+        status, length, _ = self.head
+        if length is None:
+            return False
+        if length == -1:
+            # The last-chunk marker; trailers are not used by the endpoints we probe
+            return self.buffer.endswith(b'0\r\n\r\n')
+        return len(self.buffer) >= length
+
+    def _finish(self, eof: bool = False) -> bool:
+        status, _, reusable = self.head
+        if status < 400:
+            self.result = (UNKNOWN_TTL, round((self.first_byte - self.request_sent) * 1000.0, 3))
+        self.keep_alive = reusable and not eof
+        return True
+
+    def ready(self, mask: int) -> bool:
+        if self.connecting:
+            if self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+                return True
+            self.connecting = False
+
+        if self.sent < len(self.request):
+            try:
+                self.sent += self.sock.send(self.request[self.sent:])
+            except (BlockingIOError, InterruptedError):
+                return False
+            except OSError:
+                self.retry = self.reused
+                return True
+            if self.sent < len(self.request):
+                return False
+            self.request_sent = time.perf_counter()
+            self.events = selectors.EVENT_READ
+            return False
+
+        try:
+            data = self.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return False
+        except OSError:
+            data = b''
+        if self.first_byte is None:
+            if not data:
+                # An idle keep-alive connection the server already closed: retry on a fresh one
+                self.retry = self.reused
+                return True
+            self.first_byte = time.perf_counter()
+
+        if not data:
+            return self._finish(eof=True) if self.head is not None else True
+        self.buffer += data
+        if self.head is None:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                return False
+            try:
+                self.head = self._parse_head(self.buffer[:end])
+            except (ValueError, IndexError):
+                return True
+            self.buffer = self.buffer[end + 4:]
+        return self._finish() if self._complete() else False
+
+PROBE_TYPES = {'tcp': _TcpProbe, 'udp': _UdpProbe, 'http': _HttpProbe}
+
+class ServiceProber:
+    """Runs TCP, UDP and HTTP probes for many targets concurrently on one selector.
+
+    At most max_sockets sockets are open at once, counting idle keep-alive connections;
+    further probes queue until a socket frees up, and idle connections are closed
+    first when the limit is reached. Each probe gets the full timeout from the moment
+    it starts, not from when the round began.
+    """
+
+    def __init__(self, timeout: float = PING_TIMEOUT, max_sockets: int = SERVICE_MAX_SOCKETS):
+        # Configuration
+        self.timeout = timeout
+        self.max_sockets = max_sockets
+
+        # Idle keep-alive connections per (address, port), oldest first
+        self._idle: Dict[Tuple[str, int], deque] = {}
+
+        # Socket accounting, including idle connections
+        self.open_sockets = 0
+        self.peak_sockets = 0
+
+        # Counters for benchmarking
+        self.probes_sent = 0
+        self.connections_reused = 0
+
+        # Rounds from different scheduler workers share the pool, so they run one at a time
+        self._lock = threading.Lock()
+
+    def _take_idle(self, key: Tuple[str, int]) -> Optional[socket.socket]:
+        """Pop an idle keep-alive connection for an endpoint."""
+        pool = self._idle.get(key)
+        if not pool:
+            return None
+        sock = pool.popleft()
+        if not pool:
+            del self._idle[key]
+        return sock
+
+    def _reserve_socket(self) -> bool:
+        """Account for a new socket, closing an idle connection if that is the only way under the limit."""
+        if self.open_sockets >= self.max_sockets:
+            if not self._idle:
+                return False
+            key = next(iter(self._idle))
+            self._close(self._take_idle(key))
+        self.open_sockets += 1
+        self.peak_sockets = max(self.peak_sockets, self.open_sockets)
+        return True
+
+    def _close(self, sock: Optional[socket.socket]) -> None:
+        """Close a socket and release its slot."""
+        if sock is not None:
+            sock.close()
+            self.open_sockets -= 1
+
+    def _start(self, probe: _Probe, selector: selectors.BaseSelector, active: Dict[_Probe, None]) -> bool:
+        """Open a probe's socket and register it; False if no socket slot is free."""
+        pooled = self._take_idle(probe.key) if isinstance(probe, _HttpProbe) else None
+        if pooled is None and not self._reserve_socket():
+            return False
+
+        self.probes_sent += 1
+        if pooled is not None:
+            self.connections_reused += 1
+            opened = probe.open(pooled)
+        else:
+            try:
+                opened = probe.open()
+            except OSError:
+                opened = False
+        if not opened:
+            if probe.sock is not None:
+                probe.sock.close()
+            probe.sock = None
+            self.open_sockets -= 1
+            return True
+
+        probe.deadline = time.perf_counter() + self.timeout
+        selector.register(probe.sock, probe.events, probe)
+        active[probe] = None
+        return True
+
+    def _settle(self, probe: _Probe, selector: selectors.BaseSelector, active: Dict[_Probe, None],
+                results: Dict[str, ProbeResult]) -> None:
+        """Record a finished probe and pool or close its socket."""
+        selector.unregister(probe.sock)
+        del active[probe]
+
+        if isinstance(probe, _HttpProbe) and probe.retry:
+            # The slot held by the stale connection carries over to the fresh one
+            probe.sock.close()
+            probe.retry = False
+            try:
+                opened = probe.open()
+            except OSError:
+                opened = False
+            if opened:
+                probe.deadline = time.perf_counter() + self.timeout
+                selector.register(probe.sock, probe.events, probe)
+                active[probe] = None
+                return
+            self._close(probe.sock)
+            return
+
+        results[probe.target] = probe.result
+        if isinstance(probe, _HttpProbe) and probe.keep_alive:
+            self._idle.setdefault(probe.key, deque()).append(probe.sock)
+        else:
+            self._close(probe.sock)
+
+    def probe(self, addresses: Dict[str, str]) -> Dict[str, ProbeResult]:
+        """Probe every service target once; unanswered or failed targets get (None, None)."""
+        results: Dict[str, ProbeResult] = {target: (None, None) for target in addresses}
+        queue = deque()
+        for target, address in addresses.items():
+            spec = parse_probe_target(target)
+            if spec.kind not in PROBE_TYPES:
+                raise ValueError(f"{target} is not a TCP, UDP or HTTP target")
+            queue.append(PROBE_TYPES[spec.kind](target, spec, address))
+
+        with self._lock:
+            selector = selectors.DefaultSelector()
+            active: Dict[_Probe, None] = {}
+            try:
+                while queue or active:
+                    while queue and self._start(queue[0], selector, active):
+                        queue.popleft()
+
+                    # Every probe gets the same timeout, so start order is deadline order
+                    now = time.perf_counter()
+                    timeout = max(0.0, next(iter(active)).deadline - now) if active else 0.0
+                    for key, mask in selector.select(timeout):
+                        probe = key.data
+                        if probe.ready(mask):
+                            self._settle(probe, selector, active, results)
+                        elif key.events != probe.events:
+                            selector.modify(probe.sock, probe.events, probe)
+
+                    # Anything past its deadline has failed
+                    now = time.perf_counter()
+                    while active:
+                        probe = next(iter(active))
+                        if probe.deadline > now:
+                            break
+                        selector.unregister(probe.sock)
+                        del active[probe]
+                        self._close(probe.sock)
+            finally:
+                for probe in active:
+                    self._close(probe.sock)
+                selector.close()
+        return results
+
+    def close(self) -> None:
+        """Close idle keep-alive connections."""
+        with self._lock:
+            for pool in self._idle.values():
+                for sock in pool:
+                    self._close(sock)
+            self._idle.clear()
+
+# Shared by standalone engines probing service targets without a scheduler
+default_service_prober = ServiceProber()
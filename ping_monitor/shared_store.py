@@ -0,0 +1,365 @@
+"""Shared-memory sample store: one collector publishes, any number of processes read."""
+
+import math
+import time
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Optional, Dict, List
+
+try:
+    from .config import DEFAULT_MAX_POINTS, SHARED_STORE_CAPACITY
+    from .ping_engine import PingEngine
+except ImportError:
+    from config import DEFAULT_MAX_POINTS, SHARED_STORE_CAPACITY
+    from ping_engine import PingEngine
+
+# Region layout: header, then fixed-size target slots
+#   header: magic, layout version, slot capacity, max_points, directory generation
+#   slot:   seqlock counter, fixed fields, horizon aggregates, TTL ring, RTT ring, outage history
+MAGIC = b'PMSM'
+LAYOUT_VERSION = 1
+HEADER = struct.Struct('<4sHHIIQ')
+HEADER_SIZE = 64
+
+# Target names are stored inline; DNS names are at most 253 bytes
+MAX_NAME_BYTES = 256
+MAX_HORIZONS = 8
+
+# seq, name, engine sequence, total, failed, resolution failures, publish timestamp,
+# consecutive failures, outage start (-1 for none), ring count, ring head, outage count, horizon count
+SLOT_HEADER = struct.Struct(f'<Q{MAX_NAME_BYTES}sQQQQdiiIIII')
+HORIZON_RECORD = struct.Struct('<dQQd')
+OUTAGE_RECORD = struct.Struct('<ii')
+
+# Failed pings are stored as TTL -1 and RTT NaN
+MISSING_TTL = -1
+
+# Regions created by this process; its resource tracker owns their cleanup
+_created_names = set()
+
+def _slot_size(max_points: int) -> int:
+    """Bytes per target slot, rounded up to a cache line."""
+    size = (SLOT_HEADER.size + MAX_HORIZONS * HORIZON_RECORD.size
+            + max_points * (2 + 8) + max_points * OUTAGE_RECORD.size)
+    return (size + 63) // 64 * 64
+
+class _Layout:
+    """Offsets of the regions inside one slot."""
+
+    def __init__(self, max_points: int):
+        self.max_points = max_points
+        self.slot_size = _slot_size(max_points)
+        self.horizons = SLOT_HEADER.size
+        self.rtts = self.horizons + MAX_HORIZONS * HORIZON_RECORD.size
+        self.ttls = self.rtts + max_points * 8
+        self.outages = self.ttls + max_points * 2
+
+    def slot_offset(self, index: int) -> int:
+        """Start of a slot within the region."""
+        return HEADER_SIZE + index * self.slot_size
+
+class SharedSampleStore:
+    """Publishes engine state into a shared memory region after every sample.
+
+    Each slot is guarded by a seqlock: the writer makes the counter odd, updates the
+    slot, then makes it even again. Readers retry if the counter was odd or changed
+    while they copied, so they never block the probing process. One engine writes
+    one slot, and the scheduler never runs two probes of a target at once.
+    """
+
+    def __init__(self, name: Optional[str] = None, capacity: int = SHARED_STORE_CAPACITY,
+                 max_points: int = DEFAULT_MAX_POINTS):
+        self.capacity = capacity
+        self.layout = _Layout(max_points)
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=True, size=HEADER_SIZE + capacity * self.layout.slot_size
+        )
+        self.name = self.shm.name
+        self.generation = 0
+        _created_names.add(self.shm._name)
+
+        # Target -> slot index
+        self.slots: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._write_header()
+
+    def _write_header(self) -> None:
+        """Write the region header, bumping the directory generation."""
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, LAYOUT_VERSION, 0, self.capacity,
+                         self.layout.max_points, self.generation)
+
+    def attach(self, engine: PingEngine) -> None:
+        """Allocate a slot for an engine and publish its state after every sample."""
+        if engine.max_points != self.layout.max_points:
+            raise ValueError(f"Engine window {engine.max_points} does not match store window {self.layout.max_points}")
+        name = engine.target.encode('utf-8')
+        if len(name) > MAX_NAME_BYTES:
+            raise ValueError(f"Target name too long for shared store: {engine.target}")
+
+        with self._lock:
+            if engine.target in self.slots:
+                return
+            used = set(self.slots.values())
+            free = next((index for index in range(self.capacity) if index not in used), None)
+            if free is None:
+                raise ValueError(f"Shared store is full ({self.capacity} targets)")
+            self.slots[engine.target] = free
+            self._publish_full(engine, free, name, time.time())
+            self.generation += 1
+            self._write_header()
+
+        engine.add_sample_listener(self.publish)
+
+    def detach(self, engine: PingEngine) -> None:
+        """Stop publishing an engine and free its slot."""
+        engine.remove_sample_listener(self.publish)
+
+        with self._lock:
+            index = self.slots.pop(engine.target, None)
+            if index is None:
+                return
+            offset = self.layout.slot_offset(index)
+            buf = self.shm.buf
+            seq = struct.unpack_from('<Q', buf, offset)[0]
+            struct.pack_into('<Q', buf, offset, seq + 1)
+            struct.pack_into(f'{MAX_NAME_BYTES}s', buf, offset + 8, b'')
+            struct.pack_into('<Q', buf, offset, seq + 2)
+            self.generation += 1
+            self._write_header()
+
+    def publish(self, engine: PingEngine, timestamp: float, ttl: Optional[int], ping_time: Optional[float]) -> None:
+        """Append the latest sample to the engine's slot, resynchronizing after a reset."""
+        index = self.slots.get(engine.target)
+        if index is None:
+            return
+
+        layout = self.layout
+        buf = self.shm.buf
+        offset = layout.slot_offset(index)
+        fields = SLOT_HEADER.unpack_from(buf, offset)
+        seq, count, head = fields[0], fields[9], fields[10]
+
+        # A gap in total_pings means the engine was reset, missed a publish or has moved on
+        counters = engine.capture_counters(timestamp)
+        if fields[3] + 1 != counters['total_pings']:
+            self._publish_full(engine, index, fields[1], timestamp)
+            return
+
+        struct.pack_into('<Q', buf, offset, seq + 1)
+
+        # One ring entry per sample
+        struct.pack_into('<d', buf, offset + layout.rtts + head * 8,
+                         math.nan if ttl is None or ping_time is None else ping_time)
+        struct.pack_into('<h', buf, offset + layout.ttls + head * 2,
+                         MISSING_TTL if ttl is None or ping_time is None else ttl)
+        head = (head + 1) % layout.max_points
+        count = min(count + 1, layout.max_points)
+
+        self._write_fields(counters, offset, seq + 1, fields[1], count, head, timestamp)
+        struct.pack_into('<Q', buf, offset, seq + 2)
+
+    def _publish_full(self, engine: PingEngine, index: int, name: bytes, timestamp: float) -> None:
+        """Rewrite a slot from a full engine snapshot."""
+        layout = self.layout
+        buf = self.shm.buf
+        offset = layout.slot_offset(index)
+        seq = struct.unpack_from('<Q', buf, offset)[0]
+        if seq % 2:
+            seq += 1
+        struct.pack_into('<Q', buf, offset, seq + 1)
+
+        counters = engine.capture_counters(timestamp, window=True)
+        ttls, ping_times = counters['ttls'], counters['ping_times']
+        for position, (ttl, ping_time) in enumerate(zip(ttls, ping_times)):
+            struct.pack_into('<d', buf, offset + layout.rtts + position * 8,
+                             math.nan if ping_time is None else ping_time)
+            struct.pack_into('<h', buf, offset + layout.ttls + position * 2,
+                             MISSING_TTL if ttl is None else ttl)
+        count = len(ping_times)
+
+        self._write_fields(counters, offset, seq + 1, name, count, count % layout.max_points, timestamp)
+        struct.pack_into('<Q', buf, offset, seq + 2)
+
+    def _write_fields(self, counters: dict, offset: int, seq: int, name: bytes, count: int, head: int,
+                      timestamp: float) -> None:
+        """Write the scalar fields, outage history and horizon aggregates of a slot from one capture_counters copy."""
+        layout = self.layout
+        buf = self.shm.buf
+
+        outages = counters['outage_history'][:layout.max_points]
+        for position, (start_index, duration) in enumerate(outages):
+            OUTAGE_RECORD.pack_into(buf, offset + layout.outages + position * OUTAGE_RECORD.size,
+                                    start_index, duration)
+
+        # Horizon aggregates are published as of this sample
+        horizons = counters['horizons'][:MAX_HORIZONS]
+        for position, horizon in enumerate(horizons):
+            avg_ping_time = horizon['avg_ping_time']
+            HORIZON_RECORD.pack_into(buf, offset + layout.horizons + position * HORIZON_RECORD.size,
+                                     horizon['horizon'], horizon['pings'], horizon['failed_pings'],
+                                     math.nan if avg_ping_time is None else avg_ping_time)
+
+        outage_start_index = counters['outage_start_index']
+        SLOT_HEADER.pack_into(
+            buf, offset, seq, name, counters['sequence'], counters['total_pings'], counters['failed_pings'],
+            counters['resolution_failures'], timestamp, counters['consecutive_failures'],
+            -1 if outage_start_index is None else outage_start_index,
+            count, head, len(outages), len(horizons)
+        )
+
+    def close(self) -> None:
+        """Unmap and remove the region."""
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        _created_names.discard(self.shm._name)
+
+class SharedSnapshot:
+    """A consistent copy of one target's published state, shaped like a PingEngine for readers."""
+
+    def __init__(self, target: str, sequence: int, resolution_failures: int, stats: dict):
+        self.target = target
+        self.sequence = sequence
+        self.resolution_failures = resolution_failures
+        self._stats = stats
+
+    def get_statistics(self) -> dict:
+        """Statistics in the same shape as PingEngine.get_statistics."""
+        return self._stats
+
+    def get_anomalies(self) -> list:
+        """Anomaly events stay in the collector process and are not shared."""
+        return []
+
+    def get_gaps(self) -> list:
+        """Restart gaps stay in the collector process and are not shared."""
+        return []
+
+class SharedStoreReader:
+    """Maps a store created by SharedSampleStore read-only and copies out target snapshots."""
+
+    # Readers retry while the writer is mid-update; give up rather than spin forever
+    MAX_RETRIES = 1000
+
+    def __init__(self, name: str):
+        self.shm = shared_memory.SharedMemory(name=name)
+        self._untrack()
+
+        magic, version, _, capacity, max_points, _ = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self.shm.close()
+            raise ValueError(f"Shared store {name} has an unsupported layout")
+        self.capacity = capacity
+        self.layout = _Layout(max_points)
+
+        # Target -> slot index, rebuilt whenever the writer bumps the generation
+        self._generation: Optional[int] = None
+        self._slots: Dict[str, int] = {}
+
+    def _untrack(self) -> None:
+        """Keep this process's resource tracker from unlinking a region it did not create."""
+        if self.shm._name in _created_names:
+            return
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        except Exception:
+            pass
+
+    def _directory(self) -> Dict[str, int]:
+        """Current target to slot mapping."""
+        generation = HEADER.unpack_from(self.shm.buf, 0)[5]
+        if generation != self._generation:
+            slots = {}
+            name_format = struct.Struct(f'<Q{MAX_NAME_BYTES}s')
+            for index in range(self.capacity):
+                _, raw_name = name_format.unpack_from(self.shm.buf, self.layout.slot_offset(index))
+                name = raw_name.rstrip(b'\0')
+                if name:
+                    slots[name.decode('utf-8')] = index
+            self._slots, self._generation = slots, generation
+        return self._slots
+
+    def targets(self) -> List[str]:
+        """Names of all published targets."""
+        return list(self._directory())
+
+    def sequence(self, target: str) -> Optional[int]:
+        """Engine sequence of a target's last publish, for cache versioning."""
+        index = self._directory().get(target)
+        if index is None:
+            return None
+        return SLOT_HEADER.unpack_from(self.shm.buf, self.layout.slot_offset(index))[2]
+
+    def snapshot(self, target: str) -> Optional[SharedSnapshot]:
+        """Copy one target's state under the seqlock, or None if it is not published."""
+        index = self._directory().get(target)
+        if index is None:
+            return None
+
+        layout = self.layout
+        buf = self.shm.buf
+        offset = layout.slot_offset(index)
+        for _ in range(self.MAX_RETRIES):
+            fields = SLOT_HEADER.unpack_from(buf, offset)
+            seq = fields[0]
+            if seq % 2:
+                continue
+            rtts = buf[offset + layout.rtts:offset + layout.ttls].cast('d').tolist()
+            ttls = buf[offset + layout.ttls:offset + layout.outages].cast('h').tolist()
+            outages = [
+                OUTAGE_RECORD.unpack_from(buf, offset + layout.outages + position * OUTAGE_RECORD.size)
+                for position in range(fields[11])
+            ]
+            horizons = [
+                HORIZON_RECORD.unpack_from(buf, offset + layout.horizons + position * HORIZON_RECORD.size)
+                for position in range(fields[12])
+            ]
+            if struct.unpack_from('<Q', buf, offset)[0] == seq:
+                break
+        else:
+            raise TimeoutError(f"Shared store slot for {target} kept changing")
+
+        (_, raw_name, sequence, total_pings, failed_pings, resolution_failures, _,
+         consecutive_failures, outage_start_index, count, head, _, _) = fields
+        if raw_name.rstrip(b'\0').decode('utf-8') != target:
+            return None
+
+        # Linearize the rings oldest first
+        if count == layout.max_points:
+            order = list(range(head, layout.max_points)) + list(range(head))
+        else:
+            order = range(count)
+        ping_times = [None if math.isnan(rtts[i]) else rtts[i] for i in order]
+        ttl_values = [None if ttls[i] == MISSING_TTL else ttls[i] for i in order]
+
+        window_failed = sum(1 for ping_time in ping_times if ping_time is None)
+        stats = {
+            'ttls': ttl_values,
+            'ping_times': ping_times,
+            'failed_pings': failed_pings,
+            'total_pings': total_pings,
+            'failure_rate': (window_failed / count * 100) if count > 0 else 0.0,
+            'outage_history': [duration for _, duration in outages],
+            'consecutive_failures': consecutive_failures,
+            'outage_start_index': None if outage_start_index < 0 else outage_start_index,
+            'horizons': [
+                {
+                    'horizon': int(seconds) if seconds.is_integer() else seconds,
+                    'pings': pings,
+                    'failed_pings': failed,
+                    'failure_rate': (failed / pings * 100) if pings > 0 else 0.0,
+                    'avg_ping_time': None if math.isnan(avg_ping_time) else avg_ping_time
+                }
+                for seconds, pings, failed, avg_ping_time in horizons
+            ]
+        }
+        return SharedSnapshot(target, sequence, resolution_failures, stats)
+
+    def close(self) -> None:
+        """Unmap the region without removing it."""
+        self.shm.close()
@@ -0,0 +1,220 @@
+"""Binary snapshots of engine state for warm restarts."""
+
+import os
+import math
+import time
+import struct
+from array import array
+from typing import Optional, Dict, Iterable, List, Tuple
+
+try:
+    from .ping_engine import PingEngine
+except ImportError:
+    from ping_engine import PingEngine
+
+# File layout: header, then one record per engine
+#   header: magic, format version, flags, save time, engine count
+#   record: fixed fields, name, probe interval ('d', when flagged), TTL window ('h'), RTT window ('d'),
+#           failed positions ('I'),
+#           outage history, gaps, horizon rings (totals, then one column per bucket field)
+SNAPSHOT_MAGIC = b'PMSN'
+SNAPSHOT_VERSION = 1
+FILE_HEADER = struct.Struct('<4sHHdI')
+
+# name length, flags, horizon count, max_points, window length, failed count, outage count, gap count,
+# total, failed, resolution failures, sequence, consecutive failures, outage start (-1 for none),
+# failure run start (NaN for none), last RTT (NaN for none),
+# detector samples, mean, variance, outliers
+ENGINE_HEADER = struct.Struct('<HBBIIIIIQQQQiiddQddQ')
+OUTAGE_RECORD = struct.Struct('<ii')
+GAP_RECORD = struct.Struct('<Qdd')
+HORIZON_HEADER = struct.Struct('<dIBqQQQq')
+INTERVAL_RECORD = struct.Struct('<d')
+
+# Each horizon ring is five int64 columns: bucket epochs, counts, failures, RTT counts, RTT sums
+HORIZON_COLUMNS = 5
+
+# Record flags
+FLAG_PAUSED = 0x01
+FLAG_DETECTOR = 0x02
+FLAG_INTERVAL = 0x04
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or from another format version."""
+
+def _optional(value: Optional[float]) -> float:
+    """Encode an optional float as NaN."""
+    return math.nan if value is None else value
+
+def _from_optional(value: float) -> Optional[float]:
+    """Decode a NaN-encoded optional float."""
+    return None if math.isnan(value) else value
+
+def _failure_positions(ping_times: list) -> List[int]:
+    """Positions of failed samples, found with C-level scans since failures are rare."""
+    positions = []
+    position = -1
+    try:
+        while True:
+            position = ping_times.index(None, position + 1)
+            positions.append(position)
+    except ValueError:
+        return positions
+
+def pack_engine(engine: PingEngine, paused: bool = False, interval: Optional[float] = None) -> bytes:
+    """Encode one engine's full state, and its probe interval if given, as a snapshot record."""
+    state = engine.capture_state()
+    name = engine.target.encode('utf-8')
+    ttls, ping_times = state['ttls'], state['ping_times']
+
+    # Failed samples are stored as zeros plus an explicit position list
+    failures = _failure_positions(ping_times)
+    for position in failures:
+        ttls[position] = 0
+        ping_times[position] = 0.0
+
+    detector = state['anomaly_detector']
+    flags = ((FLAG_PAUSED if paused else 0) | (FLAG_DETECTOR if detector is not None else 0)
+             | (FLAG_INTERVAL if interval is not None else 0))
+    samples, mean, var, outliers = detector if detector is not None else (0, 0.0, 0.0, 0)
+    outage_start_index = state['outage_start_index']
+
+    parts = [
+        ENGINE_HEADER.pack(
+            len(name), flags, len(state['horizons']), state['max_points'], len(ping_times), len(failures),
+            len(state['outage_history']), len(state['gaps']),
+            state['total_pings'], state['failed_pings'], state['resolution_failures'], state['sequence'],
+            state['consecutive_failures'], -1 if outage_start_index is None else outage_start_index,
+            _optional(state['failure_run_start_time']), _optional(state['last_ping_time']),
+            samples, mean, var, outliers
+        ),
+        name,
+        INTERVAL_RECORD.pack(interval) if interval is not None else b'',
+        array('h', ttls).tobytes(),
+        array('d', ping_times).tobytes(),
+        array('I', failures).tobytes()
+    ]
+    parts.extend(OUTAGE_RECORD.pack(start, duration) for start, duration in state['outage_history'])
+    parts.extend(GAP_RECORD.pack(total, start, end) for total, start, end in state['gaps'])
+
+    for seconds, buckets, current_epoch, totals, epochs, counts, failed, rtt_counts, rtt_sums_us in state['horizons']:
+        parts.append(HORIZON_HEADER.pack(seconds, buckets, current_epoch is not None, current_epoch or 0, *totals))
+        parts.append(array('q', epochs + counts + failed + rtt_counts + rtt_sums_us).tobytes())
+    return b''.join(parts)
+
+def unpack_engine(data: memoryview, offset: int) -> Tuple[str, dict, bool, int]:
+    """Decode one record into (target, engine state, paused, next offset).
+
+    The window is returned as zero-copy views for PingEngine to expand lazily.
+    """
+    (name_length, flags, horizon_count, max_points, count, failure_count, outage_count, gap_count,
+     total_pings, failed_pings, resolution_failures, sequence, consecutive_failures, outage_start_index,
+     failure_run_start_time, last_ping_time,
+     samples, mean, var, outliers) = ENGINE_HEADER.unpack_from(data, offset)
+    offset += ENGINE_HEADER.size
+
+    target = bytes(data[offset:offset + name_length]).decode('utf-8')
+    offset += name_length
+
+    interval = None
+    if flags & FLAG_INTERVAL:
+        interval, = INTERVAL_RECORD.unpack_from(data, offset)
+        offset += INTERVAL_RECORD.size
+
+    ttls = data[offset:offset + count * 2].cast('h')
+    offset += count * 2
+    ping_times = data[offset:offset + count * 8].cast('d')
+    offset += count * 8
+    failures = data[offset:offset + failure_count * 4].cast('I')
+    offset += failure_count * 4
+
+    outage_history = []
+    for _ in range(outage_count):
+        outage_history.append(OUTAGE_RECORD.unpack_from(data, offset))
+        offset += OUTAGE_RECORD.size
+
+    gaps = []
+    for _ in range(gap_count):
+        gaps.append(GAP_RECORD.unpack_from(data, offset))
+        offset += GAP_RECORD.size
+
+    horizons = []
+    for _ in range(horizon_count):
+        seconds, buckets, has_epoch, current_epoch, *totals = HORIZON_HEADER.unpack_from(data, offset)
+        offset += HORIZON_HEADER.size
+        # One conversion per ring, then cheap list slices per column
+        values = data[offset:offset + HORIZON_COLUMNS * buckets * 8].cast('q').tolist()
+        offset += HORIZON_COLUMNS * buckets * 8
+        columns = [values[column * buckets:(column + 1) * buckets] for column in range(HORIZON_COLUMNS)]
+        horizons.append((seconds, buckets, current_epoch if has_epoch else None, tuple(totals), *columns))
+
+    if offset > len(data):
+        raise SnapshotError(f"Snapshot record for {target} is truncated")
+
+    state = {
+        'max_points': max_points,
+        'window': (ttls, ping_times, failures),
+        'failed_pings': failed_pings,
+        'total_pings': total_pings,
+        'resolution_failures': resolution_failures,
+        'sequence': sequence,
+        'consecutive_failures': consecutive_failures,
+        'outage_start_index': None if outage_start_index < 0 else outage_start_index,
+        'outage_history': outage_history,
+        'failure_run_start_time': _from_optional(failure_run_start_time),
+        'last_ping_time': _from_optional(last_ping_time),
+        'gaps': gaps,
+        'horizons': horizons,
+        'anomaly_detector': (samples, mean, var, outliers) if flags & FLAG_DETECTOR else None,
+        'interval': interval
+    }
+    return target, state, bool(flags & FLAG_PAUSED), offset
+
+def save_snapshot(path: str, engines: Iterable[Tuple[PingEngine, bool]], saved_at: Optional[float] = None,
+                  intervals: Optional[Dict[str, float]] = None) -> int:
+    """Atomically write (engine, paused) pairs, with each target's probe interval if known, to path.
+
+    Returns the number of engines saved.
+    The file is written next to its destination, synced, then renamed over it, so a
+    crash mid-write leaves the previous snapshot intact.
+    """
+    intervals = intervals or {}
+    records = [pack_engine(engine, paused, intervals.get(engine.target)) for engine, paused in engines]
+    header = FILE_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0,
+                              time.time() if saved_at is None else saved_at, len(records))
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as stream:
+        stream.write(header)
+        for record in records:
+            stream.write(record)
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temp_path, path)
+    return len(records)
+
+def load_snapshot(path: str) -> Tuple[float, Dict[str, Tuple[dict, bool]]]:
+    """Read a snapshot into (save time, {target: (engine state, paused)})."""
+    try:
+        with open(path, 'rb') as stream:
+            data = memoryview(stream.read())
+    except OSError as e:
+        raise SnapshotError(f"Cannot read snapshot {path}: {e}") from e
+
+    if len(data) < FILE_HEADER.size:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+    magic, version, _, saved_at, count = FILE_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not an engine snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot {path} has version {version}, expected {SNAPSHOT_VERSION}")
+
+    engines = {}
+    offset = FILE_HEADER.size
+    try:
+        for _ in range(count):
+            target, state, paused, offset = unpack_engine(data, offset)
+            engines[target] = (state, paused)
+    except (struct.error, TypeError, ValueError) as e:
+        raise SnapshotError(f"Snapshot {path} is corrupt: {e}") from e
+    return saved_at, engines
@@ -0,0 +1,149 @@
+"""Tests for API admission control."""
+
+import unittest
+from unittest.mock import patch
+from admission import TokenBucket, AdmissionController
+
+class FakeClock:
+    """Manual clock whose sleep advances time."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for TokenBucket and AdmissionController."""
+
+    def setUp(self):
+        """Set up a controller on a manual clock with a settable lag."""
+        self.clock = FakeClock()
+        self.lag = 0.0
+        self.controller = AdmissionController(rate=2.0, burst=3, max_concurrent=2, max_lag=0.05, yield_time=0.5,
+                                              lag_source=lambda: self.lag, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_token_bucket(self):
+        """Test that a bucket allows its burst, then refills at its rate."""
+        bucket = TokenBucket(rate=2.0, burst=3, now=0.0)
+        self.assertEqual([bucket.take(0.0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.take(0.0), 0.5)
+        self.assertEqual(bucket.take(0.5), 0.0)
+        self.assertAlmostEqual(bucket.take(0.5), 0.5)
+        self.assertEqual(bucket.take(100.0), 0.0)
+        self.assertAlmostEqual(bucket.tokens, 2.0)
+
+    def test_rate_limit_per_client(self):
+        """Test that each client has its own bucket and 429 carries the wait."""
+        for _ in range(3):
+            self.assertIsNone(self.controller.admit('a', False))
+        self.assertEqual(self.controller.admit('a', False), (429, 1, 'Rate limit exceeded'))
+        self.assertIsNone(self.controller.admit('b', False))
+        self.clock.now += 0.5
+        self.assertIsNone(self.controller.admit('a', False))
+        self.assertEqual(self.controller.rate_limited, 1)
+
+    def test_client_buckets_bounded(self):
+        """Test that the least recently seen clients are forgotten beyond max_clients."""
+        self.controller.max_clients = 2
+        for client in ('a', 'b', 'a', 'c'):
+            self.controller.admit(client, False)
+        self.assertEqual(list(self.controller._buckets), ['a', 'c'])
+
+    def test_concurrency_cap(self):
+        """Test that expensive requests beyond the cap get 503 until a slot is released."""
+        self.assertIsNone(self.controller.admit('a', True))
+        self.assertIsNone(self.controller.admit('b', True))
+        self.assertEqual(self.controller.admit('c', True)[0], 503)
+        self.assertIsNone(self.controller.admit('c', False))
+        self.controller.release()
+        self.assertIsNone(self.controller.admit('c', True))
+        self.assertEqual((self.controller.active, self.controller.shed_busy), (2, 1))
+
+    def test_yields_to_lagging_probes(self):
+        """Test that requests wait for the lag to recover and expensive ones are shed if it does not."""
+        self.controller.rate = None
+        recover_at = self.clock.now + 0.2
+        self.lag = 0.2
+        self.controller.lag_source = lambda: 0.0 if self.clock.now >= recover_at else self.lag
+        self.assertIsNone(self.controller.admit('a', True))
+        self.assertGreaterEqual(self.clock.now, recover_at)
+
+        self.controller.lag_source = lambda: self.lag
+        start = self.clock.now
+        self.assertIsNone(self.controller.admit('a', False))
+        self.assertEqual(self.controller.admit('a', True), (503, 1, 'Probes are lagging; try again shortly'))
+        self.assertAlmostEqual(self.clock.now - start, 1.0, places=5)
+        self.assertEqual((self.controller.yielded, self.controller.shed_lag), (3, 1))
+
+class TestAdmissionEndpoints(unittest.TestCase):
+    """Test admission control in the web app."""
+
+    def make_app(self):
+        """An app whose scheduler never starts."""
+        # Import through the package so the app and its engines share one module copy
+        from ping_monitor.web_app import create_app
+
+        app = create_app(target='a', max_points=10)
+        scheduler = app.extensions['scheduler']
+        scheduler.get_engine('a')._process_ping_result(64, 12.0)
+        patcher = patch.object(scheduler, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return app
+
+    def test_rate_limit_response(self):
+        """Test that a client over its burst gets 429 with Retry-After."""
+        app = self.make_app()
+        admission = app.extensions['admission']
+        admission.rate, admission.burst = 0.5, 2
+        client = app.test_client()
+        self.assertEqual([client.get('/api/targets').status_code for _ in range(3)], [200, 200, 429])
+        response = client.get('/api/targets')
+        self.assertEqual(response.headers['Retry-After'], '2')
+        self.assertEqual(response.get_json(), {'error': 'Rate limit exceeded'})
+
+    def test_slots_released(self):
+        """Test that expensive requests give back their slot, streamed ones once sent."""
+        app = self.make_app()
+        admission = app.extensions['admission']
+        admission.max_concurrent = 1
+        client = app.test_client()
+        for _ in range(3):
+            self.assertEqual(client.get('/api/query?metric=avg_ping_time').status_code, 200)
+        self.assertEqual(admission.active, 0)
+
+        from ping_monitor.history import SampleHistory
+
+        history = app.extensions['scheduler'].histories['a'] = SampleHistory()
+        history.add(1000.0, 64, 12.0)
+        streamed = client.get('/api/export')
+        self.assertEqual(admission.active, 1)
+        self.assertEqual(client.get('/api/history').status_code, 503)
+        self.assertEqual(client.get('/api/targets').status_code, 200)
+        streamed.get_data()
+        streamed.close()
+        self.assertEqual(admission.active, 0)
+        self.assertEqual(client.get('/api/admission').get_json()['shed_busy'], 1)
+
+    def test_lagging_probes_shed_expensive_requests(self):
+        """Test that expensive requests get 503 while the probes lag and cheap ones still proceed."""
+        app = self.make_app()
+        admission = app.extensions['admission']
+        admission.lag_source = lambda: 1.0
+        admission.yield_time = 0.05
+        client = app.test_client()
+        response = client.get('/api/query?metric=avg_ping_time')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(client.get('/api/targets').status_code, 200)
+
+        # The dashboard's own polling waits for the probes but is never shed
+        self.assertEqual(client.get('/api/data').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,233 @@
+"""Tests for incremental alert rules and batched webhook delivery."""
+
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from alerts import AlertRule, AlertEngine, AlertError, WebhookNotifier
+from ping_engine import PingEngine
+from scheduler import ProbeScheduler
+
+class Recorder:
+    """Notifier that keeps notifications in memory."""
+
+    def __init__(self):
+        self.alerts = []
+
+    def notify(self, alert):
+        self.alerts.append(alert)
+
+class WebhookStub:
+    """Local HTTP server that records posted batches and fails the first few requests."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                if stub.failures > 0:
+                    stub.failures -= 1
+                    self.send_response(500)
+                else:
+                    stub.batches.append(json.loads(body)['alerts'])
+                    self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+class TestAlertEngine(unittest.TestCase):
+    """Test cases for rule evaluation and notification state."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.recorder = Recorder()
+        self.engine = PingEngine('8.8.8.8', max_points=100)
+        self.now = 1000.0
+
+    def attach(self, *specs, cooldown=300):
+        """Attach an alert engine built from rule dictionaries."""
+        alerts = AlertEngine.from_config(specs, notifier=self.recorder, cooldown=cooldown)
+        self.engine.add_sample_listener(alerts)
+        return alerts
+
+    def feed(self, pattern, rtt=10.0):
+        """Process 'x' as a failure and '.' as a success, one second apart."""
+        for mark in pattern:
+            self.now += 1
+            if mark == 'x':
+                self.engine._process_ping_result(None, None, timestamp=self.now)
+            else:
+                self.engine._process_ping_result(64, rtt, timestamp=self.now)
+
+    def states(self):
+        """(rule, state) of every notification so far."""
+        return [(alert['rule'], alert['state']) for alert in self.recorder.alerts]
+
+    def test_outage_fires_once_and_resolves(self):
+        """Test that an outage rule notifies at the threshold and on recovery only."""
+        alerts = self.attach({'name': 'down', 'kind': 'outage', 'threshold': 3})
+        self.feed('.xx.xxxxx')
+        self.assertEqual(self.states(), [('down', 'firing')])
+        self.assertEqual(self.recorder.alerts[0]['value'], 3)
+        self.assertEqual([alert['rule'] for alert in alerts.firing()], ['down'])
+
+        self.feed('.')
+        self.assertEqual(self.states(), [('down', 'firing'), ('down', 'resolved')])
+        self.assertEqual(self.recorder.alerts[1]['since'], 1007.0)
+        self.assertEqual(alerts.firing(), [])
+
+    def test_failure_rate_over_horizon(self):
+        """Test that failure rate rules wait for min_samples and read the horizon totals."""
+        self.attach({'name': 'lossy', 'kind': 'failure_rate', 'threshold': 40, 'horizon': 60, 'min_samples': 5})
+        self.feed('xx')
+        self.assertEqual(self.states(), [])
+        self.feed('..x')
+        self.assertEqual(self.states(), [('lossy', 'firing')])
+        self.assertAlmostEqual(self.recorder.alerts[0]['value'], 60.0)
+        self.feed('.....')
+        self.assertEqual(self.states(), [('lossy', 'firing'), ('lossy', 'resolved')])
+
+    def test_p95_over_sliding_window(self):
+        """Test that the percentile window slides and ignores failures."""
+        self.attach({'name': 'slow', 'kind': 'p95_rtt', 'threshold': 100, 'window': 10, 'min_samples': 10})
+        self.feed('.' * 9, rtt=10.0)
+        self.feed('.', rtt=500.0)
+        self.assertEqual(self.states(), [('slow', 'firing')])
+        self.feed('xxx')
+        self.assertEqual(len(self.states()), 1)
+        self.feed('.' * 9, rtt=10.0)
+        self.assertEqual(len(self.states()), 1)
+        self.feed('.', rtt=10.0)
+        self.assertEqual(self.states(), [('slow', 'firing'), ('slow', 'resolved')])
+
+    def test_cooldown_suppresses_flapping(self):
+        """Test that a refire within the cooldown is not notified, nor is its resolution."""
+        alerts = self.attach({'name': 'down', 'kind': 'outage', 'threshold': 2}, cooldown=30)
+        self.feed('xx.xx.xx.')
+        self.assertEqual(self.states(), [('down', 'firing'), ('down', 'resolved')])
+        self.assertEqual(alerts.suppressed, 2)
+
+        self.now += 30
+        self.feed('xx')
+        self.assertEqual(self.states()[-1], ('down', 'firing'))
+
+    def test_cooldown_delays_long_firing(self):
+        """Test that a refire inside the cooldown is sent once the cooldown passes if it is still firing."""
+        alerts = self.attach({'name': 'down', 'kind': 'outage', 'threshold': 3}, cooldown=300)
+        self.feed('xxx.')
+        self.feed('xxx')
+        self.assertEqual(self.states(), [('down', 'firing'), ('down', 'resolved')])
+        self.assertEqual(alerts.firing()[0]['notified'], False)
+
+        # Down for 5000 s: the firing goes out on the first sample past the cooldown, once
+        self.feed('x' * 5000)
+        self.assertEqual(self.states(), [('down', 'firing'), ('down', 'resolved'), ('down', 'firing')])
+        self.assertEqual(self.recorder.alerts[-1]['timestamp'], 1003.0 + 300)
+        self.assertEqual(self.recorder.alerts[-1]['since'], 1007.0)
+        self.assertEqual(alerts.firing()[0]['notified'], True)
+
+        self.feed('.')
+        self.assertEqual(self.states()[-1], ('down', 'resolved'))
+
+    def test_untracked_horizon_is_skipped(self):
+        """Test that a failure rate rule over a horizon the engine does not track never fires or fails."""
+        self.engine = PingEngine('8.8.8.8', max_points=100, horizons=(60,))
+        alerts = self.attach({'name': 'lossy', 'kind': 'failure_rate', 'threshold': 10, 'horizon': 900,
+                              'min_samples': 1},
+                             {'name': 'down', 'kind': 'outage', 'threshold': 2})
+        with self.assertLogs(level='ERROR') as logs:
+            self.feed('xxx')
+        self.assertEqual(self.states(), [('down', 'firing')])
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(alerts.evaluations, 3)
+
+        # A rule evaluated directly against a missing horizon stays quiet
+        rule = AlertRule('lossy', 'failure_rate', 10, horizon=900)
+        self.assertEqual(alerts._evaluate(rule, None, self.engine, self.now, None), (False, None))
+
+    def test_target_filter(self):
+        """Test that rules limited to other targets are never evaluated."""
+        alerts = self.attach({'name': 'other', 'kind': 'outage', 'threshold': 1, 'targets': ['1.1.1.1']})
+        self.feed('xxx')
+        self.assertEqual((self.states(), alerts.evaluations), ([], 0))
+
+    def test_invalid_rules(self):
+        """Test that malformed rules raise AlertError."""
+        for spec in ({'name': 'a', 'kind': 'jitter', 'threshold': 1},
+                     {'name': 'a', 'kind': 'failure_rate', 'threshold': 1},
+                     {'name': 'a', 'kind': 'failure_rate', 'threshold': 1, 'horizon': 0},
+                     {'name': 'a', 'kind': 'outage'},
+                     {'name': 'a', 'kind': 'outage', 'threshold': 'high'}):
+            with self.assertRaises(AlertError):
+                AlertRule.from_dict(spec)
+
+    def test_scheduler_attaches_and_forgets(self):
+        """Test that scheduled targets are evaluated and removed targets forgotten."""
+        alerts = AlertEngine.from_config([{'name': 'down', 'kind': 'outage', 'threshold': 1}], notifier=self.recorder)
+        scheduler = ProbeScheduler(max_points=10, alerts=alerts)
+        engine = scheduler.add_target('10.0.0.1')
+        engine._process_ping_result(None, None)
+        self.assertEqual(self.states(), [('down', 'firing')])
+        scheduler.remove_target('10.0.0.1')
+        self.assertEqual(alerts.firing(), [])
+
+class TestWebhookNotifier(unittest.TestCase):
+    """Test cases for batched webhook delivery against a local HTTP stub."""
+
+    def test_batches_posts(self):
+        """Test that queued notifications are posted together, in order."""
+        stub = WebhookStub()
+        self.addCleanup(stub.close)
+        notifier = WebhookNotifier(stub.url, batch_size=50, flush_interval=0.05)
+        for index in range(120):
+            notifier.notify({'rule': 'r', 'index': index})
+        notifier.close()
+
+        self.assertEqual([alert['index'] for batch in stub.batches for alert in batch], list(range(120)))
+        self.assertTrue(all(len(batch) <= 50 for batch in stub.batches))
+        self.assertEqual(notifier.alerts_sent, 120)
+
+    def test_retries_with_backoff(self):
+        """Test that a failing webhook is retried until the same batch is accepted."""
+        stub = WebhookStub(failures=2)
+        self.addCleanup(stub.close)
+        notifier = WebhookNotifier(stub.url, flush_interval=0.02, max_backoff=0.1)
+        self.addCleanup(notifier.close)
+        notifier.notify({'rule': 'r', 'index': 0})
+
+        self.assertTrue(wait_for(lambda: notifier.alerts_sent == 1))
+        self.assertEqual(notifier.send_failures, 2)
+        self.assertEqual(stub.batches, [[{'rule': 'r', 'index': 0}]])
+
+    def test_queue_drops_oldest(self):
+        """Test that the queue stays bounded while the webhook is unreachable."""
+        notifier = WebhookNotifier('http://127.0.0.1:9/hook', flush_interval=60, max_queue=3)
+        for index in range(5):
+            notifier.notify({'index': index})
+        self.assertEqual(notifier.alerts_dropped, 2)
+        self.assertEqual([alert['index'] for alert in notifier.queue], [2, 3, 4])
+        notifier.close(timeout=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Tests for the offline bulk analyzer."""
+
+import os
+import random
+import tempfile
+import unittest
+from ping_engine import PingEngine
+from statistics import StatisticsCalculator
+from analyzer import TargetAnalysis, analyze_file, iter_ping_output_chunks, iter_binary_sample_arrays, np
+from sample_format import LineSampleWriter, BinarySampleWriter
+
+RAW_PING_OUTPUT = """PING example.com (93.184.216.34) 56(84) bytes of data.
+64 bytes from 93.184.216.34: icmp_seq=1 ttl=56 time=10.5 ms
+64 bytes from 93.184.216.34: icmp_seq=2 ttl=56 time=11.5 ms
+no answer yet for icmp_seq=3
+no answer yet for icmp_seq=4
+64 bytes from 93.184.216.34: icmp_seq=5 ttl=56 time=12.0 ms
+64 bytes from 93.184.216.34: icmp_seq=5 ttl=56 time=12.0 ms (DUP!)
+64 bytes from 93.184.216.34: icmp_seq=8 ttl=56 time=13.0 ms
+From 10.0.0.1 icmp_seq=9 Destination Host Unreachable
+64 bytes from 93.184.216.34: icmp_seq=10 ttl=56 time=9.0 ms
+"""
+
+def random_samples(count, seed, failure_rate=0.2):
+    """Generate bursty success/failure samples."""
+    rng = random.Random(seed)
+    samples = []
+    failing = False
+    for _ in range(count):
+        # Failures come in bursts, like real outages
+        failing = rng.random() < (0.6 if failing else failure_rate)
+        samples.append((None, None) if failing else (rng.choice((56, 57)), round(rng.uniform(5, 50), 3)))
+    return samples
+
+def engine_result(samples, window):
+    """Feed samples through a live engine and return its statistics."""
+    engine = PingEngine(target="8.8.8.8", max_points=window)
+    for ttl, ping_time in samples:
+        engine._process_ping_result(ttl, ping_time)
+    stats = engine.get_statistics()
+    return stats, StatisticsCalculator.calculate_statistics(stats)
+
+class TestTargetAnalysis(unittest.TestCase):
+    """Test cases for TargetAnalysis against the live engine."""
+
+    def analyze(self, samples, window, use_numpy, chunk=97):
+        """Run the analyzer over samples in uneven chunks."""
+        analysis = TargetAnalysis("8.8.8.8", window=window, use_numpy=use_numpy)
+        for start in range(0, len(samples), chunk):
+            part = samples[start:start + chunk]
+            analysis.add_chunk([ttl for ttl, _ in part], [rtt for _, rtt in part])
+        return analysis.result()
+
+    def assert_matches_engine(self, samples, window, use_numpy):
+        """Assert windowed analyzer output equals the engine's statistics."""
+        stats, calculated = engine_result(samples, window)
+        result = self.analyze(samples, window, use_numpy)
+
+        self.assertEqual(result['total_pings'], stats['total_pings'])
+        self.assertEqual(result['failed_pings'], stats['failed_pings'])
+        self.assertEqual(result['outage_history'], stats['outage_history'])
+        self.assertEqual(result['consecutive_failures'], stats['consecutive_failures'])
+        self.assertEqual(
+            (result['failure_rate'], result['avg_ping_time'], result['min_ping_time'],
+             result['max_ping_time'], result['avg_outage_duration']),
+            calculated
+        )
+
+    def test_matches_engine_python(self):
+        """Test that the pure-Python path reproduces the engine for several windows."""
+        for seed, window in [(1, 10), (2, 50), (3, 300), (4, 2)]:
+            with self.subTest(seed=seed, window=window):
+                self.assert_matches_engine(random_samples(1000, seed), window, use_numpy=False)
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_matches_engine_numpy(self):
+        """Test that the vectorized path reproduces the engine for several windows."""
+        for seed, window in [(1, 10), (2, 50), (3, 300), (4, 2)]:
+            with self.subTest(seed=seed, window=window):
+                self.assert_matches_engine(random_samples(1000, seed), window, use_numpy=True)
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_numpy_matches_python_whole_archive(self):
+        """Test that both paths agree on whole-archive results."""
+        samples = random_samples(5000, 7)
+        self.assertEqual(self.analyze(samples, None, use_numpy=True), self.analyze(samples, None, use_numpy=False))
+
+    def test_whole_archive_matches_unbounded_engine(self):
+        """Test that without a window the archive is analyzed as one large window."""
+        samples = random_samples(2000, 5)
+        stats, calculated = engine_result(samples, window=len(samples))
+        result = self.analyze(samples, None, use_numpy=False)
+
+        self.assertEqual(result['outage_history'], stats['outage_history'])
+        self.assertEqual(result['failure_rate'], calculated[0])
+        self.assertAlmostEqual(result['avg_ping_time'], calculated[1])
+
+    def test_outage_runs_positions(self):
+        """Test that outage runs carry their start positions and open runs are excluded."""
+        samples = [(64, 1.0), (None, None), (None, None), (64, 1.0), (None, None), (64, 1.0), (None, None), (None, None)]
+        result = self.analyze(samples, None, use_numpy=False, chunk=3)
+
+        self.assertEqual(result['outage_runs'], [[1, 2]])
+        self.assertEqual(result['consecutive_failures'], 2)
+
+    def test_custom_threshold(self):
+        """Test that the outage threshold is configurable."""
+        samples = [(64, 1.0), (None, None), (64, 1.0), (None, None), (None, None), (None, None), (64, 1.0)]
+        analysis = TargetAnalysis("8.8.8.8", threshold=3, use_numpy=False)
+        analysis.add_chunk([ttl for ttl, _ in samples], [rtt for _, rtt in samples])
+
+        self.assertEqual(analysis.result()['outage_history'], [3])
+
+class TestAnalyzeFile(unittest.TestCase):
+    """Test cases for file parsing."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.directory.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(text)
+        return path
+
+    def test_parse_raw_ping_output(self):
+        """Test sequence gaps, no-answer lines, errors and duplicates in raw ping output."""
+        path = self.write('ping.log', RAW_PING_OUTPUT)
+
+        chunks = list(iter_ping_output_chunks(path, chunk_size=64))
+        ttls = [ttl for chunk_ttls, _ in chunks for ttl in chunk_ttls]
+        rtts = [rtt for _, chunk_rtts in chunks for rtt in chunk_rtts]
+
+        self.assertEqual(rtts, [10.5, 11.5, None, None, 12.0, None, None, 13.0, None, 9.0])
+        self.assertEqual(ttls[0], 56)
+
+    def test_analyze_raw_ping_output(self):
+        """Test end-to-end analysis of raw ping output."""
+        path = self.write('ping.log', RAW_PING_OUTPUT)
+
+        results = analyze_file(path, use_numpy=False)
+
+        self.assertEqual(list(results), ['example.com'])
+        result = results['example.com']
+        self.assertEqual(result['total_pings'], 10)
+        self.assertEqual(result['failed_pings'], 5)
+        self.assertEqual(result['outage_history'], [2, 2])
+
+    def test_analyze_sample_file(self):
+        """Test analysis of interleaved multi-target collector samples."""
+        path = os.path.join(self.directory.name, 'samples.txt')
+        with open(path, 'w', encoding='utf-8') as stream:
+            writer = LineSampleWriter(stream)
+            for i, (ttl, rtt) in enumerate(random_samples(200, 9)):
+                writer.write(1000.0 + i, "a" if i % 2 else "b", ttl, rtt)
+
+        results = analyze_file(path, use_numpy=False)
+
+        self.assertEqual(set(results), {"a", "b"})
+        self.assertEqual(results["a"]['total_pings'] + results["b"]['total_pings'], 200)
+
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_binary_bulk_decode_matches_python(self):
+        """Test that vectorized binary decoding agrees with the record-by-record reader."""
+        path = os.path.join(self.directory.name, 'samples.bin')
+        with open(path, 'wb') as stream:
+            writer = BinarySampleWriter(stream)
+            for i, (ttl, rtt) in enumerate(random_samples(3000, 11)):
+                writer.write(1000.0 + i, ("a", "b", "c")[i % 3] if i > 100 else "a", ttl, rtt)
+
+        # Small chunks split records and target definitions across reads
+        decoded = sum(len(chunk[1]) for chunk in iter_binary_sample_arrays(path, chunk_size=100))
+        self.assertEqual(decoded, 3000)
+
+        self.assertEqual(analyze_file(path, use_numpy=True), analyze_file(path, use_numpy=False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""Tests for online latency anomaly detection."""
+
+import random
+import unittest
+from ping_engine import PingEngine
+from scheduler import ProbeScheduler
+from anomaly import LatencyAnomalyDetector
+
+class TestLatencyAnomalyDetector(unittest.TestCase):
+    """Test cases for LatencyAnomalyDetector class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.detector = LatencyAnomalyDetector()
+        self.rng = random.Random(3)
+        self.time = 0.0
+
+    def feed(self, count, mean, std):
+        """Feed gaussian RTTs and return the detected shifts."""
+        shifts = []
+        for _ in range(count):
+            self.time += 1.0
+            shift = self.detector.update(max(0.1, self.rng.gauss(mean, std)), self.time)
+            if shift is not None:
+                shifts.append(shift)
+        return shifts
+
+    def test_no_detection_during_warmup(self):
+        """Test that the baseline is learned before anything is flagged."""
+        self.assertIsNone(self.detector.band_limits())
+        self.assertEqual(self.feed(self.detector.warmup, 15.0, 1.0), [])
+        self.assertAlmostEqual(self.detector.mean, 15.0, delta=1.0)
+
+    def test_stable_latency_has_no_shifts(self):
+        """Test that steady noisy RTTs do not raise anomalies."""
+        self.assertEqual(self.feed(5000, 15.0, 2.0), [])
+        lower, upper = self.detector.band_limits()
+        self.assertLess(lower, 15.0)
+        self.assertGreater(upper, 15.0)
+
+    def test_detects_latency_doubling(self):
+        """Test that a sustained RTT increase is detected within a few samples."""
+        self.feed(500, 15.0, 1.5)
+        shift_time = self.time
+        shifts = self.feed(20, 30.0, 1.5)
+
+        self.assertEqual(len(shifts), 1)
+        direction, start_time, baseline, observed, samples = shifts[0]
+        self.assertEqual(direction, 'up')
+        self.assertGreater(start_time, shift_time)
+        self.assertLessEqual(samples, 5)
+        self.assertAlmostEqual(baseline, 15.0, delta=1.0)
+        self.assertAlmostEqual(observed, 30.0, delta=3.0)
+
+    def test_new_level_becomes_baseline(self):
+        """Test that a shift re-anchors the baseline and a return is detected as a drop."""
+        self.feed(500, 15.0, 1.5)
+        self.assertEqual(len(self.feed(500, 30.0, 1.5)), 1)
+        self.assertAlmostEqual(self.detector.mean, 30.0, delta=1.0)
+
+        shifts = self.feed(20, 15.0, 1.5)
+        self.assertEqual([shift[0] for shift in shifts], ['down'])
+
+    def test_isolated_spikes_are_ignored(self):
+        """Test that sparse spikes count as outliers without signalling a shift."""
+        self.feed(200, 15.0, 1.0)
+        for i in range(50):
+            self.time += 1.0
+            rtt = 200.0 if i % 10 == 0 else 15.0
+            self.assertIsNone(self.detector.update(rtt, self.time))
+        self.assertGreaterEqual(self.detector.outliers, 5)
+        self.assertAlmostEqual(self.detector.mean, 15.0, delta=1.0)
+
+    def test_reset(self):
+        """Test that reset forgets the baseline."""
+        self.feed(100, 15.0, 1.0)
+        self.detector.reset()
+        self.assertEqual(self.detector.samples, 0)
+        self.assertIsNone(self.detector.band_limits())
+
+class TestEngineAnomalies(unittest.TestCase):
+    """Test anomaly reporting through PingEngine and ProbeScheduler."""
+
+    def feed(self, engine, start, count, rtt):
+        """Feed successful pings at one-second spacing."""
+        for i in range(count):
+            engine._process_ping_result(64, rtt, timestamp=start + i)
+
+    def test_engine_records_anomaly_event(self):
+        """Test that the engine turns a detected shift into an event."""
+        engine = PingEngine("8.8.8.8", 10)
+        self.feed(engine, 1000.0, 100, 15.0)
+        self.feed(engine, 1100.0, 10, 40.0)
+
+        events = engine.get_anomalies()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].target, "8.8.8.8")
+        self.assertEqual(events[0].direction, 'up')
+        self.assertEqual(events[0].start_time, 1100.0)
+        self.assertEqual(events[0].observed_rtt, 40.0)
+        self.assertAlmostEqual(events[0].to_dict()['baseline_rtt'], 15.0, delta=0.5)
+
+        # Time range filtering uses the detection time
+        self.assertEqual(engine.get_anomalies(start=2000.0), [])
+
+        engine.reset()
+        self.assertEqual(engine.get_anomalies(), [])
+
+    def test_failures_do_not_feed_detector(self):
+        """Test that lost pings are left to outage detection."""
+        engine = PingEngine("8.8.8.8", 10)
+        self.feed(engine, 1000.0, 50, 15.0)
+        for i in range(20):
+            engine._process_ping_result(None, None, timestamp=1050.0 + i)
+        self.assertEqual(engine.anomaly_detector.samples, 50)
+        self.assertEqual(engine.get_anomalies(), [])
+
+    def test_detection_can_be_disabled(self):
+        """Test that engines can run without a detector."""
+        engine = PingEngine("8.8.8.8", 10, detect_anomalies=False)
+        self.feed(engine, 1000.0, 100, 15.0)
+        self.feed(engine, 1100.0, 10, 40.0)
+        self.assertIsNone(engine.anomaly_detector)
+        self.assertEqual(engine.get_anomalies(), [])
+
+    def test_scheduler_query_anomalies(self):
+        """Test querying anomalies across targets with paging."""
+        scheduler = ProbeScheduler(max_points=10)
+        for offset, name in enumerate(("b.example", "a.example")):
+            engine = scheduler.add_target(name)
+            self.feed(engine, 1000.0, 100, 15.0)
+            self.feed(engine, 1100.0 + offset, 10, 40.0)
+
+        total, events = scheduler.query_anomalies(0, 2000)
+        self.assertEqual(total, 2)
+        self.assertEqual([event.target for event in events], ["b.example", "a.example"])
+
+        total, events = scheduler.query_anomalies(0, 2000, targets=["a.example", "missing"])
+        self.assertEqual(total, 1)
+
+        total, events = scheduler.query_anomalies(0, 2000, offset=1, limit=1)
+        self.assertEqual(total, 2)
+        self.assertEqual([event.target for event in events], ["a.example"])
+
+
+if __name__ == '__main__':
+    unittest.main()
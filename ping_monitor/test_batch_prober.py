@@ -0,0 +1,171 @@
+"""Tests for batched single-socket ICMP probing."""
+
+import socket
+import struct
+import time
+import unittest
+from unittest.mock import patch
+from batch_prober import (BatchProber, build_echo_request, parse_echo_reply, icmp_checksum,
+                          ICMP_ECHO_REPLY, ICMP_ECHO_REQUEST)
+from scheduler import ProbeScheduler
+
+def make_ip_reply(request: bytes, source: str, ttl: int = 57, icmp_type: int = ICMP_ECHO_REPLY) -> bytes:
+    """Wrap an echo request's identifier/sequence in an IPv4 echo reply packet."""
+    _, _, _, identifier, sequence = struct.unpack('!BBHHH', request[:8])
+    body = struct.pack('!BBHHH', icmp_type, 0, 0, identifier, sequence) + request[8:]
+    ip_header = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(body), 0, 0, ttl, 1, 0,
+                            socket.inet_aton(source), socket.inet_aton('10.0.0.254'))
+    return ip_header + body
+
+class FakeRawSocket:
+    """In-memory raw ICMP socket that answers echo requests from selected addresses."""
+
+    def __init__(self, responsive):
+        self.responsive = responsive
+        self.inbox = []
+        self.sent = []
+
+    def setblocking(self, flag):
+        pass
+
+    def sendto(self, packet, address):
+        self.sent.append((packet, address[0]))
+        # Raw sockets also see unrelated ICMP traffic
+        self.inbox.append((make_ip_reply(packet, address[0], icmp_type=ICMP_ECHO_REQUEST), address[0]))
+        if address[0] in self.responsive:
+            self.inbox.append((make_ip_reply(packet, address[0], ttl=self.responsive[address[0]]), address[0]))
+
+    def recvfrom(self, size):
+        if not self.inbox:
+            raise BlockingIOError()
+        data, source = self.inbox.pop(0)
+        return data, (source, 0)
+
+    def close(self):
+        pass
+
+class TestPacketCodec(unittest.TestCase):
+    """Test cases for ICMP packet helpers."""
+
+    def test_checksum_of_valid_packet_is_zero(self):
+        """Test that a packet including its checksum sums to zero."""
+        packet = build_echo_request(0x1234, 7)
+        self.assertEqual(icmp_checksum(packet), 0)
+
+    def test_checksum_odd_length(self):
+        """Test checksum padding for odd-length data."""
+        self.assertEqual(icmp_checksum(b'\x01'), icmp_checksum(b'\x01\x00'))
+
+    def test_build_echo_request_header(self):
+        """Test the echo request header fields."""
+        packet = build_echo_request(0x1234, 7)
+        icmp_type, code, _, identifier, sequence = struct.unpack('!BBHHH', packet[:8])
+        self.assertEqual((icmp_type, code, identifier, sequence), (ICMP_ECHO_REQUEST, 0, 0x1234, 7))
+
+    def test_parse_reply_with_ip_header(self):
+        """Test parsing a raw-socket reply including the IP header."""
+        reply = make_ip_reply(build_echo_request(0x1234, 7), '10.0.0.1', ttl=57)
+        self.assertEqual(parse_echo_reply(reply, has_ip_header=True), (0x1234, 7, 57))
+
+    def test_parse_reply_without_ip_header(self):
+        """Test parsing a datagram-socket reply without IP header."""
+        reply = make_ip_reply(build_echo_request(0x1234, 7), '10.0.0.1')[20:]
+        self.assertEqual(parse_echo_reply(reply, has_ip_header=False), (0x1234, 7, None))
+
+    def test_parse_ignores_non_replies(self):
+        """Test that echo requests and truncated packets are ignored."""
+        request = make_ip_reply(build_echo_request(1, 1), '10.0.0.1', icmp_type=ICMP_ECHO_REQUEST)
+        self.assertIsNone(parse_echo_reply(request, has_ip_header=True))
+        self.assertIsNone(parse_echo_reply(b'\x45\x00', has_ip_header=True))
+
+class TestBatchProber(unittest.TestCase):
+    """Test cases for BatchProber class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.sock = FakeRawSocket({'10.0.0.1': 57, '10.0.0.2': 120})
+        self.prober = BatchProber(timeout=0.05, sock=self.sock, has_ip_header=True)
+
+    @patch('batch_prober.select.select')
+    def test_probe_demultiplexes_replies(self, mock_select):
+        """Test that replies are matched back to their targets."""
+        mock_select.side_effect = lambda r, w, x, t: (r, w, x)
+
+        results = self.prober.probe({'a': '10.0.0.1', 'b': '10.0.0.2', 'c': '10.0.0.3'})
+
+        self.assertEqual(results['a'][0], 57)
+        self.assertEqual(results['b'][0], 120)
+        self.assertIsNotNone(results['a'][1])
+        self.assertEqual(results['c'], (None, None))
+        self.assertEqual(self.prober.packets_sent, 3)
+        self.assertEqual(self.prober.packets_received, 2)
+
+    @patch('batch_prober.select.select')
+    def test_single_burst_unique_sequences(self, mock_select):
+        """Test that all requests go out in one burst with unique sequence numbers."""
+        mock_select.side_effect = lambda r, w, x, t: (r, w, x)
+
+        self.prober.probe({f't{i}': '10.0.0.1' for i in range(10)})
+
+        sequences = [struct.unpack('!H', packet[6:8])[0] for packet, _ in self.sock.sent]
+        self.assertEqual(len(set(sequences)), 10)
+
+    @patch('batch_prober.select.select')
+    def test_ignores_foreign_identifier(self, mock_select):
+        """Test that replies to other processes' pings are ignored."""
+        mock_select.side_effect = lambda r, w, x, t: (r, w, x)
+        foreign = make_ip_reply(build_echo_request((self.prober.identifier + 1) & 0xFFFF, 0), '10.0.0.3')
+        self.sock.inbox.append((foreign, '10.0.0.3'))
+
+        results = self.prober.probe({'c': '10.0.0.3'})
+
+        self.assertEqual(results['c'], (None, None))
+
+    def test_loopback_probe(self):
+        """Test a real burst against loopback addresses when ICMP sockets are permitted."""
+        try:
+            prober = BatchProber(timeout=1.0)
+        except PermissionError:
+            self.skipTest("ICMP sockets not permitted")
+
+        try:
+            results = prober.probe({'lo1': '127.0.0.1', 'lo2': '127.0.0.2'})
+        finally:
+            prober.close()
+
+        for ttl, ping_time in results.values():
+            self.assertIsNotNone(ttl)
+            self.assertGreaterEqual(ping_time, 0.0)
+
+class TestSchedulerBatchMode(unittest.TestCase):
+    """Test cases for scheduling through a batch prober."""
+
+    def test_batch_results_reach_engines(self):
+        """Test that one batch per tick feeds each target's engine."""
+        class StubBatchProber:
+            def __init__(self):
+                self.batches = []
+
+            def probe(self, addresses):
+                self.batches.append(dict(addresses))
+                return {target: ((64, 10.0) if target == '1.1.1.1' else (None, None)) for target in addresses}
+
+        prober = StubBatchProber()
+        scheduler = ProbeScheduler(max_points=5, interval=0.01, batch_prober=prober)
+        up = scheduler.add_target('1.1.1.1')
+        down = scheduler.add_target('8.8.8.8')
+
+        scheduler.start()
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline and up.total_pings < 3:
+            time.sleep(0.01)
+        scheduler.stop()
+
+        self.assertGreaterEqual(up.total_pings, 3)
+        self.assertEqual(up.failed_pings, 0)
+        self.assertEqual(down.failed_pings, down.total_pings)
+        self.assertEqual(prober.batches[0], {'1.1.1.1': '1.1.1.1', '8.8.8.8': '8.8.8.8'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for the packed failure bitmap and its use by PingEngine."""
+
+import random
+import unittest
+from bitmap import FailureBitmap
+from ping_engine import PingEngine
+
+def reference_runs(bits, min_length):
+    """Failure runs of a plain list of bits, for comparison."""
+    runs, start = [], None
+    for position, bit in enumerate(bits + [False]):
+        if bit and start is None:
+            start = position
+        elif not bit and start is not None:
+            if position - start >= min_length:
+                runs.append((start, position - start))
+            start = None
+    return runs
+
+class TestFailureBitmap(unittest.TestCase):
+    """Test cases for FailureBitmap."""
+
+    def test_matches_reference_while_sliding(self):
+        """Test count, ranges and runs against a plain list across many compactions."""
+        rng = random.Random(3)
+        for capacity in (1, 63, 64, 65, 200):
+            bitmap, bits = FailureBitmap(capacity), []
+            for step in range(5 * capacity + 70):
+                failed = rng.random() < (0.9 if step % 50 < 20 else 0.1)
+                bitmap.append(failed)
+                bits = (bits + [failed])[-capacity:]
+
+                self.assertEqual(len(bitmap), len(bits))
+                self.assertEqual(bitmap.count(), sum(bits))
+                start, end = sorted(rng.randint(0, len(bits)) for _ in range(2))
+                self.assertEqual(bitmap.count_range(start, end), sum(bits[start:end]))
+                for min_length in (1, 2, 5):
+                    self.assertEqual(bitmap.runs(min_length), reference_runs(bits, min_length))
+
+    def test_whole_word_runs(self):
+        """Test runs spanning several all-failure words."""
+        bitmap = FailureBitmap(1000)
+        for failed in [False] * 10 + [True] * 300 + [False] * 5 + [True] * 3:
+            bitmap.append(failed)
+        self.assertEqual(bitmap.runs(2), [(10, 300), (315, 3)])
+        self.assertEqual(bitmap.runs(4), [(10, 300)])
+
+    def test_from_positions_and_clear(self):
+        """Test building a window from failure positions and clearing it."""
+        bitmap = FailureBitmap.from_positions(10, 6, [1, 2, 5])
+        self.assertEqual(len(bitmap), 6)
+        self.assertEqual(bitmap.runs(1), [(1, 2), (5, 1)])
+        bitmap.clear()
+        self.assertEqual((len(bitmap), bitmap.count(), bitmap.runs()), (0, 0, []))
+
+class TestEngineThreshold(unittest.TestCase):
+    """Test cases for configurable outage thresholds in PingEngine."""
+
+    def feed(self, engine, pattern):
+        """Process 'x' as a failure and '.' as a success."""
+        for mark in pattern:
+            engine._process_ping_result(None if mark == 'x' else 64, None if mark == 'x' else 10.0)
+
+    def test_threshold_applies_to_history(self):
+        """Test that only runs reaching the threshold are recorded as outages."""
+        engine = PingEngine('8.8.8.8', max_points=20, outage_threshold=3)
+        self.feed(engine, '.xx.xxx.xxxx.')
+        self.assertEqual([duration for _, duration in engine.outage_history], [3, 4])
+        self.assertAlmostEqual(engine.get_statistics()['failure_rate'], 9 / 13 * 100)
+
+    def test_runs_at_any_threshold(self):
+        """Test that window runs can be re-evaluated at other thresholds, including an open run."""
+        engine = PingEngine('8.8.8.8', max_points=20)
+        self.feed(engine, '.x.xx.xxxx')
+        self.assertEqual(engine.get_outage_runs(), [(3, 2), (6, 4)])
+        self.assertEqual(engine.get_outage_runs(1), [(1, 1), (3, 2), (6, 4)])
+        self.assertEqual(engine.get_outage_runs(3), [(6, 4)])
+
+    def test_history_expires_with_window(self):
+        """Test that outage history entries leave as their ending success slides out."""
+        engine = PingEngine('8.8.8.8', max_points=5)
+        self.feed(engine, 'xx.')
+        self.assertEqual(engine.outage_history, [(4, 2)])
+        self.feed(engine, '....')
+        self.assertEqual(engine.outage_history, [(0, 2)])
+        self.feed(engine, '.')
+        self.assertEqual(engine.outage_history, [])
+
+    def test_restore_rebuilds_bitmap(self):
+        """Test that a restored engine reports the same failures and outages."""
+        engine = PingEngine('8.8.8.8', max_points=10)
+        self.feed(engine, '..xxx.x.xx.')
+        restored = PingEngine('8.8.8.8', max_points=10)
+        restored.restore_state(engine.capture_state())
+        self.assertAlmostEqual(restored.get_statistics()['failure_rate'], 60.0)
+        self.assertEqual(restored.get_outage_runs(), engine.get_outage_runs())
+        self.assertEqual(restored.outage_history, engine.outage_history)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Tests for the headless collector."""
+
+import io
+import os
+import sys
+import subprocess
+import unittest
+from unittest.mock import patch
+from ping_engine import PingEngine
+from collector import Collector
+from sample_format import LineSampleWriter, parse_sample_line
+
+class TestCollector(unittest.TestCase):
+    """Test cases for Collector class."""
+
+    @patch.object(PingEngine, 'ping_target', return_value=(64, 15.2))
+    def test_streams_samples_until_count(self, mock_ping):
+        """Test that samples from all targets are streamed until the count is reached."""
+        stream = io.StringIO()
+        collector = Collector(["8.8.8.8", "1.1.1.1"], LineSampleWriter(stream), interval=0.01, count=6)
+
+        collector.run()
+
+        samples = [parse_sample_line(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(samples), 6)
+        self.assertEqual({sample[1] for sample in samples}, {"8.8.8.8", "1.1.1.1"})
+        self.assertTrue(all(sample[2:] == (64, 15.2) for sample in samples))
+        self.assertFalse(collector.scheduler.is_running())
+
+    def test_package_import_does_not_load_web_stack(self):
+        """Test that importing the package leaves Flask unloaded until create_app is used."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, '-c', "import sys, ping_monitor; print('flask' in sys.modules)"],
+            cwd=root, capture_output=True, text=True, check=True
+        )
+
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_collector_import_skips_optional_subsystems(self):
+        """Test that importing the collector stays fast and leaves optional subsystems unloaded."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        optional = ['urllib.request', 'ping_monitor.push', 'ping_monitor.history', 'ping_monitor.alerts',
+                    'ping_monitor.correlation', 'ping_monitor.path_prober', 'ping_monitor.path_engine',
+                    'ping_monitor.ping_stream', 'ping_monitor.snapshot']
+        script = (
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import ping_monitor.collector\n"
+            "print(time.perf_counter() - start)\n"
+            f"print([name for name in {optional!r} if name in sys.modules])\n"
+        )
+
+        # Best of three cold starts, so one slow process start does not fail the check
+        elapsed = []
+        for _ in range(3):
+            result = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True,
+                                    check=True)
+            seconds, loaded = result.stdout.strip().splitlines()
+            elapsed.append(float(seconds))
+            self.assertEqual(loaded, '[]')
+        self.assertLess(min(elapsed), 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
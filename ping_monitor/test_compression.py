@@ -0,0 +1,110 @@
+"""Tests for response compression and content negotiation."""
+
+import gzip
+import unittest
+from compression import CompressedPayloadCache, negotiate_encoding
+
+class TestNegotiateEncoding(unittest.TestCase):
+    """Test cases for Accept-Encoding negotiation."""
+
+    def test_no_header_means_identity(self):
+        """Test that a missing header disables compression."""
+        self.assertIsNone(negotiate_encoding(None))
+        self.assertIsNone(negotiate_encoding(''))
+
+    def test_gzip_selected(self):
+        """Test that gzip is chosen when offered."""
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+
+    def test_unsupported_only(self):
+        """Test that unsupported encodings fall back to identity."""
+        self.assertIsNone(negotiate_encoding('deflate, compress'))
+
+    def test_quality_values(self):
+        """Test that q-values decide between supported encodings."""
+        available = ['gzip', 'br', 'zstd']
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, br;q=0.5', available), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0.2, zstd;q=0.8', available), 'zstd')
+
+    def test_server_preference_on_ties(self):
+        """Test that equal weights prefer brotli, then zstd, then gzip."""
+        available = ['gzip', 'br', 'zstd']
+        self.assertEqual(negotiate_encoding('gzip, zstd, br', available), 'br')
+        self.assertEqual(negotiate_encoding('gzip, zstd', available), 'zstd')
+
+    def test_zero_quality_excluded(self):
+        """Test that q=0 refuses an encoding."""
+        self.assertIsNone(negotiate_encoding('gzip;q=0', ['gzip']))
+
+    def test_wildcard(self):
+        """Test that a wildcard accepts any supported encoding."""
+        self.assertEqual(negotiate_encoding('*', ['gzip']), 'gzip')
+        self.assertIsNone(negotiate_encoding('*, gzip;q=0', ['gzip']))
+
+class TestCompressedPayloadCache(unittest.TestCase):
+    """Test cases for CompressedPayloadCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.cache = CompressedPayloadCache(min_size=16)
+        self.body = b'{"ping_times": [' + b'15.2, ' * 100 + b'15.2]}'
+
+    def test_identity_response(self):
+        """Test that uncompressed bodies are returned as built."""
+        body, encoding = self.cache.get('data', 1, lambda: self.body, None)
+        self.assertEqual(body, self.body)
+        self.assertIsNone(encoding)
+
+    def test_gzip_round_trip(self):
+        """Test that gzip responses decompress to the original body."""
+        body, encoding = self.cache.get('data', 1, lambda: self.body, 'gzip')
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(gzip.decompress(body), self.body)
+        self.assertLess(len(body), len(self.body))
+
+    def test_compresses_once_per_version(self):
+        """Test that many clients at one version cost one build and one compression."""
+        for _ in range(10):
+            self.cache.get('data', 1, lambda: self.body, 'gzip')
+            self.cache.get('data', 1, lambda: self.body, None)
+
+        self.assertEqual(self.cache.builds, 1)
+        self.assertEqual(self.cache.compressions, 1)
+
+    def test_new_version_rebuilds(self):
+        """Test that a new version replaces the cached payload."""
+        self.cache.get('data', 1, lambda: self.body, 'gzip')
+        body, _ = self.cache.get('data', 2, lambda: b'x' * 64, 'gzip')
+
+        self.assertEqual(gzip.decompress(body), b'x' * 64)
+        self.assertEqual(self.cache.builds, 2)
+
+    def test_small_bodies_not_compressed(self):
+        """Test that bodies below the size threshold are sent as-is."""
+        body, encoding = self.cache.get('small', 1, lambda: b'{}', 'gzip')
+        self.assertEqual(body, b'{}')
+        self.assertIsNone(encoding)
+
+    def test_unavailable_encoding_falls_back(self):
+        """Test that an encoding without a compressor is served as identity."""
+        body, encoding = self.cache.get('data', 1, lambda: self.body, 'unknown')
+        self.assertEqual(body, self.body)
+        self.assertIsNone(encoding)
+
+    def test_bounded_cache_evicts_least_recently_used(self):
+        """Test that a bounded cache keeps only its most recently used keys."""
+        cache = CompressedPayloadCache(max_entries=2)
+        cache.get('a', 1, lambda: b'a', None)
+        cache.get('b', 1, lambda: b'b', None)
+        cache.get('a', 1, lambda: b'a', None)
+        cache.get('c', 1, lambda: b'c', None)
+
+        self.assertEqual(cache.evictions, 1)
+        cache.get('a', 1, lambda: b'a', None)
+        self.assertEqual(cache.builds, 3)
+        cache.get('b', 1, lambda: b'b', None)
+        self.assertEqual(cache.builds, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
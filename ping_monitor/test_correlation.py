@@ -0,0 +1,111 @@
+"""Tests for grouping simultaneous outages into incidents."""
+
+import unittest
+from correlation import IncidentCorrelator
+from path_engine import PathEngine
+from ping_engine import PingEngine
+from scheduler import ProbeScheduler
+
+class TestIncidentCorrelator(unittest.TestCase):
+    """Test cases for IncidentCorrelator."""
+
+    def setUp(self):
+        """Set up ten targets probed once a second into a correlator with 5 s buckets."""
+        self.paths = {}
+        self.correlator = IncidentCorrelator(bucket=5, min_targets=3, join=15, path_lookup=self.paths.get)
+        self.engines = {}
+        for index in range(10):
+            engine = PingEngine(f"10.0.0.{index}", max_points=50)
+            engine.add_sample_listener(self.correlator)
+            self.engines[engine.target] = engine
+        self.now = 1000.0
+
+    def run_seconds(self, seconds, down=()):
+        """Probe every target once a second, failing the targets in down."""
+        for _ in range(seconds):
+            self.now += 1
+            for target, engine in self.engines.items():
+                if target in down:
+                    engine._process_ping_result(None, None, timestamp=self.now)
+                else:
+                    engine._process_ping_result(64, 10.0, timestamp=self.now)
+
+    def test_simultaneous_outages_form_one_incident(self):
+        """Test that targets going down together become one incident that ends when they recover."""
+        upstream = {'10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4'}
+        self.run_seconds(10)
+        self.run_seconds(20, down=upstream)
+
+        incidents = self.correlator.incidents(now=self.now)
+        self.assertEqual(len(incidents), 1)
+        self.assertEqual(set(incidents[0].targets), upstream)
+        self.assertIsNone(incidents[0].end_time)
+
+        self.run_seconds(15)
+        incident = self.correlator.incidents(now=self.now)[0]
+        self.assertIsNotNone(incident.end_time)
+        self.assertEqual(incident.to_dict()['target_count'], 4)
+        self.assertEqual(incident.peak, 4)
+        self.assertLessEqual(incident.start_time, 1012.0)
+
+    def test_isolated_outages_are_not_incidents(self):
+        """Test that fewer than min_targets concurrent outages open nothing."""
+        self.run_seconds(30, down={'10.0.0.1', '10.0.0.2'})
+        self.assertEqual(self.correlator.incidents(now=self.now + 10), [])
+
+    def test_staggered_onsets_join(self):
+        """Test that outages detected within the join window join the same incident."""
+        self.run_seconds(5)
+        self.run_seconds(6, down={'10.0.0.1', '10.0.0.2'})
+        self.run_seconds(6, down={'10.0.0.1', '10.0.0.2', '10.0.0.3'})
+        self.run_seconds(6, down={'10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4'})
+        incidents = self.correlator.incidents(now=self.now)
+        self.assertEqual([set(incident.targets) for incident in incidents],
+                         [{'10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.4'}])
+
+    def test_separate_events_stay_separate(self):
+        """Test that a later, unrelated outage opens its own incident."""
+        self.run_seconds(20, down={'10.0.0.1', '10.0.0.2', '10.0.0.3'})
+        self.run_seconds(10)
+        self.run_seconds(20, down={'10.0.0.6', '10.0.0.7', '10.0.0.8'})
+        incidents = self.correlator.incidents(now=self.now)
+        self.assertEqual([sorted(incident.targets) for incident in incidents],
+                         [['10.0.0.1', '10.0.0.2', '10.0.0.3'], ['10.0.0.6', '10.0.0.7', '10.0.0.8']])
+        self.assertEqual([incident.id for incident in incidents], [1, 2])
+        self.assertEqual(len(self.correlator.incidents(start=self.now - 15, now=self.now)), 1)
+
+    def test_common_cause_from_shared_path(self):
+        """Test that traced members report their shared path prefix and common failing hop."""
+        for target, last_hop in (('10.0.0.1', '192.0.2.1'), ('10.0.0.2', '192.0.2.2')):
+            path = PathEngine(target, max_points=50)
+            for second in range(3):
+                hops = [('10.1.0.1', 64, 1.0), ('172.16.0.1', 63, 5.0), (last_hop, 62, 9.0)]
+                path.process_round(True, hops, timestamp=1000.0 + second)
+            for second in range(3):
+                path.process_round(False, [('10.1.0.1', 64, 1.0), (None, None, None), (None, None, None)],
+                                   timestamp=1003.0 + second)
+            self.paths[target] = path
+
+        self.run_seconds(20, down={'10.0.0.1', '10.0.0.2', '10.0.0.3'})
+        cause = self.correlator.incidents(now=self.now)[0].cause
+        self.assertEqual(cause['shared_hops'], ['10.1.0.1', '172.16.0.1'])
+        self.assertEqual(cause['traced_targets'], 2)
+        self.assertEqual(cause['failing_hop'], {'hop': 2, 'address': '172.16.0.1'})
+
+    def test_scheduler_wiring(self):
+        """Test that the scheduler attaches the correlator, lends it paths and forgets removed targets."""
+        correlator = IncidentCorrelator(bucket=5, min_targets=2, join=15)
+        scheduler = ProbeScheduler(max_points=10, correlator=correlator)
+        self.assertEqual(correlator.path_lookup, scheduler.get_path)
+        engines = [scheduler.add_target(f"10.0.1.{index}") for index in range(2)]
+        for second in range(12):
+            for engine in engines:
+                engine._process_ping_result(None, None, timestamp=1000.0 + second)
+        self.assertEqual(len(correlator.incidents(now=1015.0)), 1)
+
+        scheduler.remove_target('10.0.1.0')
+        self.assertEqual(correlator.incidents(now=1015.0)[0].targets, ['10.0.1.1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+"""Tests for the TTL-respecting DNS cache."""
+
+import time
+import threading
+import unittest
+from unittest.mock import patch
+from ping_engine import PingEngine
+from dns_cache import DnsCache, DnsResolutionError
+
+class StubResolver:
+    """Local stub resolver with programmable answers."""
+
+    def __init__(self, addresses=None, ttl=30.0):
+        self.addresses = addresses if addresses is not None else ["10.0.0.1"]
+        self.ttl = ttl
+        self.fail = False
+        self.calls = 0
+        # Cleared to hold lookups until the test sets it
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, name):
+        self.calls += 1
+        self.gate.wait()
+        if self.fail:
+            raise OSError("resolver unreachable")
+        return list(self.addresses), self.ttl
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestDnsCache(unittest.TestCase):
+    """Test cases for DnsCache class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.resolver = StubResolver()
+        self.clock = FakeClock()
+        self.cache = DnsCache(resolver=self.resolver, negative_ttl=5.0, refresh_ahead=0.2,
+                              max_stale=60.0, clock=self.clock)
+
+    def wait_for(self, condition, timeout=2.0):
+        """Poll until condition is true or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_ip_literal_bypasses_resolver(self):
+        """Test that IP addresses are returned without a lookup."""
+        self.assertEqual(self.cache.resolve("8.8.8.8"), "8.8.8.8")
+        self.assertEqual(self.cache.resolve("::1"), "::1")
+        self.assertEqual(self.resolver.calls, 0)
+
+    def test_resolves_once_within_ttl(self):
+        """Test that repeated lookups within the TTL hit the cache."""
+        for _ in range(5):
+            self.assertEqual(self.cache.resolve("example.test"), "10.0.0.1")
+            self.clock.now += 1.0
+
+        self.assertEqual(self.resolver.calls, 1)
+
+    def test_default_ttl_when_resolver_has_none(self):
+        """Test that the default TTL applies when the resolver reports no TTL."""
+        cache = DnsCache(resolver=StubResolver(ttl=None), default_ttl=10.0, refresh_ahead=0.0,
+                         max_stale=0.0, clock=self.clock)
+        cache.resolve("example.test")
+
+        self.clock.now += 9.0
+        cache.resolve("example.test")
+        self.assertEqual(cache.resolver.calls, 1)
+
+        self.clock.now += 2.0
+        cache.resolve("example.test")
+        self.assertEqual(cache.resolver.calls, 2)
+
+    def test_refresh_ahead_in_background(self):
+        """Test that entries near expiry are refreshed asynchronously."""
+        self.cache.resolve("example.test")
+        self.resolver.addresses = ["10.0.0.2"]
+
+        # Within the last 20% of the 30s TTL: cached answer now, refresh in the background
+        self.clock.now += 25.0
+        self.assertEqual(self.cache.resolve("example.test"), "10.0.0.1")
+
+        self.assertTrue(self.wait_for(lambda: self.cache.resolve("example.test") == "10.0.0.2"))
+        self.assertEqual(self.resolver.calls, 2)
+
+    def test_serves_stale_on_refresh_failure(self):
+        """Test that resolver outages keep serving the last known address."""
+        self.cache.resolve("example.test")
+        self.resolver.fail = True
+
+        self.clock.now += 31.0
+        self.assertEqual(self.cache.resolve("example.test"), "10.0.0.1")
+
+        self.assertTrue(self.wait_for(lambda: self.cache.failures("example.test") == 1))
+        self.assertEqual(self.cache.resolve("example.test"), "10.0.0.1")
+
+    def test_failure_is_negatively_cached(self):
+        """Test that failed lookups raise and are not retried until the negative TTL passes."""
+        self.resolver.fail = True
+
+        with self.assertRaises(DnsResolutionError):
+            self.cache.resolve("missing.test")
+        with self.assertRaises(DnsResolutionError):
+            self.cache.resolve("missing.test")
+        self.assertEqual(self.resolver.calls, 1)
+        self.assertEqual(self.cache.failures("missing.test"), 1)
+
+        self.clock.now += 6.0
+        self.resolver.fail = False
+        self.assertEqual(self.cache.resolve("missing.test"), "10.0.0.1")
+
+    def test_failure_past_max_stale_is_negatively_cached(self):
+        """Test that once the stale window is over, a failing resolver is not retried on every lookup."""
+        self.cache.resolve("example.test")
+        self.resolver.fail = True
+
+        self.clock.now += 30.0 + 61.0
+        for _ in range(3):
+            with self.assertRaises(DnsResolutionError):
+                self.cache.resolve("example.test")
+        self.assertEqual(self.resolver.calls, 2)
+
+        self.clock.now += 6.0
+        self.resolver.fail = False
+        self.assertEqual(self.cache.resolve("example.test"), "10.0.0.1")
+        self.assertEqual(self.resolver.calls, 3)
+
+    def test_concurrent_misses_share_one_lookup(self):
+        """Test that concurrent first lookups of a name wait on a single resolver call."""
+        self.resolver.gate.clear()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.resolve("example.test")))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+
+        self.assertTrue(self.wait_for(lambda: self.resolver.calls == 1))
+        time.sleep(0.05)
+        self.resolver.gate.set()
+        for thread in threads:
+            thread.join(2.0)
+
+        self.assertEqual(results, ["10.0.0.1"] * 5)
+        self.assertEqual(self.resolver.calls, 1)
+
+    def test_concurrent_misses_share_failure(self):
+        """Test that callers waiting on a failed lookup raise without querying again."""
+        self.resolver.fail = True
+        self.resolver.gate.clear()
+        errors = []
+
+        def resolve():
+            try:
+                self.cache.resolve("missing.test")
+            except DnsResolutionError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=resolve) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(self.wait_for(lambda: self.resolver.calls == 1))
+        time.sleep(0.05)
+        self.resolver.gate.set()
+        for thread in threads:
+            thread.join(2.0)
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.resolver.calls, 1)
+
+    def test_shared_across_engines(self):
+        """Test that engines monitoring the same name share one resolution."""
+        first = PingEngine(target="example.test", dns_cache=self.cache)
+        second = PingEngine(target="example.test", dns_cache=self.cache)
+
+        with patch.object(PingEngine, 'ping_target', return_value=(64, 15.2)) as mock_ping:
+            first.probe_once()
+            second.probe_once()
+
+        self.assertEqual(self.resolver.calls, 1)
+        mock_ping.assert_called_with("10.0.0.1")
+
+    def test_engine_counts_resolution_failures_separately(self):
+        """Test that resolution failures are not recorded as ping loss."""
+        self.resolver.fail = True
+        engine = PingEngine(target="missing.test", dns_cache=self.cache)
+
+        with patch.object(PingEngine, 'ping_target') as mock_ping:
+            engine.probe_once()
+
+        mock_ping.assert_not_called()
+        self.assertEqual(engine.resolution_failures, 1)
+        self.assertEqual(engine.failed_pings, 0)
+        self.assertEqual(engine.total_pings, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
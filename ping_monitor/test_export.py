@@ -0,0 +1,126 @@
+"""Tests for streaming sample exports."""
+
+import io
+import csv
+import json
+import unittest
+from unittest.mock import patch
+from history import SampleHistory
+from export import merge_histories, export_ndjson, export_csv, export_arrow, stream_export, ExportError, pa
+
+def make_histories():
+    """Two targets sampled at interleaved times, with sealed blocks and a failure each."""
+    histories = {'a': SampleHistory(block_size=4), 'b': SampleHistory(block_size=4)}
+    for second in range(10):
+        histories['a'].add(1000.0 + second, None if second == 3 else 57, None if second == 3 else 10.0 + second)
+        histories['b'].add(1000.5 + second, None if second == 7 else 118, None if second == 7 else 20.0 + second)
+    return histories
+
+class TestExport(unittest.TestCase):
+    """Test cases for the export generators."""
+
+    def test_merge_in_timestamp_order(self):
+        """Test that rows of all targets are merged by timestamp and limited to the range."""
+        rows = list(merge_histories(make_histories(), start=1002.0, end=1005.0))
+        self.assertEqual([row[1] for row in rows], [1002.0, 1002.5, 1003.0, 1003.5, 1004.0, 1004.5, 1005.0])
+        self.assertEqual([row[0] for row in rows[:2]], ['a', 'b'])
+        self.assertEqual(rows[2], ('a', 1003.0, None, None))
+
+    def test_ndjson_chunks(self):
+        """Test that NDJSON comes in bounded chunks of whole lines that parse back to the rows."""
+        rows = list(merge_histories(make_histories()))
+        chunks = list(export_ndjson(rows, chunk_size=200))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.endswith(b'\n') and len(chunk) < 300 for chunk in chunks))
+
+        records = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual(len(records), 20)
+        self.assertEqual(records[0], {'target': 'a', 'timestamp': 1000.0, 'ttl': 57, 'ping_time': 10.0})
+        self.assertEqual(records[6], {'target': 'a', 'timestamp': 1003.0, 'ttl': None, 'ping_time': None})
+
+    def test_csv_chunks(self):
+        """Test that CSV has one header and empty fields for failures."""
+        rows = list(merge_histories(make_histories()))
+        chunks = list(export_csv(rows, chunk_size=100))
+        self.assertGreater(len(chunks), 1)
+
+        lines = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+        self.assertEqual(lines[0], ['target', 'timestamp', 'ttl', 'ping_time'])
+        self.assertEqual(len(lines), 21)
+        self.assertEqual(lines[1], ['a', '1000.0', '57', '10.0'])
+        self.assertEqual(lines[7], ['a', '1003.0', '', ''])
+
+    def test_generators_are_lazy(self):
+        """Test that nothing is read from the rows before the first chunk is requested."""
+        consumed = []
+
+        def rows():
+            for index in range(10):
+                consumed.append(index)
+                yield 'a', 1000.0 + index, 57, 1.0
+
+        chunks = stream_export(rows(), 'csv')
+        self.assertEqual(consumed, [])
+        next(chunks)
+        self.assertEqual(len(consumed), 10)
+
+    def test_unknown_format(self):
+        """Test that an unknown format is refused before streaming."""
+        with self.assertRaises(ExportError):
+            stream_export(iter(()), 'xml')
+
+    @unittest.skipIf(pa is None, "pyarrow not installed")
+    def test_arrow_stream(self):
+        """Test that the Arrow stream reads back as record batches of at most batch_rows rows."""
+        rows = list(merge_histories(make_histories()))
+        reader = pa.ipc.open_stream(b''.join(export_arrow(rows, batch_rows=8)))
+        batches = list(reader)
+        self.assertEqual([batch.num_rows for batch in batches], [8, 8, 4])
+        table = pa.Table.from_batches(batches)
+        self.assertEqual(table.column('target').to_pylist()[:2], ['a', 'b'])
+        self.assertEqual(table.column('ttl').to_pylist()[6], None)
+
+class TestExportEndpoint(unittest.TestCase):
+    """Test the /api/export endpoint."""
+
+    def make_client(self, keep_history=True):
+        """An app with two targets and a few samples each."""
+        # Import through the package so the app and its engines share one module copy
+        from ping_monitor.web_app import create_app
+
+        with patch('ping_monitor.web_app.KEEP_HISTORY', keep_history):
+            app = create_app(target='a', max_points=10)
+        scheduler = app.extensions['scheduler']
+        scheduler.add_target('b')
+        for second in range(5):
+            scheduler.get_engine('a')._process_ping_result(57, 10.0, timestamp=1000.0 + second)
+            scheduler.get_engine('b')._process_ping_result(None, None, timestamp=1000.5 + second)
+        return app.test_client()
+
+    def test_streams_formats(self):
+        """Test NDJSON and CSV responses for a target set and time range."""
+        client = self.make_client()
+        response = client.get('/api/export?start=1001&end=1002')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertTrue(response.is_streamed)
+        records = [json.loads(line) for line in response.get_data().splitlines()]
+        self.assertEqual([(record['target'], record['timestamp']) for record in records],
+                         [('a', 1001.0), ('b', 1001.5), ('a', 1002.0)])
+
+        response = client.get('/api/export?target=b&format=csv')
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertIn('filename=samples.csv', response.headers['Content-Disposition'])
+        self.assertEqual(response.get_data(as_text=True).splitlines()[1], 'b,1000.5,,')
+
+    def test_errors(self):
+        """Test unknown formats, unknown targets and targets without history."""
+        client = self.make_client()
+        self.assertEqual(client.get('/api/export?format=xml').status_code, 400)
+        self.assertEqual(client.get('/api/export?target=c').status_code, 404)
+        if pa is None:
+            self.assertEqual(client.get('/api/export?format=arrow').status_code, 501)
+        self.assertEqual(self.make_client(keep_history=False).get('/api/export').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
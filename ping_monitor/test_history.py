@@ -0,0 +1,104 @@
+"""Tests for compressed sample history blocks."""
+
+import random
+import unittest
+from history import encode_block, decode_block, block_range, query_blocks, SampleHistory, HistoryError
+from scheduler import ProbeScheduler
+
+def make_samples(count, seed=1):
+    """Jittered 1 Hz samples with millisecond timestamps, microsecond RTTs and some failures."""
+    rng = random.Random(seed)
+    samples, timestamp = [], 1700000000.0
+    for _ in range(count):
+        timestamp = round(timestamp + 1 + rng.choice((0, 0, 0.001, -0.002, 3.5)), 3)
+        if rng.random() < 0.1:
+            samples.append((timestamp, None, None))
+        else:
+            samples.append((timestamp, rng.choice((57, 57, 57, 255, 0)), round(rng.uniform(0.05, 80), 3)))
+    return samples
+
+class TestBlockCodec(unittest.TestCase):
+    """Test cases for encode_block and decode_block."""
+
+    def test_round_trip(self):
+        """Test that samples decode exactly, including TTL 0 and 255 and failures."""
+        samples = make_samples(2000)
+        self.assertEqual(list(decode_block(encode_block(samples))), samples)
+
+    def test_edge_values(self):
+        """Test single samples, long gaps, repeated and extreme floats."""
+        cases = [
+            [(1.0, 64, 10.0)],
+            [(1.0, None, None), (2.0, None, None)],
+            [(0.0, 1, 5e-324), (86400.0 * 400, 1, 1e300), (86400.0 * 400 + 0.001, 1, 1e300),
+             (86400.0 * 400 + 0.002, 1, -0.0)],
+        ]
+        for samples in cases:
+            self.assertEqual(list(decode_block(encode_block(samples))), samples)
+
+    def test_steady_series_is_compact(self):
+        """Test that a regular interval and constant RTT cost well under a byte per sample."""
+        samples = [(1700000000.0 + i, 64, 12.5) for i in range(3600)]
+        block = encode_block(samples)
+        # About one bit each for the timestamp and the RTT
+        self.assertLess(len(block), 3600 // 3)
+
+    def test_block_range(self):
+        """Test that the header gives count and time range without decoding."""
+        samples = make_samples(10)
+        self.assertEqual(block_range(encode_block(samples)), (10, samples[0][0], samples[-1][0]))
+
+    def test_rejects_corrupt_blocks(self):
+        """Test that truncated or foreign data raises HistoryError."""
+        block = encode_block(make_samples(100))
+        for data in (block[:10], b'XXXX' + block[4:], block[:-3]):
+            with self.assertRaises(HistoryError):
+                list(decode_block(data))
+
+    def test_query_skips_blocks(self):
+        """Test that range queries return exactly the samples in range."""
+        samples = make_samples(1000)
+        blocks = [encode_block(samples[i:i + 100]) for i in range(0, 1000, 100)]
+        start, end = samples[250][0], samples[420][0]
+        self.assertEqual(list(query_blocks(blocks, start, end)), samples[250:421])
+
+class TestSampleHistory(unittest.TestCase):
+    """Test cases for SampleHistory."""
+
+    def test_seals_full_blocks(self):
+        """Test that full blocks are sealed and queries span sealed and open samples."""
+        history = SampleHistory(block_size=100, retention=None)
+        samples = make_samples(250)
+        for sample in samples:
+            history.add(*sample)
+
+        self.assertEqual(len(history.blocks()), 2)
+        self.assertEqual(history.sealed_samples, 200)
+        self.assertEqual(list(history.query()), samples)
+        self.assertEqual(list(history.query(samples[150][0], samples[220][0])), samples[150:221])
+
+    def test_retention_drops_old_blocks(self):
+        """Test that sealed blocks older than the retention are dropped."""
+        history = SampleHistory(block_size=10, retention=50)
+        for i in range(100):
+            history.add(1000.0 + i, 64, 1.0)
+        self.assertEqual([block_range(block)[1] for block in history.blocks()], [1040.0, 1050.0, 1060.0,
+                                                                                 1070.0, 1080.0, 1090.0])
+        self.assertEqual(history.sealed_samples, 60)
+
+    def test_scheduler_keeps_history(self):
+        """Test that scheduled engines feed their history as samples arrive."""
+        scheduler = ProbeScheduler(max_points=5, keep_history=True)
+        engine = scheduler.add_target('10.0.0.1')
+        for i in range(20):
+            engine._process_ping_result(64, 10.0 + i, timestamp=1000.0 + i)
+
+        samples = list(scheduler.get_history('10.0.0.1').query(1010.0))
+        self.assertEqual(len(samples), 10)
+        self.assertEqual(samples[0], (1010.0, 64, 20.0))
+        self.assertTrue(scheduler.remove_target('10.0.0.1'))
+        self.assertIsNone(scheduler.get_history('10.0.0.1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests for multi-horizon aggregates."""
+
+import random
+import unittest
+from ping_engine import PingEngine
+from horizons import HorizonAggregator
+
+class TestHorizonAggregator(unittest.TestCase):
+    """Test cases for HorizonAggregator class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.aggregator = HorizonAggregator(horizons=(60, 3600), buckets=60)
+
+    def by_horizon(self, now):
+        """Snapshot keyed by horizon length."""
+        return {entry['horizon']: entry for entry in self.aggregator.snapshot(now)}
+
+    def test_empty(self):
+        """Test that empty horizons report no data."""
+        stats = self.by_horizon(1000.0)
+        self.assertEqual(stats[60]['pings'], 0)
+        self.assertEqual(stats[60]['failure_rate'], 0.0)
+        self.assertIsNone(stats[60]['avg_ping_time'])
+
+    def test_all_horizons_from_one_stream(self):
+        """Test that one sample stream feeds every horizon."""
+        self.aggregator.add(1000.0, 10.0)
+        self.aggregator.add(1001.0, None)
+        self.aggregator.add(1002.0, 20.0)
+
+        stats = self.by_horizon(1002.0)
+        for horizon in (60, 3600):
+            self.assertEqual(stats[horizon]['pings'], 3)
+            self.assertEqual(stats[horizon]['failed_pings'], 1)
+            self.assertAlmostEqual(stats[horizon]['failure_rate'], 100 / 3)
+            self.assertEqual(stats[horizon]['avg_ping_time'], 15.0)
+
+    def test_samples_expire_from_short_horizon(self):
+        """Test that old samples leave the short horizon but stay in the long one."""
+        self.aggregator.add(1000.0, None)
+        self.aggregator.add(1100.0, 10.0)
+
+        stats = self.by_horizon(1100.0)
+        self.assertEqual(stats[60]['pings'], 1)
+        self.assertEqual(stats[60]['failure_rate'], 0.0)
+        self.assertEqual(stats[3600]['pings'], 2)
+        self.assertEqual(stats[3600]['failure_rate'], 50.0)
+
+    def test_snapshot_ages_without_new_samples(self):
+        """Test that reading later expires buckets even if no samples arrived."""
+        self.aggregator.add(1000.0, 10.0)
+        self.assertEqual(self.by_horizon(1030.0)[60]['pings'], 1)
+        stats = self.by_horizon(1070.0)
+        self.assertEqual(stats[60]['pings'], 0)
+        self.assertEqual(stats[3600]['pings'], 1)
+
+        # Long gaps clear every bucket at once
+        self.assertEqual(self.by_horizon(100000.0)[3600]['pings'], 0)
+
+    def test_samples_older_than_horizon_are_ignored(self):
+        """Test that late samples outside the horizon are dropped."""
+        self.aggregator.add(1000.0, 10.0)
+        self.aggregator.add(900.0, None)
+        stats = self.by_horizon(1000.0)
+        self.assertEqual(stats[60]['pings'], 1)
+        self.assertEqual(stats[3600]['pings'], 2)
+
+    def test_matches_brute_force(self):
+        """Test running totals against recomputing each horizon from all samples."""
+        rng = random.Random(7)
+        samples = []
+        timestamp = 0.0
+        for _ in range(5000):
+            timestamp += rng.uniform(0.2, 3.0)
+            ping_time = None if rng.random() < 0.1 else round(rng.uniform(1, 100), 3)
+            samples.append((timestamp, ping_time))
+            self.aggregator.add(timestamp, ping_time)
+
+        for entry in self.aggregator.snapshot(timestamp):
+            # Buckets are aligned, so the horizon covers whole buckets ending at now
+            width = entry['horizon'] / 60
+            oldest = (int(timestamp // width) - 59) * width
+            window = [p for t, p in samples if t >= oldest]
+            rtts = [p for p in window if p is not None]
+            self.assertEqual(entry['pings'], len(window))
+            self.assertEqual(entry['failed_pings'], len(window) - len(rtts))
+            self.assertAlmostEqual(entry['avg_ping_time'], sum(rtts) / len(rtts), places=6)
+
+class TestEngineHorizons(unittest.TestCase):
+    """Test horizon reporting through PingEngine."""
+
+    def test_statistics_include_horizons(self):
+        """Test that get_statistics reports every configured horizon."""
+        engine = PingEngine("8.8.8.8", 10, horizons=(60, 900))
+        engine._process_ping_result(64, 10.0, timestamp=1000.0)
+        engine._process_ping_result(None, None, timestamp=1001.0)
+
+        horizons = engine.get_statistics(now=1001.0)['horizons']
+        self.assertEqual([entry['horizon'] for entry in horizons], [60, 900])
+        self.assertEqual(horizons[0]['pings'], 2)
+        self.assertEqual(horizons[0]['failure_rate'], 50.0)
+
+    def test_horizons_outlive_sample_window(self):
+        """Test that horizons keep samples the max_points window has dropped."""
+        engine = PingEngine("8.8.8.8", 5, horizons=(60,))
+        for i in range(20):
+            engine._process_ping_result(64, 10.0, timestamp=1000.0 + i)
+
+        stats = engine.get_statistics(now=1019.0)
+        self.assertEqual(len(stats['ping_times']), 5)
+        self.assertEqual(stats['horizons'][0]['pings'], 20)
+
+    def test_reset_clears_horizons(self):
+        """Test that reset drops horizon aggregates."""
+        engine = PingEngine("8.8.8.8", 5, horizons=(60,))
+        engine._process_ping_result(64, 10.0, timestamp=1000.0)
+        engine.reset()
+        self.assertEqual(engine.get_statistics(now=1000.0)['horizons'][0]['pings'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
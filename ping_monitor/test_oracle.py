@@ -0,0 +1,70 @@
+"""Differential tests: random sample sequences through PingEngine and the from-scratch reference engine."""
+
+import os
+import random
+import unittest
+from ping_engine import PingEngine
+from oracle import ReferenceEngine, generate_samples
+from statistics import StatisticsCalculator
+from snapshot import pack_engine, unpack_engine
+
+# Samples per configuration; raise (e.g. ORACLE_SAMPLES=1000000) for a long run
+SAMPLES = int(os.environ.get('ORACLE_SAMPLES', 2000))
+
+HORIZONS = (10, 60)
+
+class TestOracle(unittest.TestCase):
+    """Push random sequences through both engines and compare every output."""
+
+    def assert_same(self, engine, oracle, now, context):
+        """Statistics, derived statistics and outage runs must be identical."""
+        stats = engine.get_statistics(now=now)
+        self.assertEqual(stats, oracle.get_statistics(now), context)
+        self.assertEqual(StatisticsCalculator.calculate_statistics(stats), oracle.calculate_statistics(now), context)
+        for threshold in (1, 2, 5):
+            self.assertEqual(engine.get_outage_runs(threshold), oracle.get_outage_runs(threshold), context)
+
+    def run_sequence(self, seed, max_points, threshold, every=1, restore_at=None):
+        """Feed one generated sequence, comparing every `every` samples and optionally restoring midway."""
+        rng = random.Random(seed)
+        engine = PingEngine('10.0.0.1', max_points=max_points, horizons=HORIZONS, detect_anomalies=False,
+                            outage_threshold=threshold)
+        oracle = ReferenceEngine(max_points=max_points, outage_threshold=threshold, horizons=HORIZONS)
+
+        for step, (ttl, ping_time, timestamp) in enumerate(generate_samples(rng, SAMPLES)):
+            engine._process_ping_result(ttl, ping_time, timestamp=timestamp)
+            oracle._process_ping_result(ttl, ping_time, timestamp=timestamp)
+            if step == restore_at:
+                # Continue from a packed snapshot, as after a warm restart
+                _, state, _, _ = unpack_engine(memoryview(pack_engine(engine)), 0)
+                engine = PingEngine('10.0.0.1', max_points=max_points, horizons=HORIZONS,
+                                    detect_anomalies=False, outage_threshold=threshold)
+                engine.restore_state(state)
+            if step % every == 0:
+                self.assert_same(engine, oracle, timestamp + rng.choice((0.0, 0.5, 30.0)),
+                                 f"seed={seed} max_points={max_points} threshold={threshold} step={step}")
+        self.assert_same(engine, oracle, timestamp + 1000.0, f"seed={seed} final")
+
+    def test_tiny_windows(self):
+        """Test windows of 1 to 3 samples, where outages often outlive the window."""
+        for max_points in (1, 2, 3):
+            for threshold in (1, 2, 3):
+                self.run_sequence(max_points * 10 + threshold, max_points, threshold)
+
+    def test_small_windows(self):
+        """Test windows around the bitmap word size at several outage thresholds."""
+        for seed, (max_points, threshold) in enumerate(((7, 2), (63, 2), (64, 4), (65, 1), (130, 3))):
+            self.run_sequence(100 + seed, max_points, threshold)
+
+    def test_default_window(self):
+        """Test the default 300 point window, comparing every few samples."""
+        self.run_sequence(7, 300, 2, every=7)
+
+    def test_snapshot_restore(self):
+        """Test that an engine restored from a snapshot keeps matching the reference."""
+        for seed, max_points in enumerate((5, 64, 300)):
+            self.run_sequence(200 + seed, max_points, 2, every=3, restore_at=SAMPLES // 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""Tests for the persistent outage event log."""
+
+import os
+import tempfile
+import unittest
+from ping_engine import PingEngine
+from outage_log import OutageLog, OutageEvent
+
+class TestOutageLog(unittest.TestCase):
+    """Test cases for OutageLog class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.log = OutageLog()
+
+    def add(self, target, start, end, lost=2):
+        """Record an outage event with placeholder RTTs."""
+        self.log.record(OutageEvent(target, start, end, lost, 10.0, 12.0))
+
+    def test_event_duration(self):
+        """Test that duration is derived from wall-clock bounds."""
+        event = OutageEvent("8.8.8.8", 100.0, 103.5, 3, 10.0, 12.0)
+        self.assertEqual(event.duration, 3.5)
+        self.assertEqual(event.to_dict()['duration'], 3.5)
+
+    def test_query_overlapping_range(self):
+        """Test that only outages overlapping the range are returned."""
+        self.add("8.8.8.8", 10, 20)
+        self.add("8.8.8.8", 30, 40)
+        self.add("8.8.8.8", 50, 60)
+
+        total, events = self.log.query(15, 35)
+
+        self.assertEqual(total, 2)
+        self.assertEqual([event.start_time for event in events], [10, 30])
+
+    def test_query_range_boundaries_inclusive(self):
+        """Test that outages touching the range bounds are included."""
+        self.add("8.8.8.8", 10, 20)
+        self.add("8.8.8.8", 30, 40)
+
+        self.assertEqual(self.log.query(20, 30)[0], 2)
+        self.assertEqual(self.log.query(21, 29)[0], 0)
+
+    def test_query_by_targets(self):
+        """Test filtering outages by target set."""
+        self.add("8.8.8.8", 10, 20)
+        self.add("1.1.1.1", 12, 22)
+        self.add("9.9.9.9", 14, 24)
+
+        total, events = self.log.query(0, 100, targets=["8.8.8.8", "9.9.9.9", "unknown"])
+
+        self.assertEqual(total, 2)
+        self.assertEqual([event.target for event in events], ["8.8.8.8", "9.9.9.9"])
+
+    def test_query_merges_targets_by_start_time(self):
+        """Test that results across targets are ordered by start time."""
+        self.add("a", 10, 11)
+        self.add("a", 30, 31)
+        self.add("b", 20, 21)
+        self.add("b", 40, 41)
+
+        _, events = self.log.query(0, 100)
+
+        self.assertEqual([event.start_time for event in events], [10, 20, 30, 40])
+
+    def test_query_pagination(self):
+        """Test offset and limit paging."""
+        for i in range(10):
+            self.add("8.8.8.8", i * 10, i * 10 + 5)
+
+        total, events = self.log.query(0, 1000, offset=3, limit=4)
+
+        self.assertEqual(total, 10)
+        self.assertEqual([event.start_time for event in events], [30, 40, 50, 60])
+
+    def test_out_of_order_insert(self):
+        """Test that late events are inserted in start order."""
+        self.add("8.8.8.8", 30, 40)
+        self.add("8.8.8.8", 10, 20)
+
+        _, events = self.log.query(0, 100)
+
+        self.assertEqual([event.start_time for event in events], [10, 30])
+
+    def test_retention(self):
+        """Test that events ending before the retention horizon are dropped across targets."""
+        self.log = OutageLog(retention=100)
+        self.add("a", 10, 20)
+        self.add("b", 50, 60)
+        self.add("a", 150, 160)
+
+        total, events = self.log.query(0, 1000)
+
+        self.assertEqual(total, 2)
+        self.assertEqual([event.start_time for event in events], [50, 150])
+        self.assertEqual(len(self.log), 2)
+
+    def test_max_events(self):
+        """Test that the earliest events go first beyond max_events."""
+        self.log = OutageLog(retention=None, max_events=3)
+        self.add("a", 10, 11)
+        self.add("b", 20, 21)
+        self.add("a", 30, 31)
+        self.add("b", 40, 41)
+        self.add("b", 5, 6)
+
+        _, events = self.log.query(0, 100)
+
+        self.assertEqual([event.start_time for event in events], [20, 30, 40])
+        self.assertEqual(len(self.log), 3)
+
+    def test_trim_keeps_queries_consistent(self):
+        """Test that repeated evictions across targets leave every index queryable."""
+        self.log = OutageLog(retention=None, max_events=5)
+        for i in range(50):
+            self.add("a" if i % 3 else "b", i * 10, i * 10 + 5)
+
+        total, events = self.log.query(0, 1000)
+
+        self.assertEqual(total, 5)
+        self.assertEqual([event.start_time for event in events], [450, 460, 470, 480, 490])
+        self.assertEqual(self.log.query(0, 1000, targets=["b"])[0], 2)
+        self.assertEqual(sorted(self.log.targets()), ["a", "b"])
+
+    def test_persistence(self):
+        """Test that events are reloaded from the journal file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'outages.jsonl')
+            log = OutageLog(path=path)
+            log.record(OutageEvent("8.8.8.8", 10.0, 20.0, 4, 11.0, None))
+            log.close()
+
+            reloaded = OutageLog(path=path)
+            total, events = reloaded.query(0, 100)
+            reloaded.close()
+
+        self.assertEqual(total, 1)
+        self.assertEqual(events[0], OutageEvent("8.8.8.8", 10.0, 20.0, 4, 11.0, None))
+
+    def test_engine_records_events(self):
+        """Test that the engine logs completed outages with wall-clock context."""
+        engine = PingEngine(target="8.8.8.8", max_points=3, outage_log=self.log)
+
+        engine._process_ping_result(ttl=64, ping_time=15.0, timestamp=100.0)
+        engine._process_ping_result(ttl=None, ping_time=None, timestamp=101.0)
+        engine._process_ping_result(ttl=None, ping_time=None, timestamp=102.0)
+        engine._process_ping_result(ttl=None, ping_time=None, timestamp=103.0)
+        engine._process_ping_result(ttl=64, ping_time=25.0, timestamp=104.0)
+
+        # Slide the outage out of the window; the event log keeps it
+        for i in range(5):
+            engine._process_ping_result(ttl=64, ping_time=15.0, timestamp=105.0 + i)
+
+        self.assertEqual(engine.get_statistics()['outage_history'], [])
+        total, events = self.log.query(0, 1000, targets=["8.8.8.8"])
+        self.assertEqual(total, 1)
+        self.assertEqual(events[0], OutageEvent("8.8.8.8", 101.0, 104.0, 3, 15.0, 25.0))
+
+    def test_engine_ignores_single_failures(self):
+        """Test that single failures are not logged as outages."""
+        engine = PingEngine(target="8.8.8.8", max_points=3, outage_log=self.log)
+
+        engine._process_ping_result(ttl=None, ping_time=None, timestamp=1.0)
+        engine._process_ping_result(ttl=64, ping_time=15.0, timestamp=2.0)
+
+        self.assertEqual(len(self.log), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""Tests for per-hop path statistics and path change detection."""
+
+import unittest
+from path_engine import PathEngine
+
+ROUTE = ['192.168.1.1', '10.1.0.1', '10.2.0.1', '203.0.113.9']
+
+def answered(route, rtt=5.0):
+    """A round in which every hop of the route answered."""
+    return True, [(address, 250, rtt + hop) for hop, address in enumerate(route)]
+
+def broken_at(route, hop, max_hops=8):
+    """A round in which nothing from the given hop (1-based) onwards answered."""
+    hops = [(address, 250, 5.0) for address in route[:hop - 1]]
+    return False, hops + [(None, None, None)] * (max_hops - len(hops))
+
+class TestPathEngine(unittest.TestCase):
+    """Test cases for PathEngine."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.path = PathEngine("203.0.113.9", max_points=10, confirm=2)
+        self.now = 1000.0
+
+    def feed(self, *rounds):
+        """Apply rounds at one-second spacing."""
+        for reached, hops in rounds:
+            self.now += 1.0
+            self.path.process_round(reached, hops, timestamp=self.now)
+
+    def test_hops_get_their_own_statistics(self):
+        """Test that each hop has a sample window like a regular target."""
+        self.feed(answered(ROUTE), answered(ROUTE))
+
+        hops = self.path.get_hops()
+        self.assertEqual([hop['address'] for hop in hops], ROUTE)
+        self.assertEqual([hop['avg_ping_time'] for hop in hops], [5.0, 6.0, 7.0, 8.0])
+        self.assertEqual(hops[0]['total_pings'], 2)
+        self.assertEqual(self.path.depth, 4)
+        self.assertIsNone(self.path.first_failing_hop())
+
+    def test_outage_is_located_at_first_dark_hop(self):
+        """Test that a break shows as outages from the failing hop to the destination."""
+        self.feed(answered(ROUTE), broken_at(ROUTE, 3), broken_at(ROUTE, 3), broken_at(ROUTE, 3))
+
+        hops = self.path.get_hops()
+        self.assertEqual(len(hops), 4)
+        self.assertEqual([hop['in_outage'] for hop in hops], [False, False, True, True])
+        self.assertEqual(self.path.first_failing_hop(), 3)
+
+        self.feed(answered(ROUTE))
+        self.assertIsNone(self.path.first_failing_hop())
+        self.assertEqual(self.path.get_hops()[3]['outage_history'], [3])
+
+    def test_silent_router_does_not_mask_later_hops(self):
+        """Test that a hop that never answers is not blamed while later hops answer."""
+        route = list(ROUTE)
+        silent = answered(route)[1]
+        silent[1] = (None, None, None)
+        self.feed(*[(True, silent)] * 3)
+
+        self.assertTrue(self.path.get_hops()[1]['in_outage'])
+        self.assertIsNone(self.path.first_failing_hop())
+
+    def test_path_change_needs_confirmation(self):
+        """Test that a new responder is reported only after answering consecutive rounds."""
+        rerouted = ROUTE[:1] + ['10.9.0.1'] + ROUTE[2:]
+        self.feed(answered(ROUTE), answered(rerouted), answered(ROUTE), answered(rerouted))
+        self.assertEqual(self.path.get_changes(), [])
+
+        self.feed(answered(rerouted))
+        changes = self.path.get_changes()
+        self.assertEqual(len(changes), 1)
+        self.assertEqual((changes[0].hop, changes[0].previous, changes[0].current), (2, '10.1.0.1', '10.9.0.1'))
+        self.assertEqual(changes[0].timestamp, self.now)
+        self.assertEqual(self.path.get_hops()[1]['address'], '10.9.0.1')
+
+    def test_shorter_path_drops_extra_hops(self):
+        """Test that hops beyond a confirmed closer destination are removed."""
+        shorter = ROUTE[:2] + ROUTE[3:]
+        self.feed(answered(ROUTE), answered(shorter))
+        self.assertEqual(len(self.path.get_hops()), 4)
+
+        self.feed(answered(shorter))
+        self.assertEqual([hop['address'] for hop in self.path.get_hops()], shorter)
+        self.assertEqual(self.path.get_changes()[0].hop, 3)
+
+    def test_reset(self):
+        """Test that reset forgets hops and changes."""
+        self.feed(answered(ROUTE))
+        self.path.reset()
+        self.assertEqual(self.path.get_hops(), [])
+        self.assertIsNone(self.path.depth)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""Tests for concurrent per-hop path probing against a simulated topology."""
+
+import socket
+import struct
+import unittest
+from unittest.mock import patch
+from batch_prober import build_echo_request, ICMP_ECHO_REPLY
+from path_prober import PathProber, parse_path_reply, ICMP_TIME_EXCEEDED
+from scheduler import ProbeScheduler
+
+def ip_header(source: str, destination: str, length: int, ttl: int = 64) -> bytes:
+    """Build a minimal IPv4 header carrying ICMP."""
+    return struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + length, 0, 0, ttl, 1, 0,
+                       socket.inet_aton(source), socket.inet_aton(destination))
+
+def make_time_exceeded(request: bytes, router: str, destination: str, ttl: int = 250) -> bytes:
+    """A router's time exceeded error quoting the expired echo request."""
+    quoted = ip_header('10.0.0.254', destination, len(request), ttl=1) + request[:8]
+    body = struct.pack('!BBHI', ICMP_TIME_EXCEEDED, 0, 0, 0) + quoted
+    return ip_header(router, '10.0.0.254', len(body), ttl=ttl) + body
+
+def make_echo_reply(request: bytes, source: str, ttl: int = 57) -> bytes:
+    """The destination's echo reply to a request."""
+    body = struct.pack('!BBHHH', ICMP_ECHO_REPLY, 0, 0, *struct.unpack('!HH', request[4:8])) + request[8:]
+    return ip_header(source, '10.0.0.254', len(body), ttl=ttl) + body
+
+class SimulatedTopology:
+    """In-memory raw socket that forwards TTL-limited probes along fixed routes.
+
+    routes maps each destination to its routers in order, destination last. Routers in
+    `down` drop everything crossing them; routers in `silent` forward but never answer.
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.down = set()
+        self.silent = set()
+        self.ttl = 64
+        self.inbox = []
+        self.sent = []
+
+    def setblocking(self, flag):
+        pass
+
+    def setsockopt(self, level, option, value):
+        if level == socket.IPPROTO_IP and option == socket.IP_TTL:
+            self.ttl = value
+
+    def sendto(self, packet, address):
+        self.sent.append((self.ttl, address[0]))
+        route = self.routes.get(address[0], [])
+        crossed = route[:min(self.ttl, len(route))]
+        if not crossed or any(router in self.down for router in crossed):
+            return
+        responder = crossed[-1]
+        if responder in self.silent:
+            return
+        if responder == address[0]:
+            self.inbox.append((make_echo_reply(packet, responder), responder))
+        else:
+            self.inbox.append((make_time_exceeded(packet, responder, address[0]), responder))
+
+    def recvfrom(self, size):
+        if not self.inbox:
+            raise BlockingIOError()
+        data, source = self.inbox.pop(0)
+        return data, (source, 0)
+
+    def close(self):
+        pass
+
+ROUTE = ['192.168.1.1', '10.1.0.1', '10.2.0.1', '203.0.113.9']
+
+class TestPathReplyParsing(unittest.TestCase):
+    """Test cases for parse_path_reply."""
+
+    def test_time_exceeded_quotes_probe(self):
+        """Test that identifier and sequence come from the quoted echo request."""
+        packet = make_time_exceeded(build_echo_request(0x1234, 7), '10.1.0.1', '203.0.113.9', ttl=250)
+        self.assertEqual(parse_path_reply(packet), (ICMP_TIME_EXCEEDED, 0x1234, 7, 250))
+
+    def test_echo_reply(self):
+        """Test that echo replies are parsed from their own header."""
+        packet = make_echo_reply(build_echo_request(0x1234, 9), '203.0.113.9', ttl=57)
+        self.assertEqual(parse_path_reply(packet), (ICMP_ECHO_REPLY, 0x1234, 9, 57))
+
+    def test_ignores_other_and_truncated_packets(self):
+        """Test that echo requests and cut-off errors are ignored."""
+        request = build_echo_request(1, 1)
+        self.assertIsNone(parse_path_reply(ip_header('10.0.0.1', '10.0.0.2', len(request)) + request))
+        self.assertIsNone(parse_path_reply(make_time_exceeded(request, '10.1.0.1', '203.0.113.9')[:40]))
+
+@patch('path_prober.select.select', side_effect=lambda r, w, x, t: (r, w, x))
+class TestPathProber(unittest.TestCase):
+    """Test cases for PathProber against the simulated topology."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.topology = SimulatedTopology({'203.0.113.9': ROUTE, '198.51.100.7': ROUTE[:2] + ['198.51.100.7']})
+        self.prober = PathProber(timeout=0.05, max_hops=8, sock=self.topology)
+
+    def test_all_hops_are_probed_in_one_burst(self, mock_select):
+        """Test that every TTL of every target is sent before any answer is read."""
+        results = self.prober.probe({'a': '203.0.113.9', 'b': '198.51.100.7'})
+
+        self.assertEqual([ttl for ttl, _ in self.topology.sent], [ttl for ttl in range(1, 9) for _ in range(2)])
+        self.assertEqual(self.prober.packets_sent, 16)
+        self.assertEqual(results['a'][0], True)
+        self.assertEqual([address for address, _, _ in results['a'][1]], ROUTE)
+        self.assertEqual([address for address, _, _ in results['b'][1]], ROUTE[:2] + ['198.51.100.7'])
+        self.assertEqual(results['a'][1][-1][1], 57)
+
+    def test_silent_router_leaves_hole(self, mock_select):
+        """Test that a router that never answers shows as an unanswered hop on a working path."""
+        self.topology.silent.add('10.1.0.1')
+        reached, hops = self.prober.probe({'a': '203.0.113.9'})['a']
+
+        self.assertTrue(reached)
+        self.assertEqual(hops[1], (None, None, None))
+        self.assertEqual(hops[2][0], '10.2.0.1')
+
+    def test_broken_link_runs_to_max_hops(self, mock_select):
+        """Test that an unreachable destination reports every TTL up to max_hops."""
+        self.topology.down.add('10.2.0.1')
+        reached, hops = self.prober.probe({'a': '203.0.113.9'})['a']
+
+        self.assertFalse(reached)
+        self.assertEqual(len(hops), 8)
+        self.assertEqual([address for address, _, _ in hops[:3]], ['192.168.1.1', '10.1.0.1', None])
+
+    def test_ignores_foreign_identifier(self, mock_select):
+        """Test that errors quoting another process's probe are ignored."""
+        foreign = build_echo_request((self.prober.identifier + 1) & 0xFFFF, 0)
+        self.topology.inbox.append((make_time_exceeded(foreign, '192.168.1.1', '203.0.113.9'), '192.168.1.1'))
+        self.topology.down.add('192.168.1.1')
+
+        reached, hops = self.prober.probe({'a': '203.0.113.9'})['a']
+        self.assertFalse(reached)
+        self.assertEqual(hops[0], (None, None, None))
+
+    def test_scheduler_traces_enabled_targets(self, mock_select):
+        """Test that the scheduler feeds path rounds into per-hop engines."""
+        scheduler = ProbeScheduler(max_points=10, path_prober=self.prober)
+        engine = scheduler.add_target('a')
+        self.assertIsNone(scheduler.enable_path('missing'))
+        path = scheduler.enable_path('a')
+
+        with patch.object(engine, 'resolve_address', return_value='203.0.113.9'):
+            for _ in range(3):
+                scheduler._run_paths(list(scheduler.paths.items()))
+
+        self.assertEqual([hop['address'] for hop in path.get_hops()], ROUTE)
+        self.assertEqual(path.get_hops()[0]['total_pings'], 3)
+        self.assertTrue(scheduler.remove_target('a'))
+        self.assertIsNone(scheduler.get_path('a'))
+
+class TestLoopbackPath(unittest.TestCase):
+    """Test path probing over the real network stack."""
+
+    def test_loopback_path(self):
+        """Test a real trace of loopback when raw ICMP sockets are permitted."""
+        try:
+            prober = PathProber(timeout=1.0, max_hops=3)
+        except PermissionError:
+            self.skipTest("Raw ICMP sockets not permitted")
+
+        try:
+            reached, hops = prober.probe({'lo': '127.0.0.1'})['lo']
+        finally:
+            prober.close()
+
+        self.assertTrue(reached)
+        self.assertEqual(hops[0][0], '127.0.0.1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -151,7 +151,8 @@ class TestPingEngine(unittest.TestCase):
         
         expected_keys = {
             'ttls', 'ping_times', 'failed_pings', 'total_pings',
-            'failure_rate', 'outage_history', 'consecutive_failures', 'outage_start_index'
+            'failure_rate', 'outage_history', 'consecutive_failures', 'outage_start_index',
+            'horizons'
         }
         self.assertEqual(set(stats.keys()), expected_keys)
         self.assertEqual(stats['total_pings'], 2)
@@ -0,0 +1,166 @@
+"""Tests for persistent streaming ping processes."""
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+from ping_engine import PingEngine
+from ping_stream import StreamingPinger, parse_ping_line, _Stream
+from scheduler import ProbeScheduler
+
+# Stands in for iputils ping: 127.0.0.2 exits after three replies, 127.0.0.3 loses every other probe
+FAKE_PING = """
+import sys, time
+args = sys.argv[1:]
+interval, address = float(args[args.index('-i') + 1]), args[-1]
+print(f"PING {address} ({address}) 56(84) bytes of data.", flush=True)
+for seq in range(1, 100000):
+    if address == '127.0.0.3' and seq % 2 == 0:
+        print(f"no answer yet for icmp_seq={seq}", flush=True)
+    else:
+        # Split the line so the reader sees partial output
+        sys.stdout.write(f"64 bytes from {address}: icmp_seq={seq} ")
+        sys.stdout.flush()
+        print("ttl=64 time=0.05 ms", flush=True)
+    if address == '127.0.0.2' and seq == 3:
+        sys.exit(1)
+    time.sleep(interval)
+"""
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+class TestParsePingLine(unittest.TestCase):
+    """Test cases for parse_ping_line."""
+
+    def test_reply(self):
+        """Test that replies yield sequence, TTL and time."""
+        self.assertEqual(parse_ping_line(b'64 bytes from 8.8.8.8: icmp_seq=12 ttl=117 time=14.2 ms'),
+                         (12, 117, 14.2))
+        self.assertEqual(parse_ping_line(b'64 bytes from 8.8.8.8: icmp_seq=1 ttl=117 time=9 ms'), (1, 117, 9.0))
+
+    def test_losses(self):
+        """Test that unanswered and unreachable probes yield failures."""
+        self.assertEqual(parse_ping_line(b'no answer yet for icmp_seq=4'), (4, None, None))
+        self.assertEqual(parse_ping_line(b'From 10.0.0.1 icmp_seq=5 Destination Host Unreachable'),
+                         (5, None, None))
+
+    def test_other_lines(self):
+        """Test that headers and summaries are ignored."""
+        for line in (b'PING 8.8.8.8 (8.8.8.8) 56(84) bytes of data.', b'',
+                     b'3 packets transmitted, 3 received, 0% packet loss, time 2003ms'):
+            self.assertIsNone(parse_ping_line(line))
+
+class TestStreamFeed(unittest.TestCase):
+    """Test cases for incremental parsing of one process's output."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.stream = _Stream(None, '8.8.8.8', None)
+
+    def test_partial_lines(self):
+        """Test that lines split across reads are parsed once complete."""
+        self.assertEqual(self.stream.feed(b'64 bytes from 8.8.8.8: icmp_se'), [])
+        self.assertEqual(self.stream.feed(b'q=1 ttl=60 time=5.0 ms\nno answer yet for icmp_seq=2\n64 by'),
+                         [(60, 5.0), (None, None)])
+
+    def test_late_reply_dropped(self):
+        """Test that a reply arriving after its probe was reported lost is not counted twice."""
+        self.stream.feed(b'no answer yet for icmp_seq=1\n')
+        self.assertEqual(self.stream.feed(b'64 bytes from 8.8.8.8: icmp_seq=1 ttl=60 time=1500 ms\n'), [])
+        self.assertEqual(len(self.stream.feed(b'64 bytes from 8.8.8.8: icmp_seq=2 ttl=60 time=5.0 ms\n')), 1)
+
+    def test_sequence_wraparound(self):
+        """Test that sequence numbers continue across the 16-bit wrap."""
+        self.stream.feed(b'64 bytes from 8.8.8.8: icmp_seq=65535 ttl=60 time=5.0 ms\n')
+        self.assertEqual(len(self.stream.feed(b'64 bytes from 8.8.8.8: icmp_seq=0 ttl=60 time=5.0 ms\n')), 1)
+
+class TestStreamingPinger(unittest.TestCase):
+    """Test cases for StreamingPinger supervising fake ping processes."""
+
+    def setUp(self):
+        """Write the fake ping and start a pinger using it."""
+        fd, self.script = tempfile.mkstemp(suffix='.py')
+        with os.fdopen(fd, 'w') as f:
+            f.write(FAKE_PING)
+        self.addCleanup(os.unlink, self.script)
+        self.pinger = StreamingPinger(interval=0.01, command=[sys.executable, self.script], restart_delay=0.05)
+        self.addCleanup(self.pinger.close)
+
+    def test_one_process_per_target(self):
+        """Test that many samples arrive from a single spawn per target."""
+        engines = [PingEngine(address, max_points=100) for address in ('127.0.0.1', '127.0.0.3')]
+        self.pinger.sync([(engine.target, engine) for engine in engines])
+
+        self.assertTrue(wait_for(lambda: all(engine.total_pings >= 10 for engine in engines)))
+        self.assertEqual(self.pinger.spawns, 2)
+        self.assertEqual(engines[0].failed_pings, 0)
+        self.assertAlmostEqual(engines[0].get_ping_times()[0], 0.05)
+        self.assertGreater(engines[1].failed_pings, 0)
+
+    def test_restarts_exited_process(self):
+        """Test that a process that exits is restarted and keeps feeding the same engine."""
+        engine = PingEngine('127.0.0.2', max_points=100)
+        self.pinger.sync([(engine.target, engine)])
+
+        self.assertTrue(wait_for(lambda: engine.total_pings >= 6))
+        self.assertGreaterEqual(self.pinger.restarts, 1)
+        self.assertGreaterEqual(self.pinger.spawns, 2)
+
+    def test_removed_target_stops_process(self):
+        """Test that dropping a target from sync terminates its process."""
+        engine = PingEngine('127.0.0.1', max_points=100)
+        self.pinger.sync([(engine.target, engine)])
+        self.assertTrue(wait_for(lambda: '127.0.0.1' in self.pinger.running_targets()))
+
+        self.pinger.sync([])
+        self.assertTrue(wait_for(lambda: not self.pinger.running_targets()))
+        count = engine.total_pings
+        time.sleep(0.1)
+        self.assertEqual(engine.total_pings, count)
+
+    def test_per_target_interval(self):
+        """Test that each process pings at its target's interval and an interval change restarts it."""
+        engine = PingEngine('127.0.0.1', max_points=100)
+        self.pinger.sync([(engine.target, engine)], {'127.0.0.1': 0.02})
+        self.assertTrue(wait_for(lambda: '127.0.0.1' in self.pinger._streams))
+        self.assertEqual(self.pinger._streams['127.0.0.1'].interval, 0.02)
+        self.assertIn('0.02', self.pinger._streams['127.0.0.1'].process.args)
+
+        self.pinger.sync([(engine.target, engine)], {'127.0.0.1': 0.05})
+        self.assertTrue(wait_for(lambda: self.pinger.spawns == 2 and '127.0.0.1' in self.pinger._streams))
+        self.assertIn('0.05', self.pinger._streams['127.0.0.1'].process.args)
+
+    def test_missing_binary_retries(self):
+        """Test that a missing ping binary is retried without spawning anything."""
+        pinger = StreamingPinger(interval=0.01, command=['/nonexistent/ping'], restart_delay=0.05)
+        self.addCleanup(pinger.close)
+        engine = PingEngine('127.0.0.1', max_points=10)
+        pinger.sync([(engine.target, engine)])
+        time.sleep(0.2)
+        self.assertEqual(pinger.spawns, 0)
+        self.assertEqual(engine.total_pings, 0)
+
+    def test_scheduler_streams_icmp_targets(self):
+        """Test that the scheduler hands ICMP targets to the streamer instead of spawning per sample."""
+        scheduler = ProbeScheduler(max_points=100, interval=0.02, ping_streamer=self.pinger)
+        engine = scheduler.add_target('127.0.0.1')
+        with patch.object(PingEngine, 'ping_target', side_effect=AssertionError("per-sample ping")):
+            scheduler.start()
+            try:
+                self.assertTrue(wait_for(lambda: engine.total_pings >= 5))
+                scheduler.pause_target('127.0.0.1')
+                self.assertTrue(wait_for(lambda: not self.pinger.running_targets()))
+            finally:
+                scheduler.stop()
+        self.assertEqual(self.pinger.spawns, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+"""Tests for the collector push protocol and the multi-site aggregator."""
+
+import os
+import sys
+import threading
+import subprocess
+import unittest
+from unittest.mock import patch
+from push import FrameError, PushClient, encode_frame, decode_frame
+from aggregator import Aggregator
+from sample_format import SAMPLE_RECORD
+
+SAMPLES = [(1000.0, "8.8.8.8", 64, 15.25), (1000.5, "1.1.1.1", 57, 9.875), (1001.0, "8.8.8.8", None, None),
+           (1002.0, "8.8.8.8", 64, 14.003), (1001.5, "1.1.1.1", 57, 120.5)]
+
+class TestFrameCodec(unittest.TestCase):
+    """Test cases for frame encoding."""
+
+    def test_round_trip(self):
+        """Test that frames decode to the samples, site and sequence that were encoded."""
+        frame = encode_frame("site-a", 7, 42, SAMPLES)
+        self.assertEqual(decode_frame(frame), ("site-a", 7, 42, SAMPLES))
+
+    def test_unknown_ttl_round_trip(self):
+        """Test that service probes' unknown TTL stays 0 rather than becoming a real-looking TTL."""
+        samples = [(1000.0, "tcp://db:5432", 0, 1.5), (1001.0, "tcp://db:5432", None, None),
+                   (1002.0, "tcp://db:5432", 0, 1.25), (1002.5, "8.8.8.8", 1, 9.0)]
+        self.assertEqual(decode_frame(encode_frame("site-a", 1, 1, samples))[3], samples)
+
+    def test_empty_frame(self):
+        """Test that a frame may carry no samples."""
+        self.assertEqual(decode_frame(encode_frame("site-a", 1, 1, [])), ("site-a", 1, 1, []))
+
+    def test_deltas_keep_frames_compact(self):
+        """Test that steady samples cost under a third of a binary stream record."""
+        samples = [(1000.0 + i, "8.8.8.8", 64, 15.0 + (i % 3) * 0.1) for i in range(1000)]
+        frame = encode_frame("site-a", 1, 1, samples)
+        self.assertLess(len(frame), SAMPLE_RECORD.size * len(samples) / 3)
+        self.assertEqual(decode_frame(frame)[3], samples)
+
+    def test_rejects_malformed_frames(self):
+        """Test that garbage and truncated frames raise FrameError."""
+        frame = encode_frame("site-a", 1, 1, SAMPLES)
+        with self.assertRaises(FrameError):
+            decode_frame(b'XXXX' + frame[4:])
+        with self.assertRaises(FrameError):
+            decode_frame(frame[:-3])
+
+    def test_rejects_invalid_targets(self):
+        """Test that a target table entry the engines cannot probe raises FrameError."""
+        frame = encode_frame("site-a", 1, 1, [(1000.0, "tcp://x", 64, 15.0)])
+        with self.assertRaises(FrameError):
+            decode_frame(frame)
+        with self.assertRaises(FrameError):
+            Aggregator(max_points=10).ingest(frame)
+
+class TestAggregator(unittest.TestCase):
+    """Test cases for sequence tracking and per-site state."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.aggregator = Aggregator(max_points=10)
+
+    def site(self, name="site-a"):
+        """Delivery status of one site."""
+        return next(site for site in self.aggregator.site_status() if site['site'] == name)
+
+    def test_samples_replay_into_site_engines(self):
+        """Test that pushed samples feed one engine per site and target."""
+        self.aggregator.ingest(encode_frame("site-a", 1, 1, SAMPLES))
+        engine = self.aggregator.get_engine("site-a", "8.8.8.8")
+        self.assertEqual(list(engine.ping_times), [15.25, None, 14.003])
+        self.assertEqual(self.aggregator.get_engine("site-a", "1.1.1.1").total_pings, 2)
+        self.assertIsNone(self.aggregator.get_engine("site-b", "8.8.8.8"))
+
+    def test_duplicate_frames_are_not_replayed(self):
+        """Test that a retried frame is acknowledged but applied once."""
+        frame = encode_frame("site-a", 1, 1, SAMPLES)
+        self.assertEqual(self.aggregator.ingest(frame)['status'], 'accepted')
+        self.assertEqual(self.aggregator.ingest(frame)['status'], 'duplicate')
+
+        self.assertEqual(self.aggregator.get_engine("site-a", "8.8.8.8").total_pings, 3)
+        self.assertEqual(self.site()['duplicate_frames'], 1)
+        self.assertEqual(self.site()['samples'], len(SAMPLES))
+
+    def test_sequence_gaps_count_as_lost(self):
+        """Test that skipped sequence numbers are recorded as lost frames."""
+        self.aggregator.ingest(encode_frame("site-a", 1, 1, SAMPLES[:1]))
+        self.aggregator.ingest(encode_frame("site-a", 1, 4, SAMPLES[1:2]))
+        self.assertEqual(self.site()['lost_frames'], 2)
+        self.assertEqual(self.site()['last_sequence'], 4)
+
+    def test_new_session_restarts_numbering(self):
+        """Test that a restarted collector is not mistaken for duplicates."""
+        self.aggregator.ingest(encode_frame("site-a", 1, 5, SAMPLES[:1]))
+        self.assertEqual(self.aggregator.ingest(encode_frame("site-a", 2, 1, SAMPLES[1:2]))['status'], 'accepted')
+        self.assertEqual(self.site()['restarts'], 1)
+        self.assertEqual(self.site()['lost_frames'], 4)
+
+    def test_cross_site_view(self):
+        """Test that targets list every site's statistics and the sites in outage."""
+        self.aggregator.ingest(encode_frame("site-a", 1, 1, [(1000.0 + i, "8.8.8.8", 64, 10.0) for i in range(3)]))
+        self.aggregator.ingest(encode_frame("site-b", 1, 1, [(1000.0 + i, "8.8.8.8", None, None) for i in range(3)]))
+
+        view = self.aggregator.cross_site()["8.8.8.8"]
+        self.assertEqual(set(view['sites']), {"site-a", "site-b"})
+        self.assertEqual(view['sites']['site-a']['failure_rate'], 0.0)
+        self.assertEqual(view['sites']['site-b']['consecutive_failures'], 3)
+        self.assertEqual(view['sites_in_outage'], ["site-b"])
+
+class TestPushClient(unittest.TestCase):
+    """Test cases for batching and buffering in the push client."""
+
+    def setUp(self):
+        """Create a client flushed only by the test and an aggregator to deliver to."""
+        self.aggregator = Aggregator(max_points=10)
+        self.client = PushClient("http://aggregator.invalid", "site-a", batch_size=2, flush_interval=3600,
+                                 max_buffer=4)
+        self.client._closed = True
+        self.client._wakeup.set()
+        self.client._thread.join(1)
+
+        self.reachable = True
+        patcher = patch.object(self.client, '_send', side_effect=self.deliver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def deliver(self, body):
+        """Hand the frame to the aggregator, or fail like an unreachable server."""
+        if not self.reachable:
+            raise ConnectionRefusedError("aggregator down")
+        self.aggregator.ingest(body)
+
+    def test_buffers_until_aggregator_is_reachable(self):
+        """Test that samples queued during an outage are delivered in order afterwards."""
+        self.reachable = False
+        for sample in SAMPLES[:3]:
+            self.client.write(*sample)
+        self.assertFalse(self.client.flush())
+        self.assertFalse(self.client.flush())
+        self.assertEqual(self.client.send_failures, 2)
+
+        self.reachable = True
+        self.assertTrue(self.client.flush())
+        self.assertEqual(self.client.frames_sent, 2)
+        self.assertEqual(self.client.samples_sent, 3)
+
+        # The failed frame kept its sequence number, so nothing looks lost
+        site = self.aggregator.site_status()[0]
+        self.assertEqual((site['frames'], site['lost_frames'], site['samples']), (2, 0, 3))
+        self.assertEqual(list(self.aggregator.get_engine("site-a", "8.8.8.8").ping_times), [15.25, None])
+
+    def test_buffer_drops_oldest_when_full(self):
+        """Test that the buffer is bounded and counts what it drops."""
+        self.reachable = False
+        for i in range(10):
+            self.client.write(1000.0 + i, "8.8.8.8", 64, float(i))
+        self.assertEqual(len(self.client.buffer), 4)
+        self.assertEqual(self.client.samples_dropped, 6)
+
+        self.reachable = True
+        self.client.flush()
+        self.assertEqual(list(self.aggregator.get_engine("site-a", "8.8.8.8").ping_times), [6.0, 7.0, 8.0, 9.0])
+
+PUSHER_SCRIPT = """
+import sys
+from push import PushClient
+url, site, loss = sys.argv[1], sys.argv[2], sys.argv[3] == 'loss'
+client = PushClient(url, site, batch_size=25, flush_interval=0.05)
+for i in range(100):
+    failed = loss and i >= 90
+    client.write(1000.0 + i, '8.8.8.8', None if failed else 64, None if failed else 10.0 + i % 5)
+client.close()
+print(client.frames_sent, client.samples_sent)
+"""
+
+class TestMultiSiteServing(unittest.TestCase):
+    """Test several collector processes pushing to one aggregator over HTTP."""
+
+    def test_sites_push_to_aggregator_app(self):
+        """Test that frames from separate processes are merged into a cross-site view."""
+        from werkzeug.serving import make_server
+        from ping_monitor.web_app import create_aggregator_app
+
+        app = create_aggregator_app(max_points=50)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        here = os.path.dirname(os.path.abspath(__file__))
+        processes = [
+            subprocess.Popen([sys.executable, '-c', PUSHER_SCRIPT, url, site, mode], cwd=here,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for site, mode in (("site-a", "ok"), ("site-b", "loss"), ("site-c", "ok"))
+        ]
+        for process in processes:
+            stdout, stderr = process.communicate(timeout=30)
+            self.assertEqual(process.returncode, 0, stderr)
+            frames, samples = map(int, stdout.split())
+            self.assertGreaterEqual(frames, 4)
+            self.assertEqual(samples, 100)
+
+        client = app.test_client()
+        sites = client.get('/api/sites').get_json()['sites']
+        self.assertEqual([site['site'] for site in sites], ["site-a", "site-b", "site-c"])
+        self.assertTrue(all(site['samples'] == 100 and site['lost_frames'] == 0 for site in sites))
+
+        view = client.get('/api/cross_site').get_json()['targets']["8.8.8.8"]
+        self.assertEqual(view['sites_in_outage'], ["site-b"])
+        self.assertEqual(view['sites']['site-a']['total_pings'], 100)
+
+        data = client.get('/api/data?site=site-b&target=8.8.8.8').get_json()
+        self.assertEqual(len(data['chart_data']), 50)
+        self.assertEqual(data['total_pings'], 100)
+        self.assertEqual(client.get('/api/data?site=site-x&target=8.8.8.8').status_code, 404)
+        self.assertEqual(client.post('/api/push', data=b'garbage').status_code, 400)
+        invalid = encode_frame("site-a", 2, 1, [(1000.0, "tcp://x", 64, 15.0)])
+        self.assertEqual(client.post('/api/push', data=invalid).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
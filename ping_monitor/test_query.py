@@ -0,0 +1,142 @@
+"""Tests for aggregate queries over targets and time buckets."""
+
+import unittest
+from unittest.mock import patch
+from werkzeug.datastructures import MultiDict
+from ping_engine import PingEngine
+from query import Query, QueryError, parse_query, evaluate, percentile
+
+NOW = 10000.0
+
+def make_engine(target, ping_times):
+    """An engine fed one sample per second, the last one second before NOW; None is a failed ping."""
+    engine = PingEngine(target, max_points=100, horizons=(60, 3600))
+    for i, ping_time in enumerate(ping_times):
+        engine._process_ping_result(None if ping_time is None else 64, ping_time,
+                                    timestamp=NOW - len(ping_times) + i)
+    return engine
+
+def query(**args):
+    """Parse a query from keyword arguments; lists become repeated parameters."""
+    return parse_query(MultiDict([(key, value) for key, values in args.items()
+                                  for value in (values if isinstance(values, list) else [values])]))
+
+class TestParseQuery(unittest.TestCase):
+    """Test cases for parse_query."""
+
+    def test_defaults(self):
+        """Test that an empty query asks for the fleet failure rate over the sample window."""
+        self.assertEqual(query(), Query())
+
+    def test_full_query(self):
+        """Test that every parameter is parsed and normalized."""
+        parsed = query(metric='avg_ping_time', window='3600', group_by='time,target', target=['b', 'a'],
+                       filter=['failure_rate>=5', 'pings > 10'], order='desc', limit='3')
+        self.assertEqual(parsed.window, 3600.0)
+        self.assertEqual(parsed.group_by, ('target', 'time'))
+        self.assertEqual(parsed.targets, ('a', 'b'))
+        self.assertEqual(parsed.filters, (('failure_rate', '>=', 5.0), ('pings', '>', 10.0)))
+        self.assertEqual(parsed.limit, 3)
+
+    def test_rejects_invalid_queries(self):
+        """Test that malformed or unanswerable queries raise QueryError."""
+        for args in ({'metric': 'jitter'}, {'window': 'hour'}, {'group_by': 'site'}, {'group_by': 'time'},
+                     {'metric': 'p95_ping_time', 'window': '60'}, {'filter': 'failure_rate~5'},
+                     {'order': 'up'}, {'limit': '0'}):
+            with self.assertRaises(QueryError, msg=args):
+                query(**args)
+
+class TestEvaluate(unittest.TestCase):
+    """Test cases for evaluate."""
+
+    def setUp(self):
+        """Set up four targets with distinct latency and loss."""
+        self.engines = {
+            'a': make_engine('a', [10.0] * 10),
+            'b': make_engine('b', [20.0] * 8 + [None] * 2),
+            'c': make_engine('c', [float(i) for i in range(1, 101)]),
+            'tcp://d:80': make_engine('tcp://d:80', [None] * 4),
+        }
+
+    def test_fleet_failure_rate(self):
+        """Test that an ungrouped query pools raw counts across targets."""
+        result = evaluate(query(window='3600'), self.engines, NOW)
+        self.assertEqual(result['targets'], 4)
+        self.assertAlmostEqual(result['value'], 6 / 124 * 100)
+
+    def test_top_k_by_percentile(self):
+        """Test ranking targets by p95 with no-value targets last."""
+        result = evaluate(query(metric='p95_ping_time', group_by='target', order='desc', limit='3'),
+                          self.engines, NOW)
+        self.assertEqual(result['total'], 4)
+        self.assertEqual([row['target'] for row in result['groups']], ['c', 'b', 'a'])
+        self.assertAlmostEqual(result['groups'][0]['value'], percentile([float(i) for i in range(1, 101)], 0.95))
+
+        ascending = evaluate(query(metric='p95_ping_time', group_by='target', order='asc'), self.engines, NOW)
+        self.assertEqual([row['target'] for row in ascending['groups']], ['a', 'b', 'c', 'tcp://d:80'])
+
+    def test_filters_and_selectors(self):
+        """Test that per-target filters and name, glob and type selectors narrow the targets."""
+        lossy = evaluate(query(group_by='target', filter='failure_rate>0'), self.engines, NOW)
+        self.assertEqual([row['target'] for row in lossy['groups']], ['b', 'tcp://d:80'])
+
+        self.assertEqual(evaluate(query(target=['a', 'c']), self.engines, NOW)['targets'], 2)
+        self.assertEqual(evaluate(query(match='tcp://*'), self.engines, NOW)['targets'], 1)
+        self.assertEqual(evaluate(query(kind='icmp'), self.engines, NOW)['targets'], 3)
+
+        # A filter on a metric with no value excludes the target
+        self.assertEqual(evaluate(query(filter='avg_ping_time<1000'), self.engines, NOW)['targets'], 3)
+
+    def test_group_by_time(self):
+        """Test per-bucket fleet aggregates and per-target series from the horizon rings."""
+        result = evaluate(query(metric='pings', window='60'), self.engines, NOW)
+        # The 60 s ring holds the last 59 whole seconds of c's 100 samples
+        self.assertEqual(result['value'], 10 + 10 + 59 + 4)
+
+        buckets = evaluate(query(metric='pings', window='60', group_by='time'), self.engines, NOW)['groups']
+        self.assertEqual(sum(row['value'] for row in buckets), 83)
+        self.assertEqual([row['time'] for row in buckets], [NOW - 59 + i for i in range(59)])
+        self.assertEqual(buckets[-1], {'time': NOW - 1, 'value': 4})
+
+        series = evaluate(query(metric='failed_pings', window='60', group_by='target,time', target='b'),
+                          self.engines, NOW)['groups']
+        self.assertEqual(sum(row['value'] for row in series), 2)
+        self.assertTrue(all(row['target'] == 'b' for row in series))
+
+    def test_untracked_window(self):
+        """Test that a window matching no horizon is refused."""
+        with self.assertRaises(QueryError):
+            evaluate(query(window='120'), self.engines, NOW)
+
+class TestQueryEndpoint(unittest.TestCase):
+    """Test the /api/query endpoint and its result cache."""
+
+    def test_results_cached_until_new_sample(self):
+        """Test that repeated queries hit the cache and a new sample invalidates it."""
+        # Import through the package so the app and its engines share one module copy
+        from ping_monitor.web_app import create_app
+
+        app = create_app(target='a', max_points=10)
+        scheduler = app.extensions['scheduler']
+        cache = app.extensions['query_cache']
+        engine = scheduler.get_engine('a')
+        engine._process_ping_result(64, 12.0)
+        client = app.test_client()
+
+        with patch.object(scheduler, 'start'):
+            first = client.get('/api/query?metric=avg_ping_time&group_by=target').get_json()
+            self.assertEqual(first['groups'], [{'target': 'a', 'value': 12.0}])
+            client.get('/api/query?metric=avg_ping_time&group_by=target')
+            self.assertEqual(cache.builds, 1)
+
+            engine._process_ping_result(64, 14.0)
+            self.assertEqual(client.get('/api/query?metric=avg_ping_time').get_json()['value'], 13.0)
+            self.assertEqual(client.get('/api/query?metric=avg_ping_time&group_by=target')
+                             .get_json()['groups'][0]['value'], 13.0)
+            self.assertEqual(cache.builds, 3)
+
+            self.assertEqual(client.get('/api/query?metric=median').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Tests for the streamed sample formats."""
+
+import io
+import os
+import tempfile
+import unittest
+from sample_format import (LineSampleWriter, BinarySampleWriter, format_sample_line, parse_sample_line,
+                           iter_binary_samples, iter_samples, BINARY_MAGIC)
+
+SAMPLES = [
+    (1000.0, "8.8.8.8", 117, 15.2),
+    (1001.0, "8.8.8.8", None, None),
+    (1001.5, "example.com", 56, 123.456),
+]
+
+class TestSampleFormat(unittest.TestCase):
+    """Test cases for line and binary sample formats."""
+
+    def test_line_round_trip(self):
+        """Test that formatted lines parse back to the same sample."""
+        for sample in SAMPLES:
+            self.assertEqual(parse_sample_line(format_sample_line(*sample)), sample)
+
+    def test_line_failure_marker(self):
+        """Test that failures are written with dash placeholders."""
+        self.assertEqual(format_sample_line(1.0, "8.8.8.8", None, None), "1.000 8.8.8.8 - -\n")
+
+    def test_parse_malformed_line(self):
+        """Test that malformed lines are skipped."""
+        self.assertIsNone(parse_sample_line("garbage"))
+        self.assertIsNone(parse_sample_line("x 8.8.8.8 64 1.0"))
+
+    def test_binary_round_trip(self):
+        """Test that binary records decode to the written samples."""
+        stream = io.BytesIO()
+        writer = BinarySampleWriter(stream)
+        for sample in SAMPLES:
+            writer.write(*sample)
+
+        stream.seek(len(BINARY_MAGIC))
+        self.assertEqual(list(iter_binary_samples(stream)), SAMPLES)
+
+    def test_binary_interns_targets(self):
+        """Test that each target name is written only once."""
+        stream = io.BytesIO()
+        writer = BinarySampleWriter(stream)
+        for i in range(10):
+            writer.write(1000.0 + i, "example.com", 56, 10.0)
+
+        self.assertEqual(stream.getvalue().count(b"example.com"), 1)
+
+    def test_iter_samples_detects_format(self):
+        """Test reading files in either format."""
+        with tempfile.TemporaryDirectory() as directory:
+            line_path = os.path.join(directory, 'samples.txt')
+            with open(line_path, 'w', encoding='utf-8') as stream:
+                writer = LineSampleWriter(stream)
+                for sample in SAMPLES:
+                    writer.write(*sample)
+
+            binary_path = os.path.join(directory, 'samples.bin')
+            with open(binary_path, 'wb') as stream:
+                writer = BinarySampleWriter(stream)
+                for sample in SAMPLES:
+                    writer.write(*sample)
+
+            self.assertEqual(list(iter_samples(line_path)), SAMPLES)
+            self.assertEqual(list(iter_samples(binary_path)), SAMPLES)
+
+
+if __name__ == '__main__':
+    unittest.main()
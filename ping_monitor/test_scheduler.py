@@ -0,0 +1,133 @@
+"""Tests for the shared multi-target probe scheduler."""
+
+import time
+import unittest
+from unittest.mock import patch
+from ping_engine import PingEngine
+from scheduler import ProbeScheduler
+
+class TestProbeScheduler(unittest.TestCase):
+    """Test cases for ProbeScheduler class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.scheduler = ProbeScheduler(max_points=5, interval=0.01, max_workers=4)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        if self.scheduler.is_running():
+            self.scheduler.stop()
+
+    def wait_for(self, condition, timeout=2.0):
+        """Poll until condition is true or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_add_target(self):
+        """Test adding targets creates one engine per target."""
+        engine = self.scheduler.add_target("8.8.8.8")
+        self.assertIsInstance(engine, PingEngine)
+        self.assertEqual(engine.max_points, 5)
+        self.assertIs(self.scheduler.get_engine("8.8.8.8"), engine)
+
+    def test_add_existing_target_keeps_engine(self):
+        """Test re-adding a target keeps its existing engine and data."""
+        engine = self.scheduler.add_target("8.8.8.8")
+        engine._process_ping_result(ttl=64, ping_time=15.2)
+
+        self.assertIs(self.scheduler.add_target("8.8.8.8"), engine)
+        self.assertEqual(engine.total_pings, 1)
+
+    def test_remove_target(self):
+        """Test removing targets."""
+        self.scheduler.add_target("8.8.8.8")
+
+        self.assertTrue(self.scheduler.remove_target("8.8.8.8"))
+        self.assertIsNone(self.scheduler.get_engine("8.8.8.8"))
+        self.assertFalse(self.scheduler.remove_target("8.8.8.8"))
+
+    def test_pause_and_resume_target(self):
+        """Test pausing and resuming targets."""
+        self.scheduler.add_target("8.8.8.8")
+
+        self.assertTrue(self.scheduler.pause_target("8.8.8.8"))
+        self.assertEqual(self.scheduler.list_targets(), [{'target': "8.8.8.8", 'paused': True, 'interval': 0.01,
+                                                         'total_pings': 0}])
+
+        self.assertTrue(self.scheduler.resume_target("8.8.8.8"))
+        self.assertFalse(self.scheduler.list_targets()[0]['paused'])
+
+    def test_pause_unknown_target(self):
+        """Test pausing or resuming an unknown target fails."""
+        self.assertFalse(self.scheduler.pause_target("1.1.1.1"))
+        self.assertFalse(self.scheduler.resume_target("1.1.1.1"))
+
+    @patch.object(PingEngine, 'ping_target', return_value=(64, 15.2))
+    def test_probes_all_active_targets(self, mock_ping):
+        """Test that the shared scheduler probes every active target."""
+        first = self.scheduler.add_target("8.8.8.8")
+        second = self.scheduler.add_target("1.1.1.1")
+
+        self.scheduler.start()
+
+        self.assertTrue(self.wait_for(lambda: first.total_pings >= 3 and second.total_pings >= 3))
+
+    @patch.object(PingEngine, 'ping_target', return_value=(64, 15.2))
+    def test_paused_target_not_probed(self, mock_ping):
+        """Test that paused targets are skipped while others keep probing."""
+        active = self.scheduler.add_target("8.8.8.8")
+        paused = self.scheduler.add_target("1.1.1.1")
+        self.scheduler.pause_target("1.1.1.1")
+
+        self.scheduler.start()
+
+        self.assertTrue(self.wait_for(lambda: active.total_pings >= 3))
+        self.assertEqual(paused.total_pings, 0)
+
+    @patch.object(PingEngine, 'ping_target', return_value=(64, 15.2))
+    def test_add_target_while_running(self, mock_ping):
+        """Test that targets added at runtime start probing without disturbing others."""
+        first = self.scheduler.add_target("8.8.8.8")
+        self.scheduler.start()
+        self.assertTrue(self.wait_for(lambda: first.total_pings >= 1))
+
+        second = self.scheduler.add_target("1.1.1.1")
+
+        self.assertTrue(self.wait_for(lambda: second.total_pings >= 3))
+        self.assertTrue(self.scheduler.remove_target("1.1.1.1"))
+        before = first.total_pings
+        self.assertTrue(self.wait_for(lambda: first.total_pings > before))
+
+    def test_get_summary(self):
+        """Test aggregate statistics for all targets."""
+        first = self.scheduler.add_target("8.8.8.8")
+        second = self.scheduler.add_target("1.1.1.1")
+        first._process_ping_result(ttl=64, ping_time=10.0)
+        first._process_ping_result(ttl=64, ping_time=20.0)
+        second._process_ping_result(ttl=None, ping_time=None)
+
+        summary = self.scheduler.get_summary()
+
+        self.assertEqual(set(summary.keys()), {"8.8.8.8", "1.1.1.1"})
+        self.assertEqual(summary["8.8.8.8"]['avg_ping_time'], 15.0)
+        self.assertEqual(summary["8.8.8.8"]['failure_rate'], 0.0)
+        self.assertEqual(summary["1.1.1.1"]['failure_rate'], 100.0)
+        self.assertEqual(summary["1.1.1.1"]['consecutive_failures'], 1)
+
+    def test_start_stop(self):
+        """Test starting and stopping the scheduler."""
+        self.assertFalse(self.scheduler.is_running())
+
+        self.scheduler.start()
+        self.assertTrue(self.scheduler.is_running())
+
+        self.scheduler.stop()
+        self.assertFalse(self.scheduler.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
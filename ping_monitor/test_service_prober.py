@@ -0,0 +1,205 @@
+"""Tests for TCP, UDP and HTTP probes against local servers."""
+
+import time
+import socket
+import threading
+import socketserver
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ping_engine import PingEngine
+from scheduler import ProbeScheduler
+from service_prober import ServiceProber, ProbeTarget, parse_probe_target, UNKNOWN_TTL
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers GETs over persistent HTTP/1.1 connections; /error returns 500."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'fail' if self.path == '/error' else b'ok'
+        self.send_response(500 if self.path == '/error' else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class OneShotHandler(socketserver.BaseRequestHandler):
+    """Answers one request, then drops the connection as an idle timeout would."""
+
+    def handle(self):
+        self.request.recv(4096)
+        self.request.sendall(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+
+def serve(server):
+    """Run a server on a daemon thread."""
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def closed_port(kind=socket.SOCK_STREAM) -> int:
+    """A local port with nothing listening."""
+    sock = socket.socket(socket.AF_INET, kind)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+class TestProbeTargets(unittest.TestCase):
+    """Test cases for target parsing."""
+
+    def test_parse(self):
+        """Test the probe type, port and path taken from target names."""
+        self.assertEqual(parse_probe_target("8.8.8.8"), ProbeTarget('icmp', "8.8.8.8", None, ''))
+        self.assertEqual(parse_probe_target("tcp://example.com:443"), ProbeTarget('tcp', "example.com", 443, ''))
+        self.assertEqual(parse_probe_target("udp://10.0.0.1"), ProbeTarget('udp', "10.0.0.1", 7, ''))
+        self.assertEqual(parse_probe_target("http://example.com/health?x=1"),
+                         ProbeTarget('http', "example.com", 80, '/health?x=1'))
+
+    def test_rejects_unusable_targets(self):
+        """Test that unknown schemes and port-less TCP targets are refused."""
+        for target in ("ftp://example.com", "tcp://example.com", "http://example.com:99999"):
+            with self.assertRaises(ValueError):
+                parse_probe_target(target)
+        with self.assertRaises(ValueError):
+            PingEngine("https://example.com")
+
+class TestServiceProber(unittest.TestCase):
+    """Test cases for ServiceProber against localhost servers."""
+
+    def setUp(self):
+        """Start TCP, UDP echo and HTTP servers."""
+        self.prober = ServiceProber(timeout=0.5)
+        self.addCleanup(self.prober.close)
+
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(128)
+        self.addCleanup(self.listener.close)
+        self.tcp_port = self.listener.getsockname()[1]
+
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind(('127.0.0.1', 0))
+        self.udp_port = self.udp.getsockname()[1]
+        self.echo = True
+        threading.Thread(target=self._echo_loop, daemon=True).start()
+        self.addCleanup(self.udp.close)
+
+        self.http = serve(ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler))
+        self.addCleanup(self.http.server_close)
+        self.addCleanup(self.http.shutdown)
+        self.http_url = f"http://127.0.0.1:{self.http.server_port}"
+
+    def _echo_loop(self):
+        """Echo datagrams back while self.echo is set."""
+        while True:
+            try:
+                data, source = self.udp.recvfrom(2048)
+            except OSError:
+                return
+            if self.echo:
+                self.udp.sendto(data, source)
+
+    def probe(self, *targets):
+        """Probe targets on loopback."""
+        return self.prober.probe({target: '127.0.0.1' for target in targets})
+
+    def test_tcp_connect(self):
+        """Test that handshakes are timed and refused ports fail."""
+        ok, refused = f"tcp://localhost:{self.tcp_port}", f"tcp://localhost:{closed_port()}"
+        results = self.probe(ok, refused)
+
+        self.assertEqual(results[ok][0], UNKNOWN_TTL)
+        self.assertGreaterEqual(results[ok][1], 0.0)
+        self.assertEqual(results[refused], (None, None))
+        self.assertEqual(self.prober.open_sockets, 0)
+
+    def test_udp_echo(self):
+        """Test that echoed datagrams are timed with their TTL and silence times out."""
+        ok, refused = f"udp://localhost:{self.udp_port}", f"udp://localhost:{closed_port(socket.SOCK_DGRAM)}"
+        results = self.probe(ok, refused)
+        self.assertEqual(results[ok][0], 64)
+        self.assertEqual(results[refused], (None, None))
+
+        self.echo = False
+        started = time.perf_counter()
+        self.assertEqual(self.probe(ok)[ok], (None, None))
+        self.assertGreaterEqual(time.perf_counter() - started, 0.5)
+
+    def test_http_reuses_keep_alive_connection(self):
+        """Test that time to first byte is measured over one pooled connection."""
+        ok, error = f"{self.http_url}/health", f"{self.http_url}/error"
+        for _ in range(3):
+            results = self.probe(ok)
+            self.assertEqual(results[ok][0], UNKNOWN_TTL)
+            self.assertGreater(results[ok][1], 0.0)
+
+        self.assertEqual(self.prober.connections_reused, 2)
+        self.assertEqual(self.prober.open_sockets, 1)
+        self.assertEqual(self.probe(error)[error], (None, None))
+
+    def test_http_retries_connection_closed_while_idle(self):
+        """Test that a pooled connection the server dropped is replaced without failing the probe."""
+        server = serve(socketserver.ThreadingTCPServer(('127.0.0.1', 0), OneShotHandler))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        target = f"http://127.0.0.1:{server.server_address[1]}/"
+
+        self.assertIsNotNone(self.probe(target)[target][1])
+        time.sleep(0.05)
+        self.assertIsNotNone(self.probe(target)[target][1])
+        self.assertEqual(self.prober.connections_reused, 1)
+        self.assertEqual(self.prober.open_sockets, 1)
+
+    def test_socket_limit_bounds_concurrency(self):
+        """Test that many probes complete while never holding more sockets than the limit."""
+        prober = ServiceProber(timeout=2.0, max_sockets=4)
+        self.addCleanup(prober.close)
+        targets = {f"{self.http_url}/{i}": '127.0.0.1' for i in range(40)}
+        targets.update({f"tcp://host{i}:{self.tcp_port}": '127.0.0.1' for i in range(40)})
+
+        results = prober.probe(targets)
+
+        self.assertTrue(all(ping_time is not None for _, ping_time in results.values()))
+        self.assertLessEqual(prober.peak_sockets, 4)
+        self.assertEqual(prober.probes_sent, 80)
+
+class TestServiceTargetsInEngine(unittest.TestCase):
+    """Test that service probes feed the regular engine pipeline."""
+
+    def setUp(self):
+        """Start a TCP listener."""
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(128)
+        self.addCleanup(self.listener.close)
+        self.target = f"tcp://127.0.0.1:{self.listener.getsockname()[1]}"
+
+    def test_engine_probe_once(self):
+        """Test that a standalone engine probes its service target."""
+        engine = PingEngine(self.target, max_points=5)
+        engine.probe_once()
+        stats = engine.get_statistics()
+        self.assertEqual(stats['total_pings'], 1)
+        self.assertEqual(stats['failed_pings'], 0)
+
+    def test_scheduler_mixes_probe_types(self):
+        """Test that service targets run through the scheduler's service prober."""
+        scheduler = ProbeScheduler(max_points=5, interval=0.01)
+        engine = scheduler.add_target(self.target)
+        scheduler.start()
+        try:
+            deadline = time.monotonic() + 5
+            while engine.total_pings < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            scheduler.stop()
+
+        self.assertGreaterEqual(engine.total_pings, 3)
+        self.assertEqual(engine.failed_pings, 0)
+        self.assertGreater(scheduler.service_prober.probes_sent, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
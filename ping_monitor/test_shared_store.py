@@ -0,0 +1,169 @@
+"""Tests for the shared-memory sample store."""
+
+import os
+import sys
+import time
+import struct
+import subprocess
+import unittest
+from unittest.mock import patch
+from ping_engine import PingEngine
+from shared_store import SharedSampleStore, SharedStoreReader
+
+class TestSharedStore(unittest.TestCase):
+    """Test cases for SharedSampleStore and SharedStoreReader."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.store = SharedSampleStore(capacity=4, max_points=5)
+        self.reader = SharedStoreReader(self.store.name)
+        self.engine = PingEngine("8.8.8.8", 5)
+        self.store.attach(self.engine)
+        self.now = time.time()
+
+    def tearDown(self):
+        """Unmap and remove the region."""
+        self.reader.close()
+        self.store.close()
+
+    def feed(self, results):
+        """Process (ttl, ping_time) results at one-second spacing."""
+        for ttl, ping_time in results:
+            self.now += 1.0
+            self.engine._process_ping_result(ttl, ping_time, timestamp=self.now)
+
+    def assert_matches_engine(self):
+        """Check that the published snapshot equals the engine's own statistics."""
+        snapshot = self.reader.snapshot("8.8.8.8")
+        self.assertEqual(snapshot.get_statistics(), self.engine.get_statistics(now=self.now))
+        self.assertEqual(snapshot.sequence, self.engine.sequence)
+        self.assertEqual(snapshot.resolution_failures, self.engine.resolution_failures)
+
+    def test_empty_target_is_published_on_attach(self):
+        """Test that attaching publishes the target before any sample."""
+        self.assertEqual(self.reader.targets(), ["8.8.8.8"])
+        self.assert_matches_engine()
+
+    def test_ring_wraps_like_engine_window(self):
+        """Test that the shared ring matches the engine window after wrapping."""
+        self.feed([(64, 10.0), (None, None), (None, None), (None, None), (64, 11.5),
+                   (64, 12.0), (None, None), (64, 13.25)])
+        self.assert_matches_engine()
+        self.assertEqual(self.reader.snapshot("8.8.8.8").get_statistics()['outage_history'], [3])
+
+    def test_reset_resynchronizes_slot(self):
+        """Test that a reset engine is republished in full on its next sample."""
+        self.feed([(64, 10.0)] * 7)
+        self.engine.reset()
+        self.feed([(64, 20.0)])
+        self.assert_matches_engine()
+        self.assertEqual(self.reader.snapshot("8.8.8.8").get_statistics()['ping_times'], [20.0])
+
+    def test_late_publish_writes_one_consistent_sample(self):
+        """Test that a publish running after the engine moved on republishes from one locked copy."""
+        self.feed([(64, 10.0)])
+        self.engine.remove_sample_listener(self.store.publish)
+        self.feed([(None, None), (64, 11.0)])
+
+        # The listener for the failed sample runs only now, two samples late
+        self.store.publish(self.engine, self.now - 1.0, None, None)
+        self.assert_matches_engine()
+        self.assertEqual(self.reader.snapshot("8.8.8.8").get_statistics()['ping_times'], [10.0, None, 11.0])
+
+    def test_detach_frees_slot(self):
+        """Test that detached targets disappear and stop publishing."""
+        self.store.detach(self.engine)
+        self.assertEqual(self.reader.targets(), [])
+        self.assertIsNone(self.reader.snapshot("8.8.8.8"))
+        self.feed([(64, 10.0)])
+        self.assertEqual(self.engine.sample_listeners, [])
+
+        other = PingEngine("1.1.1.1", 5)
+        self.store.attach(other)
+        self.assertEqual(self.reader.targets(), ["1.1.1.1"])
+
+    def test_rejects_mismatched_window_and_full_store(self):
+        """Test that attach validates the engine window and slot capacity."""
+        with self.assertRaises(ValueError):
+            self.store.attach(PingEngine("1.1.1.1", 10))
+        for i in range(3):
+            self.store.attach(PingEngine(f"10.0.0.{i}", 5))
+        with self.assertRaises(ValueError):
+            self.store.attach(PingEngine("10.0.0.9", 5))
+
+    def test_reader_retries_while_slot_is_being_written(self):
+        """Test that readers never return a slot whose seqlock is held."""
+        offset = self.store.layout.slot_offset(self.store.slots["8.8.8.8"])
+        seq = struct.unpack_from('<Q', self.store.shm.buf, offset)[0]
+        struct.pack_into('<Q', self.store.shm.buf, offset, seq + 1)
+
+        self.reader.MAX_RETRIES = 10
+        with self.assertRaises(TimeoutError):
+            self.reader.snapshot("8.8.8.8")
+
+        struct.pack_into('<Q', self.store.shm.buf, offset, seq + 2)
+        self.assertIsNotNone(self.reader.snapshot("8.8.8.8"))
+
+    def test_rejects_unknown_layout(self):
+        """Test that readers refuse regions they cannot interpret."""
+        self.store.shm.buf[0:4] = b'XXXX'
+        with self.assertRaises(ValueError):
+            SharedStoreReader(self.store.name)
+
+    def test_other_process_reads_store(self):
+        """Test that a separate process maps the region and sees published samples."""
+        self.feed([(64, 10.0), (None, None), (64, 12.0)])
+        script = (
+            "from shared_store import SharedStoreReader\n"
+            f"reader = SharedStoreReader({self.store.name!r})\n"
+            "stats = reader.snapshot('8.8.8.8').get_statistics()\n"
+            "print(stats['total_pings'], stats['ping_times'])\n"
+            "reader.close()\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+
+        self.assertEqual(result.stdout.strip(), "3 [10.0, None, 12.0]")
+
+        # The reader exiting must not remove the collector's region
+        self.assertEqual(SharedStoreReader(self.store.name).targets(), ["8.8.8.8"])
+
+class TestSharedStoreServing(unittest.TestCase):
+    """Test the collector publishing and the read-only web app serving from the store."""
+
+    def test_collector_publishes_to_reader_app(self):
+        """Test that API workers serve what the collector published."""
+        # Import through the package so the collector and the web app share one module copy
+        from ping_monitor.collector import Collector as PackageCollector
+        from ping_monitor.ping_engine import PingEngine as PackagePingEngine
+        from ping_monitor.web_app import create_reader_app
+
+        name = f"pm_test_{os.getpid()}"
+        patcher = patch.object(PackagePingEngine, 'ping_target', return_value=(64, 15.2))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        collector = PackageCollector(["8.8.8.8", "1.1.1.1"], None, interval=0.01, max_points=10, count=6,
+                              shared_store=name)
+        app = create_reader_app(name, target="8.8.8.8")
+        try:
+            collector.scheduler.start()
+            collector.done.wait(5)
+            collector.scheduler.stop()
+
+            client = app.test_client()
+            data = client.get('/api/data').get_json()
+            self.assertGreater(data['total_pings'], 0)
+            self.assertAlmostEqual(data['avg_ping_time'], 15.2)
+
+            summary = client.get('/api/summary').get_json()['targets']
+            self.assertEqual(set(summary), {"8.8.8.8", "1.1.1.1"})
+            self.assertEqual(client.get('/api/data?target=missing').status_code, 404)
+            self.assertEqual(client.get('/api/config').get_json()['max_points'], 10)
+            self.assertEqual(client.post('/api/reset').status_code, 404)
+        finally:
+            app.extensions['shared_store'].close()
+            collector.shared_store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
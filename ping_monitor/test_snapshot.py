@@ -0,0 +1,170 @@
+"""Tests for engine state snapshots and warm restarts."""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from ping_engine import PingEngine
+from scheduler import ProbeScheduler
+from snapshot import SnapshotError, save_snapshot, load_snapshot, SNAPSHOT_VERSION
+
+RESULTS = [(64, 10.0), (None, None), (None, None), (None, None), (64, 11.5), (64, 12.0),
+           (None, None), (64, 13.25), (None, None), (None, None)]
+
+class TestSnapshot(unittest.TestCase):
+    """Test cases for snapshot save and restore."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'engines.snap')
+        self.now = 1000.0
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def feed(self, engine, results):
+        """Process results at one-second spacing."""
+        for ttl, ping_time in results:
+            self.now += 1.0
+            engine._process_ping_result(ttl, ping_time, timestamp=self.now)
+
+    def saved_scheduler(self, max_points=8):
+        """Create a scheduler with two fed targets and snapshot it."""
+        scheduler = ProbeScheduler(max_points=max_points, snapshot_path=self.path)
+        self.feed(scheduler.add_target("8.8.8.8"), RESULTS)
+        self.feed(scheduler.add_target("1.1.1.1"), RESULTS[:3])
+        scheduler.pause_target("1.1.1.1")
+        self.assertEqual(scheduler.save_snapshot(), 2)
+        return scheduler
+
+    def test_restore_reproduces_engine_state(self):
+        """Test that a restarted scheduler has the same windows, counters and outages."""
+        before = self.saved_scheduler()
+        after = ProbeScheduler(max_points=8, snapshot_path=self.path)
+
+        self.assertEqual(set(after.engines), {"8.8.8.8", "1.1.1.1"})
+        self.assertEqual(after.paused, {"1.1.1.1"})
+        for target, engine in before.engines.items():
+            restored = after.get_engine(target)
+            self.assertEqual(restored.get_statistics(now=self.now), engine.get_statistics(now=self.now))
+            self.assertEqual(restored.failure_run_start_time, engine.failure_run_start_time)
+            self.assertEqual(restored.last_ping_time, engine.last_ping_time)
+            self.assertGreater(restored.sequence, engine.sequence)
+            self.assertEqual(restored.anomaly_detector.export_state(), engine.anomaly_detector.export_state())
+
+    def test_intervals_survive_restart(self):
+        """Test that custom probe intervals are restored rather than reset to the default."""
+        before = ProbeScheduler(max_points=8, interval=1.0, snapshot_path=self.path)
+        before.add_target("8.8.8.8", interval=0.2)
+        before.add_target("1.1.1.1")
+        before.set_interval("1.1.1.1", 30.0)
+        before.save_snapshot()
+
+        after = ProbeScheduler(max_points=8, interval=1.0, snapshot_path=self.path)
+        self.assertEqual(after.intervals, {"8.8.8.8": 0.2, "1.1.1.1": 30.0})
+
+    def test_window_is_expanded_lazily(self):
+        """Test that the restored window stays packed until the engine is used."""
+        self.saved_scheduler()
+        engine = ProbeScheduler(max_points=8, snapshot_path=self.path).get_engine("8.8.8.8")
+        self.assertIsNotNone(engine._pending_window)
+        self.assertEqual(len(engine.ping_times), 0)
+
+        engine.get_statistics()
+        self.assertIsNone(engine._pending_window)
+        self.assertEqual(list(engine.ping_times), [None, None, 11.5, 12.0, None, 13.25, None, None])
+
+    def test_detection_continues_across_restart(self):
+        """Test that outage tracking carries on as if the process never stopped."""
+        reference = PingEngine("8.8.8.8", 8)
+        self.feed(reference, RESULTS)
+        self.saved_scheduler()
+
+        engine = ProbeScheduler(max_points=8, snapshot_path=self.path).get_engine("8.8.8.8")
+        self.now += 1.0
+        reference._process_ping_result(64, 14.0, timestamp=self.now)
+        engine._process_ping_result(64, 14.0, timestamp=self.now)
+
+        expected = reference.get_statistics(now=self.now)
+        actual = engine.get_statistics(now=self.now)
+        self.assertEqual(actual['outage_history'], [3, 2])
+        self.assertEqual(actual, expected)
+
+    def test_downtime_is_marked_as_gap(self):
+        """Test that the restart gap is reported at the end of the window and slides out."""
+        self.saved_scheduler()
+        engine = ProbeScheduler(max_points=8, snapshot_path=self.path).get_engine("8.8.8.8")
+
+        gaps = engine.get_gaps()
+        self.assertEqual(len(gaps), 1)
+        self.assertEqual(gaps[0]['index'], 8)
+        self.assertLessEqual(gaps[0]['end_time'] - gaps[0]['start_time'], 60)
+
+        self.feed(engine, [(64, 10.0)] * 3)
+        self.assertEqual(engine.get_gaps()[0]['index'], 5)
+        self.feed(engine, [(64, 10.0)] * 6)
+        self.assertEqual(engine.get_gaps(), [])
+
+        engine.reset()
+        self.assertEqual(engine.get_gaps(), [])
+
+    def test_mismatched_window_is_skipped(self):
+        """Test that targets saved with another max_points are not restored."""
+        self.saved_scheduler(max_points=8)
+        scheduler = ProbeScheduler(max_points=16, snapshot_path=self.path)
+        self.assertEqual(scheduler.engines, {})
+
+    def test_version_check(self):
+        """Test that snapshots from another format version are rejected."""
+        self.saved_scheduler()
+        with open(self.path, 'r+b') as stream:
+            stream.seek(4)
+            stream.write((SNAPSHOT_VERSION + 1).to_bytes(2, 'little'))
+
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+        self.assertEqual(ProbeScheduler(max_points=8, snapshot_path=self.path).engines, {})
+
+    def test_truncated_snapshot_is_rejected(self):
+        """Test that a cut-off file is reported instead of half-restored."""
+        self.saved_scheduler()
+        with open(self.path, 'r+b') as stream:
+            stream.truncate(os.path.getsize(self.path) - 10)
+
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+
+    def test_failed_save_keeps_previous_snapshot(self):
+        """Test that write-then-rename never leaves a partial snapshot in place."""
+        self.saved_scheduler()
+        saved_at, records = load_snapshot(self.path)
+
+        engine = PingEngine("9.9.9.9", 8)
+        with patch('snapshot.os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                save_snapshot(self.path, [(engine, False)])
+
+        self.assertEqual(set(load_snapshot(self.path)[1]), set(records))
+
+    @patch.object(PingEngine, 'ping_target', return_value=(64, 15.2))
+    def test_stop_writes_final_snapshot(self, mock_ping):
+        """Test that a running scheduler saves on stop."""
+        scheduler = ProbeScheduler(max_points=8, interval=0.01, snapshot_path=self.path, snapshot_interval=60)
+        engine = scheduler.add_target("8.8.8.8")
+        scheduler.start()
+        while engine.total_pings < 3:
+            time.sleep(0.01)
+        scheduler.stop()
+
+        _, records = load_snapshot(self.path)
+        state, paused = records["8.8.8.8"]
+        self.assertEqual(state['total_pings'], engine.total_pings)
+        self.assertFalse(paused)
+
+
+if __name__ == '__main__':
+    unittest.main()
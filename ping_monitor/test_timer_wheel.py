@@ -0,0 +1,162 @@
+"""Tests for the hierarchical timing wheel and per-target probe intervals."""
+
+import time
+import random
+import threading
+import unittest
+from unittest.mock import patch
+from ping_engine import PingEngine
+from scheduler import ProbeScheduler, phase_offset
+from timer_wheel import TimerWheel
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+class SlowProber:
+    """Batch prober that takes a while per round and records how many rounds overlap."""
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.active = 0
+        self.max_active = 0
+        self.rounds = 0
+        self.probes = {}
+        self._lock = threading.Lock()
+
+    def probe(self, addresses):
+        with self._lock:
+            self.active += 1
+            self.rounds += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.duration)
+        with self._lock:
+            self.active -= 1
+            for target in addresses:
+                self.probes[target] = self.probes.get(target, 0) + 1
+        return {target: (64, 1.0) for target in addresses}
+
+    def close(self):
+        pass
+
+class TestTimerWheel(unittest.TestCase):
+    """Test cases for TimerWheel."""
+
+    def test_fires_in_order_and_never_early(self):
+        """Test that timers across every level fire on time, in expiry order."""
+        rng = random.Random(5)
+        wheel = TimerWheel(tick=1.0, slots=4, levels=3)
+        deadlines = {key: rng.uniform(0, 200) for key in range(500)}
+        for key, deadline in deadlines.items():
+            wheel.schedule(key, deadline)
+        self.assertEqual(len(wheel), 500)
+
+        now, fired = 0.0, []
+        while len(wheel):
+            now += rng.choice((0.5, 1.0, 3.0))
+            for timer in wheel.advance(now):
+                self.assertLessEqual(timer.deadline, now)
+                self.assertGreater(timer.deadline, now - 3.0 - wheel.tick)
+                fired.append(timer)
+        self.assertEqual(sorted(timer.key for timer in fired), list(range(500)))
+        expiries = [timer.expires for timer in fired]
+        self.assertEqual(expiries, sorted(expiries))
+
+    def test_cancel(self):
+        """Test that cancelled timers never fire and cancelling twice is refused."""
+        wheel = TimerWheel(tick=1.0, slots=4, levels=2)
+        keep, drop = wheel.schedule('keep', 10.0), wheel.schedule('drop', 10.0)
+        self.assertTrue(wheel.cancel(drop))
+        self.assertFalse(wheel.cancel(drop))
+        self.assertEqual([timer.key for timer in wheel.advance(10.0)], ['keep'])
+        self.assertFalse(keep.active)
+        self.assertFalse(wheel.cancel(keep))
+
+    def test_overflow_and_past_deadlines(self):
+        """Test timers beyond the top level and timers already due."""
+        wheel = TimerWheel(tick=1.0, slots=4, levels=2)
+        wheel.schedule('far', 100.0)
+        wheel.advance(5.0)
+        wheel.schedule('late', 1.0)
+        self.assertEqual([timer.key for timer in wheel.advance(5.0)], ['late'])
+        self.assertEqual(wheel.advance(99.0), [])
+        self.assertEqual([timer.key for timer in wheel.advance(100.0)], ['far'])
+
+class TestPerTargetIntervals(unittest.TestCase):
+    """Test cases for per-target intervals in ProbeScheduler."""
+
+    def test_phase_offsets_spread(self):
+        """Test that offsets are stable, inside the interval and spread across it."""
+        offsets = [phase_offset(f"10.0.{i // 256}.{i % 256}", 1.0) for i in range(1000)]
+        self.assertEqual(offsets[0], phase_offset("10.0.0.0", 1.0))
+        self.assertTrue(all(0 <= offset < 1.0 for offset in offsets))
+        quarters = [sum(1 for offset in offsets if q / 4 <= offset < (q + 1) / 4) for q in range(4)]
+        self.assertTrue(all(150 < count < 350 for count in quarters))
+
+    def test_intervals(self):
+        """Test default, custom and changed intervals and bad values."""
+        scheduler = ProbeScheduler(max_points=5, interval=1.0)
+        scheduler.add_target('a')
+        scheduler.add_target('b', interval=0.2)
+        self.assertEqual({item['target']: item['interval'] for item in scheduler.list_targets()},
+                         {'a': 1.0, 'b': 0.2})
+        self.assertTrue(scheduler.set_interval('a', 60))
+        self.assertEqual(scheduler.intervals['a'], 60)
+        self.assertFalse(scheduler.set_interval('c', 1.0))
+        with self.assertRaises(ValueError):
+            scheduler.add_target('c', interval=0)
+        self.assertTrue(scheduler.remove_target('b'))
+        self.assertNotIn('b', scheduler._timers)
+
+    @patch.object(PingEngine, 'ping_target', return_value=(64, 1.0))
+    def test_fast_target_probed_more_often(self, mock_ping):
+        """Test that each target runs at its own rate."""
+        scheduler = ProbeScheduler(max_points=100, interval=0.5, max_workers=4)
+        fast = scheduler.add_target('10.0.0.1', interval=0.02)
+        slow = scheduler.add_target('10.0.0.2')
+        scheduler.start()
+        try:
+            self.assertTrue(wait_for(lambda: fast.total_pings >= 20))
+        finally:
+            scheduler.stop()
+        self.assertLessEqual(slow.total_pings, 2)
+
+    def test_first_probe_on_next_tick(self):
+        """Test that a new target fires on the next tick and moves onto its phase grid afterwards."""
+        scheduler = ProbeScheduler(max_points=5, interval=1.0)
+        before = time.monotonic()
+        scheduler.add_target('10.0.0.7')
+        timer = scheduler._timers['10.0.0.7']
+        self.assertLessEqual(timer.deadline - before, 0.1)
+
+        scheduler._reschedule(timer, timer.deadline)
+        deadline = scheduler._timers['10.0.0.7'].deadline
+        self.assertGreaterEqual(deadline - timer.deadline, 0.5)
+        self.assertLess(deadline - timer.deadline, 1.5)
+        residual = (deadline - phase_offset('10.0.0.7', 1.0)) % 1.0
+        self.assertLess(min(residual, 1.0 - residual), 1e-6)
+
+        # On the grid, each next probe is one interval on
+        scheduler._reschedule(scheduler._timers['10.0.0.7'], deadline)
+        self.assertAlmostEqual(scheduler._timers['10.0.0.7'].deadline - deadline, 1.0)
+
+    def test_one_round_per_prober(self):
+        """Test that targets due while a batch round runs join the next round rather than overlapping it."""
+        prober = SlowProber(0.1)
+        scheduler = ProbeScheduler(max_points=100, interval=0.05, max_workers=8, batch_prober=prober)
+        for i in range(20):
+            scheduler.add_target(f"10.0.0.{i + 1}")
+        scheduler.start()
+        try:
+            self.assertTrue(wait_for(lambda: len(prober.probes) == 20 and min(prober.probes.values()) >= 3))
+        finally:
+            scheduler.stop()
+        self.assertEqual(prober.max_active, 1)
+        self.assertLess(prober.rounds, sum(prober.probes.values()) / 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Hierarchical timing wheel for large numbers of recurring probe timers."""
+
+import math
+from typing import Any, Dict, List, Optional
+
+class Timer:
+    """A scheduled expiry; keep it to cancel the timer later."""
+
+    __slots__ = ('key', 'deadline', 'expires', '_slot')
+
+    def __init__(self, key: Any, deadline: float, expires: int):
+        self.key = key
+        self.deadline = deadline
+        self.expires = expires  # Wheel tick at which the timer fires
+        self._slot: Optional[Dict['Timer', None]] = None
+
+    @property
+    def active(self) -> bool:
+        """Whether the timer is still waiting to fire."""
+        return self._slot is not None
+
+class TimerWheel:
+    """Timers bucketed into levels of slots, each level's slot spanning a whole lower level.
+
+    Level 0 has one slot per tick; level l has slots of slots**l ticks. A timer is placed at
+    the level of the highest tick digit (base slots) in which its expiry differs from the
+    current tick, so insert and cancel are O(1) dictionary operations. Each tick expires one
+    level-0 slot; when a level's digit rolls over, the next slot of the level above is
+    cascaded down. A timer moves at most once per level, so expiry is amortized O(1) too.
+    Timers further out than the top level wait in an overflow slot that is re-placed once per
+    top-level rotation.
+    """
+
+    def __init__(self, tick: float, slots: int = 256, levels: int = 4, start: float = 0.0):
+        if slots < 2 or slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self.tick = tick
+        self.start = start
+        self.levels = levels
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._wheels: List[List[Dict[Timer, None]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._overflow: Dict[Timer, None] = {}
+        self._due: Dict[Timer, None] = {}
+        self._current = 0  # Last tick whose level-0 slot has been expired
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def tick_at(self, now: float) -> int:
+        """The wheel tick that has fully elapsed at time now."""
+        return math.floor((now - self.start) / self.tick)
+
+    def schedule(self, key: Any, deadline: float) -> Timer:
+        """Add a timer firing on the first advance at or after deadline."""
+        timer = Timer(key, deadline, math.ceil((deadline - self.start) / self.tick))
+        if timer.expires <= self._current:
+            self._insert(self._due, timer)
+        else:
+            self._place(timer)
+        self._count += 1
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        """Remove a timer before it fires; returns False if it already fired or was cancelled."""
+        if timer._slot is None:
+            return False
+        del timer._slot[timer]
+        timer._slot = None
+        self._count -= 1
+        return True
+
+    def advance(self, now: float) -> List[Timer]:
+        """Move the wheel up to time now and return the timers that fired, in expiry order."""
+        fired = self._take(self._due)
+        target = self.tick_at(now)
+        bits, mask = self._bits, self._mask
+        while self._current < target:
+            # Nothing left to expire: skip straight to the target tick
+            if self._count == 0:
+                self._current = target
+                break
+
+            self._current += 1
+            current = self._current
+            if current & mask == 0:
+                # Find how many digits rolled over, then cascade from the highest one down
+                level = 1
+                while level < self.levels and current & ((1 << (bits * (level + 1))) - 1) == 0:
+                    level += 1
+                if level == self.levels:
+                    for timer in self._take(self._overflow):
+                        self._place(timer)
+                    level -= 1
+                for cascading in range(level, 0, -1):
+                    index = (current >> (bits * cascading)) & mask
+                    for timer in self._take(self._wheels[cascading][index]):
+                        self._place(timer)
+
+            fired.extend(self._take(self._wheels[0][current & mask]))
+        self._count -= len(fired)
+        return fired
+
+    def _take(self, slot: Dict[Timer, None]) -> List[Timer]:
+        """Empty a slot and return its timers, detached from it."""
+        timers = list(slot)
+        slot.clear()
+        for timer in timers:
+            timer._slot = None
+        return timers
+
+    def _insert(self, slot: Dict[Timer, None], timer: Timer) -> None:
+        """Put a timer into a slot."""
+        slot[timer] = None
+        timer._slot = slot
+
+    def _place(self, timer: Timer) -> None:
+        """Put a timer that expires at or after the current tick into its wheel slot."""
+        differing = timer.expires ^ self._current
+        level = (differing.bit_length() - 1) // self._bits if differing else 0
+        if level >= self.levels:
+            self._insert(self._overflow, timer)
+        else:
+            index = (timer.expires >> (self._bits * level)) & self._mask
+            self._insert(self._wheels[level][index], timer)
@@ -0,0 +1,29 @@
+"""Variable-length integer codec shared by the push frames and the history blocks."""
+
+from typing import Tuple
+
+def write_varint(out: bytearray, value: int) -> None:
+    """Append an unsigned LEB128 varint."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Read an unsigned LEB128 varint, returning (value, next offset)."""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def zigzag(value: int) -> int:
+    """Map signed to unsigned so small negative deltas stay short."""
+    return (value << 1) ^ (value >> 63)
+
+def unzigzag(value: int) -> int:
+    """Inverse of zigzag."""
+    return (value >> 1) ^ -(value & 1)
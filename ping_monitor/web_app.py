@@ -3,69 +3,158 @@
 import json
 import logging
 import time
-from flask import Flask, jsonify
+from itertools import islice
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from .ping_engine import PingEngine
+from .scheduler import ProbeScheduler
+from .outage_log import OutageLog
+from .compression import CompressedPayloadCache, negotiate_encoding
 from .statistics import StatisticsCalculator
-from .config import DEFAULT_TARGET, DEFAULT_MAX_POINTS, AUTO_REFRESH_INTERVAL, DEFAULT_HOST, DEFAULT_PORT
+from .shared_store import SharedStoreReader
+from .aggregator import Aggregator
+from .push import FrameError
+from .query import QueryError, parse_query, evaluate
+from .ping_stream import StreamingPinger
+from .alerts import AlertEngine, WebhookNotifier
+from .correlation import IncidentCorrelator
+from .export import EXPORT_FORMATS, ARROW_AVAILABLE, ExportError, merge_histories, stream_export
+from .admission import AdmissionController
+from .config import DEFAULT_TARGET, DEFAULT_MAX_POINTS, AUTO_REFRESH_INTERVAL, DEFAULT_HOST, DEFAULT_PORT, \
+    OUTAGE_LOG_PATH, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SHARED_STORE_NAME, SNAPSHOT_PATH, QUERY_CACHE_SIZE, \
+    STREAM_PINGS, KEEP_HISTORY, ALERT_RULES, ALERT_WEBHOOK_URL, API_EXPENSIVE_PATHS
 
 logging.getLogger('werkzeug').setLevel(logging.ERROR)
 
+def build_data_payload(ping_engine: PingEngine) -> dict:
+    """Build the /api/data payload for one engine."""
+    stats_data = ping_engine.get_statistics()
+    ttls, ping_times = stats_data['ttls'], stats_data['ping_times']
+    
+    # Transform data for Recharts format
+    chart_data = []
+    for i, (ttl, ping_time) in enumerate(zip(ttls, ping_times)):
+        if ttl is not None and ping_time is not None:
+            chart_data.append({
+                'index': i,
+                'ttl': ttl,
+                'pingTime': ping_time,
+                'timestamp': time.time()
+            })
+        else:
+            # Failed pings - mark with null values
+            chart_data.append({
+                'index': i,
+                'ttl': None,
+                'pingTime': None,
+                'timestamp': time.time()
+            })
+    
+    failure_rate, avg_ping_time, min_ping_time, max_ping_time, avg_outage_duration = \
+        StatisticsCalculator.calculate_statistics(stats_data)
+    
+    return {
+        'chart_data': chart_data,
+        'failure_rate': failure_rate,
+        'avg_ping_time': avg_ping_time,
+        'min_ping_time': min_ping_time,
+        'max_ping_time': max_ping_time,
+        'avg_outage_duration': avg_outage_duration,
+        'total_pings': stats_data.get('total_pings', 0),
+        'resolution_failures': ping_engine.resolution_failures,
+        'horizons': stats_data['horizons'],
+        'anomalies': [event.to_dict() for event in ping_engine.get_anomalies()],
+        'gaps': ping_engine.get_gaps()
+    }
+
+def make_compressed_json(app: Flask, payload_cache: CompressedPayloadCache):
+    """Build a responder that serves cached JSON payloads in the negotiated encoding."""
+    def compressed_json(key, version, build_payload) -> Response:
+        """Serve a cached JSON payload in the encoding negotiated from Accept-Encoding."""
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        body, applied_encoding = payload_cache.get(
+            key, version, lambda: app.json.dumps(build_payload()).encode('utf-8'), encoding
+        )
+        response = Response(body, mimetype='application/json')
+        if applied_encoding:
+            response.headers['Content-Encoding'] = applied_encoding
+        response.vary.add('Accept-Encoding')
+        return response
+    
+    return compressed_json
+
 def create_app(target: str = DEFAULT_TARGET, max_points: int = DEFAULT_MAX_POINTS, auto_refresh_interval: int = AUTO_REFRESH_INTERVAL, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Flask:
     """Create Flask application."""
     app = Flask(__name__)
     CORS(app)
     
-    ping_engine = PingEngine(target=target, max_points=max_points)
+    # Alert rules are evaluated as samples arrive; notifications go to the webhook when one is set
+    alerts = AlertEngine.from_config(ALERT_RULES,
+                                     notifier=WebhookNotifier(ALERT_WEBHOOK_URL) if ALERT_WEBHOOK_URL else None)
+    
+    # All targets share one scheduler; the startup target is the default for per-target endpoints
+    scheduler = ProbeScheduler(max_points=max_points, outage_log=OutageLog(path=OUTAGE_LOG_PATH),
+                               snapshot_path=SNAPSHOT_PATH, ping_streamer=StreamingPinger() if STREAM_PINGS else None,
+                               keep_history=KEEP_HISTORY, alerts=alerts if alerts.rules else None,
+                               correlator=IncidentCorrelator())
+    scheduler.add_target(target)
+    app.extensions['scheduler'] = scheduler
+    
+    # Serialized and compressed payloads, reused until the next sample arrives
+    payload_cache = CompressedPayloadCache()
+    compressed_json = make_compressed_json(app, payload_cache)
+    
+    # Query results are keyed by arbitrary parameters, so that cache is bounded
+    query_cache = CompressedPayloadCache(max_entries=QUERY_CACHE_SIZE)
+    app.extensions['query_cache'] = query_cache
+    query_json = make_compressed_json(app, query_cache)
+    
+    # Rate limits, a cap on expensive requests and yielding to lagging probes keep API bursts
+    # from starving the scheduler thread of the GIL and skewing RTT measurements
+    admission = AdmissionController(lag_source=lambda: scheduler.lag if scheduler.is_running() else 0.0)
+    app.extensions['admission'] = admission
     
     @app.route('/')
     def index():
         return jsonify({
             'message': 'Network Monitor API',
             'endpoints': {
-                'GET /api/data': 'Get network data',
-                'POST /api/reset': 'Reset statistics'
+                'GET /api/data': 'Get network data (optional ?target=)',
+                'GET /api/summary': 'Get aggregate statistics for all targets',
+                'GET /api/query': 'Aggregate a metric over targets and time buckets '
+                                  '(?metric=&window=&group_by=&target=&match=&kind=&filter=&order=&limit=)',
+                'GET /api/targets': 'List monitored targets',
+                'POST /api/targets': 'Add a target',
+                'DELETE /api/targets/<target>': 'Remove a target',
+                'POST /api/targets/<target>/pause': 'Pause probing a target',
+                'POST /api/targets/<target>/resume': 'Resume probing a target',
+                'POST /api/targets/<target>/path': "Start tracing a target's path hop by hop",
+                'DELETE /api/targets/<target>/path': "Stop tracing a target's path",
+                'GET /api/path': 'Get per-hop statistics and path changes (optional ?target=)',
+                'GET /api/history': 'Query long-term samples (optional ?target=&start=&end=&offset=&limit=)',
+                'GET /api/export': 'Stream long-term samples as NDJSON, CSV or Arrow IPC '
+                                   '(optional ?target=&start=&end=&format=)',
+                'GET /api/outages': 'Query outage events (optional ?target=&start=&end=&offset=&limit=)',
+                'GET /api/anomalies': 'Query latency anomaly events (optional ?target=&start=&end=&offset=&limit=)',
+                'GET /api/alerts': 'List alert rules and the alerts currently firing',
+                'GET /api/admission': 'Show API rate limits, shed request counters and the probe scheduling lag',
+                'GET /api/incidents': 'Query outages shared by several targets (optional ?start=&end=&offset=&limit=)',
+                'POST /api/reset': 'Reset statistics (optional ?target=)'
             }
         })
     
     @app.route('/api/data')
     def api_data():
         """Get current network data."""
+        ping_engine = scheduler.get_engine(request.args.get('target', target))
+        if ping_engine is None:
+            return jsonify({'error': 'Unknown target'}), 404
+        
         try:
-            stats_data = ping_engine.get_statistics()
-            ttls, ping_times = stats_data['ttls'], stats_data['ping_times']
-            
-            # Transform data for Recharts format
-            chart_data = []
-            for i, (ttl, ping_time) in enumerate(zip(ttls, ping_times)):
-                if ttl is not None and ping_time is not None:
-                    chart_data.append({
-                        'index': i,
-                        'ttl': ttl,
-                        'pingTime': ping_time,
-                        'timestamp': time.time()
-                    })
-                else:
-                    # Failed pings - mark with null values
-                    chart_data.append({
-                        'index': i,
-                        'ttl': None,
-                        'pingTime': None,
-                        'timestamp': time.time()
-                    })
-            
-            failure_rate, avg_ping_time, min_ping_time, max_ping_time, avg_outage_duration = \
-                StatisticsCalculator.calculate_statistics(stats_data)
-            
-            return jsonify({
-                'chart_data': chart_data,
-                'failure_rate': failure_rate,
-                'avg_ping_time': avg_ping_time,
-                'min_ping_time': min_ping_time,
-                'max_ping_time': max_ping_time,
-                'avg_outage_duration': avg_outage_duration,
-                'total_pings': stats_data.get('total_pings', 0)
-            })
+            # Horizon aggregates age with the clock even when no new samples arrive
+            version = (ping_engine.sequence, ping_engine.horizons.epoch(time.time()))
+            return compressed_json(('data', ping_engine.target), version,
+                                   lambda: build_data_payload(ping_engine))
         except Exception as e:
             logging.error(f"Error serving API data: {e}")
             return jsonify({
@@ -75,7 +164,8 @@ def create_app(target: str = DEFAULT_TARGET, max_points: int = DEFAULT_MAX_POINT
                 'min_ping_time': None,
                 'max_ping_time': None,
                 'avg_outage_duration': None,
-                'total_pings': 0
+                'total_pings': 0,
+                'resolution_failures': 0
             }), 500
 
     @app.route('/api/config')
@@ -97,9 +187,254 @@ def create_app(target: str = DEFAULT_TARGET, max_points: int = DEFAULT_MAX_POINT
                 'api_url': f'http://{DEFAULT_HOST}:{DEFAULT_PORT}'
             }), 500
     
+    @app.route('/api/summary')
+    def api_summary():
+        """Get aggregate statistics for all targets in one response."""
+        try:
+            # Any sample on any target, or a target change, is a new version
+            version = tuple(
+                (name, engine.sequence, name in scheduler.paused)
+                for name, engine in list(scheduler.engines.items())
+            )
+            return compressed_json('summary', version, lambda: {'targets': scheduler.get_summary()})
+        except Exception as e:
+            logging.error(f"Error serving summary data: {e}")
+            return jsonify({'targets': {}}), 500
+    
+    @app.route('/api/query')
+    def api_query():
+        """Evaluate an aggregate query, reusing the result until a queried target gets a new sample."""
+        try:
+            query = parse_query(request.args)
+            now = time.time()
+            engines = dict(scheduler.engines)
+            version = tuple((name, engine.sequence) for name, engine in engines.items())
+            if query.window is not None and engines:
+                # Horizon aggregates age with the clock even when no new samples arrive
+                version += (next(iter(engines.values())).horizons.epoch(now),)
+            return query_json(query, version, lambda: evaluate(query, engines, now))
+        except QueryError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    @app.route('/api/targets', methods=['GET'])
+    def api_list_targets():
+        """List monitored targets."""
+        return jsonify({'targets': scheduler.list_targets()})
+    
+    @app.route('/api/targets', methods=['POST'])
+    def api_add_target():
+        """Add a target to the shared scheduler."""
+        payload = request.get_json(silent=True) or {}
+        new_target = str(payload.get('target', '')).strip()
+        if not new_target:
+            return jsonify({'error': 'Missing target'}), 400
+        
+        interval = payload.get('interval')
+        if interval is not None and (isinstance(interval, bool) or not isinstance(interval, (int, float))):
+            return jsonify({'error': 'Invalid interval'}), 400
+        
+        try:
+            scheduler.add_target(new_target, interval=interval)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'message': 'Target added', 'target': new_target}), 201
+    
+    @app.route('/api/targets/<path:name>', methods=['DELETE'])
+    def api_remove_target(name):
+        """Remove a target from the shared scheduler."""
+        if not scheduler.remove_target(name):
+            return jsonify({'error': 'Unknown target'}), 404
+        payload_cache.discard(('data', name))
+        return jsonify({'message': 'Target removed', 'target': name})
+    
+    @app.route('/api/targets/<path:name>/pause', methods=['POST'])
+    def api_pause_target(name):
+        """Pause probing a target."""
+        if not scheduler.pause_target(name):
+            return jsonify({'error': 'Unknown target'}), 404
+        return jsonify({'message': 'Target paused', 'target': name})
+    
+    @app.route('/api/targets/<path:name>/resume', methods=['POST'])
+    def api_resume_target(name):
+        """Resume probing a target."""
+        if not scheduler.resume_target(name):
+            return jsonify({'error': 'Unknown target'}), 404
+        return jsonify({'message': 'Target resumed', 'target': name})
+    
+    @app.route('/api/targets/<path:name>/path', methods=['POST'])
+    def api_enable_path(name):
+        """Start tracing a target's path hop by hop."""
+        try:
+            path = scheduler.enable_path(name)
+        except OSError as e:
+            logging.error(f"Cannot start path probing: {e}")
+            return jsonify({'error': 'Path probing needs raw ICMP sockets (CAP_NET_RAW)'}), 503
+        if path is None:
+            return jsonify({'error': 'Unknown target'}), 404
+        return jsonify({'message': 'Path probing enabled', 'target': name})
+    
+    @app.route('/api/targets/<path:name>/path', methods=['DELETE'])
+    def api_disable_path(name):
+        """Stop tracing a target's path."""
+        if not scheduler.disable_path(name):
+            return jsonify({'error': 'Path probing not enabled for target'}), 404
+        return jsonify({'message': 'Path probing disabled', 'target': name})
+    
+    @app.route('/api/path')
+    def api_path():
+        """Get per-hop statistics and path changes for a traced target."""
+        path = scheduler.get_path(request.args.get('target', target))
+        if path is None:
+            return jsonify({'error': 'Path probing not enabled for target'}), 404
+        return jsonify({
+            'target': path.target,
+            'hops': path.get_hops(),
+            'first_failing_hop': path.first_failing_hop(),
+            'changes': [change.to_dict() for change in path.get_changes()]
+        })
+    
+    @app.route('/api/history')
+    def api_history():
+        """Query a target's long-term samples by time range, decoding only overlapping blocks."""
+        history = scheduler.get_history(request.args.get('target', target))
+        if history is None:
+            return jsonify({'error': 'History not kept for target'}), 404
+        
+        start = request.args.get('start', None, type=float)
+        end = request.args.get('end', None, type=float)
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = min(max(1, request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)), MAX_PAGE_SIZE)
+        
+        samples = islice(history.query(start, end), offset, offset + limit)
+        return jsonify({
+            'samples': [
+                {'timestamp': timestamp, 'ttl': ttl, 'ping_time': ping_time}
+                for timestamp, ttl, ping_time in samples
+            ],
+            'offset': offset,
+            'limit': limit
+        })
+    
+    @app.route('/api/export')
+    def api_export():
+        """Stream a target set's long-term samples in a time range as chunked NDJSON, CSV or Arrow IPC."""
+        export_format = request.args.get('format', 'ndjson')
+        if export_format == 'arrow' and not ARROW_AVAILABLE:
+            return jsonify({'error': 'Arrow export needs pyarrow installed'}), 501
+        
+        targets = request.args.getlist('target') or [item['target'] for item in scheduler.list_targets()]
+        histories = {}
+        for name in targets:
+            history = scheduler.get_history(name)
+            if history is None:
+                return jsonify({'error': f'History not kept for target {name}'}), 404
+            histories[name] = history
+        
+        start = request.args.get('start', None, type=float)
+        end = request.args.get('end', None, type=float)
+        try:
+            chunks = stream_export(merge_histories(histories, start, end), export_format)
+        except ExportError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Chunks are produced while the response is sent, so memory stays flat however long the range
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        return Response(chunks, mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename=samples.{extension}'})
+    
+    @app.route('/api/outages')
+    def api_outages():
+        """Query the outage event log by target set and time range."""
+        try:
+            start = request.args.get('start', 0.0, type=float)
+            end = request.args.get('end', time.time(), type=float)
+            offset = max(0, request.args.get('offset', 0, type=int))
+            limit = min(max(1, request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)), MAX_PAGE_SIZE)
+            targets = request.args.getlist('target') or None
+            
+            total, events = scheduler.outage_log.query(start, end, targets=targets, offset=offset, limit=limit)
+            return jsonify({
+                'outages': [event.to_dict() for event in events],
+                'total': total,
+                'offset': offset,
+                'limit': limit
+            })
+        except Exception as e:
+            logging.error(f"Error serving outage data: {e}")
+            return jsonify({'outages': [], 'total': 0, 'offset': 0, 'limit': 0}), 500
+    
+    @app.route('/api/anomalies')
+    def api_anomalies():
+        """Query latency anomaly events by target set and time range."""
+        try:
+            start = request.args.get('start', 0.0, type=float)
+            end = request.args.get('end', time.time(), type=float)
+            offset = max(0, request.args.get('offset', 0, type=int))
+            limit = min(max(1, request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)), MAX_PAGE_SIZE)
+            targets = request.args.getlist('target') or None
+            
+            total, events = scheduler.query_anomalies(start, end, targets=targets, offset=offset, limit=limit)
+            return jsonify({
+                'anomalies': [event.to_dict() for event in events],
+                'total': total,
+                'offset': offset,
+                'limit': limit
+            })
+        except Exception as e:
+            logging.error(f"Error serving anomaly data: {e}")
+            return jsonify({'anomalies': [], 'total': 0, 'offset': 0, 'limit': 0}), 500
+    
+    @app.route('/api/incidents')
+    def api_incidents():
+        """Query incidents: outages that hit several targets at once, with their likely common cause."""
+        try:
+            start = request.args.get('start', 0.0, type=float)
+            end = request.args.get('end', time.time(), type=float)
+            offset = max(0, request.args.get('offset', 0, type=int))
+            limit = min(max(1, request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)), MAX_PAGE_SIZE)
+            
+            incidents = scheduler.correlator.incidents(start, end, now=time.time())
+            return jsonify({
+                'incidents': [incident.to_dict() for incident in incidents[offset:offset + limit]],
+                'total': len(incidents),
+                'offset': offset,
+                'limit': limit
+            })
+        except Exception as e:
+            logging.error(f"Error serving incident data: {e}")
+            return jsonify({'incidents': [], 'total': 0, 'offset': 0, 'limit': 0}), 500
+    
+    @app.route('/api/alerts')
+    def api_alerts():
+        """List alert rules, the alerts firing now and delivery counters."""
+        payload = {
+            'rules': [rule.to_dict() for rule in alerts.rules],
+            'firing': alerts.firing(),
+            'evaluations': alerts.evaluations,
+            'notifications': alerts.notifications,
+            'suppressed': alerts.suppressed
+        }
+        if alerts.notifier is not None:
+            payload['webhook'] = {
+                'sent': alerts.notifier.alerts_sent,
+                'queued': len(alerts.notifier.queue),
+                'dropped': alerts.notifier.alerts_dropped,
+                'failures': alerts.notifier.send_failures
+            }
+        return jsonify(payload)
+    
+    @app.route('/api/admission')
+    def api_admission():
+        """Admission control settings, counters and the current probe scheduling lag."""
+        return jsonify(admission.stats())
+    
     @app.route('/api/reset', methods=['POST'])
     def api_reset():
         """Reset all statistics."""
+        ping_engine = scheduler.get_engine(request.args.get('target', target))
+        if ping_engine is None:
+            return jsonify({'error': 'Unknown target'}), 404
+        
         try:
             ping_engine.reset()
             return jsonify({'message': 'Statistics reset successfully'})
@@ -109,8 +444,222 @@ def create_app(target: str = DEFAULT_TARGET, max_points: int = DEFAULT_MAX_POINT
     
     @app.before_request
     def start_ping_engine():
-        """Start ping engine before request."""
-        if not ping_engine.is_running():
-            ping_engine.start()
+        """Start the probe scheduler before request."""
+        if not scheduler.is_running():
+            scheduler.start()
+    
+    @app.before_request
+    def admit_request():
+        """Refuse requests over the client's rate limit or the cap, after yielding to lagging probes."""
+        expensive = request.path in API_EXPENSIVE_PATHS
+        rejection = admission.admit(request.remote_addr or '', expensive)
+        if rejection is not None:
+            status, retry_after, message = rejection
+            response = jsonify({'error': message})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, status
+        g.admission_slot = expensive
+    
+    @app.after_request
+    def release_admission_slot(response):
+        """Give back an expensive request's slot; a streamed response keeps it until fully sent."""
+        if g.pop('admission_slot', False):
+            if response.is_streamed:
+                response.call_on_close(admission.release)
+            else:
+                admission.release()
+        return response
+    
+    @app.teardown_request
+    def release_admission_slot_on_error(error):
+        """Give back the slot of a request that failed before its response was built."""
+        if g.pop('admission_slot', False):
+            admission.release()
+    
+    return app 
+
+def create_reader_app(store_name: str = SHARED_STORE_NAME, target: str = DEFAULT_TARGET,
+                      auto_refresh_interval: int = AUTO_REFRESH_INTERVAL, host: str = DEFAULT_HOST,
+                      port: int = DEFAULT_PORT) -> Flask:
+    """Create a read-only Flask application served from a collector's shared-memory store.
+    
+    Any number of worker processes can run this app; none of them probe. The collector
+    started with --shared-store publishes every sample into the region they map.
+    """
+    if not store_name:
+        raise ValueError("A shared store name is required (set SHARED_STORE_NAME or pass store_name)")
+    
+    app = Flask(__name__)
+    CORS(app)
+    
+    store = SharedStoreReader(store_name)
+    app.extensions['shared_store'] = store
+    
+    payload_cache = CompressedPayloadCache()
+    compressed_json = make_compressed_json(app, payload_cache)
+    
+    def summary_entry(snapshot) -> dict:
+        """Summary statistics for one published target."""
+        stats_data = snapshot.get_statistics()
+        failure_rate, avg_ping_time, min_ping_time, max_ping_time, avg_outage_duration = \
+            StatisticsCalculator.calculate_statistics(stats_data)
+        return {
+            'paused': False,
+            'failure_rate': failure_rate,
+            'avg_ping_time': avg_ping_time,
+            'min_ping_time': min_ping_time,
+            'max_ping_time': max_ping_time,
+            'avg_outage_duration': avg_outage_duration,
+            'total_pings': stats_data['total_pings'],
+            'consecutive_failures': stats_data['consecutive_failures'],
+            'resolution_failures': snapshot.resolution_failures
+        }
+    
+    @app.route('/')
+    def index():
+        return jsonify({
+            'message': 'Network Monitor API (read-only)',
+            'endpoints': {
+                'GET /api/data': 'Get network data (optional ?target=)',
+                'GET /api/summary': 'Get aggregate statistics for all targets',
+                'GET /api/targets': 'List monitored targets',
+                'GET /api/config': 'Get application configuration'
+            }
+        })
+    
+    @app.route('/api/data')
+    def api_data():
+        """Get current network data from the shared store."""
+        name = request.args.get('target', target)
+        sequence = store.sequence(name)
+        if sequence is None:
+            return jsonify({'error': 'Unknown target'}), 404
+        
+        try:
+            def build_payload():
+                snapshot = store.snapshot(name)
+                if snapshot is None:
+                    raise KeyError(name)
+                return build_data_payload(snapshot)
+            
+            return compressed_json(('data', name), sequence, build_payload)
+        except Exception as e:
+            logging.error(f"Error serving API data: {e}")
+            return jsonify({'error': 'Failed to read shared store'}), 500
+    
+    @app.route('/api/summary')
+    def api_summary():
+        """Get aggregate statistics for all published targets."""
+        try:
+            names = store.targets()
+            version = tuple((name, store.sequence(name)) for name in names)
+            
+            def build_payload():
+                snapshots = [store.snapshot(name) for name in names]
+                return {'targets': {
+                    snapshot.target: summary_entry(snapshot) for snapshot in snapshots if snapshot is not None
+                }}
+            
+            return compressed_json('summary', version, build_payload)
+        except Exception as e:
+            logging.error(f"Error serving summary data: {e}")
+            return jsonify({'targets': {}}), 500
+    
+    @app.route('/api/targets', methods=['GET'])
+    def api_list_targets():
+        """List published targets."""
+        targets = []
+        for name in store.targets():
+            snapshot = store.snapshot(name)
+            if snapshot is not None:
+                targets.append({
+                    'target': name,
+                    'paused': False,
+                    'total_pings': snapshot.get_statistics()['total_pings']
+                })
+        return jsonify({'targets': targets})
+    
+    @app.route('/api/config')
+    def api_config():
+        """Get configuration data."""
+        return jsonify({
+            'max_points': store.layout.max_points,
+            'target': target,
+            'auto_refresh_interval': auto_refresh_interval,
+            'api_url': f'http://{host}:{port}'
+        })
+    
+    return app
+
+def create_aggregator_app(max_points: int = DEFAULT_MAX_POINTS, auto_refresh_interval: int = AUTO_REFRESH_INTERVAL,
+                          host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Flask:
+    """Create the central Flask application that collectors at several sites push samples to.
+    
+    The aggregator never probes; collectors started with --push send it sample frames
+    and it serves per-site data alongside a cross-site view of every target.
+    """
+    app = Flask(__name__)
+    CORS(app)
+    
+    aggregator = Aggregator(max_points=max_points)
+    app.extensions['aggregator'] = aggregator
+    
+    payload_cache = CompressedPayloadCache()
+    compressed_json = make_compressed_json(app, payload_cache)
+    
+    @app.route('/')
+    def index():
+        return jsonify({
+            'message': 'Network Monitor Aggregator API',
+            'endpoints': {
+                'POST /api/push': 'Push a sample frame from a collector',
+                'GET /api/sites': 'List pushing sites with delivery statistics',
+                'GET /api/data': 'Get network data for one site (?site=&target=)',
+                'GET /api/cross_site': 'Get per-target statistics across all sites',
+                'GET /api/config': 'Get application configuration'
+            }
+        })
+    
+    @app.route('/api/push', methods=['POST'])
+    def api_push():
+        """Apply one frame pushed by a collector."""
+        try:
+            return jsonify(aggregator.ingest(request.get_data()))
+        except FrameError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    @app.route('/api/sites')
+    def api_sites():
+        """List pushing sites with frame and sample counters."""
+        return jsonify({'sites': aggregator.site_status()})
+    
+    @app.route('/api/data')
+    def api_data():
+        """Get network data for one target as seen from one site."""
+        ping_engine = aggregator.get_engine(request.args.get('site', ''), request.args.get('target', ''))
+        if ping_engine is None:
+            return jsonify({'error': 'Unknown site or target'}), 404
+        
+        version = (ping_engine.sequence, ping_engine.horizons.epoch(time.time()))
+        return compressed_json(('data', request.args['site'], ping_engine.target), version,
+                               lambda: build_data_payload(ping_engine))
+    
+    @app.route('/api/cross_site')
+    def api_cross_site():
+        """Get per-target statistics from every site in one response."""
+        try:
+            return compressed_json('cross_site', aggregator.version(), lambda: {'targets': aggregator.cross_site()})
+        except Exception as e:
+            logging.error(f"Error serving cross-site data: {e}")
+            return jsonify({'targets': {}}), 500
+    
+    @app.route('/api/config')
+    def api_config():
+        """Get configuration data."""
+        return jsonify({
+            'max_points': max_points,
+            'auto_refresh_interval': auto_refresh_interval,
+            'api_url': f'http://{host}:{port}'
+        })
     
-    return app 
\ No newline at end of file
+    return app